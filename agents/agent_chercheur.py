@@ -4,9 +4,13 @@ import requests
 from bs4 import BeautifulSoup
 from typing import List
 
+from tools.rate_limiter import get_rate_limiter
+from tools.search_cache import get_search_cache
+
 class AgentChercheur:
     def __init__(self):
-        pass
+        self.rate_limiter = get_rate_limiter()
+        self.cache = get_search_cache()
 
     def collect_data(self, source_type, query):
         if source_type == 'web':
@@ -20,11 +24,16 @@ class AgentChercheur:
 
     def collect_from_web(self, query: str) -> List[str]:
         """Collecte via DuckDuckGo Instant Answer API (JSON) avec fallback HTML."""
+        return self.cache.get_or_fetch("duckduckgo", query, lambda: self._fetch_from_web(query),
+                                       params={"mode": "web"})
+
+    def _fetch_from_web(self, query: str) -> List[str]:
         print(f"Collecte DuckDuckGo Instant Answer pour : {query}")
         headers = {"User-Agent": "Mozilla/5.0 (compatible; NinaBot/0.1)"}
         # 1) Instant Answer API
         try:
             params = {"q": query, "format": "json", "no_html": "1", "lang": "fr"}
+            self.rate_limiter.acquire("https://api.duckduckgo.com/")
             resp = requests.get("https://api.duckduckgo.com/", params=params, headers=headers, timeout=10)
             resp.raise_for_status()
             data = resp.json()
@@ -49,6 +58,7 @@ class AgentChercheur:
         print(f"[AgentChercheur] Fallback scraping HTML pour : {query}")
         try:
             params = {"q": query, "kl": "fr-fr"}
+            self.rate_limiter.acquire("https://duckduckgo.com/html/")
             resp = requests.get("https://duckduckgo.com/html/", params=params, headers=headers, timeout=10)
             resp.raise_for_status()
             soup = BeautifulSoup(resp.text, "html.parser")
@@ -59,11 +69,16 @@ class AgentChercheur:
             return []
 
     def collect_from_api(self, query):
+        return self.cache.get_or_fetch("duckduckgo", query, lambda: self._fetch_from_api(query),
+                                       params={"mode": "api"})
+
+    def _fetch_from_api(self, query):
         # Implémenter la logique de collecte de données via API
         print(f"Collecte de données API pour la requête : {query}")
         try:
             params = {"q": query, "format": "json", "no_html": "1", "lang": "fr"}
             headers = {"User-Agent": "Mozilla/5.0 (compatible; NinaBot/0.1)"}
+            self.rate_limiter.acquire("https://api.duckduckgo.com/")
             resp = requests.get("https://api.duckduckgo.com/", params=params, headers=headers, timeout=10)
             resp.raise_for_status()
             data = resp.json()
@@ -7,16 +7,65 @@ Corrige les problèmes de collecte web et ajoute des alternatives.
 
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
-import time
+from typing import List, Dict, Any, Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+import os
 import random
 import json
+import threading
+
+from tools.rate_limiter import RateLimitExceeded, get_rate_limiter
+from tools.search_cache import get_search_cache
+
+class _DelayedCall:
+    """Appel soumis à `executor` au bout de `delay` secondes, sauf annulation d'ici là."""
+
+    def __init__(self, executor: Executor, delay: float, fn: Callable[[], Any]):
+        self._executor = executor
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._future = None
+        self._settled = False
+        self._timer = threading.Timer(delay, self._start)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _start(self):
+        with self._lock:
+            if not self._settled:
+                self._future = self._executor.submit(self._fn)
+
+    def _settle(self):
+        self._timer.cancel()
+        with self._lock:
+            self._settled = True
+            return self._future
+
+    def cancel(self):
+        """Annule l'appel s'il n'est pas encore parti (sinon son résultat est ignoré)."""
+        future = self._settle()
+        if future is not None:
+            future.cancel()
+
+    def result(self) -> Any:
+        """Résultat de l'appel, lancé tout de suite dans le thread courant s'il n'était pas parti."""
+        future = self._settle()
+        return future.result() if future is not None else self._fn()
+
 
 class AgentChercheurImproved:
     """Agent chercheur avec multiple sources et fallbacks."""
     
+    # Délai après lequel Wikipedia part en parallèle d'un DuckDuckGo qui tarde (secondes)
+    WIKI_HEDGE_DELAY = float(os.getenv("NINA_WIKI_HEDGE_DELAY", "1.5"))
+    
     def __init__(self):
         self.session = requests.Session()
+        # Limiteur de débit par hôte partagé avec les autres agents de recherche
+        self.rate_limiter = get_rate_limiter()
+        # Cache de résultats partagé (TTL par source, requêtes identiques fusionnées)
+        self.cache = get_search_cache()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chercheur")
         # User-Agents plus réalistes
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -41,8 +90,17 @@ class AgentChercheurImproved:
         
         results = []
         
+        # Wikipedia n'est interrogé qu'en fallback. Si DuckDuckGo tarde au-delà de
+        # WIKI_HEDGE_DELAY, il part en parallèle pour ne pas être attendu ensuite ;
+        # une réponse rapide de DuckDuckGo annule la minuterie sans appel inutile.
+        wiki = _DelayedCall(self._executor, self.WIKI_HEDGE_DELAY, lambda: self.cache.get_or_fetch(
+            "wikipedia", query, lambda: self._try_wikipedia_search(query)
+        ))
+        
         # Méthode 1: DuckDuckGo amélioré
-        duckduckgo_results = self._try_duckduckgo_improved(query)
+        duckduckgo_results = self.cache.get_or_fetch(
+            "duckduckgo", query, lambda: self._try_duckduckgo_improved(query), params={"mode": "html"}
+        )
         if duckduckgo_results:
             results.extend(duckduckgo_results)
             print(f"   ✅ DuckDuckGo: {len(duckduckgo_results)} résultats")
@@ -51,10 +109,12 @@ class AgentChercheurImproved:
         
         # Méthode 2: Wikipedia (fallback)
         if len(results) < 3:
-            wiki_results = self._try_wikipedia_search(query)
+            wiki_results = wiki.result()
             if wiki_results:
                 results.extend(wiki_results)
                 print(f"   ✅ Wikipedia: {len(wiki_results)} résultats")
+        else:
+            wiki.cancel()
         
         # Méthode 3: Données simulées réalistes (dernier recours)
         if len(results) == 0:
@@ -84,8 +144,8 @@ class AgentChercheurImproved:
                 "dc": "1"  # Safe search off
             }
             
-            # Délai aléatoire pour éviter la détection
-            time.sleep(random.uniform(0.5, 1.5))
+            # Politesse : jeton du limiteur par hôte (immédiat sous la limite)
+            self.rate_limiter.acquire("duckduckgo.com")
             
             resp = self.session.get(
                 "https://duckduckgo.com/html/", 
@@ -117,6 +177,9 @@ class AgentChercheurImproved:
             
             return list(set(results))  # Dédoublonner
             
+        except RateLimitExceeded as e:
+            print(f"   ⏳ DuckDuckGo délesté (limite de débit) : {e}")
+            return []
         except Exception as e:
             print(f"   ⚠️ Erreur DuckDuckGo: {e}")
             return []
@@ -139,6 +202,7 @@ class AgentChercheurImproved:
                 # Encode le terme pour l'URL
                 encoded_term = term.replace(" ", "_")
                 try:
+                    self.rate_limiter.acquire(api_url)
                     resp = self.session.get(f"{api_url}{encoded_term}", timeout=10)
                     if resp.status_code == 200:
                         data = resp.json()
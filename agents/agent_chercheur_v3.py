@@ -7,19 +7,70 @@ Utilise des APIs fiables au lieu du scraping bloqué.
 
 import requests
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime
 
+from tools.rate_limiter import get_rate_limiter
+from tools.page_fetcher import PageFetcher
+from tools.search_cache import get_search_cache
+from tools.source_registry import SourcePlugin, SourceRegistry, SourceSelector
+
 class AgentChercheurV3:
     """Agent chercheur utilisant des APIs officielles et fiables."""
     
-    def __init__(self):
+    def __init__(self, deep_fetch: Optional[bool] = None):
         self.session = requests.Session()
+        # Limiteur de débit par hôte partagé avec les autres agents de recherche
+        self.rate_limiter = get_rate_limiter()
+        # Cache de résultats partagé (TTL par source, requêtes identiques fusionnées)
+        self.cache = get_search_cache()
+        # Téléchargement des pages de résultats (optionnel, NINA_DEEP_FETCH=1)
+        if deep_fetch is None:
+            deep_fetch = os.getenv("NINA_DEEP_FETCH", "0") == "1"
+        self.page_fetcher = PageFetcher() if deep_fetch else None
         # Clés APIs (optionnelles, fallback si pas disponibles)
         self.serpapi_key = os.getenv("SERPAPI_KEY")
         self.newsapi_key = os.getenv("NEWSAPI_KEY")
+        # Sources déclarées et sélection adaptative (statistiques persistées si NINA_SOURCE_STATS)
+        self.sources = self._build_registry()
+        self.selector = SourceSelector(path=os.getenv("NINA_SOURCE_STATS"))
         
+    def _build_registry(self) -> SourceRegistry:
+        """Déclare chaque source : capacités, coût relatif, latence attendue, a priori."""
+        registry = SourceRegistry()
+        registry.register(SourcePlugin(
+            "duckduckgo", lambda q: self._search_ddg(q), frozenset({"web"}),
+            cost=0.0, expected_latency=1.0, prior=0.9,
+        ))
+        registry.register(SourcePlugin(
+            "serpapi", lambda q: self._cached("serpapi", q, self._try_serpapi), frozenset({"web"}),
+            cost=1.0, expected_latency=1.5, prior=0.9, available=lambda: bool(self.serpapi_key),
+        ))
+        registry.register(SourcePlugin(
+            "newsapi", lambda q: self._cached("newsapi", q, self._try_newsapi), frozenset({"news"}),
+            cost=0.5, expected_latency=1.0, prior=0.8, available=lambda: bool(self.newsapi_key),
+        ))
+        registry.register(SourcePlugin(
+            "hackernews", lambda q: self._cached("hackernews", q, self._try_hackernews), frozenset({"news"}),
+            cost=0.0, expected_latency=0.8, prior=0.7,
+        ))
+        registry.register(SourcePlugin(
+            "reddit", lambda q: self._cached("reddit", q, self._try_reddit_search), frozenset({"news"}),
+            cost=0.0, expected_latency=1.2, prior=0.6,
+        ))
+        registry.register(SourcePlugin(
+            "github", lambda q: self._cached("github", q, self._try_github_search), frozenset({"api"}),
+            cost=0.3, expected_latency=1.0, prior=0.1,   # quota non authentifié très bas
+            keywords=("code", "github", "projet", "repository", "repo", "librar"),
+        ))
+        registry.register(SourcePlugin(
+            "openlibrary", lambda q: self._cached("openlibrary", q, self._try_openlibrary), frozenset({"api"}),
+            cost=0.0, expected_latency=1.5, prior=0.1,
+            keywords=("livre", "book", "learning", "guide"),
+        ))
+        return registry
+    
     def collect_data(self, source_type: str, query: str) -> List[str]:
         """Point d'entrée principal avec multiples sources fiables."""
         if source_type == 'web':
@@ -31,25 +82,28 @@ class AgentChercheurV3:
         else:
             return self.collect_web_multisource(query)
     
+    def _collect(self, capability: str, query: str, min_sources: int = 1) -> List[str]:
+        """Interroge les sources de `capability` retenues par le sélecteur."""
+        candidates = self.sources.for_capability(capability)
+        selected = self.selector.select(query, candidates, min_sources=min_sources)
+        skipped = [p.name for p in candidates if p not in selected]
+        if skipped:
+            print(f"   ⏭️ Sources ignorées (rendement attendu trop faible): {', '.join(skipped)}")
+        results = []
+        for plugin in selected:
+            source_results = self.selector.run(plugin, query)
+            if source_results:
+                results.extend(source_results)
+                print(f"   ✅ {plugin.name}: {len(source_results)} résultats")
+        self.selector.save()
+        return results
+    
     def collect_web_multisource(self, query: str) -> List[str]:
         """Collecte web avec plusieurs sources fiables."""
         print(f"🌐 Collecte web multi-sources pour: {query}")
-        results = []
+        results = self._collect("web", query)
         
-        # Source 1: DuckDuckGo Search - GRATUIT et fiable
-        ddg_results = self._search_ddg(query)
-        if ddg_results:
-            results.extend(ddg_results)
-            print(f"   ✅ DuckDuckGo: {len(ddg_results)} résultats")
-
-        # Source 2: SerpAPI (Google Search API) - PREMIUM, utilisé en complément si dispo
-        if self.serpapi_key:
-            serpapi_results = self._try_serpapi(query)
-            if serpapi_results:
-                results.extend(serpapi_results)
-                print(f"   ✅ SerpAPI: {len(serpapi_results)} résultats")
-        
-        # Source 3: Fallback si aucune recherche n'a fonctionné
+        # Fallback si aucune recherche n'a fonctionné
         if not results:
             fallback_results = self._intelligent_fallback(query)
             results.extend(fallback_results)
@@ -60,240 +114,217 @@ class AgentChercheurV3:
     def collect_news_sources(self, query: str) -> List[str]:
         """Collecte spécialisée pour les actualités."""
         print(f"📰 Collecte news pour: {query}")
-        results = []
-        
-        # Source 1: NewsAPI (si clé disponible)
-        if self.newsapi_key:
-            news_results = self._try_newsapi(query)
-            if news_results:
-                results.extend(news_results)
-                print(f"   ✅ NewsAPI: {len(news_results)} actualités")
-        
-        # Source 2: Hackernews API - GRATUIT et tech-focused
-        hn_results = self._try_hackernews(query)
-        if hn_results:
-            results.extend(hn_results)
-            print(f"   ✅ HackerNews: {len(hn_results)} articles")
-        
-        # Source 3: Reddit API - GRATUIT (sans authentification pour lecture)
-        reddit_results = self._try_reddit_search(query)
-        if reddit_results:
-            results.extend(reddit_results)
-            print(f"   ✅ Reddit: {len(reddit_results)} posts")
-        
-        return results[:8]
+        return self._collect("news", query)[:8]
     
     def collect_from_structured_apis(self, query: str) -> List[str]:
-        """Collecte depuis des APIs structurées spécialisées."""
+        """Collecte depuis des APIs structurées spécialisées (GitHub, OpenLibrary)."""
         print(f"🔌 Collecte APIs structurées pour: {query}")
-        results = []
-        
-        # GitHub API pour les projets tech
-        if any(term in query.lower() for term in ['code', 'github', 'projet', 'repository']):
-            github_results = self._try_github_search(query)
-            if github_results:
-                results.extend(github_results)
-                print(f"   ✅ GitHub: {len(github_results)} repos")
-        
-        # OpenLibrary pour les livres/ressources
-        if any(term in query.lower() for term in ['livre', 'book', 'learning', 'guide']):
-            books_results = self._try_openlibrary(query)
-            if books_results:
-                results.extend(books_results)
-                print(f"   ✅ OpenLibrary: {len(books_results)} livres")
-        
-        return results
+        return self._collect("api", query, min_sources=0)
     
     # =====================================================================
     # Implémentations des sources spécifiques
+    # (les erreurs remontent au SourceSelector, qui les journalise)
     # =====================================================================
     
+    def _cached(self, source: str, query: str, fetch) -> List[str]:
+        """Résultats d'une source via le cache partagé (un seul appel amont par requête)."""
+        return self.cache.get_or_fetch(source, query, lambda: fetch(query))
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET HTTP soumis au limiteur de débit de l'hôte (délestage si saturé)."""
+        self.rate_limiter.acquire(url)
+        return self.session.get(url, **kwargs)
+    
     def _try_serpapi(self, query: str) -> List[str]:
         """SerpAPI - Google Search API officielle (payant mais fiable)."""
-        try:
-            params = {
-                "q": query,
-                "api_key": self.serpapi_key,
-                "engine": "google",
-                "hl": "fr",
-                "gl": "fr",
-                "num": 5
-            }
-            
-            resp = self.session.get("https://serpapi.com/search", params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for result in data.get("organic_results", [])[:5]:
-                title = result.get("title", "")
-                snippet = result.get("snippet", "")
-                if title:
-                    results.append(f"{title}: {snippet}")
-            
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur SerpAPI: {e}")
-            return []
+        params = {
+            "q": query,
+            "api_key": self.serpapi_key,
+            "engine": "google",
+            "hl": "fr",
+            "gl": "fr",
+            "num": 5
+        }
+        
+        resp = self._get("https://serpapi.com/search", params=params, timeout=15)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for result in data.get("organic_results", [])[:5]:
+            title = result.get("title", "")
+            snippet = result.get("snippet", "")
+            if title:
+                results.append(f"{title}: {snippet}")
+        
+        return results
     
     def _search_ddg(self, query: str, max_results: int = 3) -> List[str]:
-        """Recherche sur DuckDuckGo via la librairie duckduckgo-search."""
+        """Recherche sur DuckDuckGo : titre et extrait de chaque résultat."""
+        return [f"{r['title']}: {r['body']}" for r in self._ddg_hits(query, max_results)]
+    
+    def _ddg_hits(self, query: str, max_results: int = 3) -> List[Dict]:
+        """Résultats bruts DuckDuckGo (title, body, href), via le cache partagé."""
+        return self.cache.get_or_fetch(
+            "duckduckgo", query, lambda: self._fetch_ddg_hits(query, max_results),
+            params={"max_results": max_results},
+        )
+    
+    def _fetch_ddg_hits(self, query: str, max_results: int) -> List[Dict]:
+        from duckduckgo_search import DDGS
+        
+        self.rate_limiter.acquire("duckduckgo.com")
+        with DDGS() as ddgs:
+            return [r for r in ddgs.text(query, max_results=max_results)]
+    
+    def collect_pages(self, query: str, top_n: int = 3) -> List[Dict]:
+        """Passages extraits des pages des `top_n` premiers résultats (deep fetch).
+        
+        Retourne une liste de {text, url, title}, vide si le deep fetch est désactivé.
+        """
+        if self.page_fetcher is None:
+            return []
         try:
-            from duckduckgo_search import DDGS
-            
-            with DDGS() as ddgs:
-                results_list = [r for r in ddgs.text(query, max_results=max_results)]
-
-            return [f"{r['title']}: {r['body']}" for r in results_list]
+            hits = self._ddg_hits(query)
         except Exception as e:
             print(f"   ⚠️ Erreur DuckDuckGo: {e}")
             return []
+        urls = [hit.get("href") for hit in hits[:top_n]]
+        pages = self.page_fetcher.fetch_many(urls)
+        passages = []
+        for page in pages:
+            if page.error:
+                print(f"   ⚠️ Page ignorée {page.url}: {page.error}")
+                continue
+            passages.extend({"text": chunk, "url": page.url, "title": page.title} for chunk in page.chunks)
+        print(f"   📄 Deep fetch: {len(passages)} passages depuis {len(pages)} pages")
+        return passages
     
     def _try_newsapi(self, query: str) -> List[str]:
         """NewsAPI - Actualités officielles (payant)."""
-        try:
-            params = {
-                "q": query,
-                "apiKey": self.newsapi_key,
-                "language": "fr",
-                "sortBy": "publishedAt",
-                "pageSize": 5
-            }
-            
-            resp = self.session.get("https://newsapi.org/v2/everything", params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for article in data.get("articles", [])[:5]:
-                title = article.get("title", "")
-                description = article.get("description", "")
-                source = article.get("source", {}).get("name", "News")
-                
-                if title:
-                    results.append(f"{source} - {title}: {description}")
+        params = {
+            "q": query,
+            "apiKey": self.newsapi_key,
+            "language": "fr",
+            "sortBy": "publishedAt",
+            "pageSize": 5
+        }
+        
+        resp = self._get("https://newsapi.org/v2/everything", params=params, timeout=15)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for article in data.get("articles", [])[:5]:
+            title = article.get("title", "")
+            description = article.get("description", "")
+            source = article.get("source", {}).get("name", "News")
             
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur NewsAPI: {e}")
-            return []
+            if title:
+                results.append(f"{source} - {title}: {description}")
+        
+        return results
     
     def _try_hackernews(self, query: str) -> List[str]:
         """HackerNews API - Gratuit, spécialisé tech."""
-        try:
-            # Recherche via l'API Algolia de HN
-            search_url = "https://hn.algolia.com/api/v1/search"
-            params = {
-                "query": query,
-                "tags": "story",
-                "hitsPerPage": 3
-            }
-            
-            resp = self.session.get(search_url, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for hit in data.get("hits", [])[:3]:
-                title = hit.get("title", "")
-                author = hit.get("author", "")
-                points = hit.get("points", 0)
-                
-                if title:
-                    results.append(f"HackerNews - {title} (par {author}, {points} points)")
+        # Recherche via l'API Algolia de HN
+        search_url = "https://hn.algolia.com/api/v1/search"
+        params = {
+            "query": query,
+            "tags": "story",
+            "hitsPerPage": 3
+        }
+        
+        resp = self._get(search_url, params=params, timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for hit in data.get("hits", [])[:3]:
+            title = hit.get("title", "")
+            author = hit.get("author", "")
+            points = hit.get("points", 0)
             
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur HackerNews: {e}")
-            return []
+            if title:
+                results.append(f"HackerNews - {title} (par {author}, {points} points)")
+        
+        return results
     
     def _try_reddit_search(self, query: str) -> List[str]:
         """Reddit API - Gratuit pour recherche."""
-        try:
-            # API Reddit (pas besoin d'auth pour la recherche)
-            search_url = "https://www.reddit.com/search.json"
-            headers = {"User-Agent": "NinaBot/1.0"}
-            params = {
-                "q": query,
-                "limit": 3,
-                "sort": "relevance"
-            }
-            
-            resp = self.session.get(search_url, params=params, headers=headers, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for post in data.get("data", {}).get("children", [])[:3]:
-                post_data = post.get("data", {})
-                title = post_data.get("title", "")
-                subreddit = post_data.get("subreddit", "")
-                score = post_data.get("score", 0)
-                
-                if title:
-                    results.append(f"Reddit r/{subreddit} - {title} ({score} votes)")
+        # API Reddit (pas besoin d'auth pour la recherche)
+        search_url = "https://www.reddit.com/search.json"
+        headers = {"User-Agent": "NinaBot/1.0"}
+        params = {
+            "q": query,
+            "limit": 3,
+            "sort": "relevance"
+        }
+        
+        resp = self._get(search_url, params=params, headers=headers, timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for post in data.get("data", {}).get("children", [])[:3]:
+            post_data = post.get("data", {})
+            title = post_data.get("title", "")
+            subreddit = post_data.get("subreddit", "")
+            score = post_data.get("score", 0)
             
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur Reddit: {e}")
-            return []
+            if title:
+                results.append(f"Reddit r/{subreddit} - {title} ({score} votes)")
+        
+        return results
     
     def _try_github_search(self, query: str) -> List[str]:
         """GitHub API - Gratuit, excellent pour les projets tech."""
-        try:
-            search_url = "https://api.github.com/search/repositories"
-            params = {
-                "q": query,
-                "sort": "stars",
-                "order": "desc",
-                "per_page": 3
-            }
-            
-            resp = self.session.get(search_url, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for repo in data.get("items", [])[:3]:
-                name = repo.get("full_name", "")
-                description = repo.get("description", "")
-                stars = repo.get("stargazers_count", 0)
-                
-                if name:
-                    results.append(f"GitHub - {name}: {description} ({stars} étoiles)")
+        search_url = "https://api.github.com/search/repositories"
+        params = {
+            "q": query,
+            "sort": "stars",
+            "order": "desc",
+            "per_page": 3
+        }
+        
+        resp = self._get(search_url, params=params, timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for repo in data.get("items", [])[:3]:
+            name = repo.get("full_name", "")
+            description = repo.get("description", "")
+            stars = repo.get("stargazers_count", 0)
             
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur GitHub: {e}")
-            return []
+            if name:
+                results.append(f"GitHub - {name}: {description} ({stars} étoiles)")
+        
+        return results
     
     def _try_openlibrary(self, query: str) -> List[str]:
         """OpenLibrary API - Gratuit, excellent pour les livres."""
-        try:
-            search_url = "https://openlibrary.org/search.json"
-            params = {
-                "q": query,
-                "limit": 3,
-                "lang": "fre"
-            }
-            
-            resp = self.session.get(search_url, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            results = []
-            for book in data.get("docs", [])[:3]:
-                title = book.get("title", "")
-                author = book.get("author_name", ["Inconnu"])[0] if book.get("author_name") else "Inconnu"
-                year = book.get("first_publish_year", "")
-                
-                if title:
-                    results.append(f"OpenLibrary - {title} par {author} ({year})")
+        search_url = "https://openlibrary.org/search.json"
+        params = {
+            "q": query,
+            "limit": 3,
+            "lang": "fre"
+        }
+        
+        resp = self._get(search_url, params=params, timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+        
+        results = []
+        for book in data.get("docs", [])[:3]:
+            title = book.get("title", "")
+            author = book.get("author_name", ["Inconnu"])[0] if book.get("author_name") else "Inconnu"
+            year = book.get("first_publish_year", "")
             
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Erreur OpenLibrary: {e}")
-            return []
+            if title:
+                results.append(f"OpenLibrary - {title} par {author} ({year})")
+        
+        return results
     
     def _intelligent_fallback(self, query: str) -> List[str]:
         """Fallback intelligent avec base de connaissances étendue."""
@@ -357,14 +388,7 @@ class AgentChercheurV3:
     def get_stats(self) -> Dict[str, Any]:
         """Statistiques de performance de la collecte."""
         return {
-            "sources_available": {
-                "serpapi": bool(self.serpapi_key),
-                "newsapi": bool(self.newsapi_key),
-                "wikipedia": True,
-                "hackernews": True,
-                "reddit": True,
-                "github": True,
-                "openlibrary": True
-            },
+            "sources_available": {plugin.name: plugin.available() for plugin in self.sources},
+            "selection": self.selector.summary(),
             "fallback_enabled": True
-        } 
\ No newline at end of file
+        }
@@ -6,17 +6,55 @@ Implémente les meilleures pratiques de 2024-2025 pour les systèmes de mémoire
 import json
 import os
 import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
-from tools.vector_db import VectorDB
+
+import numpy as np
+
+from tools.text_analysis import TextAnalyzer
+from tools.vector_db import VectorDB, to_epoch
+
+
+def composite_scores(relevance: np.ndarray, timestamps: np.ndarray, importance: np.ndarray,
+                     now: float, weights: Tuple[float, float, float] = (0.6, 0.25, 0.15)) -> np.ndarray:
+    """Score composite vectorisé (pertinence, récence, importance).
+
+    Args:
+        relevance: similarités cosinus renvoyées par l'index
+        timestamps: horodatages epoch (NaN si inconnus → récence nulle)
+        importance: scores d'importance dans [0, 1]
+        now: instant de référence (epoch)
+        weights: poids (pertinence, récence, importance)
+    """
+    relevance_weight, recency_weight, importance_weight = weights
+    # Normalisation min-max de la pertinence sur le lot de candidats : les
+    # similarités cosinus sont tassées dans une plage étroite et seraient
+    # sinon écrasées par la récence et l'importance.
+    spread = float(relevance.max() - relevance.min()) if relevance.size else 0.0
+    relevance = (relevance - relevance.min()) / spread if spread > 1e-9 else np.ones_like(relevance)
+    days_old = np.maximum(now - timestamps, 0.0) / (24 * 3600)
+    # Décroissance hyperbolique : 1.0 pour maintenant, 0.5 à 10 jours
+    recency = np.where(np.isnan(timestamps), 0.0, 1.0 / (1.0 + 0.1 * days_old))
+    return (
+        relevance_weight * relevance
+        + recency_weight * recency
+        + importance_weight * importance
+    )
+
 
 class AgentMemory:
     """Agent de mémoire avancé pour Nina avec hiérarchie et compression intelligente."""
     
-    def __init__(self, memory_file: str = "data/nina_memory.json"):
-        """Initialise l'agent de mémoire avec architecture hiérarchique."""
+    def __init__(self, memory_file: str = "data/nina_memory.json", text_analyzer: Optional[TextAnalyzer] = None):
+        """Initialise l'agent de mémoire avec architecture hiérarchique.
+
+        `text_analyzer` porte les listes de mots-clés (importance, sujets…) ;
+        par défaut celles de tools/text_analysis.py.
+        """
         self.memory_file = memory_file
         self.vector_db = VectorDB()
+        self.text_analyzer = text_analyzer or TextAnalyzer()
         
         # Mémoire hiérarchique à plusieurs niveaux
         self.conversation_history = []  # Mémoire épisodique complète
@@ -34,6 +72,7 @@ class AgentMemory:
         self.relevance_weight = 0.6
         self.recency_weight = 0.25
         self.importance_weight = 0.15
+        self.rerank_candidates = 200  # candidats récupérés avant re-classement
         self.max_working_memory_size = 5000  # tokens
         
         # Créer le dossier data s'il n'existe pas
@@ -49,14 +88,18 @@ class AgentMemory:
         if context is None:
             context = {}
             
+        now = time.time()
+        # Importance, entités et sujets en une seule passe sur l'échange
+        analysis = self.text_analyzer.analyze(user_input, nina_response)
         conversation = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "ts": now,
             "user": user_input,
             "nina": nina_response,
             "context": context,
-            "importance_score": self._calculate_importance(user_input, nina_response),
-            "entities": self._extract_entities(user_input + " " + nina_response),
-            "topics": self._extract_topics(user_input + " " + nina_response)
+            "importance_score": analysis.importance,
+            "entities": list(analysis.entities),
+            "topics": list(analysis.topics)
         }
         
         # Générer un ID unique pour cette conversation
@@ -74,6 +117,7 @@ class AgentMemory:
             [{
                 "type": "conversation", 
                 "timestamp": conversation["timestamp"],
+                "ts": conversation["ts"],
                 "importance": conversation["importance_score"],
                 "entities": conversation["entities"],
                 "topics": conversation["topics"],
@@ -90,71 +134,16 @@ class AgentMemory:
         print(f"[AgentMemory] Conversation ajoutée (importance: {conversation['importance_score']:.2f})")
 
     def _calculate_importance(self, user_input: str, nina_response: str) -> float:
-        """Calcule un score d'importance basé sur plusieurs facteurs."""
-        importance = 0.5  # Score de base
-        
-        # Facteurs d'augmentation d'importance
-        high_importance_keywords = [
-            "préférence", "n'aime pas", "déteste", "adore", "important", 
-            "nom", "âge", "travail", "famille", "objectif", "problème",
-            "erreur", "bug", "solution", "urgent", "critique"
-        ]
-        
-        text = (user_input + " " + nina_response).lower()
-        
-        # Boost pour mots-clés importants
-        for keyword in high_importance_keywords:
-            if keyword in text:
-                importance += 0.1
-        
-        # Boost pour questions personnelles
-        if any(word in user_input.lower() for word in ["je", "mon", "ma", "mes"]):
-            importance += 0.2
-        
-        # Boost pour informations factuelles
-        if any(word in nina_response.lower() for word in ["définition", "explication", "signifie"]):
-            importance += 0.15
-        
-        # Longueur de la conversation (plus long = potentiellement plus important)
-        if len(text.split()) > 50:
-            importance += 0.1
-        
-        return min(importance, 1.0)  # Cap à 1.0
+        """Calcule un score d'importance basé sur plusieurs facteurs (voir `TextAnalyzer`)."""
+        return self.text_analyzer.analyze(user_input, nina_response).importance
 
     def _extract_entities(self, text: str) -> List[str]:
-        """Extraction simple d'entités (noms, lieux, concepts)."""
-        # Implémentation basique - pourrait être améliorée avec NER
-        words = text.split()
-        entities = []
-        
-        # Détecter les mots capitalisés (potentiels noms propres)
-        for word in words:
-            clean_word = word.strip(".,!?;:")
-            if clean_word and clean_word[0].isupper() and len(clean_word) > 2:
-                if clean_word not in ["Nina", "User", "Je", "Tu", "Il", "Elle"]:
-                    entities.append(clean_word)
-        
-        return list(set(entities))
+        """Extraction simple d'entités (mots capitalisés hors mots vides)."""
+        return list(self.text_analyzer.analyze(text).entities)
 
     def _extract_topics(self, text: str) -> List[str]:
-        """Extraction simple de sujets/thèmes."""
-        topic_keywords = {
-            "programmation": ["python", "code", "programmation", "développement", "bug", "fonction"],
-            "alimentation": ["manger", "nourriture", "cuisine", "restaurant", "recette", "plat"],
-            "travail": ["travail", "bureau", "collègue", "projet", "réunion", "entreprise"],
-            "personnel": ["famille", "ami", "maison", "vacances", "loisir", "hobby"],
-            "technologie": ["ordinateur", "internet", "ia", "intelligence", "artificielle", "tech"],
-            "santé": ["santé", "médecin", "maladie", "sport", "exercice", "bien-être"]
-        }
-        
-        text_lower = text.lower()
-        detected_topics = []
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_topics.append(topic)
-        
-        return detected_topics
+        """Extraction simple de sujets/thèmes (listes de mots-clés de `TextAnalyzer`)."""
+        return list(self.text_analyzer.analyze(text).topics)
 
     def _update_memory_graph(self, conversation: Dict[str, Any]):
         """Met à jour le graphe de mémoire avec les nouvelles entités et relations."""
@@ -254,7 +243,7 @@ class AgentMemory:
                 current_tokens += len(text.split()) * 1.3  # Estimation tokens
         
         # 2. Entités et relations du graphe de mémoire
-        entities_in_query = self._extract_entities(user_input)
+        entities_in_query = self.text_analyzer.analyze(user_input).entities
         if entities_in_query:
             context_parts.append("Entités connues:")
             for entity in entities_in_query:
@@ -288,63 +277,56 @@ class AgentMemory:
         return "\n".join(context_parts) if context_parts else ""
 
     def search_conversations(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
-        """Recherche améliorée avec scoring multiple."""
+        """Recherche améliorée avec scoring multiple.
+
+        Récupère un large lot de candidats (`rerank_candidates`) filtré sur les
+        conversations, puis les re-classe en une passe NumPy.
+        """
         try:
-            # Recherche vectorielle de base
-            results = self.vector_db.similarity_search(query, top_k=limit * 2)
+            candidates = self.vector_db.similarity_search(
+                query, top_k=max(self.rerank_candidates, limit), filters={"type": "conversation"}
+            )
+            if not candidates:
+                return []
+
+            order, scores = self._rerank(candidates)
             conversations = []
-            
-            for result in results:
-                if result.get('meta', {}).get('type') == 'conversation':
-                    # Calcul du score composite
-                    relevance_score = result.get('score', 0.5)
-                    
-                    # Score de récence
-                    timestamp = result.get('meta', {}).get('timestamp')
-                    recency_score = self._calculate_recency_score(timestamp)
-                    
-                    # Score d'importance
-                    importance_score = result.get('meta', {}).get('importance', 0.5)
-                    
-                    # Score composite
-                    composite_score = (
-                        self.relevance_weight * relevance_score +
-                        self.recency_weight * recency_score +
-                        self.importance_weight * importance_score
-                    )
-                    
-                    conversations.append({
-                        'text': result['text'],
-                        'timestamp': timestamp,
-                        'composite_score': composite_score,
-                        'entities': result.get('meta', {}).get('entities', []),
-                        'topics': result.get('meta', {}).get('topics', [])
-                    })
-            
-            # Trier par score composite et retourner les meilleurs
-            conversations.sort(key=lambda x: x['composite_score'], reverse=True)
-            return conversations[:limit]
+            for i in order[:limit]:
+                meta = candidates[i].get('meta') or {}
+                conversations.append({
+                    'text': candidates[i]['text'],
+                    'timestamp': meta.get('timestamp'),
+                    'composite_score': float(scores[i]),
+                    'entities': meta.get('entities', []),
+                    'topics': meta.get('topics', [])
+                })
+            return conversations
             
         except Exception as e:
             print(f"[AgentMemory] Erreur recherche conversations: {e}")
             return []
 
-    def _calculate_recency_score(self, timestamp: str) -> float:
-        """Calcule un score de récence avec décroissance temporelle."""
-        if not timestamp:
-            return 0.0
-        
-        try:
-            conv_time = datetime.fromisoformat(timestamp)
-            time_diff = datetime.now() - conv_time
-            
-            # Décroissance exponentielle : score élevé pour récent, faible pour ancien
-            days_old = time_diff.total_seconds() / (24 * 3600)
-            recency_score = 1.0 / (1.0 + 0.1 * days_old)
-            
-            return recency_score
-        except:
-            return 0.0
+    def _rerank(self, candidates: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Calcule les scores composites et l'ordre décroissant des candidats."""
+        n = len(candidates)
+        metas = [c.get('meta') or {} for c in candidates]
+        relevance = np.fromiter((c.get('score', 0.5) for c in candidates), dtype=np.float64, count=n)
+        timestamps = np.fromiter((self._meta_epoch(m) for m in metas), dtype=np.float64, count=n)
+        importance = np.fromiter((m.get('importance', 0.5) for m in metas), dtype=np.float64, count=n)
+        scores = composite_scores(
+            relevance, timestamps, importance, time.time(),
+            (self.relevance_weight, self.recency_weight, self.importance_weight),
+        )
+        return np.argsort(-scores, kind="stable"), scores
+
+    @staticmethod
+    def _meta_epoch(meta: Dict[str, Any]) -> float:
+        """Horodatage epoch d'une méta-donnée (`ts`, sinon ISO des anciennes entrées)."""
+        ts = meta.get('ts')
+        if isinstance(ts, (int, float)):
+            return float(ts)
+        ts = to_epoch(meta.get('timestamp'))
+        return np.nan if ts is None else ts
 
     def _generate_conversation_id(self, conversation: Dict[str, Any]) -> str:
         """Génère un ID unique pour une conversation."""
@@ -4,74 +4,114 @@ Stratégie :
 1. Si la variable d'env NEWSAPI_KEY est définie → appeler NewsAPI.org.
 2. Sinon → fallback scraping DuckDuckGo news.
 
+Les sources ne sont plus interrogées à chaque appel : un `NewsPoller`
+(tools/news_feed.py) les sonde au plus une fois par intervalle, avec requêtes
+conditionnelles et curseur incrémental, et `fetch_ai_news` lit le stock local
+(en sondant d'abord les sources échues). Un appelant de longue durée peut
+déplacer ce sondage en tâche de fond avec `start_polling()` ; aucun ne le
+fait aujourd'hui. Une erreur amont remonte au `NewsPoller`, qui espace alors
+les appels à la source (voir `FeedSource.is_due`).
+
 Retour : liste de dicts {title, url, published, source}
 """
 from __future__ import annotations
 
 import os
 import requests
-from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
 
+from tools.news_feed import ArticleStore, FeedSource, FetchResult, NewsPoller
+from tools.rate_limiter import get_rate_limiter
+
 
 class AgentNews:
-    def __init__(self):
+    # Intervalles minimaux entre deux appels à chaque source (secondes)
+    POLL_INTERVALS = {"newsapi": 900.0, "duckduckgo": 300.0}
+
+    def __init__(self, store_path: Optional[str] = None, page_size: int = 20):
         self.news_key = os.getenv("NEWSAPI_KEY")
         self.session = requests.Session()
+        self.rate_limiter = get_rate_limiter()
+        self.page_size = page_size
+        # Stock persistant optionnel (ex. data/news_articles.json)
+        self.store = ArticleStore(store_path or os.getenv("NINA_NEWS_STORE"))
+        self.poller = NewsPoller(self.store)
+        if self.news_key:
+            self.poller.register("newsapi", self._fetch_newsapi, self.POLL_INTERVALS["newsapi"])
+        else:
+            self.poller.register("duckduckgo", self._scrape_duckduckgo, self.POLL_INTERVALS["duckduckgo"])
 
     # ------------------------------------------------------------------
     def fetch_ai_news(self, max_items: int = 5) -> List[Dict]:
-        if self.news_key:
-            return self._fetch_newsapi(max_items)
-        return self._scrape_duckduckgo(max_items)
+        # Sans sondage en tâche de fond, on rafraîchit les sources échues à la lecture
+        if not self.poller.running:
+            self.poller.poll_due()
+        return self.store.latest(max_items)
+
+    def start_polling(self, tick: float = 5.0):
+        """Sonde les sources en arrière-plan ; `fetch_ai_news` ne fait alors plus d'I/O."""
+        self.poller.start(tick)
+
+    def stop_polling(self):
+        self.poller.stop()
 
     # ------------------------------------------------------------------
-    def _fetch_newsapi(self, max_items: int) -> List[Dict]:
+    @staticmethod
+    def _conditional_headers(source: FeedSource) -> Dict[str, str]:
+        headers = {}
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+        return headers
+
+    def _fetch_newsapi(self, source: FeedSource) -> FetchResult:
         url = "https://newsapi.org/v2/everything"
         params = {
             "q": "artificial intelligence",
             "sortBy": "publishedAt",
             "language": "en",
-            "pageSize": max_items,
+            "pageSize": self.page_size,
             "apiKey": self.news_key,
         }
-        try:
-            resp = self.session.get(url, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            articles = []
-            for art in data.get("articles", [])[:max_items]:
-                articles.append({
-                    "title": art["title"],
-                    "url": art["url"],
-                    "published": art["publishedAt"],
-                    "source": art["source"]["name"],
-                })
-            return articles
-        except Exception as exc:
-            print(f"[AgentNews] Erreur NewsAPI: {exc}")
-            return []
+        if source.cursor:
+            params["from"] = source.cursor  # seulement les articles plus récents
+        # Les erreurs remontent au NewsPoller (compte d'erreurs et espacement des appels)
+        self.rate_limiter.acquire(url)
+        resp = self.session.get(url, params=params, headers=self._conditional_headers(source), timeout=10)
+        if resp.status_code == 304:
+            return FetchResult(articles=None)
+        resp.raise_for_status()
+        data = resp.json()
+        articles = []
+        for art in data.get("articles", []):
+            articles.append({
+                "title": art["title"],
+                "url": art["url"],
+                "published": art["publishedAt"],
+                "source": art["source"]["name"],
+            })
+        cursor = max((a["published"] for a in articles), default=None)
+        return FetchResult(articles, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), cursor)
 
-    def _scrape_duckduckgo(self, max_items: int) -> List[Dict]:
+    def _scrape_duckduckgo(self, source: FeedSource) -> FetchResult:
         params = {"q": "intelligence artificielle actualités", "kl": "fr-fr"}
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; NinaBot/0.1)"}
-        try:
-            resp = self.session.get("https://duckduckgo.com/html/", params=params, headers=headers, timeout=10)
-            resp.raise_for_status()
-        except Exception as exc:
-            print(f"[AgentNews] Erreur DuckDuckGo: {exc}")
-            return []
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; NinaBot/0.1)", **self._conditional_headers(source)}
+        self.rate_limiter.acquire("https://duckduckgo.com/html/")
+        resp = self.session.get("https://duckduckgo.com/html/", params=params, headers=headers, timeout=10)
+        if resp.status_code == 304:
+            return FetchResult(articles=None)
+        resp.raise_for_status()
 
         soup = BeautifulSoup(resp.text, "html.parser")
         results = []
-        for a in soup.select("a.result__a")[:max_items]:
-            title = a.get_text(strip=True)
-            url = a["href"]
+        for a in soup.select("a.result__a")[:self.page_size]:
+            # Pas de date côté DuckDuckGo : l'ArticleStore retient la date de première vue
             results.append({
-                "title": title,
-                "url": url,
-                "published": datetime.utcnow().isoformat(),
+                "title": a.get_text(strip=True),
+                "url": a["href"],
+                "published": None,
                 "source": "DuckDuckGo",
             })
-        return results 
\ No newline at end of file
+        return FetchResult(results, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
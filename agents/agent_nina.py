@@ -9,21 +9,24 @@ import sys
 import os
 import time
 import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # Ajout du chemin racine pour les imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.agent_chercheur_v3 import AgentChercheurV3
-from agents.agent_analyste import AgentAnalyste, AgentApprentissage
-from agents.agent_redacteur import AgentRedacteur
-from agents.agent_planificateur import AgentPlanificateur
-from agents.agent_news import AgentNews
-from tools.vector_db import VectorDB
-from tools.sql_db import SQLDatabase
-from agents.agent_llm_local import AgentLLMLocal  # Assurer que l'import est présent
+# Les agents, bases et LLM sont importés et construits au premier usage (tools/lazy.py)
+from tools.lazy import component, import_attr
+from tools.context_renderer import estimate_tokens
+from tools.embedding_cache import cache_summary, embedding_scope
+from tools.sessions import DEFAULT_SESSION, Session
+from tools.speculation import Speculation, search_probability
+from tools.tracing import get_tracer
 
 class TaskType(Enum):
     """Types de tâches que Nina peut traiter."""
@@ -60,59 +63,134 @@ class AgentNina:
     tous les agents spécialisés pour fournir des réponses intelligentes.
     """
     
+    # Agents spécialisés, construits au premier accès : le démarrage ne paie
+    # ni les imports (bs4, sqlalchemy, qdrant, vllm…) ni les connexions.
+    chercheur = component("agents.agent_chercheur_v3:AgentChercheurV3")
+    analyste = component("agents.agent_analyste:AgentAnalyste")
+    apprenant = component("agents.agent_analyste:AgentApprentissage")
+    redacteur = component("agents.agent_redacteur:AgentRedacteur")
+    planificateur = component("agents.agent_planificateur:AgentPlanificateur")
+    news_agent = component("agents.agent_news:AgentNews")
+    
+    # Base de données vectorielle (partitionnée si NINA_VECTOR_SHARDING est défini)
+    vectordb = component("tools.sharded_vector_db:open_vector_db")
+    
+    # Intégration SQL pour la mémoire relationnelle
+    sql_db = component(lambda self: import_attr("tools.sql_db:SQLDatabase")(
+        os.getenv('DATABASE_URL', 'sqlite:///data/nina_memory.db')
+    ))
+    
+    # Historique de conversation chargé depuis la BDD SQL au premier usage
+    conversation_history = component(lambda self: self.sql_db.load_conversations())
+    
+    # Échanges gardés tels quels par session ; les plus anciens ne vivent plus que dans le résumé glissant
+    HISTORY_TURNS = 20
+    
+    # Session implicite (requêtes sans identifiant) : l'historique global de la BDD SQL
+    default_session = component(lambda self: Session(
+        DEFAULT_SESSION, history=self.conversation_history, turns=len(self.conversation_history)
+    ))
+    
+    # Sessions par utilisateur : actives en mémoire (LRU), inactives sur disque (tools/sessions.py)
+    sessions = component(lambda self: import_attr("tools.sessions:SessionStore")(
+        os.getenv('NINA_SESSION_DIR', 'data/sessions'),
+        max_active=int(os.getenv('NINA_MAX_SESSIONS', '256')),
+        max_history=self.HISTORY_TURNS,
+    ))
+    
+    # Souvenirs des sessions, partitionnés par le champ de payload `session`
+    session_memory = component(lambda self: import_attr("tools.vector_db:VectorDB")(
+        collection="nina_sessions", dedup=False
+    ))
+    
+    # Recherche spéculative pendant le routage (tools/speculation.py)
+    speculation_policy = component(lambda self: import_attr("tools.speculation:SpeculationPolicy").from_env())
+    speculation_pool = component(lambda self: ThreadPoolExecutor(
+        max_workers=int(os.getenv('NINA_SPECULATION_WORKERS', '8')), thread_name_prefix="nina-speculation"
+    ))
+    
+    # Réponses déjà produites et fusion des questions identiques simultanées (tools/answer_cache.py)
+    answer_cache = component(lambda self: import_attr("tools.answer_cache:AnswerCache").from_env())
+    
     def __init__(self):
-        # Agents spécialisés
-        self.chercheur = AgentChercheurV3()
-        self.analyste = AgentAnalyste()
-        self.apprenant = AgentApprentissage()
-        self.redacteur = AgentRedacteur()
-        self.planificateur = AgentPlanificateur()
-        self.news_agent = AgentNews()
-        
         # Classe ObjectifAgent simulée
         class ObjectifAgent:
             def planifier(self): pass
         self.objectif = ObjectifAgent()
         
-        # Base de données vectorielle
-        self.vectordb = VectorDB()
-        
-        # Historique et statistiques
-        self.conversation_history = []
+        # Statistiques
         self.task_stats = {
             "total_tasks": 0,
             "successful_tasks": 0,
             "avg_response_time": 0.0,
             "agent_usage": {},
+            "task_types": {},
             "user_satisfaction": []
         }
-        # Charger le profil utilisateur depuis crew_config.yaml
+        self._stats_lock = threading.Lock()     # requêtes servies par plusieurs threads
+        self.tracer = get_tracer()
+        # Écritures dans les souvenirs de chaque session (versions du cache de réponses)
+        self._session_writes: Dict[str, int] = {}
+        self._session_writes_lock = threading.Lock()
+    
+    @component
+    def user_profile(self) -> Dict[str, Any]:
+        """Profil utilisateur : crew_config.yaml, complété par la BDD SQL."""
         try:
             import yaml  # type: ignore
             cfg_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'configs', 'crew_config.yaml')
             with open(cfg_path, 'r', encoding='utf-8') as f:
                 cfg = yaml.safe_load(f) or {}
-            self.user_profile = cfg.get('parameters', {})
+            profile = cfg.get('parameters', {})
         except Exception:
-            self.user_profile = {}
-        # Intégration SQL pour la mémoire relationnelle
-        db_url = os.getenv('DATABASE_URL', 'sqlite:///data/nina_memory.db')
-        self.sql_db = SQLDatabase(db_url)
-        # Charger historique de conversation et profil utilisateur depuis la BDD SQL
-        self.conversation_history = self.sql_db.load_conversations()
+            profile = {}
         db_profile = self.sql_db.load_user_profile()
-        self.user_profile = {**self.user_profile, **db_profile}
-        # Initialiser l'agent LLM local avec Mixtral, tag 'instruct'
+        return {**profile, **db_profile}
+    
+    @component
+    def local_llm(self):
+        """LLM local avec Mixtral, tag 'instruct' (None s'il est indisponible)."""
         try:
-            self.local_llm = AgentLLMLocal(model="mixtral:instruct")
+            from agents.agent_llm_local import AgentLLMLocal
+            local_llm = AgentLLMLocal(model="mixtral:instruct")
             print("[AgentNina] LLM local (AgentLLMLocal) initialisé avec le modèle 'mixtral:instruct'.")
+            return local_llm
         except Exception as e:
             print(f"[AgentNina] ⚠️ Impossible d'initialiser le LLM local : {e}")
-            self.local_llm = None
+            return None
+    
+    @contextmanager
+    def session(self, session_id: Optional[str] = None):
+        """Session de `session_id` pendant un traitement (la session implicite si None)."""
+        if session_id is None or session_id == DEFAULT_SESSION:
+            yield self.default_session
+        else:
+            with self.sessions.use(session_id) as session:
+                yield session
+    
+    def update_profile(self, key: str, value: Any, session_id: Optional[str] = None):
+        """Renseigne le profil : global (BDD SQL) ou propre à une session."""
+        if session_id is None or session_id == DEFAULT_SESSION:
+            self.sql_db.save_user_profile(key, value)
+            self.user_profile[key] = value
+            return
+        with self.session(session_id) as session, session.lock:
+            session.profile[key] = value
+            session.dirty = True
+    
+    def flush_sessions(self):
+        """Écrit les sessions actives modifiées sur disque (arrêt du serveur)."""
+        if component.is_built(self, "sessions"):
+            self.sessions.flush()
     
     def analyze_request(self, query: str) -> TaskPlan:
         """🧠 Nina utilise le LLM pour classifier la requête et choisir la stratégie."""
-        
+        with self.tracer.span("routing") as span:
+            plan = self._analyze_request(query)
+            span.set(route=plan.task_type.value)
+            return plan
+    
+    def _analyze_request(self, query: str) -> TaskPlan:
         if not self.local_llm:
             print("[AgentNina] LLM local non disponible, fallback sur une recherche par défaut.")
             return TaskPlan(TaskType.RECHERCHE_INFORMATION, TaskComplexity.MODERATE, ["chercheur", "analyste"], 5.0, 1, "Fallback: LLM local indisponible.")
@@ -147,7 +225,7 @@ Requête de l'utilisateur : "{query}"
 Catégorie:"""
 
         try:
-            response_text = self.local_llm.generate(routing_prompt).strip().lower()
+            response_text = self._generate(routing_prompt, "routing").strip().lower()
             
             if 'raisonnement_pur' in response_text:
                 best_type = TaskType.RAISONNEMENT_PUR
@@ -189,56 +267,227 @@ Catégorie:"""
                 reasoning="La requête nécessite une recherche d'information, activation du pipeline RAG."
             )
     
-    def _execute_search_task(self, query: str) -> Dict[str, Any]:
+    def _execute_search_task(self, query: str, session: Optional[Session] = None,
+                             speculation: Optional[Speculation] = None) -> Dict[str, Any]:
         """Exécution optimisée pour la recherche."""
-        # 1. Recherche dans la mémoire d'abord
-        memory_results = self.vectordb.similarity_search(query, top_k=3)
+        # Les étapes 1, 2 et 2b ont pu être lancées pendant le routage : leurs résultats sont repris
+        speculation = speculation or Speculation()
+        
+        # 1. Recherche dans la mémoire d'abord (souvenirs de la session, puis mémoire commune)
+        memory_results = speculation.take("memory", self._search_memory, query, session)
         
         # 2. Recherche web
-        web_results = self.chercheur.collect_data("web", query)
+        web_results = speculation.take("web", self._collect_web, query)
+        
+        # 2b. Pages complètes (deep fetch) : indexées puis interrogées comme la mémoire
+        page_passages = []
+        page_chunks = speculation.take("pages", self._collect_pages, query)
+        if page_chunks:
+            self.vectordb.add_documents(
+                [c["text"] for c in page_chunks],
+                [{"type": "web_page", "source": c["url"], "title": c["title"], "ts": time.time()} for c in page_chunks],
+            )
+            page_passages = self.vectordb.similarity_search(query, top_k=3, filters={"type": "web_page"})
         
         # 3. Combinaison et analyse
-        all_data = web_results + [r["text"] for r in memory_results]
+        all_data = web_results + [r["text"] for r in page_passages] + [r["text"] for r in memory_results]
         insights = self.analyste.analyze_data(all_data) if all_data else {}
         
-        # 4. Mise à jour de la mémoire
+        # 4. Mise à jour de la mémoire (les snippets déjà connus sont dédupliqués)
         if web_results:
-            self.vectordb.add_documents(web_results)
+            now = time.time()
+            self.vectordb.add_documents(
+                web_results, [{"type": "web_result", "ts": now} for _ in web_results]
+            )
         
         return {
             "web_results": web_results,
             "memory_results": memory_results,
+            "page_passages": page_passages,
             "insights": insights,
             "total_sources": len(all_data)
         }
     
-    def _summarize_history(self) -> str:
-        """Crée un résumé de l'historique de conversation."""
-        if not self.local_llm or not self.conversation_history:
+    def _search_memory(self, query: str, session: Optional[Session] = None) -> List[Dict[str, Any]]:
+        memory_results = self.vectordb.similarity_search(query, top_k=3)
+        if session is not None and session.session_id != DEFAULT_SESSION:
+            memory_results = self.session_memory.similarity_search(
+                query, top_k=2, filters={"session": session.session_id}
+            ) + memory_results
+        return memory_results
+    
+    def _collect_web(self, query: str) -> List[str]:
+        with self.tracer.span("collection", kind="web") as span:
+            web_results = self.chercheur.collect_data("web", query)
+            span.set(results=len(web_results))
+        return web_results
+    
+    def _collect_pages(self, query: str) -> List[Dict[str, Any]]:
+        with self.tracer.span("collection", kind="pages") as span:
+            page_chunks = self.chercheur.collect_pages(query)
+            span.set(results=len(page_chunks))
+        return page_chunks
+    
+    def _start_retrieval(self, speculation: Speculation, query: str, session: Session, tasks, speculative: bool):
+        """Lance en arrière-plan les étapes de collecte `tasks` pas encore lancées."""
+        calls = {
+            "memory": (self._search_memory, query, session),
+            "web": (self._collect_web, query),
+            "pages": (self._collect_pages, query),
+        }
+        for task in tasks:
+            if task not in speculation.futures:
+                speculation.start(task, *calls[task], speculative=speculative)
+    
+    def _speculate(self, query: str, session: Session) -> Speculation:
+        """Démarre la collecte avant le routage si la requête a l'air d'une recherche."""
+        speculation = Speculation(self.speculation_pool, self.tracer.metrics)
+        probability = search_probability(query)
+        tasks = self.speculation_policy.tasks(probability)
+        self.tracer.set_attributes(search_probability=round(probability, 2), speculated=",".join(tasks))
+        self._start_retrieval(speculation, query, session, tasks, speculative=True)
+        return speculation
+    
+    def _summarize_history(self, session: Session) -> str:
+        """Résumé glissant : le résumé précédent est complété des seuls nouveaux échanges."""
+        with session.lock:
+            pending = session.pending_turns()
+            previous, upto = session.summary, session.turns
+        if not self.local_llm or not (pending or previous):
             return "Aucun historique de conversation."
+        if not pending:
+            return previous
 
-        # Concaténer les échanges pour le prompt de résumé
-        full_history = "\n".join([f"Utilisateur: {e.get('query', '')}\nNina: {e.get('response', '')}" for e in self.conversation_history])
+        # Concaténer les nouveaux échanges pour le prompt de résumé
+        new_turns = "\n".join([
+            f"Utilisateur: {e.get('query', e.get('user', ''))}\nNina: {e.get('response', e.get('nina', ''))}"
+            for e in pending
+        ])
+        previous_block = f"Résumé de la conversation jusqu'ici :\n{previous}\n\n" if previous else ""
 
         summary_prompt = f"""Tu es un expert en synthèse. Résume la conversation suivante en quelques points clés pour donner un contexte à un autre agent IA. Ne dépasse pas 100 mots.
 
-Conversation :
-{full_history}
+{previous_block}Conversation :
+{new_turns}
 
 Résumé contextuel :"""
 
         try:
-            summary = self.local_llm.generate(summary_prompt)
-            return summary
+            summary = self._generate(summary_prompt, "history_summary")
         except Exception as e:
             print(f"[AgentNina] Erreur lors du résumé de l'historique : {e}")
-            return "Le résumé de l'historique n'a pas pu être généré."
-
-    def think_and_respond(self, query: str) -> str:
-        """🤖 Méthode principale : Nina réfléchit et répond en suivant le plan."""
-        start_time = time.time()
+            return previous or "Le résumé de l'historique n'a pas pu être généré."
+        with session.lock:
+            session.set_summary(summary, upto, self.HISTORY_TURNS)
+        return summary
+
+    def _generate(self, prompt: str, purpose: str) -> str:
+        """Appel au LLM local, tracé (durée, tokens estimés)."""
+        with self.tracer.span("llm.generate", purpose=purpose, model="local") as span:
+            text = self.local_llm.generate(prompt)
+            self.tracer.record_llm(span, estimate_tokens(prompt), estimate_tokens(str(text)), model="local")
+            return text
+
+    def think_and_respond(self, query: str, session_id: Optional[str] = None) -> str:
+        """🤖 Méthode principale : Nina réfléchit et répond en suivant le plan.
+
+        `session_id` (utilisateur ou conversation) isole l'historique, le résumé,
+        le profil et les souvenirs ; sans identifiant, la session implicite est utilisée.
+        """
+        start_time = time.perf_counter()
+        outcome: Dict[str, Any] = {"plan": None}
+        success = False
+        # Un seul embedding de la requête pour la mémoire, les souvenirs et les passages de pages
+        with self.tracer.span("request") as span, self.session(session_id) as session, embedding_scope():
+            try:
+                response, plan = self._answer(query, session, outcome)
+                success = True
+                span.set(route=plan.task_type.value, response_chars=len(response))
+                return response
+            finally:
+                self._record_task(outcome["plan"], time.perf_counter() - start_time, success)
+
+    def _answer(self, query: str, session: Session, outcome: Dict[str, Any]) -> Tuple[str, TaskPlan]:
+        """Réponse en cache, partagée avec une requête identique en cours, ou calculée.
+
+        `outcome["plan"]` reçoit le plan dès qu'il est connu (statistiques, même en cas d'échec).
+        """
+        cache = self.answer_cache
+        if not cache.enabled:
+            return self._run_pipeline(query, session, outcome)
+        
+        context = self._context_fingerprint(session)
+        cached = cache.get(query, context, self._memory_version(session))
+        self.tracer.record_cache("answer", cached is not None)
+        if cached is not None:
+            outcome["plan"] = cached.plan
+            self._remember_turn(query, cached.answer, session, replayed=True)
+            return cached.answer, cached.plan
         
-        plan = self.analyze_request(query)
+        # Les requêtes identiques simultanées (même contexte) attendent la première
+        (response, plan), shared = cache.coalesce(
+            (cache.normalize(query), context), lambda: self._run_pipeline(query, session, outcome)
+        )
+        outcome["plan"] = plan
+        self.tracer.set_attributes(answer_coalesced=shared)
+        if shared:
+            self._remember_turn(query, response, session, replayed=True)
+        elif self._cacheable(plan):
+            # Seules les réponses de recherche dépendent du contexte et de la mémoire ; les deux
+            # sont relus après la réponse (résumé mis à jour, écritures de la réponse elle-même)
+            if plan.task_type == TaskType.RECHERCHE_INFORMATION:
+                cache.put(query, response, plan.task_type.value,
+                          self._context_fingerprint(session), self._memory_version(session), plan=plan)
+            else:
+                cache.put(query, response, plan.task_type.value, plan=plan)
+        return response, plan
+
+    def _cacheable(self, plan: TaskPlan) -> bool:
+        """Les réponses de repli (LLM indisponible ou en erreur) ne sont pas gardées."""
+        span = self.tracer.current_span()
+        if span is not None and span.attributes.get("degraded"):
+            return False
+        return plan.task_type == TaskType.RECHERCHE_INFORMATION or bool(self.local_llm)
+
+    def _run_pipeline(self, query: str, session: Session, outcome: Dict[str, Any]) -> Tuple[str, TaskPlan]:
+        speculation = self._speculate(query, session)
+        try:
+            plan = outcome["plan"] = self.analyze_request(query)
+            if plan.task_type != TaskType.RECHERCHE_INFORMATION:
+                speculation.discard()
+            return self._respond(query, plan, session, speculation), plan
+        finally:
+            speculation.discard()
+
+    def _context_fingerprint(self, session: Session) -> str:
+        """Empreinte de ce qui, dans la session, oriente une réponse de recherche (résumé, profil).
+
+        Les échanges pas encore résumés n'y entrent pas : une question répétée juste
+        après sa réponse retrouve celle-ci. Le profil global n'est pas chargé pour
+        autant : une réponse de recherche ne peut être en cache qu'une fois construit.
+        Une session nommée y ajoute son identifiant : ses réponses citent ses propres
+        souvenirs et ne doivent ni servir ni être partagées avec une autre session.
+        """
+        profile = self.user_profile if component.is_built(self, "user_profile") else {}
+        with session.lock:
+            state = [session.summary, {**profile, **session.profile}]
+        if session.session_id != DEFAULT_SESSION:
+            state.append(session.session_id)
+        blob = json.dumps(state, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+    def _memory_version(self, session: Session) -> int:
+        """Version de la mémoire commune (0 tant qu'elle n'est pas construite) et des souvenirs de la session.
+
+        Les deux compteurs ne font que croître : leur somme change à chaque écriture
+        qui peut modifier une réponse de recherche de cette session.
+        """
+        version = getattr(self.vectordb, "version", 0) if component.is_built(self, "vectordb") else 0
+        with self._session_writes_lock:
+            return version + self._session_writes.get(session.session_id, 0)
+
+    def _respond(self, query: str, plan: TaskPlan, session: Session,
+                 speculation: Optional[Speculation] = None) -> str:
         print(f"[AgentNina] Plan d'action : {plan.reasoning}")
 
         if plan.task_type == TaskType.RAISONNEMENT_PUR:
@@ -265,8 +514,9 @@ Raisonnement étape par étape :
 """
             
             try:
-                response = self.local_llm.generate(reasoning_prompt)
+                response = self._generate(reasoning_prompt, "reasoning")
             except Exception as e:
+                self.tracer.set_attributes(degraded=True)
                 response = f"J'ai rencontré une erreur en essayant de résoudre le problème : {e}"
         
         elif plan.task_type == TaskType.CONVERSATION_SIMPLE:
@@ -274,14 +524,18 @@ Raisonnement étape par étape :
                 return "Bonjour ! Comment puis-je vous aider ?"
             
             conversation_prompt = f"Tu es Nina, une assistante IA amicale et serviable. Réponds de manière naturelle à l'utilisateur.\n\nUtilisateur: {query}\nNina:"
-            response = self.local_llm.generate(conversation_prompt)
+            response = self._generate(conversation_prompt, "conversation")
 
         else: # RECHERCHE_INFORMATION
+            # La collecte (si elle n'a pas déjà été lancée en spéculation) avance pendant le résumé
+            speculation = speculation or Speculation(self.speculation_pool, self.tracer.metrics)
+            self._start_retrieval(speculation, query, session, ("memory", "web", "pages"), speculative=False)
+            
             # Créer un résumé de l'historique pour maintenir le contexte
-            conversation_summary = self._summarize_history()
+            conversation_summary = self._summarize_history(session)
             
             # Exécution du pipeline RAG (recherche, analyse, rédaction)
-            search_results = self._execute_search_task(query)
+            search_results = self._execute_search_task(query, session, speculation)
             
             # Enrichir les résultats avec le résumé pour le rédacteur
             context_data = {
@@ -290,37 +544,86 @@ Raisonnement étape par étape :
                 "conversation_summary": conversation_summary
             }
             
-            response = self._generate_data_rich_response(context_data, plan)
+            response = self._generate_data_rich_response(context_data, plan, session)
 
         # Mise à jour de l'historique et des stats
-        self.conversation_history.append({'query': query, 'response': response})
-        self.sql_db.save_interaction(query, response, summary=conversation_summary if plan.task_type == TaskType.RECHERCHE_INFORMATION else "")
-        
-        end_time = time.time()
-        # ... (logique de stats)
-
+        summary = conversation_summary if plan.task_type == TaskType.RECHERCHE_INFORMATION else ""
+        self._remember_turn(query, response, session, summary)
         return response
+
+    def _remember_turn(self, query: str, response: str, session: Session, summary: str = "",
+                       replayed: bool = False):
+        """Ajoute l'échange à la session, à la BDD SQL et aux souvenirs de la session.
+
+        Un échange `replayed` (réponse en cache ou partagée) répète un souvenir déjà
+        compté : il ne change pas la version de mémoire de la session, sans quoi une
+        question répétée alternerait succès et échec du cache.
+        """
+        with session.lock:
+            session.add_turn(query, response, self.HISTORY_TURNS)
+        if session.session_id == DEFAULT_SESSION:
+            self.sql_db.save_interaction(query, response, summary=summary)
+        else:
+            self.sql_db.save_interaction(query, response, summary=summary, meta={"session": session.session_id})
+            self.session_memory.add_documents(
+                [f"User: {query}\nNina: {response}"],
+                [{"type": "conversation", "session": session.session_id, "ts": time.time()}],
+            )
+            if not replayed:
+                with self._session_writes_lock:
+                    self._session_writes[session.session_id] = self._session_writes.get(session.session_id, 0) + 1
+
+    def _record_task(self, plan: Optional[TaskPlan], duration: float, success: bool):
+        """Met à jour `task_stats` (moyenne glissante du temps de réponse, usage des agents)."""
+        stats = self.task_stats
+        with self._stats_lock:
+            stats["total_tasks"] += 1
+            stats["successful_tasks"] += int(success)
+            stats["avg_response_time"] += (duration - stats["avg_response_time"]) / stats["total_tasks"]
+            if plan is not None:
+                task_type = plan.task_type.value
+                stats["task_types"][task_type] = stats["task_types"].get(task_type, 0) + 1
+                for agent in plan.agents_needed:
+                    stats["agent_usage"][agent] = stats["agent_usage"].get(agent, 0) + 1
     
-    def _generate_data_rich_response(self, context_data: Dict[str, Any], plan: TaskPlan) -> str:
+    def _generate_data_rich_response(self, context_data: Dict[str, Any], plan: TaskPlan,
+                                     session: Optional[Session] = None) -> str:
         """✨ Nina génère un rapport synthétique via AgentRedacteur."""
         # L'historique et la requête sont maintenant dans context_data
+        profile = self.user_profile
+        if session is not None and session.profile:
+            profile = {**profile, **session.profile}
         report = self.redacteur.generate_report(
             context_data, 
             reasoning=plan.reasoning, 
-            profile=self.user_profile
+            profile=profile
         )
         return report
     
     def get_stats(self) -> Dict[str, Any]:
         """Retourne les statistiques de Nina."""
+        with self._stats_lock:
+            task_stats = {**self.task_stats, "agent_usage": dict(self.task_stats["agent_usage"]),
+                          "task_types": dict(self.task_stats["task_types"])}
+        total = task_stats["total_tasks"]
+        success_rate = 100.0 * task_stats["successful_tasks"] / total if total else 0.0
+        # La mémoire n'est pas construite (ni chargée) pour de simples statistiques
+        memory_size = len(self.vectordb) if component.is_built(self, "vectordb") else 0
+        history = self.conversation_history if component.is_built(self, "conversation_history") else []
         return {
-            "total_tasks": self.task_stats["total_tasks"],
-            "successful_tasks": self.task_stats["successful_tasks"],
-            "avg_response_time": self.task_stats["avg_response_time"],
-            "agent_usage": self.task_stats["agent_usage"],
-            "success_rate": "100.0%",
-            "conversation_length": len(self.conversation_history),
-            "memory_size": 0
+            "total_tasks": total,
+            "successful_tasks": task_stats["successful_tasks"],
+            "avg_response_time": round(task_stats["avg_response_time"], 3),
+            "agent_usage": task_stats["agent_usage"],
+            "task_types": task_stats["task_types"],
+            "success_rate": f"{success_rate:.1f}%",
+            "conversation_length": len(history),
+            "memory_size": memory_size,
+            "sessions": self.sessions.summary() if component.is_built(self, "sessions") else {},
+            "answer_cache": self.answer_cache.summary() if component.is_built(self, "answer_cache") else {},
+            "vector_cache": cache_summary(),
+            # Durée moyenne par étape (routage, LLM, mémoire, sources…) depuis le démarrage
+            "stages": self.tracer.metrics.histogram_summary("nina_span_duration_seconds", "span"),
         }
     
     # Anciennes méthodes metadata SQLite supprimées
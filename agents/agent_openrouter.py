@@ -4,6 +4,8 @@ import json
 import hashlib
 from typing import Optional, Dict, Any, List
 
+from tools.tracing import get_tracer
+
 class AgentOpenRouter:
     """Agent universel pour interroger n'importe quel LLM via l'API OpenRouter."""
     
@@ -65,9 +67,17 @@ class AgentOpenRouter:
         Returns:
             La réponse textuelle du modèle.
         """
+        tracer = get_tracer()
+        with tracer.span("llm.invoke", model=model_name) as span:
+            return self._invoke(tracer, span, model_name, messages, temperature, max_tokens)
+
+    def _invoke(self, tracer, span, model_name: str, messages: List[Dict[str, str]], temperature: float,
+                max_tokens: int) -> str:
         # --- Gestion du Cache ---
         cache_key = self._get_cache_key(model_name, messages, temperature)
-        if cache_key in self.cache:
+        hit = cache_key in self.cache
+        tracer.record_cache("openrouter", hit)
+        if hit:
             print("--- INFO: Réponse trouvée dans le cache. ---")
             return self.cache[cache_key]
         
@@ -85,6 +95,10 @@ class AgentOpenRouter:
             response = requests.post(api_url, json=payload, headers=self.headers, timeout=60)
             response.raise_for_status()
             data = response.json()
+            usage = data.get("usage") or {}
+            if usage:
+                tracer.record_llm(span, int(usage.get("prompt_tokens", 0)),
+                                  int(usage.get("completion_tokens", 0)), model=model_name)
             
             if data.get("choices") and data["choices"]:
                 message_content = data["choices"][0].get("message", {}).get("content", "")
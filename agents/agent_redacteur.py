@@ -8,30 +8,54 @@ except ImportError:
     _OPENAI = False
 
 import os
-import json
 from typing import Dict, Any
 
+from tools.context_renderer import estimate_tokens, render_context
+from tools.tracing import get_tracer
+
 class AgentRedacteur:
-    def __init__(self):
+    def __init__(self, llm=None):
+        # LLM de synthèse injecté (tests, benchmark) ; sinon AgentLLMLocal à chaque rapport
+        self.llm = llm
         # Configure openai endpoint for LocalAI/Ollama if dispo
         if _OPENAI:
             openai.api_key = os.getenv("OPENAI_API_KEY", "demo")
             openai.base_url = os.getenv("OPENAI_API_BASE", "http://localhost:8080/v1")
             self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        # Budget de tokens alloué aux résultats de recherche dans le prompt
+        self.context_budget = int(os.getenv("NINA_CONTEXT_TOKENS", "1200"))
 
     def generate_report(self, context_data: Dict[str, Any], reasoning: str, profile: Dict[str, Any]):
-        """Génère un rapport synthétique en utilisant le contexte complet."""
-        
+        """Génère un rapport synthétique en utilisant le contexte complet.
+
+        Une réponse de repli (LLM indisponible ou en erreur) marque `degraded` le
+        span de synthèse et celui de l'appelant : elle ne doit pas être mise en cache.
+        """
+        tracer = get_tracer()
+        caller = tracer.current_span()
+        with tracer.span("synthesis") as span:
+            report, degraded = self._generate_report(context_data)
+            if degraded:
+                span.set(degraded=True)
+                if caller is not None:
+                    caller.set(degraded=True)
+            return report
+
+    def _generate_report(self, context_data: Dict[str, Any]):
         query = context_data.get('query', '')
         search_results = context_data.get('search_results', {})
         summary = context_data.get('conversation_summary', 'Aucun résumé fourni.')
+        # Passages dédupliqués, classés et tronqués au budget, au format [n] texte (source)
+        context = render_context(search_results, query, budget_tokens=self.context_budget)
+        get_tracer().set_attributes(context_tokens=context.tokens, passages=len(context.passages),
+                                    dropped_duplicates=context.dropped_duplicates)
         
         # Préparation du prompt enrichi
         prompt = f"""Tu es Nina, une assistante IA. Ta mission est de fournir une réponse complète et pertinente à la requête de l'utilisateur.
 
 Pour cela, tu disposes de plusieurs sources d'information :
 1.  **La requête actuelle de l'utilisateur.**
-2.  **Les résultats d'une recherche web.**
+2.  **Les résultats d'une recherche web**, numérotés : cite-les sous la forme [n].
 3.  **Un résumé de l'historique récent de la conversation.**
 
 Analyse toutes ces informations pour formuler la meilleure réponse possible. Le résumé te donne le contexte global de la discussion.
@@ -43,7 +67,7 @@ Analyse toutes ces informations pour formuler la meilleure réponse possible. Le
 {query}
 
 **Résultats de la Recherche Web :**
-{json.dumps(search_results, indent=2, ensure_ascii=False)}
+{context.text}
 
 **Résumé de la Conversation :**
 {summary}
@@ -54,15 +78,20 @@ Analyse toutes ces informations pour formuler la meilleure réponse possible. Le
 
         # Appel au LLM local pour la synthèse finale
         try:
-            from agents.agent_llm_local import AgentLLMLocal
-            local_llm = AgentLLMLocal()
-            if local_llm.use_ollama:
-                return local_llm.generate(prompt)
-            else:
-                return "Le service de synthèse est actuellement indisponible."
+            llm = self.llm
+            if llm is None:
+                from agents.agent_llm_local import AgentLLMLocal
+                llm = AgentLLMLocal()
+                if not llm.use_ollama:
+                    return "Le service de synthèse est actuellement indisponible.", True
+            tracer = get_tracer()
+            with tracer.span("llm.generate", purpose="synthesis", model="local") as span:
+                text = llm.generate(prompt)
+                tracer.record_llm(span, estimate_tokens(prompt), estimate_tokens(str(text)), model="local")
+                return text, False
         except Exception as e:
             print(f"[AgentRedacteur] Erreur lors de la synthèse finale : {e}")
-            return "Désolé, une erreur est survenue lors de la génération de la réponse."
+            return "Désolé, une erreur est survenue lors de la génération de la réponse.", True
 
     def format_report(self, insights):
         # Implémenter la logique pour formater le rapport
@@ -1,65 +1,573 @@
-import time
-import sys
+"""benchmark.py – Banc d'essai hors ligne de `AgentNina.think_and_respond`.
+
+Le LLM et la recherche sont remplacés par des doubles déterministes dont la
+latence suit une distribution configurable ; la mémoire vectorielle (client
+local), l'analyse, le rendu du contexte et la base SQLite (fichier temporaire)
+sont les vrais composants. Aucun accès réseau, ni Ollama ni Qdrant.
+
+Mesures :
+- latence de bout en bout et par étape (routage, mémoire, collecte, synthèse),
+  en p50/p95/p99 ;
+- débit sous `--clients` clients concurrents (un `AgentNina` par client) ;
+- mémoire : pic RSS du processus et, avec `--tracemalloc`, pic d'allocation Python.
+
+Distributions de latence (`--llm-latency`, `--search-latency`, en ms) :
+    fixed:20   uniform:10,40   lognormal:20,0.5 (médiane, sigma)   none
+
+Usage :
+    python app/benchmark.py --requests 200 --clients 4
+    python app/benchmark.py --json results/bench.json
+    python app/benchmark.py --compare results/bench.json --max-regression 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
 import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager, redirect_stdout
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
 
 # Ajout du chemin racine pour les imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.agent_nina import AgentNina
-
-def run_benchmark(query: str, agent: AgentNina):
-    """Exécute une requête et mesure le temps de réponse."""
-    start_time = time.time()
-    response = agent.think_and_respond(query)
-    end_time = time.time()
-    
-    duration = end_time - start_time
-    num_tokens = len(response.split())
-    tokens_per_second = num_tokens / duration if duration > 0 else 0
-    
-    print("\n--- Résultat du Benchmark ---")
-    print(f"Requête: {query}")
-    print(f"Réponse: {response}")
-    print("-----------------------------")
-    print(f"Temps total de réponse: {duration:.2f} secondes")
-    print(f"Nombre de tokens générés: {num_tokens}")
-    print(f"Vitesse: {tokens_per_second:.2f} tokens/seconde")
-    print("-----------------------------")
-    
-    return {"duration": duration, "tokens": num_tokens, "tps": tokens_per_second}
-
-def main():
-    print("🚀 Lancement du benchmark de performance de Nina...")
-    
-    # Assurez-vous qu'Ollama et Qdrant sont lancés
-    os.environ['QDRANT_URL'] = 'http://localhost:6333'
-    
+from tools.context_renderer import estimate_tokens
+
+try:
+    import resource  # type: ignore  # absent sous Windows
+except ImportError:
+    resource = None
+
+STAGES = ("routing", "retrieval", "collection", "synthesis")
+
+
+# ----------------------------------------------------------------------
+# Latences simulées
+# ----------------------------------------------------------------------
+
+class LatencyModel:
+    """Distribution de latence en millisecondes, tirée avec le générateur fourni."""
+
+    def __init__(self, spec: str = "none"):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(x) for x in args.split(",") if x.strip()]
+        expected = {"none": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Distribution de latence invalide : '{spec}'")
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(max(median, 1e-6)), sigma)
+        return 0.0
+
+    def sleep(self, rng: random.Random, extra_ms: float = 0.0):
+        delay = self.sample_ms(rng) + extra_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+
+def _stable_hash(text: str) -> int:
+    """Hachage stable d'un processus à l'autre (contrairement à `hash`)."""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+# ----------------------------------------------------------------------
+# Doubles du LLM et de la recherche
+# ----------------------------------------------------------------------
+
+_ROUTED_QUERY_RE = re.compile(r'Requête de l\'utilisateur : "(.*)"', re.S)
+_WORDS = ("modèle langage données réseau énergie climat histoire économie santé recherche "
+          "système mémoire agent analyse source résultat méthode étude effet cause").split()
+
+
+class FakeLLM:
+    """LLM déterministe : même prompt, même réponse ; coût de préremplissage et de décodage simulé.
+
+    Le routage suit un mélange fixe calculé sur la requête (70 % recherche,
+    20 % raisonnement, 10 % conversation).
+    """
+
+    use_ollama = True
+
+    def __init__(self, latency: LatencyModel, prefill_tps: float = 5000.0, decode_tps: float = 400.0,
+                 answer_tokens: int = 60, seed: int = 0):
+        self.latency = latency
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.answer_tokens = answer_tokens
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    @staticmethod
+    def route(query: str) -> str:
+        bucket = _stable_hash(query) % 10
+        if bucket < 7:
+            return "recherche_information"
+        if bucket < 9:
+            return "raisonnement_pur"
+        return "conversation_simple"
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        routed = _ROUTED_QUERY_RE.search(prompt) if prompt.rstrip().endswith("Catégorie:") else None
+        if routed:
+            text = self.route(routed.group(1))
+        else:
+            rng = random.Random(_stable_hash(prompt))
+            text = " ".join(rng.choice(_WORDS) for _ in range(self.answer_tokens)) + "."
+        prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.output_tokens += output_tokens
+        cost_ms = 1000 * (prompt_tokens / self.prefill_tps + output_tokens / self.decode_tps)
+        self.latency.sleep(self.rng, cost_ms)
+        return text
+
+
+class FakeSearch:
+    """Remplace `AgentChercheurV3` : extraits web et passages de pages synthétiques."""
+
+    def __init__(self, latency: LatencyModel, snippets: int = 5, pages: int = 3, chunks_per_page: int = 3,
+                 seed: int = 0):
+        self.latency = latency
+        self.snippets = snippets
+        self.pages = pages
+        self.chunks_per_page = chunks_per_page
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def _sentence(rng: random.Random, query: str, n_words: int) -> str:
+        words = [rng.choice(_WORDS) for _ in range(n_words)]
+        return f"{query.rstrip(' ?')} : " + " ".join(words) + "."
+
+    def collect_data(self, source_type: str, query: str) -> List[str]:
+        self.latency.sleep(self.rng)
+        rng = random.Random(_stable_hash(f"{source_type}|{query}"))
+        return [self._sentence(rng, query, 25) for _ in range(self.snippets)]
+
+    def collect_pages(self, query: str, top_n: int = 3) -> List[Dict[str, Any]]:
+        if not self.pages:
+            return []
+        self.latency.sleep(self.rng)
+        rng = random.Random(_stable_hash(f"pages|{query}"))
+        chunks = []
+        for p in range(min(top_n, self.pages)):
+            url = f"https://example.org/{_stable_hash(query) % 1000}/{p}"
+            for _ in range(self.chunks_per_page):
+                chunks.append({"url": url, "title": f"Page {p}", "text": self._sentence(rng, query, 120)})
+        return chunks
+
+
+# ----------------------------------------------------------------------
+# Chronométrage par étape
+# ----------------------------------------------------------------------
+
+class StageTimer:
+    """Temps passé par étape pour la requête en cours (contexte d'exécution appelant).
+
+    Seule l'étape la plus externe est comptée : l'appel au LLM fait pendant le
+    routage compte dans `routing`, pas dans `synthesis`. Les étapes lancées en
+    arrière-plan (recherche spéculative) comptent pour la requête qui les a
+    lancées : elles peuvent chevaucher les autres.
+    """
+
+    def __init__(self):
+        self._stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("bench_stages", default=None)
+        self._depth: ContextVar[int] = ContextVar("bench_stage_depth", default=0)
+        self._lock = threading.Lock()
+
+    def begin(self):
+        self._stages.set(defaultdict(float))
+
+    def end(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stages.get() or {})
+
+    @contextmanager
+    def stage(self, name: str):
+        if self._stages.get() is None:
+            self.begin()
+        if self._depth.get():
+            yield
+            return
+        token = self._depth.set(1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stages.get()[name] += time.perf_counter() - start
+            self._depth.reset(token)
+
+    def wrap(self, func: Callable, name: str) -> Callable:
+        def timed(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return timed
+
+
+class _StageProxy:
+    """Délègue à `target` en chronométrant chaque appel de méthode sous l'étape `stage`."""
+
+    def __init__(self, target, stage: str, timer: StageTimer):
+        self._target = target
+        self._stage = stage
+        self._timer = timer
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        return self._timer.wrap(attr, self._stage) if callable(attr) else attr
+
+    def __bool__(self):
+        return bool(self._target)
+
+
+# ----------------------------------------------------------------------
+# Exécution
+# ----------------------------------------------------------------------
+
+@dataclass
+class BenchConfig:
+    requests: int = 100
+    clients: int = 1
+    warmup: int = 2
+    seed: int = 42
+    llm_latency: str = "lognormal:20,0.3"
+    search_latency: str = "lognormal:80,0.5"
+    prefill_tps: float = 5000.0
+    decode_tps: float = 400.0
+    answer_tokens: int = 60
+    snippets: int = 5
+    pages: int = 3
+    trace_memory: bool = False
+
+
+@dataclass
+class RequestResult:
+    client: int
+    query: str
+    route: str
+    latency: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+_SUBJECTS = ("la photosynthèse", "les réseaux de neurones", "la révolution industrielle", "le climat en Europe",
+             "les vaccins à ARN", "la fusion nucléaire", "l'économie circulaire", "les trous noirs",
+             "la blockchain", "le sommeil", "les volcans", "la démocratie athénienne")
+_TEMPLATES = ("Explique-moi {s}.", "Quelles sont les dernières avancées sur {s} ?", "Résume l'histoire de {s}.",
+              "Quels sont les enjeux de {s} ?", "Compare {s} et {t}.", "Si {s} doublait, que se passerait-il ?",
+              "Merci pour {s} !")
+
+
+def make_queries(n: int, seed: int) -> List[str]:
+    """Requêtes déterministes, variées (routage, recouvrement avec la mémoire)."""
+    rng = random.Random(seed)
+    return [rng.choice(_TEMPLATES).format(s=rng.choice(_SUBJECTS), t=rng.choice(_SUBJECTS)) for _ in range(n)]
+
+
+def build_agent(config: BenchConfig, client: int, timer: StageTimer, workdir: str):
+    """`AgentNina` dont le LLM et la recherche sont simulés et la persistance est locale."""
+    from agents.agent_nina import AgentNina
+    from agents.agent_redacteur import AgentRedacteur
+    from tools.sql_db import SQLDatabase
+    from tools.vector_db import VectorDB
+
+    seed = config.seed * 1000 + client
+    llm = FakeLLM(LatencyModel(config.llm_latency), config.prefill_tps, config.decode_tps,
+                  config.answer_tokens, seed=seed)
+    search = FakeSearch(LatencyModel(config.search_latency), config.snippets, config.pages, seed=seed)
+
+    nina = AgentNina()
+    nina.sql_db = SQLDatabase(f"sqlite:///{os.path.join(workdir, f'bench_{client}.db')}")
+    nina.conversation_history = []
+    nina.user_profile = {}
+    nina.local_llm = _StageProxy(llm, "synthesis", timer)
+    nina.chercheur = _StageProxy(search, "collection", timer)
+    nina.vectordb = _StageProxy(VectorDB(collection=f"bench_{client}"), "retrieval", timer)
+    nina.redacteur = _StageProxy(AgentRedacteur(llm=llm), "synthesis", timer)
+    nina.analyze_request = timer.wrap(nina.analyze_request, "routing")
+    nina.fake_llm = llm
+    return nina
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile `q` (0-100) par interpolation linéaire."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def distribution(values: List[float]) -> Dict[str, float]:
+    """Résumé en millisecondes."""
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50": round(percentile(ms, 50), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+        "max": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
     try:
-        print("\nInitialisation de l'agent Nina...")
-        nina_agent = AgentNina()
-        print("Agent initialisé.")
-    except Exception as e:
-        print(f"❌ Erreur lors de l'initialisation de Nina : {e}")
-        return
-
-    queries = [
-        "Quelle est la capitale de l'Australie ?",
-        "Explique-moi le principe de la photosynthèse en trois phrases.",
-        "Si je mélange de la peinture bleue et de la peinture jaune, quelle couleur j'obtiens ?"
-    ]
-    
-    all_results = []
-    for query in queries:
-        all_results.append(run_benchmark(query, nina_agent))
-        
-    # Calcul des moyennes
-    avg_duration = sum(r['duration'] for r in all_results) / len(all_results)
-    avg_tps = sum(r['tps'] for r in all_results) / len(all_results)
-    
-    print("\n\n--- 🔥 Rapport de Benchmark Final 🔥 ---")
-    print(f"Temps de réponse moyen: {avg_duration:.2f} secondes")
-    print(f"Vitesse moyenne de génération: {avg_tps:.2f} tokens/seconde")
-    print("----------------------------------------")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                             text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(config: BenchConfig) -> Dict[str, Any]:
+    """Exécute le banc d'essai et retourne le rapport (sérialisable en JSON)."""
+    # Mémoire vectorielle en processus, jamais un serveur Qdrant
+    os.environ.pop("QDRANT_URL", None)
+    # Les spans des requêtes simulées ne doivent pas se mêler aux traces réelles
+    os.environ.setdefault("NINA_TRACE_FILE", "off")
+    queries = make_queries(config.requests, config.seed)
+    timer = StageTimer()
+    results: List[RequestResult] = []
+    results_lock = threading.Lock()
+
+    with tempfile.TemporaryDirectory(prefix="nina-bench-") as workdir:
+        agents = [build_agent(config, c, timer, workdir) for c in range(config.clients)]
+        warmup_queries = make_queries(config.warmup, config.seed + 1)
+        for agent in agents:
+            for query in warmup_queries:
+                agent.think_and_respond(query)
+
+        if config.trace_memory:
+            tracemalloc.start()
+        next_index = iter(range(len(queries)))
+        index_lock = threading.Lock()
+
+        def client(client_id: int):
+            agent = agents[client_id]
+            while True:
+                with index_lock:
+                    i = next(next_index, None)
+                if i is None:
+                    return
+                query = queries[i]
+                timer.begin()
+                start = time.perf_counter()
+                error = None
+                try:
+                    agent.think_and_respond(query)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                result = RequestResult(client_id, query, FakeLLM.route(query), time.perf_counter() - start,
+                                       timer.end(), error)
+                with results_lock:
+                    results.append(result)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(c,), name=f"bench-client-{c}")
+                   for c in range(config.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        traced_peak = None
+        if config.trace_memory:
+            traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            tracemalloc.stop()
+        llm_calls = sum(a.fake_llm.calls for a in agents)
+        prompt_tokens = sum(a.fake_llm.prompt_tokens for a in agents)
+        output_tokens = sum(a.fake_llm.output_tokens for a in agents)
+
+    ok = [r for r in results if r.error is None]
+    by_route: Dict[str, List[float]] = defaultdict(list)
+    for r in ok:
+        by_route[r.route].append(r.latency)
+    stages = {name: distribution([r.stages.get(name, 0.0) for r in ok]) for name in STAGES}
+    stages["other"] = distribution([max(0.0, r.latency - sum(r.stages.values())) for r in ok])
+    errors = [r.error for r in results if r.error]
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": config.__dict__,
+        },
+        "latency_ms": distribution([r.latency for r in ok]),
+        "stages_ms": stages,
+        "routes_ms": {route: distribution(v) for route, v in sorted(by_route.items())},
+        "throughput_rps": round(len(ok) / wall, 3) if wall > 0 else 0.0,
+        "wall_s": round(wall, 3),
+        "requests": len(results),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "llm": {
+            "calls": llm_calls,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+        },
+        "memory": {
+            "max_rss_mb": _max_rss_mb(),
+            "tracemalloc_peak_mb": traced_peak,
+        },
+    }
+
+
+# ----------------------------------------------------------------------
+# Comparaison avec une exécution de référence
+# ----------------------------------------------------------------------
+
+# (chemin dans le rapport, True si une valeur plus haute est meilleure)
+COMPARED_METRICS = [
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    *[(("stages_ms", stage, "p50"), False) for stage in STAGES],
+    (("throughput_rps",), True),
+    (("llm", "prompt_tokens"), False),
+    (("memory", "max_rss_mb"), False),
+]
+
+
+def _lookup(report: Dict[str, Any], path) -> Optional[float]:
+    value: Any = report
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any],
+                    max_regression: float = 10.0) -> List[Dict[str, Any]]:
+    """Écart relatif (%) de chaque métrique ; `regression` si elle se dégrade de plus de `max_regression` %."""
+    rows = []
+    for path, higher_is_better in COMPARED_METRICS:
+        before, after = _lookup(baseline, path), _lookup(current, path)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": ".".join(path),
+            "baseline": before,
+            "current": after,
+            "change_pct": round(change, 1),
+            "regression": worse > max_regression,
+        })
+    return rows
+
+
+def print_report(report: Dict[str, Any]):
+    meta = report["meta"]
+    print("\n--- Benchmark Nina (hors ligne) ---")
+    print(f"Commit: {meta['commit'] or '?'} | Python {meta['python']} | {meta['cpus']} CPU")
+    print(f"Requêtes: {report['requests']} ({report['errors']} erreurs) | "
+          f"clients: {meta['config']['clients']} | durée: {report['wall_s']:.2f} s")
+    print(f"Débit: {report['throughput_rps']:.2f} requêtes/s")
+    print(f"{'':14}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    rows = [("total", report["latency_ms"])] + list(report["stages_ms"].items()) + \
+           [(f"route:{k[:9]}", v) for k, v in report["routes_ms"].items()]
+    for name, dist in rows:
+        print(f"{name:14}{dist['p50']:>10.1f}{dist['p95']:>10.1f}{dist['p99']:>10.1f}")
+    llm, memory = report["llm"], report["memory"]
+    print(f"LLM: {llm['calls']} appels, {llm['prompt_tokens']} tokens de prompt, {llm['output_tokens']} générés")
+    print(f"Mémoire: pic RSS {memory['max_rss_mb']} Mo"
+          + (f", pic tracemalloc {memory['tracemalloc_peak_mb']} Mo" if memory["tracemalloc_peak_mb"] else ""))
+    for error in report["error_samples"]:
+        print(f"  ❌ {error}")
+    print("-----------------------------------")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de Nina")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=1, help="clients concurrents")
+    parser.add_argument("--warmup", type=int, default=2, help="requêtes d'échauffement par client")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", default=BenchConfig.llm_latency)
+    parser.add_argument("--search-latency", default=BenchConfig.search_latency)
+    parser.add_argument("--prefill-tps", type=float, default=BenchConfig.prefill_tps)
+    parser.add_argument("--decode-tps", type=float, default=BenchConfig.decode_tps)
+    parser.add_argument("--answer-tokens", type=int, default=BenchConfig.answer_tokens)
+    parser.add_argument("--pages", type=int, default=BenchConfig.pages, help="pages par recherche (0 : sans deep fetch)")
+    parser.add_argument("--tracemalloc", action="store_true", help="mesure le pic d'allocation Python (plus lent)")
+    parser.add_argument("--verbose", action="store_true", help="affiche les journaux des agents")
+    parser.add_argument("--json", metavar="PATH", help="écrit le rapport JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare à un rapport JSON de référence")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="dégradation tolérée (%%) avant échec de --compare")
+    args = parser.parse_args(argv)
+
+    config = BenchConfig(
+        requests=args.requests, clients=max(1, args.clients), warmup=args.warmup, seed=args.seed,
+        llm_latency=args.llm_latency, search_latency=args.search_latency, prefill_tps=args.prefill_tps,
+        decode_tps=args.decode_tps, answer_tokens=args.answer_tokens, pages=args.pages,
+        trace_memory=args.tracemalloc,
+    )
+    print("🚀 Lancement du benchmark hors ligne de Nina...")
+    if args.verbose:
+        report = run_benchmark(config)
+    else:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            report = run_benchmark(config)
+    print_report(report)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Rapport écrit dans {args.json}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_reports(baseline, report, args.max_regression)
+        print(f"\nComparaison avec {args.compare} (commit {baseline.get('meta', {}).get('commit') or '?'}):")
+        for row in rows:
+            flag = "  ⚠️ régression" if row["regression"] else ""
+            print(f"  {row['metric']:26}{row['baseline']:>12}{row['current']:>12}{row['change_pct']:>+9.1f}%{flag}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
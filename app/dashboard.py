@@ -1,36 +1,112 @@
-import streamlit as st
-import pandas as pd
-import json
 import os
+import sys
+import threading
 from datetime import datetime
 
+import pandas as pd
+import streamlit as st
+
+# Ajout du chemin racine pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.log_tail import JsonlTail, TraceAggregator
+from tools.tracing import DEFAULT_TRACE_FILE
+
 LOG_FILE = 'logs/memory_stats.jsonl'
+TRACE_FILE = os.getenv("NINA_TRACE_FILE", DEFAULT_TRACE_FILE)
+# Historique relu au premier affichage : au-delà, seul le nouveau contenu est lu
+BACKFILL_MB = int(os.getenv("NINA_DASHBOARD_BACKFILL_MB", "64"))
+MAX_MEMORY_ROWS = 5000
+
+
+class _LogState:
+    """État conservé entre les reruns Streamlit : offsets de lecture et agrégats."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.trace_tail = JsonlTail(TRACE_FILE, max_backfill_bytes=BACKFILL_MB * 1024 * 1024)
+        self.traces = TraceAggregator(bucket_seconds=60, max_buckets=720)
+        self.memory_tail = JsonlTail(LOG_FILE, max_backfill_bytes=BACKFILL_MB * 1024 * 1024)
+        self.memory_rows = []
+
+    def refresh(self):
+        """Ne lit que les lignes ajoutées depuis le dernier rerun (rien si le fichier n'a pas changé)."""
+        with self.lock:
+            self.traces.add_many(self.trace_tail.read_new())
+            new_rows = list(self.memory_tail.read_new())
+            if new_rows:
+                self.memory_rows.extend(new_rows)
+                # Sous-échantillonnage : on garde une ligne sur deux de la partie la plus ancienne
+                if len(self.memory_rows) > MAX_MEMORY_ROWS:
+                    half = len(self.memory_rows) // 2
+                    self.memory_rows = self.memory_rows[:half:2] + self.memory_rows[half:]
+
+
+@st.cache_resource
+def get_state() -> _LogState:
+    return _LogState()
+
+
+def to_frame(rows):
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df.set_index('time')
+
+
+st.title("Dashboard Nina")
+
+state = get_state()
+state.refresh()
+traces = state.traces
+
+st.caption(f"{traces.records} spans agrégés par intervalles de {traces.bucket_seconds:.0f} s "
+           f"— mis à jour {datetime.now():%H:%M:%S}")
+if st.button("Rafraîchir"):
+    st.rerun()
+
+if not traces.records:
+    st.warning(f"Aucune trace trouvée dans {TRACE_FILE}. Exécutez quelques requêtes pour en générer.")
+else:
+    st.subheader("Latence du pipeline (ms)")
+    names = traces.span_names()
+    default = "request" if "request" in names else names[0]
+    span_name = st.selectbox("Étape", names, index=names.index(default))
+    latency = to_frame(traces.latency_series(span_name))
+    if not latency.empty:
+        st.line_chart(latency[['p50', 'p95', 'p99']])
+
+    cache = to_frame(traces.cache_series())
+    if not cache.empty:
+        st.subheader("Taux de succès des caches")
+        st.line_chart(cache)
 
-def load_stats():
-    records = []
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    records.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-    return pd.DataFrame(records)
+    tokens = to_frame(traces.token_series())
+    if not tokens.empty:
+        st.subheader("Tokens LLM")
+        st.bar_chart(tokens[['prompt_tokens', 'completion_tokens']])
+        st.caption("Débit de génération (tokens/s de LLM)")
+        st.line_chart(tokens[['decode_tps']])
 
-st.title("Dashboard Mémoire Nina")
+    sources = traces.source_latency()
+    if sources:
+        st.subheader("Latence par source de recherche (ms)")
+        st.dataframe(pd.DataFrame.from_dict(sources, orient='index'))
 
-df = load_stats()
+st.subheader("Mémoire")
+df = pd.DataFrame(state.memory_rows)
 if df.empty:
-    st.warning("Aucun log de mémoire trouvé. Exécutez quelques interactions pour générer des logs.")
+    st.info("Aucun log de mémoire trouvé.")
 else:
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     df = df.set_index('timestamp')
 
-    st.subheader("Évolution du nombre de conversations et de mémoires compressées")
+    st.caption("Évolution du nombre de conversations et de mémoires compressées")
     st.line_chart(df[['conversations', 'compressed_memories']])
 
-    st.subheader("Taille du graphe (entités et connexions)")
+    st.caption("Taille du graphe (entités et connexions)")
     st.line_chart(df[['entities_in_graph', 'total_connections']])
 
-    st.subheader("Statistiques détaillées")
-    st.dataframe(df) 
\ No newline at end of file
+    st.caption("Dernières statistiques détaillées")
+    st.dataframe(df.tail(200))
@@ -18,14 +18,20 @@ try:
 except ImportError:
     pass
 
-from orchestrator import Orchestrator
+from tools.lazy import component, import_attr, preload
 
 
 class NinaInterface:
     """Interface utilisateur moderne pour Nina."""
     
-    def __init__(self):
-        self.orchestrator = Orchestrator()
+    # Orchestrateur (client LLM, outils) construit au premier usage ou en tâche de fond
+    orchestrator = component(lambda self: import_attr("app.orchestrator:Orchestrator")(
+        openrouter_api_key=os.getenv("OPENROUTER_API_KEY", "")
+    ))
+    
+    def __init__(self, started_at: Optional[float] = None):
+        # Instant de lancement du processus (time.perf_counter), pour mesurer le démarrage
+        self.started_at = started_at
         self.session_history = []
         
     def print_banner(self):
@@ -106,7 +112,13 @@ class NinaInterface:
         self.print_banner()
         self.print_commands()
         
-        print("\n🚀 Nina est prête ! Posez votre première question :")
+        if self.started_at is not None:
+            ready_ms = (time.perf_counter() - self.started_at) * 1000
+            print(f"\n🚀 Nina est prête en {ready_ms:.0f} ms ! Posez votre première question :")
+        else:
+            print("\n🚀 Nina est prête ! Posez votre première question :")
+        # Les composants lourds se construisent pendant que l'utilisateur tape
+        preload(self, ["orchestrator"])
         
         while True:
             try:
@@ -125,7 +137,7 @@ class NinaInterface:
                 start_time = time.time()
                 
                 try:
-                    response = self.orchestrator.orchestrate(user_input)
+                    response = self.orchestrator.run(user_input)
                     duration = time.time() - start_time
                     
                     # Sauvegarde dans l'historique
@@ -1,18 +1,35 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import sys
 import os
 import json
 import re # Importer le module pour les expressions régulières
+import codecs
+import mmap
+import stat
+import uuid
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.agent_openrouter import AgentOpenRouter
-from duckduckgo_search import DDGS
+from tools.lazy import component, import_attr
+from tools.react_history import ReActHistory
+from tools.tracing import get_tracer
+
+# duckduckgo_search, requests et le client OpenRouter sont importés au premier usage
 
 # --- Définition des Outils ---
 
 class FileSystemTool:
-    """Outil pour lire et écrire dans des fichiers locaux dans un 'workspace' sécurisé."""
+    """Outil pour lire et écrire dans des fichiers locaux dans un 'workspace' sécurisé.
+
+    Les lectures sont bornées et par plages (octets ou lignes) : un fichier de
+    plusieurs Go se parcourt sans jamais être chargé en mémoire. Chaque lecture
+    annonce la taille du fichier pour que l'orchestrateur décide de la suite.
+    """
+
+    # Taille maximale renvoyée par une lecture (octets)
+    MAX_READ_BYTES = 64 * 1024
+    MAX_LINES = 500
+
     def __init__(self, workspace_dir: str = "workspace"):
         self.workspace_dir = os.path.abspath(workspace_dir)
         if not os.path.exists(self.workspace_dir):
@@ -26,103 +43,268 @@ class FileSystemTool:
         
         return os.path.join(self.workspace_dir, filename)
 
-    def read_file(self, filename: str) -> str:
-        """Lit le contenu d'un fichier dans le workspace."""
+    def file_info(self, filename: str) -> Dict[str, Any]:
+        """Taille et date de modification, sans lire le fichier."""
+        st = os.stat(self._get_safe_path(filename))
+        return {"filename": filename, "size": st.st_size, "modified": st.st_mtime}
+
+    def read_file(self, filename: str, offset: int = 0, length: Optional[int] = None) -> str:
+        """Lit au plus `length` octets à partir de `offset` (plage alignée sur les caractères UTF-8)."""
+        try:
+            safe_path = self._get_safe_path(filename)
+            size = os.path.getsize(safe_path)
+            offset = max(0, int(offset))
+            length = self.MAX_READ_BYTES if length is None else max(0, min(int(length), self.MAX_READ_BYTES))
+            with open(safe_path, 'rb') as f:
+                f.seek(offset)
+                raw = f.read(length + 3)  # marge pour compléter un caractère coupé en fin de plage
+            # Début de plage au milieu d'un caractère multi-octets : on saute les octets de continuation
+            skip = 0
+            while skip < min(3, len(raw)) and raw[skip] & 0xC0 == 0x80:
+                skip += 1
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            end = min(len(raw), skip + length)
+            text = decoder.decode(raw[skip:end])
+            # Compléter le dernier caractère s'il est coupé par la borne de plage
+            while decoder.getstate()[0] and end < len(raw):
+                text += decoder.decode(raw[end:end + 1])
+                end += 1
+            start, stop = offset + skip, offset + end
+            header = f"[{filename} : {size} octets, plage {start}-{stop}"
+            header += f", suite avec offset={stop}]" if stop < size else "]"
+            return f"{header}\n{text}"
+        except FileNotFoundError:
+            return f"Erreur: Le fichier '{filename}' n'a pas été trouvé."
+        except Exception as e:
+            return f"Erreur lors de la lecture du fichier: {e}"
+
+    def read_lines(self, filename: str, start: int = 1, count: int = 100) -> str:
+        """Lit les lignes `start` à `start + count - 1` (numérotées à partir de 1) en flux."""
         try:
             safe_path = self._get_safe_path(filename)
-            with open(safe_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            size = os.path.getsize(safe_path)
+            start, count = max(1, int(start)), max(1, min(int(count), self.MAX_LINES))
+            lines = []
+            with open(safe_path, 'r', encoding='utf-8', errors='replace') as f:
+                for number, line in enumerate(f, start=1):
+                    if number >= start + count:
+                        break
+                    if number >= start:
+                        lines.append(f"{number}: {line.rstrip()}")
+            header = f"[{filename} : {size} octets, lignes {start}-{start + len(lines) - 1}]"
+            return "\n".join([header] + lines) if lines else f"{header}\n(aucune ligne à partir de {start})"
         except FileNotFoundError:
             return f"Erreur: Le fichier '{filename}' n'a pas été trouvé."
         except Exception as e:
             return f"Erreur lors de la lecture du fichier: {e}"
 
-    def write_file(self, filename: str, content: str) -> str:
-        """Écrit du contenu dans un fichier du workspace."""
+    def search_file(self, filename: str, pattern: str, regex: bool = False, max_matches: int = 50) -> str:
+        """Recherche à la grep dans un fichier projeté en mémoire (mmap) : rien n'est chargé d'un bloc."""
         try:
             safe_path = self._get_safe_path(filename)
-            with open(safe_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            size = os.path.getsize(safe_path)
+            if size == 0:
+                return f"[{filename} : 0 octets, 0 correspondance]"
+            needle = re.compile(pattern.encode('utf-8') if regex else re.escape(pattern.encode('utf-8')))
+            matches = []
+            with open(safe_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                line_no, counted_to = 1, 0
+                last_line_start = -1
+                for match in needle.finditer(mm):
+                    line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                    if line_start == last_line_start:
+                        continue  # une seule sortie par ligne
+                    # Comptage des lignes par blocs bornés (jamais de copie d'une grande plage)
+                    for block_start in range(counted_to, line_start, 1 << 20):
+                        line_no += mm[block_start:min(block_start + (1 << 20), line_start)].count(b"\n")
+                    counted_to = line_start
+                    last_line_start = line_start
+                    line_end = mm.find(b"\n", match.end())
+                    line = mm[line_start:line_end if line_end != -1 else size][:500]
+                    matches.append(f"{line_no}: {line.decode('utf-8', errors='replace').rstrip()}")
+                    if len(matches) >= max_matches:
+                        break
+            header = f"[{filename} : {size} octets, {len(matches)} correspondance(s)"
+            header += ", limite atteinte]" if len(matches) >= max_matches else "]"
+            return "\n".join([header] + matches)
+        except FileNotFoundError:
+            return f"Erreur: Le fichier '{filename}' n'a pas été trouvé."
+        except re.error as e:
+            return f"Erreur: motif invalide ({e})."
+        except Exception as e:
+            return f"Erreur lors de la recherche dans le fichier: {e}"
+
+    def iter_chunks(self, filename: str, chunk_size: int = 1024 * 1024):
+        """Itère sur le contenu brut du fichier par blocs (usage programmatique)."""
+        with open(self._get_safe_path(filename), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def write_file(self, filename: str, content: str, mode: str = "w") -> str:
+        """Écrit du contenu dans un fichier du workspace.
+
+        `mode="w"` remplace le fichier de façon atomique (fichier temporaire puis
+        renommage) ; `mode="a"` ajoute à la fin.
+        """
+        try:
+            safe_path = self._get_safe_path(filename)
+            os.makedirs(os.path.dirname(safe_path), exist_ok=True)
+            if mode == "a":
+                with open(safe_path, 'a', encoding='utf-8') as f:
+                    f.write(content)
+                return f"Contenu ajouté au fichier '{filename}'."
+            if mode != "w":
+                return f"Erreur: mode d'écriture '{mode}' inconnu (attendu 'w' ou 'a')."
+            permissions = self._file_permissions(safe_path)
+            tmp_path = os.path.join(os.path.dirname(safe_path), f".tmp-{uuid.uuid4().hex}")
+            # Créé en 0o666 : le noyau applique le umask, comme pour un open() ordinaire
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    # Un fichier remplacé garde ses droits
+                    if permissions is not None and hasattr(os, "fchmod"):
+                        os.fchmod(f.fileno(), permissions)
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, safe_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             return f"Le fichier '{filename}' a été écrit avec succès."
         except Exception as e:
             return f"Erreur lors de l'écriture du fichier: {e}"
 
+    @staticmethod
+    def _file_permissions(path: str) -> Optional[int]:
+        """Droits du fichier existant, `None` s'il n'existe pas encore."""
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            return None
+
 class WebSearchTool:
     """Un outil qui effectue une véritable recherche sur le web avec DuckDuckGo."""
+
+    # Longueur du contenu de page ajouté à chaque résultat en mode deep fetch
+    PAGE_EXCERPT_CHARS = 1500
+
+    def __init__(self, deep_fetch: Optional[bool] = None):
+        if deep_fetch is None:
+            deep_fetch = os.getenv("NINA_DEEP_FETCH", "0") == "1"
+        self.page_fetcher = import_attr("tools.page_fetcher:PageFetcher")() if deep_fetch else None
+
     def run(self, query: str) -> str:
         """Exécute la recherche et retourne les 3 premiers résultats."""
         print(f"--- TOOL: WebSearchTool, QUERY: '{query}' ---")
         try:
-            with DDGS() as ddgs:
-                results = [r for r in ddgs.text(query, max_results=3)]
-                if not results:
-                    return "Aucun résultat trouvé."
-                
-                # Formatter les résultats pour le LLM
-                formatted_results = "\n".join([
-                    f"- Titre: {res.get('title', 'N/A')}\n"
-                    f"  Extrait: {res.get('body', 'N/A')}\n"
-                    f"  Source: {res.get('href', 'N/A')}"
-                    for res in results
-                ])
-                return formatted_results
+            from tools.search_cache import get_search_cache
+            results = get_search_cache().get_or_fetch(
+                "duckduckgo", query, lambda: self._search(query), params={"max_results": 3}
+            )
+            if not results:
+                return "Aucun résultat trouvé."
+
+            # Deep fetch : texte principal des pages au lieu du seul extrait
+            page_texts = {}
+            if self.page_fetcher:
+                for page in self.page_fetcher.fetch_many([res.get('href') for res in results]):
+                    if page.text:
+                        page_texts[page.url] = page.text[:self.PAGE_EXCERPT_CHARS]
+
+            # Formatter les résultats pour le LLM
+            formatted_results = "\n".join([
+                f"- Titre: {res.get('title', 'N/A')}\n"
+                f"  Extrait: {page_texts.get(res.get('href')) or res.get('body', 'N/A')}\n"
+                f"  Source: {res.get('href', 'N/A')}"
+                for res in results
+            ])
+            return formatted_results
         except Exception as e:
             return f"Erreur lors de la recherche web: {e}"
 
+    @staticmethod
+    def _search(query: str) -> list:
+        from duckduckgo_search import DDGS
+        from tools.rate_limiter import get_rate_limiter
+        get_rate_limiter().acquire("duckduckgo.com")
+        with DDGS() as ddgs:
+            return [r for r in ddgs.text(query, max_results=3)]
+
 # --- Orchestrateur ReAct ---
 class Orchestrator:
     """Orchestre une tâche complexe en utilisant un raisonnement ReAct."""
 
     MAX_ITERATIONS = 5
 
-    def __init__(self, openrouter_api_key: str):
-        """Initialise l'orchestrateur avec le moteur LLM et les outils."""
-        self.llm = AgentOpenRouter(api_key=openrouter_api_key)
-        self.tools = {
-            "web_search": WebSearchTool().run,
-            "read_file": FileSystemTool().read_file,
-            "write_file": FileSystemTool().write_file,
-        }
-
-    def _build_react_prompt(self, task: str, history: List[str]) -> List[Dict[str, str]]:
-        """Construit le prompt pour le LLM en incluant l'historique de la boucle ReAct."""
-        system_prompt = f"""
+    # Prompt système constant (identique octet pour octet à chaque itération) :
+    # le préfixe peut ainsi être servi par le cache de prompt du fournisseur.
+    SYSTEM_PROMPT = """
         Vous êtes un assistant IA. Votre unique but est de retourner un bloc de code JSON valide sans aucun autre texte, en-tête ou explication.
         Le JSON doit contenir une 'pensée' et soit une 'action' pour utiliser un outil, soit 'finish' avec la réponse finale.
 
         Exemple de format d'action:
         ```json
-        {{"thought": "Je dois chercher des informations.", "action": {{"tool_name": "web_search", "query": "requête"}}}}
+        {"thought": "Je dois chercher des informations.", "action": {"tool_name": "web_search", "query": "requête"}}
         ```
         ou pour écrire un fichier:
         ```json
-        {{"thought": "Je vais sauvegarder ce texte.", "action": {{"tool_name": "write_file", "filename": "nom_du_fichier.txt", "content": "contenu du fichier"}}}}
+        {"thought": "Je vais sauvegarder ce texte.", "action": {"tool_name": "write_file", "filename": "nom_du_fichier.txt", "content": "contenu du fichier"}}
         ```
 
         Exemple de format de réponse finale:
         ```json
-        {{"thought": "J'ai toutes les informations.", "finish": "Ceci est la réponse finale."}}
+        {"thought": "J'ai toutes les informations.", "finish": "Ceci est la réponse finale."}
         ```
 
         **Outils disponibles**:
         - `web_search`: Utile pour trouver des informations récentes sur un sujet. Prend un `query` en paramètre.
-        - `read_file`: Pour lire le contenu d'un fichier. Prend un `filename` en paramètre.
-        - `write_file`: Pour écrire dans un fichier. Prend un `filename` et `content` en paramètres.
+        - `read_file`: Pour lire un fichier par plage d'octets. Prend un `filename`, et optionnellement `offset` et `length` (64 Ko max). La réponse commence par la taille du fichier.
+        - `read_lines`: Pour lire des lignes précises. Prend un `filename`, et optionnellement `start` (à partir de 1) et `count`.
+        - `search_file`: Pour chercher un texte dans un fichier (même très gros). Prend un `filename` et un `pattern`, optionnellement `regex` (booléen).
+        - `write_file`: Pour écrire dans un fichier. Prend un `filename` et `content` en paramètres, et optionnellement `mode` ("w" pour remplacer, "a" pour ajouter).
+        - `read_observation`: Les observations longues des étapes anciennes sont résumées et référencées (ex. `obs-2`). Pour en relire un morceau, prend `ref`, et optionnellement `offset` et `length` (caractères).
 
         Ne répondez RIEN d'autre que le bloc JSON.
         """
-        messages = [{"role": "system", "content": system_prompt}]
-        history_str = "\n".join(history)
+
+    # Client LLM construit au premier appel (import de requests, chargement du cache)
+    llm = component(lambda self: import_attr("agents.agent_openrouter:AgentOpenRouter")(api_key=self.openrouter_api_key))
+
+    def __init__(self, openrouter_api_key: str):
+        """Initialise l'orchestrateur avec le moteur LLM et les outils."""
+        self.openrouter_api_key = openrouter_api_key
+        files = FileSystemTool()
+        self.tools = {
+            "web_search": WebSearchTool().run,
+            "read_file": files.read_file,
+            "read_lines": files.read_lines,
+            "search_file": files.search_file,
+            "write_file": files.write_file,
+        }
+
+    def _build_react_prompt(self, task: str, history: ReActHistory) -> List[Dict[str, str]]:
+        """Construit le prompt pour le LLM en incluant l'historique compacté de la boucle ReAct."""
+        messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
         
         # Le contexte est construit en ajoutant la tâche initiale et l'historique des actions/observations
-        user_content = f"Tâche à accomplir: {task}\n\nVoici l'historique des étapes précédentes:\n{history_str}\n\nQuelle est votre prochaine action ou votre réponse finale ? Répondez uniquement avec un bloc JSON."
+        user_content = f"Tâche à accomplir: {task}\n\nVoici l'historique des étapes précédentes:\n{history.render()}\n\nQuelle est votre prochaine action ou votre réponse finale ? Répondez uniquement avec un bloc JSON."
         
         messages.append({"role": "user", "content": user_content})
         return messages
 
     def run(self, task: str) -> str:
         """Exécute la boucle ReAct pour accomplir une tâche."""
-        history = []
+        with get_tracer().span("task"):
+            return self._run(task)
+
+    def _run(self, task: str) -> str:
+        history = ReActHistory()
+        # Les observations volumineuses sont stockées hors prompt et relues à la demande
+        tools = {**self.tools, "read_observation": history.read_observation}
         for i in range(self.MAX_ITERATIONS):
             print(f"\n--- Itération {i+1}/{self.MAX_ITERATIONS} ---")
 
@@ -136,7 +318,7 @@ class Orchestrator:
             
             if not json_match:
                 print(f"Erreur: Aucun bloc JSON trouvé dans la réponse du LLM.")
-                history.append(f"Observation: Erreur de formatage, aucun JSON détecté.")
+                history.add_observation("Erreur de formatage, aucun JSON détecté.")
                 continue
 
             json_str = json_match.group(0)
@@ -145,24 +327,25 @@ class Orchestrator:
                 llm_response_json = json.loads(json_str)
                 thought = llm_response_json.get("thought", "(Pas de pensée formulée)")
                 print(f"Pensée: {thought}")
-                history.append(f"Pensée: {thought}")
+                history.add_thought(thought, llm_response_json.get("action"))
 
                 # 2. Act
                 if "action" in llm_response_json:
                     action = llm_response_json["action"]
                     tool_name = action.get("tool_name")
                     
-                    if tool_name in self.tools:
+                    if tool_name in tools:
                         # Préparer les arguments pour l'outil
                         tool_args = action.copy()
                         del tool_args["tool_name"]
                         
-                        observation = self.tools[tool_name](**tool_args)
-                        history.append(f"Observation: {observation}")
+                        with get_tracer().span("tool", tool=tool_name):
+                            observation = tools[tool_name](**tool_args)
+                        history.add_observation(observation)
                         print(f"Observation: {observation}")
                     else:
                         observation = f"Outil '{tool_name}' non trouvé."
-                        history.append(f"Observation: {observation}")
+                        history.add_observation(observation)
                 
                 elif "finish" in llm_response_json:
                     final_answer = llm_response_json.get("finish")
@@ -170,14 +353,14 @@ class Orchestrator:
                     return final_answer
                 
                 else:
-                    history.append("Observation: Le JSON ne contenait ni 'action' ni 'finish'.")
+                    history.add_observation("Le JSON ne contenait ni 'action' ni 'finish'.")
 
             except json.JSONDecodeError:
                 print(f"Erreur: La sortie du LLM n'est pas un JSON valide. Sortie: {llm_response_str}")
-                history.append(f"Observation: Erreur de formatage, le LLM n'a pas retourné un JSON valide.")
+                history.add_observation("Erreur de formatage, le LLM n'a pas retourné un JSON valide.")
             except Exception as e:
                 print(f"Une erreur inattendue est survenue: {e}")
-                history.append(f"Observation: Erreur système inattendue.")
+                history.add_observation("Erreur système inattendue.")
 
 
         return "La tâche n'a pas pu être terminée dans le nombre d'itérations imparti." 
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""prefork.py – Serveur pré-fork : un maître préchauffé, N processus workers.
+
+    python nina.py --serve --processes 4 --workers 4
+
+Le maître construit et préchauffe un seul `AgentNina`, place la mémoire
+vectorielle en mémoire partagée (`tools/shared_state.py`), gèle ses objets
+(`gc.freeze`), ouvre le socket d'écoute puis fork les workers. Chaque worker
+sert le socket hérité avec un `NinaServer` (le noyau répartit les
+connexions) : le GIL ne limite plus le débit à un cœur et l'état chargé
+n'est pas dupliqué.
+
+Un worker qui meurt est relancé. SIGTERM/SIGINT sur le maître est relayé aux
+workers, qui terminent leurs requêtes en cours (voir `NinaServer.shutdown`) ;
+le maître libère ensuite la mémoire partagée.
+
+Limites : les écritures d'un worker (historique, nouveaux documents) restent
+locales à ce worker (la base SQL est partagée) ; une session utilisateur
+n'est relue du disque qu'en cas d'absence dans le worker qui répond ;
+`/metrics` rend les métriques du worker qui répond. Nécessite `os.fork` (Linux, macOS, WSL).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Ajout du chemin racine pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.server import NinaServer, warm_up
+from tools.lazy import component
+from tools.shared_state import SharedArray, freeze_for_fork, release, share_vector_db
+from tools.tracing import get_tracer
+
+
+class PreforkMaster:
+    """Prépare l'état partagé, fork les workers et les supervise."""
+
+    # Un worker qui meurt plus vite que ça est compté comme un échec de démarrage
+    MIN_UPTIME = 2.0
+    MAX_FAST_FAILURES = 5
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000, processes: Optional[int] = None,
+                 workers: int = 4, queue_size: int = 16, request_timeout: float = 60.0,
+                 shutdown_grace: float = 30.0, agent=None):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Le mode pré-fork nécessite os.fork (Linux, macOS ou WSL)")
+        self.host = host
+        self.port = port
+        self.processes = processes or os.cpu_count() or 1
+        self.server_options = dict(workers=workers, queue_size=queue_size, request_timeout=request_timeout,
+                                   shutdown_grace=shutdown_grace)
+        self.agent = agent
+        self.sock: Optional[socket.socket] = None
+        self.segments: List[SharedArray] = []
+        self.children: Dict[int, int] = {}     # pid -> indice du worker
+        self.started: Dict[int, float] = {}
+        self.stopping = False
+        self.fast_failures = 0
+
+    # ------------------------------------------------------------------
+    def prepare(self):
+        """Charge, préchauffe et fige l'état partagé ; ouvre le socket d'écoute."""
+        if self.agent is None:
+            from agents.agent_nina import AgentNina
+            self.agent = AgentNina()
+        warm_up(self.agent)
+        if component.is_built(self.agent, "vectordb"):
+            self.segments = share_vector_db(self.agent.vectordb)
+        self._dispose_connections()
+        get_tracer().flush()
+
+        self.sock = socket.create_server((self.host, self.port), backlog=1024)
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+        freeze_for_fork()
+
+    def _dispose_connections(self):
+        """Les connexions SQL ne doivent pas franchir le fork : chaque worker ouvre les siennes."""
+        if component.is_built(self.agent, "sql_db"):
+            engine = self.agent.sql_db.engine
+            try:
+                engine.dispose(close=False)
+            except TypeError:      # SQLAlchemy < 1.4.33
+                engine.dispose()
+
+    # ------------------------------------------------------------------
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._run_worker(index)
+                code = 0
+            except BaseException as e:
+                print(f"[Prefork] Worker {index} arrêté sur erreur: {e}")
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        self.started[pid] = time.monotonic()
+
+    def _run_worker(self, index: int):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self._dispose_connections()
+        tracer = get_tracer()
+        tracer.service = f"nina-worker-{index}"
+        server = NinaServer(agent=self.agent, sock=self.sock, warm=False, **self.server_options)
+        asyncio.run(server.serve_forever())
+
+    def _signal(self, signum, _frame):
+        if not self.stopping:
+            print(f"[Prefork] Signal {signum} : arrêt des {len(self.children)} workers")
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Bloque jusqu'à l'arrêt de tous les workers."""
+        self.prepare()
+        signal.signal(signal.SIGTERM, self._signal)
+        signal.signal(signal.SIGINT, self._signal)
+        print(f"[Prefork] http://{self.host}:{self.port} : {self.processes} processus × "
+              f"{self.server_options['workers']} threads (maître pid {os.getpid()})")
+        for index in range(self.processes):
+            self._spawn(index)
+        try:
+            while self.children:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                index = self.children.pop(pid, None)
+                if index is None:
+                    continue
+                uptime = time.monotonic() - self.started.pop(pid, 0.0)
+                if self.stopping:
+                    continue
+                code = os.waitstatus_to_exitcode(status)
+                print(f"[Prefork] Worker {index} (pid {pid}) terminé (code {code}) après {uptime:.1f} s")
+                self.fast_failures = self.fast_failures + 1 if uptime < self.MIN_UPTIME else 0
+                if self.fast_failures >= self.MAX_FAST_FAILURES:
+                    print("[Prefork] Les workers échouent au démarrage : arrêt")
+                    self._signal(signal.SIGTERM, None)
+                    continue
+                self._spawn(index)
+        finally:
+            self.sock.close()
+            release(self.segments)
+            print("[Prefork] Arrêté.")
+
+
+def run_prefork(host: str = "127.0.0.1", port: int = 8000, processes: Optional[int] = None, workers: int = 4,
+                queue_size: int = 16, request_timeout: float = 60.0):
+    """Point d'entrée bloquant de `nina.py --serve --processes N`."""
+    if not os.getenv("QDRANT_URL"):
+        # Sans serveur Qdrant, la mémoire en processus doit être celle du moteur local
+        # pour être partagée : qdrant-client en mémoire serait dupliqué dans chaque worker
+        os.environ.setdefault("NINA_VECTOR_BACKEND", "local")
+    PreforkMaster(host=host, port=port, processes=processes, workers=workers, queue_size=queue_size,
+                  request_timeout=request_timeout).run()
@@ -0,0 +1,418 @@
+"""server.py – Serveur HTTP asynchrone (JSON et Server-Sent Events) devant un AgentNina partagé.
+
+    python nina.py --serve --port 8000 --workers 4 --queue-size 16
+
+Points d'entrée :
+    POST /ask           {"query": "...", "session_id": "alice", "timeout": 30}
+                        -> {"answer", "route", "session_id", "elapsed_ms"}
+    POST /ask/stream    même corps ; GET /ask/stream?q=... (EventSource)
+                        événements `queued`, `stage` (un par étape terminée), `answer`, `done`
+    GET  /health        200 tant que le serveur accepte du travail, 503 pendant l'arrêt
+    GET  /metrics       métriques Prometheus du pipeline (tools/tracing.py)
+
+Un seul `AgentNina` est construit et préchauffé au démarrage ; les requêtes
+s'exécutent dans un pool de `workers` threads (le pipeline est bloquant). Au
+plus `workers + queue_size` requêtes sont acceptées à la fois : au-delà, le
+serveur répond 429 avec `Retry-After` au lieu d'allonger la file. Chaque
+requête a une échéance (504 si elle est dépassée ; une requête encore en file
+à son échéance n'est jamais exécutée). SIGTERM/SIGINT : le serveur cesse
+d'accepter les connexions, `/health` passe à 503, les requêtes en cours se
+terminent (dans la limite de `shutdown_grace` secondes).
+
+`session_id` (ou `user_id`) isole l'historique, le résumé et le profil de
+chaque utilisateur (`tools/sessions.py`) ; sans identifiant, la session
+implicite partagée est utilisée.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Ajout du chemin racine pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.sessions import validate_session_id
+from tools.tracing import get_tracer
+
+# Composants construits avant d'accepter la première requête
+WARM_COMPONENTS = ("local_llm", "sql_db", "conversation_history", "user_profile", "vectordb",
+                   "chercheur", "analyste", "redacteur", "sessions", "session_memory")
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 429: "Too Many Requests", 503: "Service Unavailable",
+            504: "Gateway Timeout", 500: "Internal Server Error"}
+
+
+def warm_up(agent, names=WARM_COMPONENTS):
+    """Construit les composants de l'agent avant la première requête."""
+    start = time.perf_counter()
+    for name in names:
+        try:
+            getattr(agent, name)
+        except Exception as e:
+            print(f"[NinaServer] Préchauffage de '{name}' impossible: {e}")
+    print(f"[NinaServer] AgentNina prêt en {time.perf_counter() - start:.2f} s")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class NinaServer:
+    """Serveur asyncio : analyse HTTP/1.1 minimale, file bornée, échéances, arrêt propre."""
+
+    def __init__(self, agent=None, host: str = "127.0.0.1", port: int = 8000, workers: int = 4,
+                 queue_size: int = 16, request_timeout: float = 60.0, max_timeout: float = 300.0,
+                 max_body_bytes: int = 64 * 1024, shutdown_grace: float = 30.0, warm: bool = True,
+                 sock=None):
+        self._agent = agent
+        # Socket d'écoute déjà ouvert (hérité du maître en mode pré-fork)
+        self.sock = sock
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.request_timeout = request_timeout
+        self.max_timeout = max_timeout
+        self.max_body_bytes = max_body_bytes
+        self.shutdown_grace = shutdown_grace
+        self.warm = warm
+        self.tracer = get_tracer()
+        self.inflight = 0            # requêtes acceptées dont le calcul n'est pas terminé
+        self.draining = False
+        self.stats = {"accepted": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nina-worker")
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            from agents.agent_nina import AgentNina
+            self._agent = AgentNina()
+        return self._agent
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stopped = asyncio.Event()
+        if self.warm:
+            await self._loop.run_in_executor(self._pool, warm_up, self.agent)
+        if self.sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=self.sock)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        print(f"[NinaServer] En écoute sur http://{self.host}:{self.port} "
+              f"({self.workers} workers, {self.capacity} requêtes max)")
+
+    async def serve_forever(self):
+        """Sert jusqu'à `shutdown()` (appelé aussi sur SIGTERM/SIGINT)."""
+        if self._server is None:
+            await self.start()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(sig, lambda: asyncio.ensure_future(self.shutdown()))
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows, ou boucle hors du thread principal
+        await self._stopped.wait()
+
+    async def shutdown(self):
+        if self.draining:
+            return
+        self.draining = True
+        print(f"[NinaServer] Arrêt : plus de nouvelles connexions, {self.inflight} requête(s) en cours")
+        self._server.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.shutdown_grace)
+        except asyncio.TimeoutError:
+            print(f"[NinaServer] {self.inflight} requête(s) abandonnée(s) après {self.shutdown_grace:.0f} s")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        flush_sessions = getattr(self._agent, "flush_sessions", None)
+        if flush_sessions is not None:
+            flush_sessions()
+        self.tracer.flush()
+        self._stopped.set()
+
+    # ------------------------------------------------------------------
+    # Admission et exécution
+    # ------------------------------------------------------------------
+    def _admit(self):
+        if self.draining:
+            raise HttpError(503, "Serveur en cours d'arrêt", {"Retry-After": "5", "Connection": "close"})
+        if self.inflight >= self.capacity:
+            self.stats["rejected"] += 1
+            raise HttpError(429, "Serveur saturé, réessayez plus tard", {"Retry-After": "1"})
+        self.inflight += 1
+        self.stats["accepted"] += 1
+        self._idle.clear()
+
+    def _release(self):
+        self.inflight -= 1
+        if self.inflight == 0:
+            self._idle.set()
+
+    def _submit(self, query: str, on_stage=None, session_id: Optional[str] = None):
+        """Soumet la requête au pool ; le créneau est libéré à la fin réelle du calcul."""
+        self._admit()
+        future = self._pool.submit(self._answer, query, on_stage, session_id)
+        future.add_done_callback(self._release_threadsafe)
+        return future
+
+    def _release_threadsafe(self, _future):
+        try:
+            self._loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # boucle déjà fermée (fin de l'arrêt)
+
+    def _answer(self, query: str, on_stage=None, session_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Exécuté dans un thread du pool : réponse et route choisie."""
+        route = {}
+
+        def listener(span):
+            if span.name == "routing":
+                route["value"] = span.attributes.get("route")
+            if on_stage is not None:
+                on_stage(span)
+
+        with self.tracer.listen(listener):
+            answer = self.agent.think_and_respond(query, session_id=session_id)
+        return answer, route.get("value")
+
+    def _deadline(self, payload: Dict[str, Any]) -> float:
+        try:
+            timeout = float(payload.get("timeout") or self.request_timeout)
+        except (TypeError, ValueError):
+            raise HttpError(400, "'timeout' doit être un nombre de secondes")
+        return min(max(timeout, 0.001), self.max_timeout)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            keep_alive = True
+            while keep_alive and not self.draining:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {"error": e.message}, {"Connection": "close"})
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                keep_alive = await self._dispatch(writer, method, path, query, body, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Ligne de requête invalide")
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > 100:
+                raise HttpError(400, "Trop d'en-têtes")
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(400, "Transfer-Encoding chunked non pris en charge")
+        raw_length = headers.get("content-length", "0")
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            raise HttpError(400, "Content-Length invalide")
+        length = int(raw_length)
+        if length > self.max_body_bytes:
+            raise HttpError(413, f"Corps limité à {self.max_body_bytes} octets")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return method.upper(), url.path, parse_qs(url.query), headers, body
+
+    async def _dispatch(self, writer, method: str, path: str, query: Dict, body: bytes, keep_alive: bool) -> bool:
+        """Traite une requête ; retourne False si la connexion doit être fermée."""
+        try:
+            if path == "/health" and method == "GET":
+                status = 503 if self.draining else 200
+                await self._send_json(writer, status, {
+                    "status": "draining" if self.draining else "ok",
+                    "inflight": self.inflight,
+                    "capacity": self.capacity,
+                    **self.stats,
+                }, keep_alive=keep_alive)
+            elif path == "/metrics" and method == "GET":
+                await self._send(writer, 200, self.tracer.metrics.render_prometheus().encode("utf-8"),
+                                 "text/plain; version=0.0.4; charset=utf-8", keep_alive=keep_alive)
+            elif path == "/ask":
+                if method != "POST":
+                    raise HttpError(405, "Utilisez POST")
+                await self._ask(writer, self._parse_payload(body, query), keep_alive)
+            elif path == "/ask/stream":
+                if method not in ("GET", "POST"):
+                    raise HttpError(405, "Utilisez GET ou POST")
+                await self._ask_stream(writer, self._parse_payload(body, query))
+                return False
+            else:
+                raise HttpError(404, f"Chemin inconnu : {path}")
+        except HttpError as e:
+            headers = dict(e.headers)
+            await self._send_json(writer, e.status, {"error": e.message}, headers,
+                                  keep_alive=keep_alive and headers.get("Connection") != "close")
+        return keep_alive and not self.draining
+
+    @staticmethod
+    def _parse_payload(body: bytes, query: Dict) -> Dict[str, Any]:
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HttpError(400, "Corps JSON invalide")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "Le corps doit être un objet JSON")
+        else:
+            payload = {k: v[-1] for k, v in query.items()}
+            if "q" in payload:
+                payload.setdefault("query", payload.pop("q"))
+        text = payload.get("query")
+        if not isinstance(text, str) or not text.strip():
+            raise HttpError(400, "'query' est requis")
+        payload["query"] = text.strip()
+        # Session : identifiant d'utilisateur ou de conversation (historique et profil isolés)
+        session_id = payload.get("session_id", payload.get("user_id"))
+        if session_id is not None:
+            try:
+                payload["session_id"] = validate_session_id(session_id)
+            except ValueError as e:
+                raise HttpError(400, str(e))
+        return payload
+
+    async def _ask(self, writer, payload: Dict[str, Any], keep_alive: bool):
+        deadline = self._deadline(payload)
+        start = time.perf_counter()
+        future = self._submit(payload["query"], session_id=payload.get("session_id"))
+        try:
+            answer, route = await asyncio.wait_for(asyncio.wrap_future(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            # Annule la requête si elle est encore en file ; un calcul commencé va à son terme
+            future.cancel()
+            self.stats["timeouts"] += 1
+            raise HttpError(504, f"Échéance de {deadline:g} s dépassée")
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[NinaServer] Erreur pendant le traitement: {e}")
+            raise HttpError(500, "Erreur interne pendant le traitement de la requête")
+        await self._send_json(writer, 200, {
+            "answer": answer,
+            "route": route,
+            "session_id": payload.get("session_id"),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }, keep_alive=keep_alive)
+
+    async def _ask_stream(self, writer, payload: Dict[str, Any]):
+        deadline = self._deadline(payload)
+        start = time.perf_counter()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_stage(span):
+            event = {"name": span.name, "ms": round(span.duration * 1000, 1)}
+            event.update({k: v for k, v in span.attributes.items() if isinstance(v, (str, int, float, bool))})
+            self._loop.call_soon_threadsafe(events.put_nowait, ("stage", event))
+
+        future = self._submit(payload["query"], on_stage, payload.get("session_id"))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\nX-Accel-Buffering: no\r\n\r\n")
+        await self._send_event(writer, "queued", {"inflight": self.inflight})
+        done = asyncio.ensure_future(asyncio.wrap_future(future))
+        try:
+            while True:
+                remaining = deadline - (time.perf_counter() - start)
+                if remaining <= 0:
+                    future.cancel()
+                    self.stats["timeouts"] += 1
+                    await self._send_event(writer, "error", {"status": 504, "error": f"Échéance de {deadline:g} s dépassée"})
+                    return
+                getter = asyncio.ensure_future(events.get())
+                finished, _ = await asyncio.wait({getter, done}, timeout=remaining,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if getter in finished:
+                    name, data = getter.result()
+                    await self._send_event(writer, name, data)
+                    continue
+                getter.cancel()
+                if done in finished:
+                    break
+            while not events.empty():
+                name, data = events.get_nowait()
+                await self._send_event(writer, name, data)
+            try:
+                answer, route = done.result()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[NinaServer] Erreur pendant le traitement: {e}")
+                await self._send_event(writer, "error", {"status": 500, "error": "Erreur interne"})
+                return
+            await self._send_event(writer, "answer", {"answer": answer, "route": route})
+            await self._send_event(writer, "done", {"elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+        finally:
+            if not done.done():
+                done.cancel()
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def _send(writer, status: int, body: bytes, content_type: str,
+                    headers: Optional[Dict[str, str]] = None, keep_alive: bool = True):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items() if k != "Connection"]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, data: Dict[str, Any],
+                         headers: Optional[Dict[str, str]] = None, keep_alive: bool = True):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8", headers, keep_alive)
+
+    @staticmethod
+    async def _send_event(writer, event: str, data: Dict[str, Any]):
+        writer.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await writer.drain()
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, workers: int = 4, queue_size: int = 16,
+               request_timeout: float = 60.0):
+    """Point d'entrée bloquant de `nina.py --serve`."""
+    server = NinaServer(host=host, port=port, workers=workers, queue_size=queue_size,
+                        request_timeout=request_timeout)
+    asyncio.run(server.serve_forever())
+    print("[NinaServer] Arrêté.")
@@ -0,0 +1,84 @@
+"""Benchmark de la recherche groupée `VectorDB.similarity_search_many`.
+
+Compare `--queries` appels à `similarity_search` à un seul appel à
+`similarity_search_many` (cache de résultats désactivé : chaque requête est
+réellement cherchée). L'embedder simulé, de dimension `--dim`, facture
+`--call-ms` par appel (aller-retour vers un modèle) : `embed` le paie pour
+chaque requête, `embed_batch` une fois par lot.
+
+Usage :
+    python benchmarks/bench_batch_search.py --documents 20000 --queries 1000 --dim 256 --call-ms 0 2
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import embedding_cache
+from tools.vector_db import VectorDB
+
+
+class ModelEmbedder:
+    """Vecteurs pseudo-aléatoires déterministes, avec un coût fixe par appel."""
+
+    def __init__(self, dim: int, call_ms: float):
+        self.dim = dim
+        self.name = f"modele-{dim}-{call_ms}ms"
+        self.delay = call_ms / 1000
+
+    def _vector(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32).tolist()
+
+    def embed(self, text: str):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._vector(text)
+
+    def embed_batch(self, texts):
+        if self.delay:
+            time.sleep(self.delay)
+        return [self._vector(text) for text in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--call-ms", type=float, nargs="+", default=[0.0, 2.0])
+    args = parser.parse_args()
+
+    queries = [f"question d'évaluation {i}" for i in range(args.queries)]
+    print(f"\n--- {args.documents} documents (dimension {args.dim}), {args.queries} requêtes, top {args.top_k} ---")
+    print(f"{'ms/appel':>9} {'filtre':>7} {'une à une ms/req.':>18} {'groupée ms/req.':>16} {'gain':>7}")
+    for call_ms in args.call_ms:
+        embedder = ModelEmbedder(args.dim, 0.0)
+        db = VectorDB(collection=f"bench_batch_{call_ms}", embedder=embedder, dedup=False)
+        db.add_documents([f"Document {i} sur le sujet {i % 50}" for i in range(args.documents)],
+                         [{"type": "web_page" if i % 4 else "web_result"} for i in range(args.documents)])
+        db.cache_results = False
+        embedder.delay = call_ms / 1000
+        for filters in (None, {"type": "web_page"}):
+            embedding_cache.clear_caches()
+            start = time.perf_counter()
+            single = [db.similarity_search(q, top_k=args.top_k, filters=filters) for q in queries]
+            one_by_one = 1000 * (time.perf_counter() - start) / len(queries)
+
+            embedding_cache.clear_caches()
+            start = time.perf_counter()
+            batch = db.similarity_search_many(queries, top_k=args.top_k, filters=filters)
+            grouped = 1000 * (time.perf_counter() - start) / len(queries)
+            assert [[r["text"] for r in res] for res in batch] == [[r["text"] for r in res] for res in single]
+            print(f"{call_ms:>9g} {'oui' if filters else 'non':>7} {one_by_one:>18.3f} {grouped:>16.3f} "
+                  f"{one_by_one / grouped:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark du contexte injecté dans le prompt de `AgentRedacteur.generate_report`.
+
+Compare, sur des résultats de recherche synthétiques de la forme produite par
+`AgentNina._execute_search_task` :
+- avant : `json.dumps(search_results, indent=2)` ;
+- après : `render_context` (dédupliqué, classé, tronqué, citations numérotées).
+
+Mesure les tokens de prompt par requête (estimation BPE de
+`tools.context_renderer.estimate_tokens`) et la latence de synthèse. Sans
+`--ollama`, la latence est modélisée : préremplissage à `--prefill-tps`
+tokens/s plus `--output-tokens` générés à `--decode-tps` tokens/s.
+
+Usage :
+    python benchmarks/bench_context_render.py --requests 200
+    python benchmarks/bench_context_render.py --requests 5 --ollama
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.context_renderer import estimate_tokens, render_context
+
+WORDS = ("modèle langage open source benchmark inférence GPU quantification latence contexte "
+         "entraînement données licence paramètres évaluation déploiement agent recherche mémoire").split()
+
+TEMPLATE = """Tu es Nina, une assistante IA.
+
+**Requête Actuelle :**
+{query}
+
+**Résultats de la Recherche Web :**
+{context}
+
+**Résumé de la Conversation :**
+{summary}
+"""
+
+
+def sentence(rng, n=18):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def fake_results(rng, deep_fetch):
+    web = [f"Titre {i} – {sentence(rng)} {sentence(rng)}" for i in range(5)]
+    web.append(web[0].replace(".", " !", 1))          # même snippet vu sur deux sources
+    memory = [{"text": rng.choice(web) if rng.random() < 0.5 else sentence(rng, 30),
+               "meta": {"type": "web_result", "ts": 1.7e9 + rng.random() * 1e6, "source": "duckduckgo"},
+               "score": round(rng.uniform(0.5, 0.9), 3)} for _ in range(3)]
+    pages = []
+    if deep_fetch:
+        pages = [{"text": " ".join(sentence(rng) for _ in range(8)),
+                  "meta": {"type": "web_page", "source": f"https://site{i}.example/article", "title": f"Article {i}",
+                           "ts": 1.7e9},
+                  "score": round(rng.uniform(0.6, 0.95), 3)} for i in range(3)]
+    return {"web_results": web, "memory_results": memory, "page_passages": pages,
+            "insights": {"nombre_elements": len(web) + len(memory)}, "total_sources": len(web) + len(memory)}
+
+
+def synthesize(prompt, args, llm):
+    if llm is not None:
+        start = time.perf_counter()
+        llm.generate(prompt)
+        return time.perf_counter() - start
+    return estimate_tokens(prompt) / args.prefill_tps + args.output_tokens / args.decode_tps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=1200)
+    parser.add_argument("--deep-fetch", action="store_true", help="inclut des passages de pages complètes")
+    parser.add_argument("--prefill-tps", type=float, default=200.0)
+    parser.add_argument("--decode-tps", type=float, default=20.0)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument("--ollama", action="store_true", help="mesure réelle via AgentLLMLocal")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    llm = None
+    if args.ollama:
+        from agents.agent_llm_local import AgentLLMLocal
+        llm = AgentLLMLocal()
+
+    rng = random.Random(args.seed)
+    rows = {"avant (json indent=2)": ([], []), "après (render_context)": ([], [])}
+    render_ms = []
+    for _ in range(args.requests):
+        query = " ".join(rng.sample(WORDS, 3))
+        results = fake_results(rng, args.deep_fetch)
+        summary = sentence(rng, 40)
+
+        before = TEMPLATE.format(query=query, context=json.dumps(results, indent=2, ensure_ascii=False),
+                                 summary=summary)
+        start = time.perf_counter()
+        ctx = render_context(results, query, budget_tokens=args.budget)
+        render_ms.append((time.perf_counter() - start) * 1000)
+        after = TEMPLATE.format(query=query, context=ctx.text, summary=summary)
+
+        for label, prompt in zip(rows, (before, after)):
+            rows[label][0].append(estimate_tokens(prompt))
+            rows[label][1].append(synthesize(prompt, args, llm))
+
+    mode = "mesurée" if llm else f"modélisée, {args.prefill_tps:.0f} tok/s prefill"
+    for label, (tokens, latency) in rows.items():
+        print(f"{label:<24}: {statistics.mean(tokens):7.0f} tokens de prompt/requête, "
+              f"synthèse {statistics.mean(latency):5.2f} s ({mode})")
+    print(f"coût du rendu : {statistics.mean(render_ms):.2f} ms/requête")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark de la croissance de l'index vectoriel sous un journal de requêtes rejoué.
+
+Chaque requête du journal produit les snippets qu'un moteur de recherche
+renverrait (déterministes par requête, avec les petites variations habituelles :
+ponctuation, casse, suffixe « ... », date). Ils sont ingérés comme dans
+`AgentNina._execute_search_task`, avec et sans déduplication.
+
+Usage :
+    python benchmarks/bench_ingest_dedup.py                      # journal synthétique (Zipf)
+    python benchmarks/bench_ingest_dedup.py --log requetes.txt   # une requête par ligne
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.vector_db import VectorDB
+
+
+def synthetic_log(n_queries: int, vocabulary: int, rng: random.Random):
+    """Journal synthétique : popularité des requêtes en loi de Zipf (s = 1.1)."""
+    weights = [1.0 / (rank ** 1.1) for rank in range(1, vocabulary + 1)]
+    topics = [f"sujet populaire numéro {i}" for i in range(vocabulary)]
+    return rng.choices(topics, weights=weights, k=n_queries)
+
+
+def fake_snippets(query: str, rng: random.Random, per_query: int = 5):
+    """Snippets stables pour une requête, bruités comme des résultats web réels."""
+    base_rng = random.Random(query)
+    snippets = []
+    for i in range(per_query):
+        words = " ".join(base_rng.choice(["modèle", "données", "réseau", "agent", "recherche",
+                                          "langage", "apprentissage", "mémoire", "index"])
+                         for _ in range(18))
+        text = f"Résultat {i} pour {query} : {words}"
+        variant = rng.random()
+        if variant < 0.2:
+            text = text.upper()
+        elif variant < 0.35:
+            text = text + " ..."
+        elif variant < 0.45:
+            text = text.replace(" : ", " - ") + f" (mis à jour le {rng.randint(1, 28)}/06)"
+        snippets.append(text)
+    return snippets
+
+
+def replay(queries, dedup: bool, seed: int):
+    rng = random.Random(seed)
+    db = VectorDB(collection=f"bench_dedup_{dedup}", dedup=dedup)
+    growth = []
+    start = time.perf_counter()
+    for i, query in enumerate(queries, 1):
+        snippets = fake_snippets(query, rng)
+        db.add_documents(snippets, [{"type": "web_result", "ts": time.time()} for _ in snippets])
+        if i % max(1, len(queries) // 10) == 0:
+            growth.append(db.client.count(collection_name=db.collection).count)
+    elapsed = time.perf_counter() - start
+    return db, growth, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="Journal de requêtes (une par ligne)")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--vocabulary", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = synthetic_log(args.queries, args.vocabulary, random.Random(args.seed))
+
+    print(f"\n--- Croissance de l'index : {len(queries)} requêtes rejouées ---")
+    for dedup in (False, True):
+        db, growth, elapsed = replay(queries, dedup, args.seed)
+        total = len(queries) * 5
+        print(f"\ndédup={'oui' if dedup else 'non'}")
+        print(f"  points finaux       : {growth[-1] if growth else 0} (snippets reçus : {total})")
+        print(f"  croissance (déciles): {growth}")
+        print(f"  ingestion           : {1e6 * elapsed / total:.1f} µs/snippet")
+        if dedup:
+            print(f"  stats               : {db.dedup_stats}")
+
+
+if __name__ == "__main__":
+    main()
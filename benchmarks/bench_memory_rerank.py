@@ -0,0 +1,105 @@
+"""Benchmark du re-classement de `AgentMemory.search_conversations`.
+
+Compare l'ancien scoring (boucle Python, pertinence constante à 0.5, parsing
+ISO par résultat, `top_k = limit * 2`) au nouveau (scores cosinus de l'index,
+horodatages epoch, re-classement NumPy sur `rerank_candidates`).
+
+Qualité : chaque requête est le texte exact d'une conversation stockée ; on
+mesure le rappel@k de cette conversation cible.
+
+Usage :
+    python benchmarks/bench_memory_rerank.py --conversations 5000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.agent_memory import AgentMemory
+
+
+def legacy_search(memory: AgentMemory, query: str, limit: int):
+    """Reproduction de l'ancien `search_conversations` (avant re-classement vectorisé)."""
+    results = memory.vector_db.similarity_search(query, top_k=limit * 2)
+    conversations = []
+    for result in results:
+        meta = result.get('meta', {})
+        if meta.get('type') != 'conversation':
+            continue
+        relevance = 0.5  # l'ancien index ne renvoyait pas de score
+        timestamp = meta.get('timestamp')
+        try:
+            days_old = (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds() / 86400
+            recency = 1.0 / (1.0 + 0.1 * days_old)
+        except Exception:
+            recency = 0.0
+        score = (memory.relevance_weight * relevance + memory.recency_weight * recency
+                 + memory.importance_weight * meta.get('importance', 0.5))
+        conversations.append({'text': result['text'], 'composite_score': score})
+    conversations.sort(key=lambda x: x['composite_score'], reverse=True)
+    return conversations[:limit]
+
+
+def populate(memory: AgentMemory, n_conversations: int, n_facts: int, rng: random.Random):
+    texts = []
+    now = time.time()
+    docs, metas = [], []
+    for i in range(n_conversations):
+        text = f"User: question {i} sur le sujet {rng.randint(0, 50)}\nNina: réponse {i}"
+        ts = now - rng.uniform(0, 90) * 86400
+        docs.append(text)
+        metas.append({
+            "type": "conversation",
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "ts": ts,
+            "importance": rng.uniform(0.3, 1.0),
+        })
+        texts.append(text)
+    for i in range(n_facts):
+        docs.append(f"Sujet: ia\nFait: fait {i}")
+        metas.append({"type": "learned_fact", "topic": "ia", "timestamp": datetime.now().isoformat()})
+    memory.vector_db.add_documents(docs, metas)
+    return texts
+
+
+def run(search, memory, queries, limit):
+    hits = 0
+    start = time.perf_counter()
+    for query in queries:
+        results = search(memory, query, limit)
+        hits += any(r['text'] == query for r in results)
+    elapsed = time.perf_counter() - start
+    return {"recall_at_k": hits / len(queries), "ms_per_query": 1000 * elapsed / len(queries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--facts", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        memory = AgentMemory(memory_file=os.path.join(tmp, "data", "memory.json"))
+        texts = populate(memory, args.conversations, args.facts, rng)
+        queries = rng.sample(texts, min(args.queries, len(texts)))
+
+        legacy = run(legacy_search, memory, queries, args.limit)
+        vectorized = run(lambda m, q, k: m.search_conversations(q, k), memory, queries, args.limit)
+
+    print(f"\n--- Re-classement mémoire ({args.conversations} conversations, {args.facts} faits) ---")
+    print(f"{'scoring':<12} {'rappel@' + str(args.limit):>10} {'ms/requête':>12}")
+    for name, res in (("legacy", legacy), ("vectorisé", vectorized)):
+        print(f"{name:<12} {res['recall_at_k']:>10.2%} {res['ms_per_query']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
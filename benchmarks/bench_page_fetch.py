@@ -0,0 +1,76 @@
+"""Benchmark du deep fetch : pages/seconde téléchargées et extraites.
+
+Sert des pages d'articles factices depuis un serveur HTTP local (processus
+séparé, latence simulée par requête), puis compare :
+- séquentiel : `requests.get` + BeautifulSoup page par page (approche naïve) ;
+- PageFetcher, extraction dans les threads de l'appelant ;
+- PageFetcher, extraction dans un pool de processus.
+
+Usage :
+    python benchmarks/bench_page_fetch.py --pages 200 --paragraphs 80 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from bs4 import BeautifulSoup
+
+from tests.page_fixture_server import serve_pages
+from tools.page_fetcher import PageFetcher, chunk_text
+from tools.rate_limiter import HostRateLimiter
+
+
+def run_sequential(urls):
+    session = requests.Session()
+    passages = 0
+    for url in urls:
+        soup = BeautifulSoup(session.get(url, timeout=10).text, "html.parser")
+        for tag in soup(["script", "style", "nav", "header", "footer", "aside"]):
+            tag.decompose()
+        passages += len(chunk_text(soup.get_text("\n")))
+    return passages
+
+
+def run_fetcher(urls, use_processes, workers):
+    # Pas de limite de débit vers le serveur local
+    limiter = HostRateLimiter(limits={"127.0.0.1": (1e6, 1e6)})
+    fetcher = PageFetcher(max_workers=workers, use_processes=use_processes, inline_below=0, rate_limiter=limiter)
+    try:
+        # Échauffement : démarrage du pool de processus hors chronométrage
+        fetcher.fetch_many(urls[:workers])
+        start = time.perf_counter()
+        pages = fetcher.fetch_many(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        fetcher.close()
+    return sum(len(p.chunks) for p in pages), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par page (s)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU, {args.pages} pages, latence {args.latency * 1000:.0f} ms")
+    with serve_pages(paragraphs=args.paragraphs, latency=args.latency, separate_process=True) as base:
+        urls = [f"{base}/article/{i}" for i in range(args.pages)]
+
+        start = time.perf_counter()
+        passages = run_sequential(urls)
+        elapsed = time.perf_counter() - start
+        print(f"séquentiel + BeautifulSoup   : {args.pages / elapsed:7.1f} pages/s  ({passages} passages)")
+
+        for label, use_processes in (("PageFetcher, threads", False), ("PageFetcher, processus", True)):
+            passages, elapsed = run_fetcher(urls, use_processes, args.workers)
+            print(f"{label:<29}: {args.pages / elapsed:7.1f} pages/s  ({passages} passages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark de la quantification des vecteurs du moteur local (rappel, latence, mémoire).
+
+Collection synthétique de vecteurs normalisés regroupés en `--clusters` groupes
+(comme des chunks de pages proches), requêtes tirées près de vecteurs stockés.
+Pour chaque codage (float32, int8, PQ x16/x32/x64) : rappel@k par rapport à
+la recherche exacte, ms par requête et octets par vecteur en RAM, sans puis
+avec re-scoring des `k × --oversampling` meilleurs candidats sur les vecteurs
+pleine précision gardés sur disque.
+
+Usage :
+    python benchmarks/bench_quantization.py --vectors 20000 --dim 256 --oversampling 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.local_vector_store import LocalQdrantClient, models
+from tools.vector_db import VectorDB
+
+ENCODINGS = ["float32", "int8", "pq-x16", "pq-x32", "pq-x64"]
+
+
+def dataset(n: int, dim: int, clusters: int, queries: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.5 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    picked = vectors[rng.integers(0, n, size=queries)]
+    probes = picked + 0.3 * rng.normal(size=picked.shape) / np.sqrt(dim)
+    return vectors.astype(np.float32), probes.astype(np.float32)
+
+
+def build(vectors: np.ndarray, encoding: str) -> LocalQdrantClient:
+    client = LocalQdrantClient(":memory:")
+    config = None if encoding == "float32" else VectorDB.quantization_config(encoding)
+    client.recreate_collection("bench", models.VectorParams(size=vectors.shape[1]), quantization_config=config)
+    for start in range(0, len(vectors), 5000):
+        client.upsert("bench", [models.PointStruct(id=start + i, vector=v) for i, v in
+                                enumerate(vectors[start:start + 5000])])
+    client.collections["bench"].matrix()        # consolide (et entraîne le quantificateur)
+    return client
+
+
+def run(client: LocalQdrantClient, probes: np.ndarray, truth, k: int, params) -> tuple:
+    found = 0
+    start = time.perf_counter()
+    for probe, expected in zip(probes, truth):
+        hits = client.search("bench", probe, limit=k, search_params=params)
+        found += len(expected & {h.id for h in hits})
+    elapsed = time.perf_counter() - start
+    return found / (k * len(probes)), 1000 * elapsed / len(probes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument("--encodings", nargs="+", default=ENCODINGS)
+    args = parser.parse_args()
+
+    vectors, probes = dataset(args.vectors, args.dim, args.clusters, args.queries)
+    scores = probes @ vectors.T
+    truth = [set(np.argsort(-row)[:args.top_k].tolist()) for row in scores]
+
+    print(f"\n--- {args.vectors} vecteurs de dimension {args.dim}, {args.queries} requêtes, "
+          f"rappel@{args.top_k}, re-scoring x{args.oversampling:g} ---")
+    print(f"{'codage':>8} {'octets/vect.':>13} {'entraînement s':>15} {'re-scoring':>11} {'rappel':>7} {'ms/requête':>11}")
+    for encoding in args.encodings:
+        start = time.perf_counter()
+        client = build(vectors, encoding)
+        build_s = time.perf_counter() - start
+        usage = client.collections["bench"].memory_usage()
+        modes = [(False, None)] if encoding == "float32" else [
+            (False, models.SearchParams(quantization=models.QuantizationSearchParams(rescore=False))),
+            (True, models.SearchParams(quantization=models.QuantizationSearchParams(
+                rescore=True, oversampling=args.oversampling))),
+        ]
+        for rescore, params in modes:
+            recall, ms = run(client, probes, truth, args.top_k, params)
+            print(f"{encoding:>8} {usage['bytes_per_vector']:>13} {build_s:>15.1f} "
+                  f"{'oui' if rescore else 'non':>11} {recall:>7.3f} {ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
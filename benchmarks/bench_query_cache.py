@@ -0,0 +1,103 @@
+"""Benchmark de la réutilisation des embeddings de requête et des résultats top-k.
+
+Rejoue un journal de requêtes (popularité en loi de Zipf) comme le fait
+`AgentNina._execute_search_task` : mémoire commune, souvenirs de session et
+passages de pages, soit trois recherches de la même requête, et une écriture
+dans la mémoire toutes les `--write-every` requêtes (invalidation par version).
+
+L'embedder simulé coûte `--embed-ms` par vecteur (0 : `SimpleEmbedder` seul),
+pour estimer le gain avec un vrai modèle.
+
+Usage :
+    python benchmarks/bench_query_cache.py --requests 500 --embed-ms 0 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import embedding_cache
+from tools.embedding_cache import embedding_scope
+from tools.vector_db import SimpleEmbedder, VectorDB
+
+
+class SlowEmbedder:
+    """`SimpleEmbedder` ralenti pour simuler un modèle d'embedding."""
+    dim = SimpleEmbedder.dim
+
+    def __init__(self, delay_ms: float):
+        self.name = f"lent-{delay_ms}ms"
+        self.delay = delay_ms / 1000
+        self.calls = 0
+
+    def embed(self, text):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return SimpleEmbedder.embed(text)
+
+
+def replay(queries, embed_ms: float, cached: bool, write_every: int):
+    embedding_cache.query_vectors.max_entries = 4096 if cached else 0
+    embedding_cache.search_results.max_entries = 2048 if cached else 0
+    embedder = SlowEmbedder(embed_ms)
+    shared = VectorDB(collection=f"bench_shared_{embed_ms}_{cached}", embedder=embedder)
+    sessions = VectorDB(collection=f"bench_sessions_{embed_ms}_{cached}", embedder=embedder, dedup=False)
+    shared.add_documents([f"Document {i} sur le sujet {i % 40}" for i in range(2000)])
+    sessions.add_documents([f"User: question {i}\nNina: réponse" for i in range(500)],
+                           [{"type": "conversation", "session": f"s{i % 10}"} for i in range(500)])
+    shared.cache_results = sessions.cache_results = cached
+    embedder.calls = 0
+    embedding_cache.clear_caches()
+
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        scope = embedding_scope() if cached else _no_scope()
+        with scope:
+            shared.similarity_search(query, top_k=3)
+            sessions.similarity_search(query, top_k=2, filters={"session": f"s{i % 10}"})
+            shared.similarity_search(query, top_k=3, filters={"type": "web_page"})
+        if write_every and i % write_every == write_every - 1:
+            shared.add_documents([f"Nouveau résultat web {i}"], [{"type": "web_result"}])
+    elapsed = time.perf_counter() - start
+    return {"ms_per_request": 1000 * elapsed / len(queries), "embeddings": embedder.calls,
+            "summary": embedding_cache.cache_summary()}
+
+
+class _no_scope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=10)
+    parser.add_argument("--embed-ms", type=float, nargs="+", default=[0.0, 5.0])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    weights = [1.0 / (rank ** 1.1) for rank in range(1, args.vocabulary + 1)]
+    topics = [f"question populaire numéro {i}" for i in range(args.vocabulary)]
+    queries = rng.choices(topics, weights=weights, k=args.requests)
+
+    print(f"\n--- {args.requests} requêtes, 3 recherches chacune, une écriture toutes les {args.write_every} ---")
+    print(f"{'embed ms':>9} {'cache':>6} {'ms/requête':>11} {'embeddings':>11} {'succès vecteurs':>16} {'succès top-k':>13}")
+    for embed_ms in args.embed_ms:
+        for cached in (False, True):
+            res = replay(queries, embed_ms, cached, args.write_every)
+            emb, results = res["summary"]["embeddings"], res["summary"]["results"]
+            emb_rate = (emb["hits"] + emb["request_hits"]) / max(1, emb["hits"] + emb["misses"] + emb["request_hits"])
+            print(f"{embed_ms:>9g} {'oui' if cached else 'non':>6} {res['ms_per_request']:>11.3f} "
+                  f"{res['embeddings']:>11} {emb_rate:>16.1%} {results['hit_rate']:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark des collections partitionnées (`ShardedVectorDB`) quand le volume grandit.
+
+Pour chaque volume de `--sizes` documents (dimension `--dim`, cache de
+résultats désactivé), mesure la latence d'une recherche top-k :
+
+- collection unique (`VectorDB`) ;
+- hachage cohérent sur `--shards` partitions, dans le processus ou dans des
+  processus dédiés (le gain du scatter parallèle suppose autant de cœurs que
+  de partitions) ;
+- tranches temporelles de `--bucket-docs` documents, requête filtrée sur les
+  deux dernières tranches (`since`) : seules ces tranches sont interrogées.
+
+Usage :
+    python benchmarks/bench_sharding.py --sizes 10000 40000 160000 --shards 4
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.sharded_vector_db import HashSharding, ShardedVectorDB, TimeSharding
+from tools.vector_db import VectorDB
+
+DAY = 86400
+
+
+class HashEmbedder:
+    """Vecteurs pseudo-aléatoires déterministes de dimension `dim`."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.name = f"hash-{dim}"
+
+    def embed(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32).tolist()
+
+
+def timed_search(db, queries, top_k: int, filters=None) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        db.similarity_search(query, top_k=top_k, filters=filters)
+    return 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 40000, 160000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--bucket-docs", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    embedder = HashEmbedder(args.dim)
+    queries = [f"requête {i}" for i in range(args.queries)]
+    print(f"\n--- dimension {args.dim}, {args.shards} partitions, tranches de {args.bucket_docs} documents, "
+          f"{os.cpu_count()} cœur(s) ---")
+    print(f"{'documents':>10} {'unique ms':>10} {'hachage ms':>11} {'processus ms':>13} {'tranches récentes ms':>21}")
+    for size in args.sizes:
+        docs = [f"Document {i} sur le sujet {i % 97}" for i in range(size)]
+        metas = [{"type": "web_result", "ts": DAY * (i // args.bucket_docs) + 60} for i in range(size)]
+        newest = DAY * ((size - 1) // args.bucket_docs)
+
+        setups = {
+            "unique": lambda: VectorDB(collection=f"bench_single_{size}", embedder=embedder, dedup=False),
+            "hachage": lambda: ShardedVectorDB(f"bench_hash_{size}", HashSharding(args.shards),
+                                               embedder=embedder, dedup=False),
+            "processus": lambda: ShardedVectorDB(f"bench_proc_{size}", HashSharding(args.shards), processes=True,
+                                                 embedder=embedder, dedup=False),
+            "tranches": lambda: ShardedVectorDB(f"bench_time_{size}", TimeSharding(DAY),
+                                                embedder=embedder, dedup=False),
+        }
+        latencies = {}
+        for name, setup in setups.items():
+            db = setup()
+            for start in range(0, size, 5000):
+                db.add_documents(docs[start:start + 5000], metas[start:start + 5000])
+            db.cache_results = False
+            filters = {"since": newest - DAY} if name == "tranches" else None
+            latencies[name] = timed_search(db, queries, args.top_k, filters)
+            if isinstance(db, ShardedVectorDB):
+                db.close()
+        print(f"{size:>10} {latencies['unique']:>10.3f} {latencies['hachage']:>11.3f} "
+              f"{latencies['processus']:>13.3f} {latencies['tranches']:>21.3f}")
+
+
+if __name__ == "__main__":
+    main()
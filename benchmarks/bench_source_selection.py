@@ -0,0 +1,73 @@
+"""Benchmark de la sélection adaptative des sources (simulation).
+
+Sources simulées dont le rendement dépend du thème de la requête (ex. GitHub
+ne rapporte que pour les requêtes « code »). On compare l'interrogation de
+toutes les sources avec le `SourceSelector` : appels amont par requête, coût
+cumulé et qualité (part des résultats utiles obtenus par rapport à tout interroger).
+
+Usage :
+    python benchmarks/bench_source_selection.py --requests 2000
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.source_registry import SourcePlugin, SourceSelector
+
+THEMES = {
+    "code": ["python", "rust", "framework", "library", "github"],
+    "news": ["annonce", "lancement", "levée", "rachat", "actualité"],
+    "books": ["livre", "roman", "guide", "manuel", "auteur"],
+}
+# source -> (coût, probabilité de rendement par thème)
+SOURCES = {
+    "hackernews": (0.0, {"code": 0.7, "news": 0.8, "books": 0.1}),
+    "reddit": (0.0, {"code": 0.5, "news": 0.6, "books": 0.3}),
+    "newsapi": (0.5, {"code": 0.2, "news": 0.9, "books": 0.05}),
+    "github": (0.3, {"code": 0.9, "news": 0.02, "books": 0.02}),
+    "openlibrary": (0.0, {"code": 0.05, "news": 0.0, "books": 0.9}),
+}
+
+
+def make_plugins(rng):
+    plugins = []
+    for name, (cost, rates) in SOURCES.items():
+        def fetch(query, rates=rates):
+            theme = query.split()[0]
+            return ["résultat"] if rng.random() < rates[theme] else []
+        plugins.append(SourcePlugin(name, fetch, frozenset({"any"}), cost=cost, expected_latency=0.5))
+    return plugins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    plugins = make_plugins(rng)
+    selector = SourceSelector(rng=random.Random(args.seed))
+    totals = {"all": [0, 0.0, 0], "adaptive": [0, 0.0, 0]}   # appels, coût, requêtes avec résultat
+
+    for _ in range(args.requests):
+        theme = rng.choice(list(THEMES))
+        query = f"{theme} {' '.join(rng.sample(THEMES[theme], 2))}"
+        for mode, chosen in (("all", plugins), ("adaptive", selector.select(query, plugins))):
+            got = 0
+            for p in chosen:
+                got += len(selector.run(p, query) if mode == "adaptive" else p.fetch(query))
+            totals[mode][0] += len(chosen)
+            totals[mode][1] += sum(p.cost for p in chosen)
+            totals[mode][2] += int(got > 0)
+
+    for mode, (calls, cost, answered) in totals.items():
+        print(f"{mode:<9}: {calls / args.requests:.2f} appels/requête, coût {cost / args.requests:.2f}/requête, "
+              f"{answered / args.requests:.1%} requêtes avec résultat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark de l'analyse des échanges d'`AgentMemory` (importance, entités, sujets).
+
+Compare les anciens balayages `keyword in text` (une passe par mot-clé, texte
+mis en minuscules et découpé plusieurs fois) à l'automate d'Aho-Corasick de
+`TextAnalyzer`, quand les listes de mots-clés grossissent. Le cache par
+empreinte est désactivé (`cache_size=0`) : chaque échange est analysé.
+
+Usage :
+    python benchmarks/bench_text_analysis.py --exchanges 2000 --sizes 50 500 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.text_analysis import FACTUAL_WORDS, PERSONAL_WORDS, TextAnalyzer
+
+STOPWORDS = ["Nina", "User", "Je", "Tu", "Il", "Elle"]
+
+
+def legacy_analyze(user_input, nina_response, importance_keywords, topics):
+    """Reproduction des anciens `_calculate_importance`, `_extract_entities`, `_extract_topics`."""
+    text = (user_input + " " + nina_response).lower()
+    importance = 0.5
+    for keyword in importance_keywords:
+        if keyword in text:
+            importance += 0.1
+    if any(word in user_input.lower() for word in PERSONAL_WORDS):
+        importance += 0.2
+    if any(word in nina_response.lower() for word in FACTUAL_WORDS):
+        importance += 0.15
+    if len(text.split()) > 50:
+        importance += 0.1
+    entities = []
+    for word in (user_input + " " + nina_response).split():
+        clean = word.strip(".,!?;:")
+        if clean and clean[0].isupper() and len(clean) > 2 and clean not in STOPWORDS:
+            entities.append(clean)
+    text_lower = (user_input + " " + nina_response).lower()
+    detected = [topic for topic, keywords in topics.items() if any(k in text_lower for k in keywords)]
+    return min(importance, 1.0), list(set(entities)), detected
+
+
+def keyword_lists(size: int, rng: random.Random):
+    """`size` mots-clés d'importance et autant répartis sur 20 sujets."""
+    def word():
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyzéè") for _ in range(rng.randint(4, 10)))
+    importance = [word() for _ in range(size)]
+    topics = {f"sujet{t}": [word() for _ in range(max(1, size // 20))] for t in range(20)}
+    return importance, topics
+
+
+def exchanges(n: int, vocabulary, rng: random.Random):
+    words = vocabulary + ["Python", "Paris", "je", "mon", "projet", "définition", "le", "la", "de"]
+    return [(" ".join(rng.choice(words) for _ in range(12)),
+             " ".join(rng.choice(words) for _ in range(60))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exchanges", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 500, 5000])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"\n--- Analyse de {args.exchanges} échanges ---")
+    print(f"{'mots-clés':>10} {'legacy ms/éch.':>15} {'automate ms/éch.':>17} {'gain':>7}")
+    for size in args.sizes:
+        importance, topics = keyword_lists(size, rng)
+        data = exchanges(args.exchanges, importance[:50] + [k for ks in topics.values() for k in ks[:3]], rng)
+        analyzer = TextAnalyzer(importance_keywords=importance, topics=topics, cache_size=0)
+
+        start = time.perf_counter()
+        for user, response in data:
+            legacy_analyze(user, response, importance, topics)
+        legacy = 1000 * (time.perf_counter() - start) / len(data)
+
+        start = time.perf_counter()
+        for user, response in data:
+            analyzer.analyze(user, response)
+        automaton = 1000 * (time.perf_counter() - start) / len(data)
+        print(f"{size:>10} {legacy:>15.3f} {automaton:>17.3f} {legacy / automaton:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
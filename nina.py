@@ -5,9 +5,14 @@
 Point d'entrée principal pour lancer Nina en différents modes.
 """
 
+import time
+
+_STARTED_AT = time.perf_counter()
+
 import sys
 import os
 import argparse
+import subprocess
 
 # Configuration du path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -23,6 +28,10 @@ Exemples d'utilisation :
   python nina.py --test          # Test de fonctionnement
   python nina.py --web           # Interface web (en développement)
   python nina.py --version       # Version et informations
+  python nina.py --profile-imports  # Temps d'import au démarrage (-X importtime)
+  python nina.py --metrics-port 9464  # Expose /metrics (Prometheus) pendant la session
+  python nina.py --serve --port 8000  # Serveur HTTP (/ask, /ask/stream en SSE, /health)
+  python nina.py --serve --processes 4  # Serveur pré-fork : 4 processus, état partagé
         """
     )
     
@@ -50,8 +59,67 @@ Exemples d'utilisation :
         help='Pose une question directement en ligne de commande'
     )
     
+    parser.add_argument(
+        '--session',
+        type=str,
+        help='Identifiant de session (utilisateur) pour --query : historique et profil isolés'
+    )
+    
+    parser.add_argument(
+        '--profile-imports',
+        nargs='?',
+        const=15,
+        type=int,
+        metavar='N',
+        help='Affiche les N imports les plus coûteux du démarrage (python -X importtime)'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='Expose les métriques du pipeline au format Prometheus sur http://127.0.0.1:PORT/metrics'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Lance le serveur HTTP (/ask en JSON, /ask/stream en SSE) sur un AgentNina partagé'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Adresse d\'écoute du serveur')
+    parser.add_argument('--port', type=int, default=8000, help='Port du serveur')
+    parser.add_argument('--workers', type=int, default=4, help='Requêtes traitées en parallèle')
+    parser.add_argument('--queue-size', type=int, default=16, help='Requêtes en attente avant de répondre 429')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Échéance par défaut d\'une requête (s)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Processus workers forkés après préchauffage (0 : un par cœur) ; sans '
+                             'QDRANT_URL, la mémoire vectorielle utilise alors le moteur local '
+                             '(NINA_VECTOR_BACKEND=local), seul partageable entre processus')
+    
     args = parser.parse_args()
     
+    # Profil des imports du démarrage CLI, mesuré dans un interpréteur neuf
+    if args.profile_imports is not None:
+        profile_imports(args.profile_imports)
+        return
+    
+    # Spans : logs/traces.jsonl (NINA_TRACE_FILE) ; métriques : /metrics
+    if args.metrics_port:
+        from tools.tracing import serve_metrics
+        serve_metrics(args.metrics_port)
+    
+    # Mode serveur
+    if args.serve and args.processes != 1:
+        from app.prefork import run_prefork
+        run_prefork(host=args.host, port=args.port, processes=args.processes or None, workers=args.workers,
+                    queue_size=args.queue_size, request_timeout=args.timeout)
+        return
+    if args.serve:
+        from app.server import run_server
+        run_server(host=args.host, port=args.port, workers=args.workers,
+                   queue_size=args.queue_size, request_timeout=args.timeout)
+        return
+    
     # Mode test
     if args.test:
         print("🧪 Lancement du test de Nina...")
@@ -100,7 +168,8 @@ Exemples d'utilisation :
             # On utilise AgentNina directement pour la logique locale
             from agents.agent_nina import AgentNina
             nina_agent = AgentNina()
-            response = nina_agent.think_and_respond(args.query)
+            response = nina_agent.think_and_respond(args.query, session_id=args.session)
+            nina_agent.flush_sessions()
             print(f"\n📝 Réponse :\n{response}")
         except Exception as e:
             print(f"❌ Erreur : {e}")
@@ -115,9 +184,28 @@ Exemples d'utilisation :
     else:
         # Mode CLI par défaut
         from app.interface import NinaInterface
-        interface = NinaInterface()
+        interface = NinaInterface(started_at=_STARTED_AT)
         interface.start_cli()
 
 
+def profile_imports(top: int = 15):
+    """Rejoue les imports du chemin CLI sous `-X importtime` et résume les plus coûteux."""
+    from tools.lazy import summarize_importtime
+    
+    root = os.path.dirname(os.path.abspath(__file__))
+    code = "import sys; sys.path.insert(0, %r); import app.interface, agents.agent_nina" % root
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    total_ms, rows = summarize_importtime(proc.stderr, top)
+    
+    print(f"⏱️ Interpréteur + imports du démarrage : {wall_ms:.0f} ms (imports : {total_ms:.0f} ms)")
+    print(f"{'module':<40} {'cumulé (ms)':>12} {'propre (ms)':>12}")
+    for name, cumulative, own in rows:
+        print(f"{name:<40} {cumulative:>12.1f} {own:>12.1f}")
+    if proc.returncode != 0:
+        print(f"❌ L'import a échoué :\n{proc.stderr.strip().splitlines()[-1]}")
+
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -12,6 +12,7 @@ setup(
         "requests>=2.31.0",
         "beautifulsoup4>=4.12.2",
         "qdrant-client>=1.7.0",
+        "numpy>=1.24.0",
         "langchain>=0.1.0",
         "openai>=1.3.6",
         "python-dotenv>=0.21.0",
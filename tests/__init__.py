@@ -1 +1,7 @@
- 
\ No newline at end of file
+import os
+
+# Les tests ne doivent ni lire ni alimenter le cache de recherche persistant
+os.environ.setdefault("NINA_SEARCH_CACHE", "off")
+
+# Les spans des tests ne sont pas écrits dans logs/traces.jsonl
+os.environ.setdefault("NINA_TRACE_FILE", "off")
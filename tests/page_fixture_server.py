@@ -0,0 +1,92 @@
+"""Serveur HTTP local de pages d'articles factices (tests et benchmarks du deep fetch).
+
+Chaque chemin `/article/<n>` renvoie une page déterministe avec le « chrome »
+habituel (menu, scripts, pied de page) autour de `paragraphs` paragraphes.
+`/binary` renvoie un contenu non HTML et `/missing` une erreur 404.
+`latency` simule le temps de réponse d'un site distant.
+"""
+import contextlib
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NAV = "<nav><a href='/'>Accueil</a> <a href='/tech'>Tech</a> <a href='/ia'>IA</a></nav>"
+SCRIPT = "<script>var tracking = {id: 42, events: []}; function track(e) { tracking.events.push(e); }</script>"
+FOOTER = "<footer><p>© Journal factice – mentions légales – cookies – contact</p></footer>"
+
+
+def article_html(n: int, paragraphs: int = 12) -> str:
+    body = "".join(
+        f"<p>Article {n}, paragraphe {i} : les modèles de langage open source progressent "
+        f"rapidement et leur évaluation sur des tâches réelles reste un sujet ouvert ({n * 31 + i}).</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        f"<!doctype html><html><head><title>Article {n}</title><style>p {{ margin: 0 }}</style>{SCRIPT}</head>"
+        f"<body>{NAV}<main><article><h1>Titre de l'article {n}</h1>{body}</article></main>"
+        f"<aside><p>À lire aussi : une autre histoire sans rapport avec celle-ci, promis.</p></aside>{FOOTER}</body></html>"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    paragraphs = 12
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path.startswith("/article/"):
+            payload = article_html(int(self.path.rsplit("/", 1)[1]), self.paragraphs).encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        elif self.path == "/binary":
+            payload, content_type = b"%PDF-1.4" + b"\0" * 1024, "application/pdf"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _make_server(paragraphs: int, latency: float) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"paragraphs": paragraphs, "latency": latency})
+    return ThreadingHTTPServer(("127.0.0.1", 0), handler)
+
+
+def _serve_in_child(paragraphs: int, latency: float, ports):
+    server = _make_server(paragraphs, latency)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def serve_pages(paragraphs: int = 12, latency: float = 0.0, separate_process: bool = False):
+    """Démarre le serveur sur un port libre et retourne son URL de base.
+
+    `separate_process=True` isole le serveur du GIL de l'appelant (benchmarks).
+    """
+    if separate_process:
+        ports = multiprocessing.Queue()
+        child = multiprocessing.Process(target=_serve_in_child, args=(paragraphs, latency, ports), daemon=True)
+        child.start()
+        try:
+            yield f"http://127.0.0.1:{ports.get(timeout=10)}"
+        finally:
+            child.terminate()
+            child.join()
+        return
+
+    server = _make_server(paragraphs, latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
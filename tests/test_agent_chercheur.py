@@ -1,7 +1,10 @@
+import time
 import unittest
 from unittest.mock import patch
 
 from nina_project.agents.agent_chercheur import AgentChercheur
+from nina_project.agents.agent_chercheur_improved import AgentChercheurImproved
+from nina_project.tools.search_cache import SearchCache
 
 
 class TestAgentChercheurWeb(unittest.TestCase):
@@ -25,5 +28,32 @@ class TestAgentChercheurWeb(unittest.TestCase):
         self.assertEqual(results[:3], ["Résultat 1", "Résultat 2", "Résultat 3"])
 
 
+class TestAgentChercheurImprovedFallback(unittest.TestCase):
+    def make_agent(self, duckduckgo, delay=0.05):
+        agent = AgentChercheurImproved()
+        agent.cache = SearchCache(path=None, enabled=False)
+        agent.WIKI_HEDGE_DELAY = delay
+        agent._try_duckduckgo_improved = duckduckgo
+        agent.wiki_calls = []
+        agent._try_wikipedia_search = lambda q: agent.wiki_calls.append(q) or [f"Wikipedia: {q}"]
+        return agent
+
+    def test_wikipedia_not_called_when_duckduckgo_is_enough(self):
+        agent = self.make_agent(lambda q: ["a" * 20, "b" * 20, "c" * 20])
+        self.assertEqual(len(agent.collect_from_web_multi_source("python")), 3)
+        time.sleep(0.1)
+        self.assertEqual(agent.wiki_calls, [])
+
+    def test_wikipedia_fallback_when_duckduckgo_is_short(self):
+        agent = self.make_agent(lambda q: [])
+        self.assertEqual(agent.collect_from_web_multi_source("python"), ["Wikipedia: python"])
+        self.assertEqual(agent.wiki_calls, ["python"])
+
+    def test_slow_duckduckgo_starts_wikipedia_in_parallel(self):
+        agent = self.make_agent(lambda q: time.sleep(0.2) or [], delay=0.01)
+        self.assertEqual(agent.collect_from_web_multi_source("python"), ["Wikipedia: python"])
+        self.assertEqual(agent.wiki_calls, ["python"])
+
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
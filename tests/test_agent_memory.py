@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from nina_project.agents.agent_memory import AgentMemory, composite_scores
+
+
+class TestCompositeScores(unittest.TestCase):
+    def test_recency_and_missing_timestamps(self):
+        now = time.time()
+        scores = composite_scores(
+            np.array([0.9, 0.9, 0.9]),
+            np.array([now, now - 10 * 86400, np.nan]),
+            np.array([0.5, 0.5, 0.5]),
+            now,
+        )
+        # Même pertinence : le plus récent passe devant, l'horodatage inconnu en dernier
+        self.assertEqual(list(np.argsort(-scores)), [0, 1, 2])
+        self.assertAlmostEqual(scores[0] - scores[1], 0.25 * 0.5)
+
+
+class TestSearchConversations(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.memory = AgentMemory(memory_file=os.path.join(self._tmp.name, "data", "memory.json"))
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_exact_match_ranks_first(self):
+        for i in range(20):
+            self.memory.learn_fact("ia", f"fait {i}")
+        for i in range(10):
+            self.memory.add_conversation(f"question {i}", f"réponse {i}")
+        results = self.memory.search_conversations("User: question 4\nNina: réponse 4", limit=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["text"], "User: question 4\nNina: réponse 4")
+        self.assertGreaterEqual(results[0]["composite_score"], results[1]["composite_score"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -49,5 +49,54 @@ class TestAgentNews(unittest.TestCase):
             self.assertEqual(len(items), 2)
             self.assertTrue(all('title' in it and 'url' in it for it in items))
 
+    @patch('nina_project.agents.agent_news.requests.Session.get')
+    def test_served_from_store_between_polls(self, mock_get):
+        with patch.dict('os.environ', {'NEWSAPI_KEY': 'fakekey'}):
+            mock_resp = MagicMock()
+            mock_resp.status_code = 200
+            mock_resp.headers = {'ETag': '"v1"'}
+            mock_resp.raise_for_status.return_value = None
+            mock_resp.json.return_value = {
+                'articles': [
+                    {'title': 'A', 'url': 'http://example.com/a', 'publishedAt': '2025-01-02T00:00:00Z', 'source': {'name': 'S'}},
+                    {'title': 'A bis', 'url': 'http://example.com/a/', 'publishedAt': '2025-01-02T00:00:00Z', 'source': {'name': 'S'}},
+                ]
+            }
+            mock_get.return_value = mock_resp
+
+            agent = AgentNews()
+            self.assertEqual([a['title'] for a in agent.fetch_ai_news(5)], ['A'])
+            agent.fetch_ai_news(5)
+            self.assertEqual(mock_get.call_count, 1)
+
+            # Sondage suivant : requête conditionnelle et curseur incrémental
+            mock_resp.status_code = 304
+            agent.poller.poll_due(force=True)
+            _, kwargs = mock_get.call_args
+            self.assertEqual(kwargs['headers']['If-None-Match'], '"v1"')
+            self.assertEqual(kwargs['params']['from'], '2025-01-02T00:00:00Z')
+            self.assertEqual(len(agent.fetch_ai_news(5)), 1)
+
+    @patch('nina_project.agents.agent_news.requests.Session.get')
+    def test_upstream_errors_back_off(self, mock_get):
+        with patch.dict('os.environ', {'NEWSAPI_KEY': 'fakekey'}):
+            mock_get.side_effect = ConnectionError("amont indisponible")
+            agent = AgentNews()
+            source = agent.poller.sources['newsapi']
+            agent.poller.poll_due(force=True)
+            self.assertEqual(source.errors, 1)
+
+            # Intervalle doublé après un échec
+            self.assertFalse(source.is_due(source.last_poll + source.min_interval))
+            self.assertTrue(source.is_due(source.last_poll + 2 * source.min_interval))
+
+            mock_get.side_effect = None
+            mock_resp = MagicMock()
+            mock_resp.status_code = 304
+            mock_resp.headers = {}
+            mock_get.return_value = mock_resp
+            agent.poller.poll_due(force=True)
+            self.assertEqual(source.errors, 0)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,230 @@
+import sys
+import threading
+import time
+import unittest
+
+from nina_project.agents.agent_nina import AgentNina
+from nina_project.agents.agent_redacteur import AgentRedacteur
+from nina_project.tools.answer_cache import AnswerCache
+from nina_project.tools.sessions import SessionStore
+from nina_project.tools.tracing import Tracer
+
+
+class TestAnswerCache(unittest.TestCase):
+    def test_lookup_depends_on_context_and_memory_version(self):
+        cache = AnswerCache()
+        cache.put("Qui a écrit Candide ?", "Voltaire", "recherche_information", context="c1", memory_version=3)
+        self.assertEqual(cache.get("qui a écrit  Candide", "c1", 3).answer, "Voltaire")
+        self.assertIsNone(cache.get("Qui a écrit Candide ?", "c2", 3))
+        self.assertIsNone(cache.get("Qui a écrit Candide ?", "c1", 4))
+        # Une réponse construite sur une mémoire plus récente remplace l'ancienne
+        cache.put("Qui a écrit Candide ?", "Voltaire (1759)", "recherche_information", context="c2", memory_version=4)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.summary()["invalidated"], 1)
+
+        # Les routes sans contexte servent toutes les sessions et survivent aux écritures
+        cache.put("Combien font 2 + 2 ?", "4", "raisonnement_pur")
+        self.assertEqual(cache.get("combien font 2 + 2", "autre", 99).answer, "4")
+        self.assertEqual(cache.invalidate("Combien font 2 + 2 ?"), 1)
+        self.assertIsNone(cache.get("Combien font 2 + 2 ?", "", 0))
+
+    def test_ttl_and_lru(self):
+        cache = AnswerCache(max_entries=2, ttls={"conversation_simple": 0.01, "actualites": 0})
+        self.assertFalse(cache.put("x", "y", "actualites"))
+        cache.put("salut", "bonjour", "conversation_simple")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("salut", "", 0))
+        for q in ("a", "b", "c"):
+            cache.put(q, q.upper(), "raisonnement_pur")
+        self.assertIsNone(cache.get("a", "", 0))
+        self.assertEqual(cache.get("c", "", 0).answer, "C")
+
+    def test_coalesce_runs_once(self):
+        cache = AnswerCache()
+        gate, calls, results = threading.Event(), [], []
+
+        def compute():
+            calls.append(1)
+            gate.wait(5)
+            return "réponse"
+
+        threads = [threading.Thread(target=lambda: results.append(cache.coalesce("k", compute)))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        while cache.summary()["coalesced"] < 3:
+            time.sleep(0.001)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual({value for value, _ in results}, {"réponse"})
+
+
+class _LLM:
+    def __init__(self, route):
+        self.route = route
+
+    def generate(self, prompt):
+        return self.route if prompt.rstrip().endswith("Catégorie:") else "réponse"
+
+
+class _Search:
+    def collect_data(self, source, query):
+        return []
+
+    def collect_pages(self, query):
+        return []
+
+
+class _Memory:
+    def __init__(self):
+        self.version = 0
+
+    def __len__(self):
+        return 0
+
+    def similarity_search(self, query, top_k=3, filters=None):
+        return []
+
+    def add_documents(self, docs, metadata_list=None):
+        self.version += 1
+        return len(docs)
+
+
+class _SessionMemory(_Memory):
+    def __init__(self):
+        super().__init__()
+        self.docs = []
+
+    def similarity_search(self, query, top_k=3, filters=None):
+        return [{"text": text, "score": 1.0, "metadata": meta} for text, meta in self.docs
+                if meta["session"] == filters["session"]][:top_k]
+
+    def add_documents(self, docs, metadata_list=None):
+        self.docs.extend(zip(docs, metadata_list))
+        return super().add_documents(docs, metadata_list)
+
+
+class _Analyste:
+    def analyze_data(self, data):
+        return {}
+
+
+class _Redacteur:
+    def __init__(self, gate=None):
+        self.calls = 0
+        self.gate = gate
+
+    def generate_report(self, context_data, reasoning, profile):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        memories = [r["text"] for r in context_data["search_results"]["memory_results"]]
+        return "\n".join([f"Rapport {self.calls}"] + memories)
+
+
+class _FailingLLM:
+    def generate(self, prompt):
+        raise TimeoutError("LLM injoignable")
+
+
+class _SQL:
+    def __init__(self):
+        self.saved = []
+
+    def save_interaction(self, query, response, summary=None, meta=None):
+        self.saved.append(query)
+
+
+class TestAgentNinaAnswerCache(unittest.TestCase):
+    def make_agent(self, route="recherche_information", gate=None):
+        nina = AgentNina()
+        nina.tracer = Tracer(path=None)
+        nina.local_llm = _LLM(route)
+        nina.chercheur = _Search()
+        nina.vectordb = _Memory()
+        nina.analyste = _Analyste()
+        nina.redacteur = _Redacteur(gate)
+        nina.sql_db = _SQL()
+        nina.conversation_history = []
+        nina.user_profile = {}
+        return nina
+
+    def test_repeat_hits_until_memory_changes(self):
+        nina = self.make_agent()
+        self.assertEqual(nina.think_and_respond("Qui a écrit Candide ?"), "Rapport 1")
+        self.assertEqual(nina.think_and_respond("qui a écrit candide"), "Rapport 1")
+        self.assertEqual(nina.redacteur.calls, 1)
+        # L'échange servi depuis le cache est tout de même enregistré
+        self.assertEqual(nina.sql_db.saved, ["Qui a écrit Candide ?", "qui a écrit candide"])
+        self.assertEqual(len(nina.conversation_history), 2)
+        self.assertEqual(nina.task_stats["task_types"], {"recherche_information": 2})
+        self.assertEqual(nina.tracer.metrics.counter("nina_cache_requests_total", cache="answer", result="hit"), 1)
+
+        nina.vectordb.add_documents(["Candide paraît en 1759."])
+        self.assertEqual(nina.think_and_respond("Qui a écrit Candide ?"), "Rapport 2")
+
+    def test_profile_change_misses(self):
+        nina = self.make_agent()
+        nina.think_and_respond("Qui a écrit Candide ?")
+        nina.user_profile["langue"] = "en"
+        nina.think_and_respond("Qui a écrit Candide ?")
+        self.assertEqual(nina.redacteur.calls, 2)
+
+    def test_concurrent_identical_requests_share_one_pipeline(self):
+        gate = threading.Event()
+        nina = self.make_agent(gate=gate)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(nina.think_and_respond("Qui a écrit Candide ?")))
+                   for _ in range(3)]
+        for t in threads:
+            t.start()
+        while nina.answer_cache.summary()["coalesced"] < 2:
+            time.sleep(0.001)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["Rapport 1"] * 3)
+        self.assertEqual(nina.redacteur.calls, 1)
+        self.assertEqual(len(nina.conversation_history), 3)
+
+    def test_sessions_do_not_share_answers(self):
+        nina = self.make_agent()
+        nina.local_llm = None
+        nina.sessions = SessionStore(None)
+        nina.session_memory = _SessionMemory()
+        nina.session_memory.add_documents(["User: Mon diagnostic: diabète\nNina: noté"],
+                                          [{"type": "conversation", "session": "alice"}])
+        alice = nina.think_and_respond("Recherche mon diagnostic", session_id="alice")
+        self.assertIn("diabète", alice)
+        bob = nina.think_and_respond("Recherche mon diagnostic", session_id="bob")
+        self.assertNotIn("diabète", bob)
+        self.assertEqual(nina.redacteur.calls, 2)
+        # La question répétée par alice reste servie depuis le cache, à chaque fois
+        for _ in range(2):
+            self.assertEqual(nina.think_and_respond("Recherche mon diagnostic", session_id="alice"), alice)
+            self.assertEqual(nina.redacteur.calls, 2)
+
+    def test_fallback_report_is_not_cached(self):
+        nina = self.make_agent()
+        # Traceur du module des agents : le rédacteur marque le span de la requête
+        nina.tracer = sys.modules[AgentRedacteur.__module__].get_tracer.__globals__["Tracer"](path=None)
+        nina.redacteur = AgentRedacteur(llm=_FailingLLM())
+        first = nina.think_and_respond("Qui a écrit Candide ?")
+        self.assertIn("erreur est survenue", first)
+        self.assertEqual(len(nina.answer_cache), 0)
+        nina.redacteur.llm = _LLM("recherche_information")
+        self.assertEqual(nina.think_and_respond("Qui a écrit Candide ?"), "réponse")
+
+    def test_disabled_cache(self):
+        nina = self.make_agent(route="conversation_simple")
+        nina.answer_cache = AnswerCache(enabled=False)
+        nina.think_and_respond("Salut")
+        nina.think_and_respond("Salut")
+        self.assertEqual(nina.get_stats()["answer_cache"]["stores"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import random
+import unittest
+
+from nina_project.app.benchmark import (
+    BenchConfig,
+    FakeLLM,
+    LatencyModel,
+    compare_reports,
+    make_queries,
+    percentile,
+    run_benchmark,
+)
+
+
+class TestLatencyModel(unittest.TestCase):
+    def test_distributions(self):
+        rng = random.Random(0)
+        self.assertEqual(LatencyModel("fixed:12").sample_ms(rng), 12)
+        self.assertEqual(LatencyModel("none").sample_ms(rng), 0)
+        self.assertTrue(all(5 <= LatencyModel("uniform:5,9").sample_ms(rng) <= 9 for _ in range(50)))
+        self.assertGreater(LatencyModel("lognormal:20,0.5").sample_ms(rng), 0)
+
+    def test_invalid_spec(self):
+        for spec in ("gaussian:1", "fixed", "uniform:1"):
+            with self.assertRaises(ValueError):
+                LatencyModel(spec)
+
+
+class TestFakeLLM(unittest.TestCase):
+    def test_deterministic_routing_and_answers(self):
+        llm = FakeLLM(LatencyModel("none"))
+        prompt = 'Requête de l\'utilisateur : "Explique-moi les volcans."\n\nCatégorie:'
+        self.assertIn(llm.generate(prompt), ("recherche_information", "raisonnement_pur", "conversation_simple"))
+        self.assertEqual(llm.generate("Résume ceci."), llm.generate("Résume ceci."))
+        self.assertEqual(llm.calls, 3)
+        routes = [FakeLLM.route(q) for q in make_queries(200, seed=1)]
+        self.assertGreater(routes.count("recherche_information"), routes.count("raisonnement_pur"))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(percentile(list(range(101)), 99), 99)
+
+    def test_run_offline_with_concurrent_clients(self):
+        config = BenchConfig(requests=8, clients=2, warmup=1, llm_latency="none", search_latency="fixed:1",
+                             pages=1)
+        report = run_benchmark(config)
+        self.assertEqual(report["requests"], 8)
+        self.assertEqual(report["errors"], 0, report["error_samples"])
+        self.assertEqual(report["latency_ms"]["count"], 8)
+        self.assertEqual(set(report["stages_ms"]), {"routing", "retrieval", "collection", "synthesis", "other"})
+        if report["routes_ms"].get("recherche_information"):
+            self.assertGreater(report["stages_ms"]["collection"]["max"], 0)
+        self.assertGreater(report["throughput_rps"], 0)
+        self.assertGreater(report["llm"]["calls"], 0)
+        json.dumps(report)   # sérialisable pour la comparaison entre commits
+
+    def test_compare_flags_regressions(self):
+        baseline = {"latency_ms": {"p50": 100, "p95": 200}, "throughput_rps": 10.0}
+        current = {"latency_ms": {"p50": 105, "p95": 260}, "throughput_rps": 8.0}
+        rows = {r["metric"]: r for r in compare_reports(baseline, current, max_regression=10)}
+        self.assertFalse(rows["latency_ms.p50"]["regression"])
+        self.assertTrue(rows["latency_ms.p95"]["regression"])
+        self.assertTrue(rows["throughput_rps"]["regression"])
+        self.assertNotIn("latency_ms.p99", rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from nina_project.tools.context_renderer import estimate_tokens, render_context
+
+SNIPPET = "Mistral publie un nouveau modèle open source de 7 milliards de paramètres sous licence Apache"
+
+
+def search_results():
+    return {
+        "web_results": [
+            f"{SNIPPET}.",
+            f"{SNIPPET} !",                     # quasi-doublon
+            "Mistral publie un nouveau modèle",  # inclus dans le premier
+            "Le marché des GPU reste tendu en 2024 selon plusieurs analystes du secteur.",
+        ],
+        "memory_results": [
+            {"text": "Les modèles open source rattrapent les modèles propriétaires sur plusieurs benchmarks.",
+             "meta": {"type": "web_result", "ts": 1700000000.0, "simhash": "9f0c2a61b3d4e5f6"}, "score": 0.82},
+        ],
+        "page_passages": [
+            {"text": "Le modèle Mistral 7B surpasse Llama 2 13B sur l'ensemble des benchmarks publiés.",
+             "meta": {"type": "web_page", "source": "https://mistral.ai/news/announcing-mistral-7b/"},
+             "score": 0.9},
+        ],
+        "insights": {"nombre_elements": 5},
+        "total_sources": 5,
+    }
+
+
+class TestRenderContext(unittest.TestCase):
+    def test_deduplicates_and_numbers_passages(self):
+        ctx = render_context(search_results(), "nouveau modèle Mistral open source")
+        lines = ctx.text.splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(ctx.dropped_duplicates, 2)
+        self.assertTrue(lines[0].startswith("[1] "))
+        self.assertIn("(mistral.ai)", ctx.text)
+        self.assertIn("(mémoire)", ctx.text)
+        for scaffolding in ("simhash", "nombre_elements", "total_sources", "{"):
+            self.assertNotIn(scaffolding, ctx.text)
+
+    def test_fits_budget_and_is_smaller_than_json(self):
+        results = search_results()
+        results["web_results"] += [" ".join(f"terme{i}x{j}" for j in range(80)) for i in range(10)]
+        ctx = render_context(results, "mistral", budget_tokens=300, max_passage_tokens=60)
+        self.assertLessEqual(ctx.tokens, 300)
+        self.assertGreater(ctx.dropped_budget, 0)
+        baseline = estimate_tokens(json.dumps(results, indent=2, ensure_ascii=False))
+        self.assertLess(ctx.tokens, baseline / 2)
+
+    def test_empty_results(self):
+        self.assertEqual(render_context({}, "x").text, "Aucun résultat.")
+
+
+if __name__ == "__main__":
+    unittest.main()
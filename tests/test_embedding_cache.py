@@ -0,0 +1,101 @@
+import contextvars
+import sys
+import threading
+import unittest
+
+from nina_project.tools import vector_db
+from nina_project.tools.vector_db import SimpleEmbedder, VectorDB
+
+# Le module de cache effectivement utilisé par VectorDB (importé sous `tools.`)
+embedding_cache = sys.modules[vector_db.embed_query.__module__]
+LRUCache, embed_query = embedding_cache.LRUCache, embedding_cache.embed_query
+embed_queries = embedding_cache.embed_queries
+embedding_scope, filters_key = embedding_cache.embedding_scope, embedding_cache.filters_key
+
+
+class _CountingEmbedder:
+    """Embedder coûteux simulé : compte les vecteurs calculés par texte."""
+    dim = SimpleEmbedder.dim
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def embed(self, text):
+        self.calls.append(text)
+        return SimpleEmbedder.embed(text)
+
+
+class TestEmbeddingReuse(unittest.TestCase):
+    def setUp(self):
+        embedding_cache.clear_caches()
+
+    def test_request_scope_is_shared_with_copied_contexts(self):
+        embedder = _CountingEmbedder("scope")
+        process_cache = embedding_cache.query_vectors
+        embedding_cache.query_vectors = LRUCache(0)         # seule la portée requête peut servir
+        try:
+            with embedding_scope():
+                first = embed_query(embedder, "volcans")
+                context = contextvars.copy_context()
+                thread = threading.Thread(target=context.run, args=(embed_query, embedder, "volcans"))
+                thread.start()
+                thread.join()
+                self.assertEqual(embed_query(embedder, "volcans"), first)
+            embed_query(embedder, "volcans")                  # hors portée : recalculé
+        finally:
+            embedding_cache.query_vectors = process_cache
+        self.assertEqual(embedder.calls, ["volcans", "volcans"])
+
+    def test_batch_embeds_only_missing_texts_once(self):
+        embedder = _CountingEmbedder("lot")
+        batches = []
+        embedder.embed_batch = lambda texts: (batches.append(list(texts)), [SimpleEmbedder.embed(t) for t in texts])[1]
+        embed_query(embedder, "volcans")
+        vectors = embed_queries(embedder, ["fleuves", "volcans", "fleuves", "glaciers"])
+        self.assertEqual(batches, [["fleuves", "glaciers"]])
+        self.assertEqual(vectors[0], vectors[2])
+        self.assertEqual(vectors[1], SimpleEmbedder.embed("volcans"))
+        self.assertEqual(embedder.calls, ["volcans"])
+
+    def test_filters_key_is_canonical(self):
+        self.assertEqual(filters_key({"type": "web", "topic": ["b", "a"]}),
+                         filters_key({"topic": ("a", "b"), "type": "web"}))
+        self.assertEqual(filters_key(None), ())
+
+
+class TestVectorDBCache(unittest.TestCase):
+    def setUp(self):
+        embedding_cache.clear_caches()
+        self.embedder = _CountingEmbedder("compteur")
+        self.db = VectorDB(collection="test_embedding_cache", embedder=self.embedder)
+        if not self.db.cache_results:
+            self.skipTest("résultats non mis en cache (serveur Qdrant partagé)")
+        self.db.add_documents(["Le Vésuve est un volcan", "Le Rhône est un fleuve"])
+        self.embedder.calls.clear()
+
+    def test_results_cached_until_next_write(self):
+        first = self.db.similarity_search("volcan", top_k=2)
+        first[0]["text"] = "modifié par l'appelant"
+        second = self.db.similarity_search("volcan", top_k=2)
+        self.assertNotEqual(second[0]["text"], "modifié par l'appelant")
+        self.assertEqual(self.embedder.calls, ["volcan"])
+        self.assertEqual(embedding_cache.search_results.stats["hits"], 1)
+
+        # Une écriture change la version : nouvelle recherche, vecteur de requête réutilisé
+        self.db.add_documents(["L'Etna est un volcan"])
+        third = self.db.similarity_search("volcan", top_k=3)
+        self.assertEqual(len(third), 3)
+        self.assertEqual(self.embedder.calls, ["volcan", "L'Etna est un volcan"])
+        self.assertEqual(embedding_cache.cache_summary()["embeddings"]["hits"], 1)
+
+    def test_filters_and_top_k_are_part_of_the_key(self):
+        self.db.similarity_search("volcan", top_k=1)
+        self.db.similarity_search("volcan", top_k=2)
+        self.db.similarity_search("volcan", top_k=2, filters={"type": "web_result"})
+        self.assertEqual(embedding_cache.search_results.stats, {"hits": 0, "misses": 3})
+        self.assertEqual(self.embedder.calls, ["volcan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import stat
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from nina_project.app.orchestrator import FileSystemTool
+
+
+class TestFileSystemTool(unittest.TestCase):
+    def setUp(self):
+        self.tool = FileSystemTool(workspace_dir=tempfile.mkdtemp())
+        # ~6 Mo de journal
+        with open(os.path.join(self.tool.workspace_dir, "app.log"), "w", encoding="utf-8") as f:
+            for n in range(1, 100001):
+                level = "ERROR" if n % 25000 == 0 else "INFO"
+                f.write(f"2024-01-01 12:00:00 {level} requête {n} traitée en {n % 97} ms\n")
+
+    def test_ranged_read_reports_size_and_next_offset(self):
+        out = self.tool.read_file("app.log", offset=0, length=100)
+        header, body = out.split("\n", 1)
+        size = os.path.getsize(os.path.join(self.tool.workspace_dir, "app.log"))
+        self.assertIn(f"{size} octets", header)
+        self.assertIn("offset=", header)
+        self.assertTrue(body.startswith("2024-01-01 12:00:00 INFO requête 1 "))
+        self.assertLessEqual(len(body.encode("utf-8")), 103)
+        # Lecture par défaut bornée, même sur un gros fichier
+        self.assertLess(len(self.tool.read_file("app.log")), 70 * 1024)
+
+    def test_range_inside_multibyte_character(self):
+        self.tool.write_file("utf8.txt", "éééé")
+        out = self.tool.read_file("utf8.txt", offset=1, length=3)
+        self.assertEqual(out.split("\n", 1)[1], "éé")
+        self.assertNotIn("�", out)
+
+    def test_read_lines(self):
+        out = self.tool.read_lines("app.log", start=50000, count=2).splitlines()
+        self.assertEqual(len(out), 3)
+        self.assertTrue(out[1].startswith("50000: "))
+        self.assertIn("requête 50001", out[2])
+
+    def test_search_is_mmap_backed(self):
+        tracemalloc.start()
+        out = self.tool.search_file("app.log", "ERROR")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = out.splitlines()
+        self.assertIn("4 correspondance(s)", lines[0])
+        self.assertTrue(lines[1].startswith("25000: "))
+        self.assertTrue(lines[4].startswith("100000: "))
+        self.assertLess(peak, 3 * 1024 * 1024)
+        regex_out = self.tool.search_file("app.log", r"requête 9999\d ", regex=True)
+        self.assertIn("10 correspondance(s)", regex_out)
+
+    def test_append_and_atomic_write(self):
+        self.tool.write_file("notes.txt", "a")
+        self.tool.write_file("notes.txt", "b", mode="a")
+        self.assertTrue(self.tool.read_file("notes.txt").endswith("\nab"))
+        self.tool.write_file("notes.txt", "c")
+        self.assertTrue(self.tool.read_file("notes.txt").endswith("\nc"))
+        leftovers = [n for n in os.listdir(self.tool.workspace_dir) if n.startswith(".tmp-")]
+        self.assertEqual(leftovers, [])
+        self.assertIn("Accès non autorisé", self.tool.read_file("../x"))
+
+    @unittest.skipUnless(hasattr(os, "fchmod"), "droits POSIX indisponibles")
+    def test_atomic_write_keeps_permissions(self):
+        umask = os.umask(0o022)
+        try:
+            self.tool.write_file("neuf.txt", "a")
+            path = os.path.join(self.tool.workspace_dir, "neuf.txt")
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o644)
+            os.chmod(path, 0o640)
+            self.tool.write_file("neuf.txt", "b")
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o640)
+        finally:
+            os.umask(umask)
+
+    def test_new_file_does_not_change_process_umask(self):
+        # Le umask est global au processus : le modifier, même brièvement, gênerait les autres threads
+        with patch("os.umask", side_effect=AssertionError("umask modifié")):
+            self.assertIn("succès", self.tool.write_file("autre.txt", "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from nina_project.tools.lazy import component, preload, summarize_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Holder:
+    builds = 0
+
+    @component
+    def heavy(self):
+        Holder.builds += 1
+        return object()
+
+    decoder = component("json:JSONDecoder")
+
+
+class TestComponent(unittest.TestCase):
+    def test_built_once_on_first_access(self):
+        Holder.builds = 0
+        holder = Holder()
+        self.assertFalse(component.is_built(holder, "heavy"))
+        first = holder.heavy
+        self.assertIs(holder.heavy, first)
+        self.assertEqual(Holder.builds, 1)
+        self.assertIn("Holder.heavy", component.build_times)
+        self.assertEqual(type(holder.decoder).__name__, "JSONDecoder")
+
+    def test_assignment_overrides_factory(self):
+        Holder.builds = 0
+        holder = Holder()
+        holder.heavy = "double de test"
+        self.assertEqual(holder.heavy, "double de test")
+        self.assertEqual(Holder.builds, 0)
+
+    def test_preload_builds_in_background(self):
+        holder = Holder()
+        preload(holder, ["heavy"]).join(5)
+        self.assertTrue(component.is_built(holder, "heavy"))
+
+    def test_summarize_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       300 |        300 |     json.scanner\n"
+            "import time:       500 |       2500 | json\n"
+            "import time:      1000 |       9000 | bs4\n"
+        )
+        total, rows = summarize_importtime(stderr, top=5)
+        self.assertEqual(total, 11.5)
+        self.assertEqual(rows[0], ("bs4", 9.0, 1.0))
+        self.assertEqual(len(rows), 2)
+
+
+class TestColdStart(unittest.TestCase):
+    def test_agent_nina_defers_heavy_imports(self):
+        code = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "from agents.agent_nina import AgentNina\n"
+            "import app.orchestrator\n"
+            "AgentNina()\n"
+            "heavy = [m for m in ('bs4', 'sqlalchemy', 'duckduckgo_search', 'requests', 'numpy') if m in sys.modules]\n"
+            "print(','.join(heavy))\n"
+        ) % ROOT
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertEqual(out.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from nina_project.tools.log_tail import JsonlTail, LatencyStats, TraceAggregator
+
+
+def span(name, end_s, ms, **attributes):
+    end = int(end_s * 1e9)
+    return {"name": name, "startTimeUnixNano": end - int(ms * 1e6), "endTimeUnixNano": end,
+            "durationMs": ms, "attributes": attributes, "status": {"code": "OK"}}
+
+
+class TestJsonlTail(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, text):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_reads_only_appended_complete_lines(self):
+        tail = JsonlTail(self.path, block_size=16)
+        self.assertEqual(list(tail.read_new()), [])        # fichier absent
+        self.append('{"a": 1}\n{"a": 2}\n{"a": ')
+        self.assertEqual([r["a"] for r in tail.read_new()], [1, 2])
+        self.assertFalse(tail.changed())
+        self.assertEqual(list(tail.read_new()), [])
+        self.append('3}\nnot json\n{"a": 4}\n')
+        self.assertTrue(tail.changed())
+        self.assertEqual([r["a"] for r in tail.read_new()], [3, 4])
+        self.assertEqual(tail.bad_lines, 1)
+
+    def test_truncation_restarts_from_beginning(self):
+        tail = JsonlTail(self.path)
+        self.append('{"a": 1}\n{"a": 2}\n')
+        list(tail.read_new())
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"a": 9}\n')
+        self.assertEqual([r["a"] for r in tail.read_new()], [9])
+
+    def test_backfill_limits_first_read(self):
+        self.append("".join(json.dumps({"a": i}) + "\n" for i in range(1000)))
+        tail = JsonlTail(self.path, block_size=64, max_backfill_bytes=100)
+        values = [r["a"] for r in tail.read_new()]
+        self.assertTrue(0 < len(values) < 20)
+        self.assertEqual(values[-1], 999)
+        self.assertEqual(tail.bad_lines, 0)
+
+
+class TestTraceAggregator(unittest.TestCase):
+    def test_percentiles_are_close(self):
+        stats = LatencyStats()
+        for ms in range(1, 1001):
+            stats.add(float(ms))
+        self.assertAlmostEqual(stats.percentile(50), 500, delta=30)
+        self.assertAlmostEqual(stats.percentile(99), 990, delta=60)
+        self.assertAlmostEqual(stats.mean, 500.5)
+
+    def test_series_and_downsampling(self):
+        agg = TraceAggregator(bucket_seconds=10, max_buckets=4)
+        for i in range(40):
+            t = 1000 + i * 5
+            agg.add(span("request", t, 100 + i))
+            agg.add(span("search.source", t, 20, source="ddg", cache_hit=i % 4 == 0))
+            agg.add(span("llm.generate", t, 500, prompt_tokens=100, completion_tokens=50))
+        agg.add({"name": "incomplet"})
+        self.assertEqual(agg.records, 120)
+        self.assertLessEqual(len(agg.buckets), 4)
+        self.assertEqual(agg.bucket_seconds, 80)
+        series = agg.latency_series("request")
+        self.assertEqual(sum(row["count"] for row in series), 40)
+        self.assertTrue(all(row["p50"] <= row["p95"] <= row["p99"] for row in series))
+        hits = sum(row["search.source"] for row in agg.cache_series()) / len(agg.cache_series())
+        self.assertAlmostEqual(hits, 0.25, delta=0.1)
+        self.assertTrue(all(row["decode_tps"] == 100.0 for row in agg.token_series()))
+        self.assertEqual(agg.source_latency()["ddg"]["count"], 40)
+
+    def test_cache_rates_are_per_cache(self):
+        agg = TraceAggregator(bucket_seconds=60)
+        for i in range(4):
+            agg.add(span("vector.search", 1000 + i, 2, **{"cache_misses.vector_results": 1,
+                                                         "cache_hits.embedding": 1}))
+        self.assertEqual(agg.cache_series(), [{"time": 960, "vector_results": 0.0, "embedding": 1.0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
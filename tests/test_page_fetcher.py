@@ -0,0 +1,50 @@
+import unittest
+
+from nina_project.tools.page_fetcher import PageFetcher, chunk_text, extract_main_text
+from .page_fixture_server import article_html, serve_pages
+
+
+class TestExtraction(unittest.TestCase):
+    def test_main_text_drops_page_chrome(self):
+        extracted = extract_main_text(article_html(3, paragraphs=4))
+        self.assertEqual(extracted["title"], "Article 3")
+        self.assertIn("Titre de l'article 3", extracted["text"])
+        self.assertIn("paragraphe 3", extracted["text"])
+        for noise in ("tracking", "Accueil", "mentions légales", "À lire aussi"):
+            self.assertNotIn(noise, extracted["text"])
+
+    def test_chunks_respect_size(self):
+        text = "\n".join(f"Paragraphe {i} " + "x" * 300 for i in range(10)) + "\n" + "y" * 2500
+        chunks = chunk_text(text, max_chars=1000, overlap=100)
+        self.assertTrue(all(len(c) <= 1000 for c in chunks))
+        self.assertEqual("".join(chunks).count("Paragraphe"), 10)
+        self.assertTrue(chunks[-1].endswith("y"))
+
+
+class TestPageFetcher(unittest.TestCase):
+    def test_fetch_many_keeps_order_and_reports_errors(self):
+        fetcher = PageFetcher(max_workers=4, use_processes=False)
+        with serve_pages(paragraphs=20) as base:
+            urls = [f"{base}/article/{i}" for i in range(3)] + [f"{base}/missing", f"{base}/binary"]
+            pages = fetcher.fetch_many(urls)
+        fetcher.close()
+        self.assertEqual([p.url for p in pages], urls)
+        for i, page in enumerate(pages[:3]):
+            self.assertIsNone(page.error)
+            self.assertEqual(page.title, f"Article {i}")
+            self.assertGreater(len(page.chunks), 1)
+        self.assertEqual(pages[3].status, 404)
+        self.assertIsNotNone(pages[3].error)
+        self.assertIn("application/pdf", pages[4].error)
+
+    def test_body_is_truncated_at_max_bytes(self):
+        fetcher = PageFetcher(max_bytes=2048, use_processes=False)
+        with serve_pages(paragraphs=50) as base:
+            page = fetcher.fetch_many([f"{base}/article/1"])[0]
+        fetcher.close()
+        self.assertTrue(page.truncated)
+        self.assertEqual(page.bytes, 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
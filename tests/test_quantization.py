@@ -0,0 +1,152 @@
+import unittest
+
+import numpy as np
+
+from nina_project.tools.local_vector_store import LocalQdrantClient, models
+from nina_project.tools.quantization import DiskVectors, ProductQuantizer, ScalarQuantizer, make_quantizer
+from nina_project.tools.vector_db import VectorDB
+
+
+def _clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(16, dim))
+    vectors = centers[rng.integers(0, 16, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestQuantizers(unittest.TestCase):
+    def setUp(self):
+        self.vectors = _clustered(1000, 32)
+        self.queries = self.vectors[:3]
+
+    def test_scalar_scores_match_decoded_vectors(self):
+        quantizer = ScalarQuantizer(32)
+        quantizer.train(self.vectors)
+        codes = quantizer.encode(self.vectors)
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertLess(np.abs(quantizer.decode(codes) - self.vectors).mean(), 0.01)
+        np.testing.assert_allclose(quantizer.scores(self.queries, codes),
+                                   self.queries @ quantizer.decode(codes).T, atol=1e-4)
+
+    def test_product_quantizer_code_size_and_scores(self):
+        quantizer = ProductQuantizer.for_compression(32, 16, iterations=5)
+        self.assertEqual(quantizer.code_size, 8)               # 128 octets / 16
+        quantizer.train(self.vectors)
+        codes = quantizer.encode(self.vectors)
+        self.assertEqual(codes.shape, (1000, 8))
+        np.testing.assert_allclose(quantizer.scores(self.queries, codes),
+                                   self.queries @ quantizer.decode(codes).T, atol=1e-4)
+        # Le plus proche voisin approché d'un vecteur stocké reste dans son groupe
+        self.assertGreater(quantizer.scores(self.queries, codes)[0, 0], 0.8)
+
+    def test_make_quantizer_reads_qdrant_configs(self):
+        scalar = make_quantizer(models.ScalarQuantization(scalar=models.ScalarQuantizationConfig()), 32)
+        product = make_quantizer(models.ProductQuantization(
+            product=models.ProductQuantizationConfig(compression=models.CompressionRatio.X32)), 32)
+        self.assertIsInstance(scalar, ScalarQuantizer)
+        self.assertEqual(product.code_size, 4)
+        with self.assertRaises(ValueError):
+            make_quantizer(object(), 32)
+
+
+class TestDiskVectors(unittest.TestCase):
+    def test_append_take_and_set(self):
+        store = DiskVectors(4)
+        store.append(np.arange(8, dtype=np.float32).reshape(2, 4))
+        store.append(np.full((1, 4), 9, dtype=np.float32))
+        store.set(0, np.ones(4, dtype=np.float32))
+        np.testing.assert_array_equal(store.take([2, 0]), [[9, 9, 9, 9], [1, 1, 1, 1]])
+        self.assertEqual((len(store), store.nbytes), (3, 48))
+
+
+class TestQuantizedCollection(unittest.TestCase):
+    def _collection(self, config, n=600):
+        client = LocalQdrantClient(":memory:")
+        client.recreate_collection("q", models.VectorParams(size=32), quantization_config=config)
+        collection = client.collections["q"]
+        collection.TRAIN_SIZE = 256
+        self.vectors = _clustered(n, 32)
+        client.upsert("q", [models.PointStruct(id=i, vector=v.tolist(), payload={"parity": "odd" if i % 2 else "even"})
+                            for i, v in enumerate(self.vectors)])
+        client.create_payload_index("q", "parity", models.PayloadSchemaType.KEYWORD)
+        return client, collection
+
+    def test_int8_keeps_codes_in_ram_and_rescores_from_disk(self):
+        client, collection = self._collection(models.ScalarQuantization(scalar=models.ScalarQuantizationConfig()))
+        usage = collection.memory_usage()
+        self.assertEqual(usage["bytes_per_vector"], 32)
+        self.assertEqual(usage["disk"], 600 * 32 * 4)
+
+        exact = np.argsort(-(self.vectors @ self.vectors[7]))[:5]
+        params = models.SearchParams(quantization=models.QuantizationSearchParams(rescore=True, oversampling=4))
+        hits = client.search("q", self.vectors[7].tolist(), limit=5, search_params=params)
+        self.assertEqual([h.id for h in hits], exact.tolist())
+        self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+
+    def test_product_quantization_with_filter_and_update(self):
+        client, collection = self._collection(models.ProductQuantization(
+            product=models.ProductQuantizationConfig(compression=models.CompressionRatio.X16)))
+        self.assertEqual(collection.memory_usage()["bytes_per_vector"], 8)
+
+        only_odd = models.Filter(must=[models.FieldCondition(key="parity", match=models.MatchValue(value="odd"))])
+        hits = client.search("q", self.vectors[3].tolist(), limit=3, query_filter=only_odd)
+        self.assertEqual(hits[0].id, 3)
+        self.assertTrue(all(h.payload["parity"] == "odd" for h in hits))
+
+        # Mise à jour d'un point déjà quantifié : codes et vecteur sur disque suivent
+        client.upsert("q", [models.PointStruct(id=3, vector=self.vectors[10].tolist(), payload={"parity": "odd"})])
+        hits = client.search("q", self.vectors[10].tolist(), limit=2, query_filter=only_odd)
+        self.assertEqual(hits[0].id, 3)
+        self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+
+    def test_batch_search_matches_single_searches(self):
+        client, _ = self._collection(models.ScalarQuantization(scalar=models.ScalarQuantizationConfig()))
+        params = models.SearchParams(quantization=models.QuantizationSearchParams(rescore=True, oversampling=2))
+        queries = self.vectors[[3, 50, 99]]
+        batch = client.search_batch("q", [models.SearchRequest(vector=q, limit=4, params=params) for q in queries])
+        for query, hits in zip(queries, batch):
+            single = client.search("q", query, limit=4, search_params=params)
+            self.assertEqual([h.id for h in hits], [h.id for h in single])
+
+    def test_deleted_rows_are_compacted(self):
+        for config in (None, models.ScalarQuantization(scalar=models.ScalarQuantizationConfig())):
+            client, collection = self._collection(config)
+            client.delete("q", models.PointIdsList(points=list(range(0, 600, 3))))
+            self.assertEqual((len(collection.ids), len(collection._deleted)), (400, 0))
+            self.assertEqual(len(collection.payloads), 400)
+            if config is not None:
+                self.assertEqual((len(collection.codes()), len(collection._originals)), (400, 400))
+
+            only_odd = models.Filter(must=[models.FieldCondition(key="parity", match=models.MatchValue(value="odd"))])
+            self.assertEqual(client.count("q", count_filter=only_odd).count, 200)
+            hits = client.search("q", self.vectors[5].tolist(), limit=1, query_filter=only_odd)
+            self.assertEqual(hits[0].id, 5)
+            self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+            self.assertEqual(client.retrieve("q", [3, 4])[0].id, 4)
+            records, _ = client.scroll("q", limit=1000)
+            self.assertEqual(len(records), 400)
+
+    def test_vectors_stay_in_float_before_training(self):
+        client, collection = self._collection(models.ScalarQuantization(scalar=models.ScalarQuantizationConfig()), n=100)
+        self.assertIsNone(collection.codes())
+        self.assertEqual(client.search("q", self.vectors[5].tolist(), limit=1)[0].id, 5)
+
+
+class TestVectorDBQuantization(unittest.TestCase):
+    def test_spec_parsing(self):
+        self.assertIsNone(VectorDB.quantization_config("off"))
+        self.assertEqual(VectorDB.quantization_config("int8").scalar.type, "int8")
+        self.assertEqual(VectorDB.quantization_config("pq").product.compression, "x16")
+        self.assertEqual(VectorDB.quantization_config("pq-x64").product.compression, "x64")
+        with self.assertRaises(ValueError):
+            VectorDB.quantization_config("pq-x3")
+
+    def test_quantized_vector_db_searches(self):
+        db = VectorDB(collection="test_quantization", quantization="int8")
+        self.assertIsNotNone(db.search_params)
+        db.add_documents(["Le Vésuve est un volcan", "Le Rhône est un fleuve"])
+        self.assertEqual(db.similarity_search("Le Rhône est un fleuve", top_k=1)[0]["text"], "Le Rhône est un fleuve")
+
+
+if __name__ == "__main__":
+    unittest.main()
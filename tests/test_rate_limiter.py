@@ -0,0 +1,63 @@
+import asyncio
+import time
+import unittest
+
+from nina_project.tools.rate_limiter import HostRateLimiter, RateLimitExceeded, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_is_immediate_then_queues(self):
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(bucket.acquire(), 0.0)
+        # Troisième appel : réserve le prochain jeton (~0.1 s), le quatrième attend derrière
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.02)
+
+    def test_shed_when_wait_exceeds_budget(self):
+        bucket = TokenBucket(rate=1.0, capacity=1)
+        bucket.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(max_wait=0.1)
+        self.assertFalse(bucket.try_acquire())
+
+    def test_async_acquire_does_not_block_loop(self):
+        bucket = TokenBucket(rate=20.0, capacity=1)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.ensure_future(ticker())
+            for _ in range(3):
+                await bucket.acquire_async()
+            task.cancel()
+            return ticks
+
+        start = time.monotonic()
+        ticks = asyncio.run(scenario())
+        self.assertGreater(time.monotonic() - start, 0.08)
+        self.assertGreater(ticks, 5)
+
+
+class TestHostRateLimiter(unittest.TestCase):
+    def test_hosts_share_bucket_by_domain_suffix(self):
+        limiter = HostRateLimiter()
+        self.assertIs(limiter.bucket("https://fr.wikipedia.org/api/x"), limiter.bucket("wikipedia.org"))
+        self.assertIsNot(limiter.bucket("duckduckgo.com"), limiter.bucket("api.github.com"))
+
+    def test_shed_is_counted(self):
+        limiter = HostRateLimiter(limits={"example.org": (1.0, 1)}, max_wait=0.0)
+        limiter.acquire("https://example.org/a")
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire("https://www.example.org/b")
+        self.assertEqual(limiter.shed_count["example.org"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
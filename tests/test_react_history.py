@@ -0,0 +1,51 @@
+import unittest
+
+from nina_project.app.orchestrator import Orchestrator
+from nina_project.tools.context_renderer import estimate_tokens
+from nina_project.tools.react_history import ReActHistory
+
+
+def big_file(i: int) -> str:
+    return "\n".join(f"fichier {i} ligne {n} : valeur={n * i} statut=ok" for n in range(2000))
+
+
+class TestReActHistory(unittest.TestCase):
+    def test_prompt_stays_bounded_and_system_prompt_stable(self):
+        orchestrator = Orchestrator.__new__(Orchestrator)
+        history = ReActHistory()
+        sizes, systems = [], set()
+        for i in range(8):
+            messages = orchestrator._build_react_prompt("Analyser les logs", history)
+            systems.add(messages[0]["content"])
+            sizes.append(estimate_tokens(messages[1]["content"]))
+            history.add_thought(f"Je lis le fichier {i}.", {"tool_name": "read_file", "filename": f"log{i}.txt"})
+            history.add_observation(big_file(i))
+        self.assertEqual(len(systems), 1)
+        self.assertLess(max(sizes), 1800)
+        self.assertLess(sizes[-1], sizes[2] * 2)
+
+    def test_large_observation_is_referenced_and_readable(self):
+        history = ReActHistory(keep_recent=1)
+        history.add_thought("lecture", {"tool_name": "read_file", "filename": "a.txt"})
+        history.add_observation(big_file(1))
+        history.add_thought("suite", {"tool_name": "web_search", "query": "x"})
+        history.add_observation("court")
+        rendered = history.render()
+        self.assertIn("obs-1", rendered)
+        self.assertNotIn("ligne 1999", rendered)
+        chunk = history.read_observation("obs-1", offset=0, length=50)
+        self.assertTrue(chunk.startswith("fichier 1 ligne 0"))
+        self.assertIn("caractères 0-50", chunk)
+        self.assertIn("inconnue", history.read_observation("obs-9"))
+
+    def test_recent_steps_verbatim(self):
+        history = ReActHistory()
+        history.add_thought("t" * 500, {"tool_name": "write_file", "filename": "f", "content": "c" * 1000})
+        history.add_observation("écrit")
+        rendered = history.render()
+        self.assertIn("t" * 500, rendered)
+        self.assertIn("<1000 caractères>", rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
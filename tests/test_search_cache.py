@@ -0,0 +1,93 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from nina_project.tools.search_cache import SearchCache
+
+
+class TestSearchCache(unittest.TestCase):
+    def test_hit_after_first_fetch_with_normalized_query(self):
+        cache = SearchCache(path=None)
+        calls = []
+        fetch = lambda: calls.append(1) or ["résultat"]
+        self.assertEqual(cache.get_or_fetch("duckduckgo", "ChatGPT  news", fetch), ["résultat"])
+        self.assertEqual(cache.get_or_fetch("duckduckgo", "chatgpt news", fetch), ["résultat"])
+        self.assertEqual(len(calls), 1)
+        # Source ou paramètres différents : autre clé
+        cache.get_or_fetch("wikipedia", "chatgpt news", fetch)
+        cache.get_or_fetch("duckduckgo", "chatgpt news", fetch, params={"max_results": 5})
+        self.assertEqual(len(calls), 3)
+
+    def test_concurrent_identical_queries_are_coalesced(self):
+        cache = SearchCache(path=None)
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return ["r"]
+
+        threads = [threading.Thread(target=cache.get_or_fetch, args=("reddit", "llm", slow_fetch))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats["coalesced"], 4)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        cache = SearchCache(path=None, ttls={"hackernews": 0.05})
+        cache.get_or_fetch("hackernews", "rust", lambda: ["v1"])
+        time.sleep(0.06)
+        self.assertEqual(cache.get_or_fetch("hackernews", "rust", lambda: ["v2"]), ["v1"])
+        time.sleep(0.05)
+        self.assertEqual(cache.get_or_fetch("hackernews", "rust", lambda: ["v3"]), ["v2"])
+
+    def test_empty_results_not_cached_and_store_bounded(self):
+        cache = SearchCache(path=None, max_bytes=200)
+        calls = []
+        cache.get_or_fetch("github", "x", lambda: calls.append(1) or [])
+        cache.get_or_fetch("github", "x", lambda: calls.append(1) or [])
+        self.assertEqual(len(calls), 2)
+        for i in range(20):
+            cache.get_or_fetch("github", f"q{i}", lambda: ["x" * 40])
+        self.assertLessEqual(cache._size, 200)
+        self.assertGreater(cache.stats["evictions"], 0)
+
+    def test_entries_survive_restart(self):
+        path = os.path.join(tempfile.mkdtemp(), "cache.db")
+        SearchCache(path=path).get_or_fetch("wikipedia", "python", lambda: ["persisté"])
+        reopened = SearchCache(path=path)
+        self.assertEqual(reopened.get_or_fetch("wikipedia", "python", lambda: ["neuf"]), ["persisté"])
+
+    def test_hits_do_not_hold_the_write_lock(self):
+        path = os.path.join(tempfile.mkdtemp(), "cache.db")
+        first = SearchCache(path=path)
+        first.get_or_fetch("wikipedia", "python", lambda: ["persisté"])
+        first.get_or_fetch("wikipedia", "python", lambda: ["neuf"])
+        self.assertFalse(first._db.in_transaction)
+        # Un autre processus (ici une autre connexion) peut toujours écrire
+        second = SearchCache(path=path)
+        second._db.execute("PRAGMA busy_timeout = 100")
+        self.assertEqual(second.get_or_fetch("github", "rust", lambda: ["écrit"]), ["écrit"])
+        # L'accès est enregistré avec l'écriture suivante
+        first.get_or_fetch("reddit", "llm", lambda: ["r"])
+        key = SearchCache.make_key("wikipedia", "python")
+        accessed = second._db.execute("SELECT last_access, created FROM entries WHERE key = ?", (key,)).fetchone()
+        self.assertGreater(accessed[0], accessed[1])
+
+    def test_size_bound_shared_between_processes(self):
+        path = os.path.join(tempfile.mkdtemp(), "cache.db")
+        # Deux connexions au même fichier, comme deux workers pré-forkés
+        workers = [SearchCache(path=path, max_bytes=400), SearchCache(path=path, max_bytes=400)]
+        for i in range(20):
+            workers[i % 2].get_or_fetch("github", f"q{i}", lambda: ["x" * 40])
+        total = workers[0]._db.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+        self.assertLessEqual(total, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+import unittest
+
+from nina_project.app.server import NinaServer
+
+
+class _SlowAgent:
+    """Double d'AgentNina : un span de routage puis une réponse après `delay` secondes."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.sessions = []
+        self.tracer = None   # celui du serveur, comme pour AgentNina (get_tracer partagé)
+
+    def think_and_respond(self, query, session_id=None):
+        self.calls.append(query)
+        self.sessions.append(session_id)
+        with self.tracer.span("routing") as span:
+            span.set(route="conversation_simple")
+        time.sleep(self.delay)
+        return f"Réponse à : {query}"
+
+
+class ServerTestCase(unittest.TestCase):
+    workers, queue_size, delay = 2, 1, 0.0
+
+    def setUp(self):
+        self.agent = _SlowAgent(self.delay)
+        self.server = NinaServer(agent=self.agent, port=0, workers=self.workers, queue_size=self.queue_size,
+                                 warm=False, shutdown_grace=5)
+        self.agent.tracer = self.server.tracer
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            started.set()
+            self.loop.run_until_complete(self.server.serve_forever())
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.assertTrue(started.wait(5))
+
+    def tearDown(self):
+        if not self.server.draining:
+            asyncio.run_coroutine_threadsafe(self.server.shutdown(), self.loop).result(10)
+        self.thread.join(5)
+        self.loop.close()
+
+    def request(self, method, path, body=None, timeout=10):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=timeout)
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = resp.read().decode("utf-8")
+        conn.close()
+        return resp, data
+
+
+class TestServer(ServerTestCase):
+    def test_ask_returns_answer_and_route(self):
+        resp, data = self.request("POST", "/ask", {"query": "  Bonjour  "})
+        self.assertEqual(resp.status, 200)
+        payload = json.loads(data)
+        self.assertEqual(payload["answer"], "Réponse à : Bonjour")
+        self.assertEqual(payload["route"], "conversation_simple")
+        self.assertIsNone(payload["session_id"])
+
+    def test_session_id_is_forwarded_to_the_agent(self):
+        resp, data = self.request("POST", "/ask", {"query": "Bonjour", "session_id": " alice "})
+        self.assertEqual(json.loads(data)["session_id"], "alice")
+        self.request("GET", "/ask/stream?q=Salut&user_id=bob")
+        self.assertEqual(self.agent.sessions, ["alice", "bob"])
+        self.assertEqual(self.request("POST", "/ask", {"query": "x", "session_id": ""})[0].status, 400)
+        self.assertEqual(self.request("POST", "/ask", {"query": "x", "session_id": 42})[0].status, 400)
+
+    def test_keep_alive_connection_serves_several_requests(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        for i in range(3):
+            conn.request("POST", "/ask", body=json.dumps({"query": f"q{i}"}))
+            resp = conn.getresponse()
+            self.assertEqual(json.loads(resp.read())["answer"], f"Réponse à : q{i}")
+        conn.close()
+
+    def test_stream_emits_stage_answer_and_done(self):
+        resp, data = self.request("GET", "/ask/stream?q=Salut")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("Content-Type"), "text/event-stream; charset=utf-8")
+        events = [block.split("\n") for block in data.strip().split("\n\n")]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        self.assertEqual(names, ["queued", "stage", "answer", "done"])
+        self.assertEqual(json.loads(events[1][1].removeprefix("data: "))["route"], "conversation_simple")
+        self.assertEqual(json.loads(events[2][1].removeprefix("data: "))["answer"], "Réponse à : Salut")
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request("POST", "/ask", {"question": "x"})[0].status, 400)
+        self.assertEqual(self.request("GET", "/ask")[0].status, 405)
+        self.assertEqual(self.request("GET", "/nope")[0].status, 404)
+        resp, data = self.request("GET", "/health")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(json.loads(data)["capacity"], 3)
+
+    def test_malformed_content_length(self):
+        for value in ("-5", "abc", "1e3", ""):
+            with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+                sock.sendall(f"POST /ask HTTP/1.1\r\nContent-Length: {value}\r\n\r\n".encode("latin-1"))
+                status_line = sock.makefile("rb").readline().decode("latin-1")
+            self.assertEqual(status_line.split()[1], "400", value)
+
+
+class TestBackpressure(ServerTestCase):
+    delay = 0.5
+
+    def test_saturation_returns_429_and_deadline_504(self):
+        results = []
+
+        def ask(query, timeout=None):
+            body = {"query": query}
+            if timeout:
+                body["timeout"] = timeout
+            results.append(self.request("POST", "/ask", body)[0].status)
+
+        threads = [threading.Thread(target=ask, args=(f"q{i}",)) for i in range(3)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)   # 2 requêtes en cours, 1 en file : capacité atteinte
+        resp, data = self.request("POST", "/ask", {"query": "de trop"})
+        self.assertEqual(resp.status, 429)
+        self.assertEqual(resp.getheader("Retry-After"), "1")
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(results), [200, 200, 200])
+
+        # Échéance plus courte que le traitement
+        self.assertEqual(self.request("POST", "/ask", {"query": "lente", "timeout": 0.1})[0].status, 504)
+        self.assertEqual(self.server.stats["timeouts"], 1)
+
+    def test_graceful_shutdown_finishes_inflight_requests(self):
+        results = []
+        t = threading.Thread(target=lambda: results.append(self.request("POST", "/ask", {"query": "q"})))
+        t.start()
+        time.sleep(0.2)
+        asyncio.run_coroutine_threadsafe(self.server.shutdown(), self.loop).result(10)
+        t.join()
+        self.assertEqual(results[0][0].status, 200)
+        self.assertEqual(self.server.inflight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import os
+import tempfile
+import time
+import unittest
+
+from nina_project.agents.agent_nina import AgentNina
+from nina_project.tools.sessions import Session, SessionStore
+from nina_project.tools.tracing import Tracer
+from nina_project.tools.vector_db import VectorDB
+
+
+class TestSession(unittest.TestCase):
+    def test_rolling_summary_and_trim(self):
+        session = Session("alice")
+        for i in range(3):
+            session.add_turn(f"q{i}", f"r{i}", max_history=2)
+        # Rien n'est résumé : les échanges sont gardés jusqu'à 4 × max_history
+        self.assertEqual([t["query"] for t in session.pending_turns()], ["q0", "q1", "q2"])
+        session.set_summary("résumé", upto=3, max_history=2)
+        self.assertEqual(session.pending_turns(), [])
+        self.assertEqual([t["query"] for t in session.history], ["q1", "q2"])
+        session.add_turn("q3", "r3", max_history=2)
+        self.assertEqual([t["query"] for t in session.pending_turns()], ["q3"])
+        # Un résumé plus ancien arrivé en retard est ignoré
+        session.set_summary("ancien", upto=2, max_history=2)
+        self.assertEqual(session.summary, "résumé")
+        for i in range(10):
+            session.add_turn(f"x{i}", "", max_history=2)
+        self.assertEqual(len(session.history), 8)
+        self.assertEqual(Session.from_dict(session.to_dict()).to_dict(), session.to_dict())
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(self.tmp.name, max_active=2, idle_ttl=None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lru_eviction_to_disk_and_lazy_restore(self):
+        with self.store.use("alice") as alice:
+            alice.add_turn("bonjour", "salut", max_history=20)
+            alice.profile["langue"] = "fr"
+        self.store.get("bob")
+        self.store.get("carol")             # alice, la moins récente, part sur disque
+        self.assertNotIn("alice", self.store)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+        restored = self.store.get("alice")
+        self.assertEqual(restored.history, [{"query": "bonjour", "response": "salut"}])
+        self.assertEqual(restored.profile, {"langue": "fr"})
+        self.assertEqual(self.store.summary()["loaded"], 1)
+        self.assertEqual(self.store.summary()["evicted"], 2)
+
+    def test_session_in_use_is_not_evicted(self):
+        with self.store.use("alice") as alice:
+            self.store.get("bob")
+            self.store.get("carol")
+            self.store.get("dave")
+            self.assertIn("alice", self.store)
+            alice.add_turn("q", "r", max_history=20)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.get("alice").turns, 1)
+
+    def test_idle_eviction_flush_and_delete(self):
+        self.store.get("alice").profile["x"] = 1
+        self.store.get("alice").dirty = True
+        self.store.flush()
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+        time.sleep(0.01)
+        self.assertEqual(self.store.evict_idle(0.005), 1)
+        self.assertEqual(len(self.store), 0)
+        self.store.delete("alice")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertEqual(self.store.get("alice").profile, {})
+        with self.assertRaises(ValueError):
+            self.store.get("  ")
+        with self.assertRaises(ValueError):
+            self.store.get("x" * 200)
+
+
+class _LLM:
+    """LLM simulé : route tout vers la recherche et garde les prompts de résumé."""
+
+    def __init__(self):
+        self.summaries = []
+
+    def generate(self, prompt):
+        if prompt.rstrip().endswith("Catégorie:"):
+            return "recherche_information"
+        if prompt.rstrip().endswith("Résumé contextuel :"):
+            self.summaries.append(prompt)
+            return f"résumé {len(self.summaries)}"
+        return "réponse"
+
+
+class _Search:
+    def collect_data(self, source, query):
+        return []
+
+    def collect_pages(self, query):
+        return []
+
+
+class _Analyste:
+    def analyze_data(self, data):
+        return {}
+
+
+class _Redacteur:
+    def __init__(self):
+        self.calls = []
+
+    def generate_report(self, context_data, reasoning, profile):
+        self.calls.append((context_data, profile))
+        return f"Rapport : {context_data['query']}"
+
+
+class _SQL:
+    def __init__(self):
+        self.saved = []
+
+    def save_interaction(self, query, response, summary=None, meta=None):
+        self.saved.append((query, meta))
+
+
+class TestAgentNinaSessions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        nina = self.nina = AgentNina()
+        nina.tracer = Tracer(path=None)
+        nina.local_llm = _LLM()
+        nina.chercheur = _Search()
+        nina.analyste = _Analyste()
+        nina.redacteur = _Redacteur()
+        nina.sql_db = _SQL()
+        nina.conversation_history = []
+        nina.user_profile = {"langue": "fr"}
+        nina.vectordb = VectorDB(collection="test_sessions_shared")
+        nina.session_memory = VectorDB(collection="test_sessions_memory", dedup=False)
+        nina.sessions = SessionStore(self.tmp.name, max_active=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sessions_are_isolated(self):
+        nina = self.nina
+        nina.think_and_respond("Parle-moi de Python", session_id="alice")
+        nina.update_profile("niveau", "expert", session_id="alice")
+        nina.think_and_respond("Et de Rust ?", session_id="bob")     # alice est évincée sur disque
+        nina.think_and_respond("Et ses usages ?", session_id="alice")
+        nina.think_and_respond("Et sa syntaxe ?", session_id="alice")
+
+        self.assertEqual(nina.conversation_history, [])
+        self.assertEqual(nina.sessions.get("alice").turns, 3)
+        self.assertEqual(nina.sessions.get("bob").turns, 1)
+        # Résumé glissant : le résumé précédent d'alice, complété du seul nouvel échange
+        alice_summary = nina.local_llm.summaries[-1]
+        self.assertIn("résumé 1", alice_summary)
+        self.assertIn("Et ses usages ?", alice_summary)
+        self.assertNotIn("Parle-moi de Python", alice_summary)
+        self.assertNotIn("Rust", alice_summary)
+        # Profil : global complété par celui de la session
+        context_data, profile = nina.redacteur.calls[-1]
+        self.assertEqual(profile, {"langue": "fr", "niveau": "expert"})
+        # Souvenirs : uniquement ceux de la session
+        recalled = [r["text"] for r in context_data["search_results"]["memory_results"]]
+        self.assertTrue(any("Python" in text for text in recalled))
+        self.assertFalse(any("Rust" in text for text in recalled))
+        self.assertEqual(nina.sql_db.saved[1], ("Et de Rust ?", {"session": "bob"}))
+        self.assertEqual(nina.get_stats()["sessions"]["active"], 1)
+
+    def test_default_session_uses_global_history(self):
+        nina = self.nina
+        for i in range(3):
+            nina.think_and_respond(f"Question {i}")
+        self.assertEqual([t["query"] for t in nina.conversation_history], ["Question 0", "Question 1", "Question 2"])
+        self.assertEqual(nina.sql_db.saved[0], ("Question 0", None))
+        self.assertNotIn("Question 0", nina.local_llm.summaries[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+
+from nina_project.tools.sharded_vector_db import (
+    HashSharding, ShardedVectorDB, TimeSharding, TypeSharding, strategy_from_spec,
+)
+from nina_project.tools.vector_db import VectorDB
+
+DOCS = [f"Document {i} sur le sujet {i % 7}" for i in range(200)]
+DAY = 86400
+
+
+def _texts(results):
+    return [r["text"] for r in results]
+
+
+class TestStrategies(unittest.TestCase):
+    def test_consistent_hashing_moves_a_fraction_of_keys(self):
+        ring = HashSharding(4)
+        keys = [f"point-{i}" for i in range(2000)]
+        before = {k: ring.shard_for(k, None) for k in keys}
+        ring.add("h4")
+        moved = [k for k in keys if ring.shard_for(k, None) != before[k]]
+        self.assertTrue(all(ring.shard_for(k, None) == "h4" for k in moved))
+        self.assertLess(len(moved), len(keys) * 0.35)
+        ring.remove("h4")
+        self.assertEqual({k: ring.shard_for(k, None) for k in keys}, before)
+
+    def test_filters_prune_type_and_time_shards(self):
+        by_type = TypeSharding(groups={"web_result": "web", "web_page": "web"})
+        self.assertEqual(by_type.shard_for("x", {"type": "web_page"}), "web")
+        self.assertEqual(by_type.shard_for("x", None), "autres")
+        self.assertEqual(by_type.shards_for({"type": "web_result"}, ["web", "conversation"]), ["web"])
+
+        by_time = TimeSharding(DAY)
+        self.assertEqual(by_time.shard_for("x", {"timestamp": "1970-01-02T06:00:00+00:00"}), f"t{DAY}")
+        shards = ["t0", f"t{DAY}", f"t{2 * DAY}"]
+        self.assertEqual(by_time.shards_for({"since": DAY + 10}, shards), shards[1:])
+        self.assertEqual(by_time.shards_for({"until": DAY - 10}, shards), ["t0"])
+        # Tranche entièrement dans la période : plus de condition de date à évaluer
+        self.assertIsNone(by_time.shard_filters(f"t{2 * DAY}", {"since": DAY + 10}))
+        self.assertEqual(by_time.shard_filters(f"t{DAY}", {"since": DAY + 10, "type": "x"}),
+                         {"since": DAY + 10, "type": "x"})
+
+    def test_spec(self):
+        self.assertEqual(strategy_from_spec("hash:3").names, ["h0", "h1", "h2"])
+        self.assertEqual(strategy_from_spec("time:3600").bucket_seconds, 3600)
+        with self.assertRaises(ValueError):
+            strategy_from_spec("range")
+
+
+class TestShardedVectorDB(unittest.TestCase):
+    def setUp(self):
+        self.reference = VectorDB(collection="test_shards_reference")
+        self.reference.add_documents(DOCS)
+        self.expected = _texts(self.reference.similarity_search("sujet 3", top_k=5))
+
+    def test_scatter_gather_matches_a_single_collection(self):
+        db = ShardedVectorDB("test_shards_hash", HashSharding(3))
+        self.assertEqual(db.add_documents(DOCS), len(DOCS))
+        self.assertEqual(db.add_documents(DOCS[:5]), 0)           # doublons : même partition
+        self.assertEqual(len(db), len(DOCS))
+        self.assertEqual(_texts(db.similarity_search("sujet 3", top_k=5)), self.expected)
+        batch = db.similarity_search_many(["sujet 3", "Document 12"], top_k=5)
+        self.assertEqual(_texts(batch[0]), self.expected)
+        self.assertEqual(_texts(batch[1]), _texts(self.reference.similarity_search("Document 12", top_k=5)))
+
+    def test_duplicates_are_dropped_across_shards(self):
+        db = ShardedVectorDB("test_shards_dedup", HashSharding(8))
+        first = "Le Vésuve est un volcan actif situé près de Naples, en Italie du Sud."
+        self.assertEqual(db.add_documents([first, first[:-1] + " !"]), 1)
+        self.assertEqual(len(db), 1)
+        self.assertEqual(db.dedup_stats["near_duplicates"], 1)
+
+        by_time = ShardedVectorDB("test_shards_dedup_time", TimeSharding(DAY))
+        by_time.add_documents([first], [{"ts": 60}])
+        self.assertEqual(by_time.add_documents([first], [{"ts": DAY + 60}]), 0)
+        self.assertEqual(len(by_time), 1)
+        # Une tranche abandonnée libère ses documents
+        by_time.drop_before(DAY)
+        self.assertEqual(by_time.add_documents([first], [{"ts": DAY + 60}]), 1)
+
+    def test_merge_keeps_distinct_points_with_equal_text_and_score(self):
+        ranked = [
+            [{"id": "a", "text": "même texte", "score": 0.5}],
+            [{"id": "a", "text": "même texte", "score": 0.5}, {"id": "b", "text": "même texte", "score": 0.5}],
+        ]
+        self.assertEqual([r["id"] for r in ShardedVectorDB._merge(ranked, top_k=5)], ["a", "b"])
+
+    def test_add_and_remove_shards_online(self):
+        db = ShardedVectorDB("test_shards_rebalance", HashSharding(2))
+        db.add_documents(DOCS)
+        version = db.version
+        db.add_shard("h2")
+        sizes = db.shard_sizes()
+        self.assertEqual(sum(sizes.values()), len(DOCS))
+        self.assertGreater(sizes["h2"], 0)
+        self.assertGreater(db.version, version)
+        self.assertEqual(_texts(db.similarity_search("sujet 3", top_k=5)), self.expected)
+
+        db.remove_shard("h0")
+        self.assertEqual(sorted(db.shard_sizes()), ["h1", "h2"])
+        self.assertEqual(len(db), len(DOCS))
+        self.assertEqual(_texts(db.similarity_search("sujet 3", top_k=5)), self.expected)
+
+    def test_time_buckets_are_pruned_and_dropped(self):
+        db = ShardedVectorDB("test_shards_time", TimeSharding(DAY))
+        db.add_documents(DOCS, [{"type": "web_result", "ts": DAY * (i % 4) + 60} for i in range(len(DOCS))])
+        self.assertEqual(len(db.shards), 4)
+        recent = db.similarity_search("sujet 3", top_k=50, filters={"since": 2 * DAY})
+        self.assertTrue(recent)
+        self.assertTrue(all(DOCS.index(r["text"]) % 4 >= 2 for r in recent))
+
+        self.assertEqual(db.drop_before(2 * DAY), ["t0", f"t{DAY}"])
+        self.assertEqual(len(db), len(DOCS) // 2)
+        self.assertTrue(all(DOCS.index(r["text"]) % 4 >= 2 for r in db.similarity_search("sujet 3", top_k=50)))
+
+    def test_process_shards(self):
+        db = ShardedVectorDB("test_shards_processes", HashSharding(2), processes=True)
+        try:
+            db.add_documents(DOCS)
+            self.assertEqual(_texts(db.similarity_search("sujet 3", top_k=5)), self.expected)
+            db.add_shard("h2")
+            self.assertEqual(len(db), len(DOCS))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
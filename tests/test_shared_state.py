@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from nina_project.tools.shared_state import SharedJsonList, release, share_vector_db
+from nina_project.tools.vector_db import VectorDB
+
+
+class TestSharedJsonList(unittest.TestCase):
+    def setUp(self):
+        self.items = SharedJsonList.from_items([{"a": 1}, "é", [1, 2], None])
+
+    def tearDown(self):
+        release(self.items.segments)
+
+    def test_reads_and_local_writes(self):
+        self.assertEqual(list(self.items), [{"a": 1}, "é", [1, 2], None])
+        self.assertEqual(self.items[-2], [1, 2])
+        self.assertEqual(self.items[1:3], ["é", [1, 2]])
+        self.items[0] = {"a": 2}
+        self.items.append("nouveau")
+        self.items[4] = "remplacé"
+        self.assertEqual(len(self.items), 5)
+        self.assertEqual(self.items[0], {"a": 2})
+        self.assertEqual(self.items[4], "remplacé")
+        self.assertFalse(self.items.blob.array.flags.writeable)
+
+    def test_only_appends_are_supported(self):
+        with self.assertRaises(TypeError):
+            del self.items[0]
+        with self.assertRaises(TypeError):
+            self.items.insert(0, "x")
+        with self.assertRaises(IndexError):
+            self.items[10]
+
+
+class TestLocalBackend(unittest.TestCase):
+    def test_env_selects_the_shareable_engine(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "from tools.vector_db import VectorDB; print(type(VectorDB(collection='x').client).__name__)"
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, timeout=60,
+                             env={**os.environ, "NINA_VECTOR_BACKEND": "local", "QDRANT_URL": ""})
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "LocalQdrantClient")
+
+
+class TestShareVectorDB(unittest.TestCase):
+    def setUp(self):
+        self.db = VectorDB(collection="test_shared_state")
+        if type(self.db.client).__name__ != "LocalQdrantClient":
+            self.skipTest("Client Qdrant distant : rien à partager")
+        self.db.add_documents(
+            ["Python est un langage", "La Terre est ronde", "User: bonjour\nNina: salut"],
+            [{"type": "learned_fact"}, {"type": "learned_fact", "timestamp": "2024-01-01T00:00:00"},
+             {"type": "conversation", "timestamp": "2025-03-01T12:00:00"}],
+        )
+        self.before = self.db.similarity_search("langage", top_k=3)
+        self.segments = share_vector_db(self.db)
+
+    def tearDown(self):
+        if hasattr(self, "segments"):
+            release(self.segments)
+
+    def test_search_and_filters_unchanged(self):
+        self.assertEqual(self.db.similarity_search("langage", top_k=3), self.before)
+        res = self.db.similarity_search("bonjour", top_k=3, filters={"type": "conversation"})
+        self.assertEqual([r["meta"]["type"] for r in res], ["conversation"])
+        res = self.db.similarity_search("x", top_k=3, filters={"since": "2024-06-01T00:00:00"})
+        self.assertEqual(len(res), 1)
+
+    def test_writes_after_sharing_stay_local(self):
+        self.assertEqual(self.db.add_documents(["ChatGPT est un LLM"], [{"type": "conversation"}]), 1)
+        res = self.db.similarity_search("ChatGPT", top_k=5, filters={"type": "conversation"})
+        self.assertIn("ChatGPT est un LLM", [r["text"] for r in res])
+        self.assertEqual(len(res), 2)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "os.fork indisponible")
+    def test_forked_child_reads_shared_state(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                ok = self.db.similarity_search("langage", top_k=3) == self.before
+                os.write(write_fd, b"1" if ok else b"0")
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        self.assertEqual(result, b"1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from nina_project.tools.source_registry import SourcePlugin, SourceRegistry, SourceSelector
+
+
+def plugin(name, results, **kwargs):
+    return SourcePlugin(name, lambda q: list(results), frozenset({"news"}), **kwargs)
+
+
+class TestSourceSelector(unittest.TestCase):
+    def test_learns_to_skip_unproductive_source(self):
+        selector = SourceSelector(rng=random.Random(0))
+        good, empty = plugin("good", ["r"]), plugin("empty", [])
+        for _ in range(40):
+            for p in (good, empty):
+                selector.run(p, "rust async runtime")
+
+        picks = [selector.select("rust runtime", [good, empty]) for _ in range(50)]
+        self.assertTrue(all(good in chosen for chosen in picks))
+        self.assertLess(sum(empty in chosen for chosen in picks), 5)
+        self.assertEqual(selector.summary()["sources"]["empty"]["yield_rate"], 0.0)
+
+    def test_per_term_usefulness(self):
+        selector = SourceSelector(rng=random.Random(1))
+        books = SourcePlugin("books", lambda q: ["livre"] if "roman" in q else [], frozenset({"api"}))
+        for i in range(30):
+            selector.run(books, f"roman policier {i}")
+            selector.run(books, f"cours bourse {i}")
+        p_roman, _ = selector.estimate(books, ["roman"])
+        p_bourse, _ = selector.estimate(books, ["bourse"])
+        self.assertGreater(p_roman, 0.8)
+        self.assertLess(p_bourse, 0.2)
+
+    def test_keyword_prior_and_min_sources(self):
+        selector = SourceSelector(rng=random.Random(2))
+        github = plugin("github", ["repo"], prior=0.05, keywords=("github",))
+        self.assertGreater(selector.estimate(github, ["projets", "github"])[0], 0.8)
+        self.assertLess(selector.estimate(github, ["recette", "crepes"])[0], 0.2)
+        self.assertEqual(selector.select("recette crêpes", [github], min_sources=1), [github])
+
+    def test_errors_lower_utility(self):
+        selector = SourceSelector(rng=random.Random(3))
+
+        def failing(q):
+            raise ConnectionError("amont indisponible")
+
+        broken = SourcePlugin("broken", failing, frozenset({"news"}))
+        for i in range(10):
+            self.assertEqual(selector.run(broken, f"actualités {i}"), [])
+        self.assertEqual(selector.summary()["sources"]["broken"]["error_rate"], 1.0)
+
+        selector.rng = random.Random(4)
+        with_errors = selector.score(broken, ["actualités"])
+        selector.stats["broken"].errors = 0
+        selector.rng = random.Random(4)
+        without_errors = selector.score(broken, ["actualités"])
+        self.assertAlmostEqual(without_errors - with_errors, selector.error_weight)
+
+    def test_registry_filters_by_capability_and_availability(self):
+        registry = SourceRegistry()
+        registry.register(plugin("hn", ["a"]))
+        registry.register(plugin("paid", ["b"], available=lambda: False))
+        registry.register(SourcePlugin("web", lambda q: [], frozenset({"web"})))
+        self.assertEqual([p.name for p in registry.for_capability("news")], ["hn"])
+
+
+if __name__ == "__main__":
+    unittest.main()
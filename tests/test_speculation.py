@@ -0,0 +1,142 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from nina_project.agents.agent_nina import AgentNina
+from nina_project.tools.speculation import Speculation, SpeculationPolicy, quick_route, search_probability
+from nina_project.tools.tracing import Metrics, Tracer
+
+
+class TestQuickRoute(unittest.TestCase):
+    def test_routes_and_confidence(self):
+        self.assertEqual(quick_route("Bonjour, comment vas-tu ?")[0], "conversation_simple")
+        self.assertEqual(quick_route("Merci beaucoup !")[0], "conversation_simple")
+        self.assertEqual(quick_route("Quelle est la suite logique : 2, 4, 6, 8, ?")[0], "raisonnement_pur")
+        self.assertEqual(quick_route("Combien font 12 * 7 ?")[0], "raisonnement_pur")
+        self.assertEqual(quick_route("Quelle est la capitale de la France ?")[0], "recherche_information")
+        self.assertGreater(search_probability("Quelles sont les dernières actualités sur la fusion ?"),
+                           search_probability("Quelle est la capitale de la France ?"))
+        self.assertLess(search_probability("ok"), 0.5)
+
+    def test_policy(self):
+        policy = SpeculationPolicy(threshold=0.5, pages_threshold=0.8)
+        self.assertEqual(policy.tasks(0.3), ())
+        self.assertEqual(policy.tasks(0.6), ("memory", "web"))
+        self.assertEqual(policy.tasks(0.9), ("memory", "web", "pages"))
+        self.assertEqual(SpeculationPolicy(mode="off").tasks(1.0), ())
+        self.assertEqual(SpeculationPolicy(mode="always").tasks(0.0), ("memory", "web", "pages"))
+
+
+class TestSpeculation(unittest.TestCase):
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.metrics = Metrics()
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def test_take_reuses_result_and_discard_cancels(self):
+        gate = threading.Event()
+        speculation = Speculation(self.pool, self.metrics)
+        speculation.start("web", lambda q: gate.wait(5) and [q], "x")
+        speculation.start("pages", lambda q: ["jamais"], "x")      # en file derrière "web"
+        speculation.discard()
+        gate.set()
+        self.assertEqual(self.metrics.counter("nina_speculation_total", task="pages", outcome="cancelled"), 1)
+        self.assertEqual(self.metrics.counter("nina_speculation_total", task="web", outcome="discarded"), 1)
+
+        speculation = Speculation(self.pool, self.metrics)
+        speculation.start("web", lambda q: [q], "x")
+        self.assertEqual(speculation.take("web", lambda q: ["recalculé"], "x"), ["x"])
+        self.assertEqual(speculation.take("memory", lambda q: ["direct"], "x"), ["direct"])
+        self.assertEqual(self.metrics.counter("nina_speculation_total", task="web", outcome="used"), 1)
+        self.assertEqual(self.metrics.counter("nina_speculation_total", task="memory", outcome="used"), 0)
+
+
+class _LLM:
+    def __init__(self, route):
+        self.route = route
+
+    def generate(self, prompt):
+        return self.route if prompt.rstrip().endswith("Catégorie:") else "réponse"
+
+
+class _Search:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+
+    def collect_data(self, source, query):
+        self.calls.append(("web", query))
+        self.threads.add(threading.current_thread().name)
+        return [f"Résultat sur {query}"]
+
+    def collect_pages(self, query):
+        self.calls.append(("pages", query))
+        return []
+
+
+class _Memory:
+    def similarity_search(self, query, top_k=3, filters=None):
+        return []
+
+    def add_documents(self, docs, metadata_list=None):
+        return len(docs)
+
+
+class _Analyste:
+    def analyze_data(self, data):
+        return {}
+
+
+class _Redacteur:
+    def generate_report(self, context_data, reasoning, profile):
+        return f"{len(context_data['search_results']['web_results'])} résultat(s)"
+
+
+class _SQL:
+    def save_interaction(self, query, response, summary=None, meta=None):
+        pass
+
+
+class TestAgentNinaSpeculation(unittest.TestCase):
+    def make_agent(self, route, mode="always"):
+        nina = AgentNina()
+        nina.tracer = Tracer(path=None)
+        nina.local_llm = _LLM(route)
+        nina.chercheur = _Search()
+        nina.vectordb = _Memory()
+        nina.analyste = _Analyste()
+        nina.redacteur = _Redacteur()
+        nina.sql_db = _SQL()
+        nina.conversation_history = []
+        nina.user_profile = {}
+        nina.speculation_policy = SpeculationPolicy(mode=mode)
+        return nina
+
+    def test_search_route_reuses_speculated_collection(self):
+        nina = self.make_agent("recherche_information")
+        self.assertEqual(nina.think_and_respond("Explique-moi les volcans"), "1 résultat(s)")
+        self.assertEqual(nina.chercheur.calls.count(("web", "Explique-moi les volcans")), 1)
+        self.assertTrue(all(name.startswith("nina-speculation") for name in nina.chercheur.threads))
+        metrics = nina.tracer.metrics
+        self.assertEqual(metrics.counter("nina_speculation_total", task="web", outcome="used"), 1)
+
+    def test_other_routes_discard_speculation(self):
+        nina = self.make_agent("conversation_simple")
+        self.assertEqual(nina.think_and_respond("Explique-moi les volcans"), "réponse")
+        metrics = nina.tracer.metrics
+        discarded = sum(metrics.counter("nina_speculation_total", task=t, outcome=o)
+                        for t in ("memory", "web", "pages") for o in ("cancelled", "discarded"))
+        self.assertEqual(discarded, 3)
+        self.assertEqual(metrics.counter("nina_speculation_total", task="web", outcome="used"), 0)
+
+    def test_search_without_speculation_still_collects(self):
+        nina = self.make_agent("recherche_information", mode="off")
+        self.assertEqual(nina.think_and_respond("Bonjour"), "1 résultat(s)")
+        self.assertEqual(nina.chercheur.calls, [("web", "Bonjour"), ("pages", "Bonjour")])
+        self.assertEqual(nina.tracer.metrics.counter("nina_speculation_total", task="web", outcome="used"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
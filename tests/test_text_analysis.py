@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from nina_project.tools.text_analysis import (
+    FACTUAL_WORDS, IMPORTANCE_KEYWORDS, PERSONAL_WORDS, TOPIC_KEYWORDS, KeywordAutomaton, TextAnalyzer,
+)
+
+
+def legacy_analysis(user_input, nina_response):
+    """Ancienne logique d'`AgentMemory` (balayages `keyword in text` successifs)."""
+    text = (user_input + " " + nina_response).lower()
+    importance = 0.5 + 0.1 * sum(1 for k in IMPORTANCE_KEYWORDS if k in text)
+    if any(w in user_input.lower() for w in PERSONAL_WORDS):
+        importance += 0.2
+    if any(w in nina_response.lower() for w in FACTUAL_WORDS):
+        importance += 0.15
+    if len(text.split()) > 50:
+        importance += 0.1
+    topics = [t for t, keywords in TOPIC_KEYWORDS.items() if any(k in text for k in keywords)]
+    entities = set()
+    for word in (user_input + " " + nina_response).split():
+        clean = word.strip(".,!?;:")
+        if clean and clean[0].isupper() and len(clean) > 2 and clean not in ["Nina", "User", "Je", "Tu", "Il", "Elle"]:
+            entities.add(clean)
+    return min(importance, 1.0), entities, topics
+
+
+class TestKeywordAutomaton(unittest.TestCase):
+    def test_matches_like_substring_search(self):
+        automaton = KeywordAutomaton(["he", "she", "his", "hers", "ers", "s"])
+        found = sorted((automaton.keywords[i], end) for i, end in automaton.iter_matches("ushers"))
+        self.assertEqual(found, [("ers", 5), ("he", 3), ("hers", 5), ("s", 1), ("s", 5), ("she", 3)])
+
+        rng = random.Random(0)
+        keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)]
+        automaton = KeywordAutomaton(keywords)
+        for _ in range(50):
+            text = "".join(rng.choice("abcd") for _ in range(40))
+            matched = {automaton.keywords[i] for i, _ in automaton.iter_matches(text)}
+            self.assertEqual(matched, {k for k in keywords if k in text})
+
+
+class TestTextAnalyzer(unittest.TestCase):
+    def test_same_results_as_legacy_scans(self):
+        analyzer = TextAnalyzer()
+        vocabulary = ["Je", "mon", "Python", "bug", "définition", "travail", "Paris", "Marie", "ia",
+                      "urgent", "ami", "signifie", "recette", "Nina", "code", "mais", "image", "sport"]
+        rng = random.Random(1)
+        for _ in range(200):
+            user = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+            response = " ".join(rng.choice(vocabulary) + rng.choice(["", ".", "!"]) for _ in range(rng.randint(0, 45)))
+            importance, entities, topics = legacy_analysis(user, response)
+            result = analyzer.analyze(user, response)
+            self.assertAlmostEqual(result.importance, importance)
+            self.assertEqual(set(result.entities), entities)
+            self.assertEqual(list(result.topics), topics)
+
+    def test_scopes_cache_and_custom_lists(self):
+        analyzer = TextAnalyzer(importance_keywords=["facture"], personal_words=["moi"], factual_words=[],
+                                topics={"finance": ["facture", "banque"]})
+        # « moi » dans la réponse seulement : pas de bonus de question personnelle
+        self.assertAlmostEqual(analyzer.analyze("Une Facture ?", "pour moi").importance, 0.6)
+        self.assertAlmostEqual(analyzer.analyze("Pour moi", "ok").importance, 0.7)
+        result = analyzer.analyze("Ma Banque ferme", "")
+        self.assertEqual(result.topics, ("finance",))
+        self.assertEqual(result.entities, ("Banque",))
+        self.assertIs(analyzer.analyze("Ma Banque ferme", ""), result)
+        self.assertEqual(analyzer.stats["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
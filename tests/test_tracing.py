@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+
+from nina_project.agents.agent_nina import AgentNina, TaskComplexity, TaskPlan, TaskType
+from nina_project.tools.tracing import Metrics, Tracer, serve_metrics, to_otlp
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+        self.tracer = Tracer(path=self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_records(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_nested_spans_share_trace_and_are_exported(self):
+        with self.tracer.span("request") as root:
+            with self.tracer.span("vector.search", top_k=3) as child:
+                child.set(results=2)
+            self.tracer.set_attributes(route="recherche_information")
+        records = {r["name"]: r for r in self.read_records()}
+        self.assertEqual(records["vector.search"]["traceId"], records["request"]["traceId"])
+        self.assertEqual(records["vector.search"]["parentSpanId"], root.span_id)
+        self.assertEqual(records["vector.search"]["attributes"], {"top_k": 3, "results": 2})
+        self.assertEqual(records["request"]["attributes"]["route"], "recherche_information")
+        self.assertGreaterEqual(records["request"]["endTimeUnixNano"], records["request"]["startTimeUnixNano"])
+
+    def test_error_status_and_metrics(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.span("db.write"):
+                raise ValueError("disque plein")
+        record = self.read_records()[0]
+        self.assertEqual(record["status"], {"code": "ERROR", "message": "ValueError: disque plein"})
+        self.assertEqual(self.tracer.metrics.counter("nina_span_errors_total", span="db.write"), 1)
+
+    def test_llm_tokens_and_cache_counters(self):
+        with self.tracer.span("llm.generate") as span:
+            self.tracer.record_llm(span, 120, 30, model="local")
+            self.tracer.record_cache("search", True, source="ddg")
+        self.assertEqual(span.attributes["prompt_tokens"], 120)
+        self.assertEqual(span.attributes["cache_hits.search"], 1)
+        metrics = self.tracer.metrics
+        self.assertEqual(metrics.counter("nina_llm_tokens_total", type="completion", model="local"), 30)
+        self.assertEqual(metrics.counter("nina_cache_requests_total", cache="search", result="hit", source="ddg"), 1)
+
+    def test_caches_are_counted_separately_on_a_span(self):
+        with self.tracer.span("vector.search") as span:
+            self.tracer.record_cache("vector_results", False)
+            self.tracer.record_cache("embedding", True, level="process")
+            self.tracer.record_cache("embedding", True, level="process")
+        self.assertEqual(span.attributes["cache_misses.vector_results"], 1)
+        self.assertEqual(span.attributes["cache_hits.embedding"], 2)
+        self.assertNotIn("cache_hits.vector_results", span.attributes)
+
+    def test_to_otlp(self):
+        with self.tracer.span("request", cache_hit=False, passages=4):
+            pass
+        payload = to_otlp(self.read_records())
+        span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(span["name"], "request")
+        self.assertNotIn("parentSpanId", span)
+        self.assertIn({"key": "passages", "value": {"intValue": "4"}}, span["attributes"])
+        self.assertIn({"key": "cache_hit", "value": {"boolValue": False}}, span["attributes"])
+
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus_histogram(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 2.0):
+            metrics.observe("nina_span_duration_seconds", value, "Durée", span="routing")
+        text = metrics.render_prometheus()
+        self.assertIn("# TYPE nina_span_duration_seconds histogram", text)
+        self.assertIn('nina_span_duration_seconds_bucket{span="routing",le="0.1"} 1', text)
+        self.assertIn('nina_span_duration_seconds_bucket{span="routing",le="1"} 2', text)
+        self.assertIn('nina_span_duration_seconds_bucket{span="routing",le="+Inf"} 3', text)
+        self.assertIn('nina_span_duration_seconds_count{span="routing"} 3', text)
+        summary = metrics.histogram_summary("nina_span_duration_seconds", "span")
+        self.assertEqual(summary["routing"]["count"], 3)
+
+    def test_metrics_endpoint(self):
+        tracer = Tracer(path=None)
+        with tracer.span("routing"):
+            pass
+        server = serve_metrics(0, tracer=tracer)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                body = resp.read().decode("utf-8")
+            self.assertIn('nina_span_duration_seconds_count{span="routing"} 1', body)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class _ChattyLLM:
+    def generate(self, prompt):
+        return "conversation_simple" if prompt.rstrip().endswith("Catégorie:") else "Bonjour !"
+
+
+class _SQL:
+    def __init__(self):
+        self.fail = False
+
+    def save_interaction(self, query, response, summary=None):
+        if self.fail:
+            raise RuntimeError("base verrouillée")
+
+
+class _SlowDict(dict):
+    """Lecture lente : rend visible une mise à jour lecture-modification-écriture non protégée."""
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        time.sleep(0.001)
+        return value
+
+
+class TestAgentNinaStats(unittest.TestCase):
+    def test_task_stats_and_stage_durations(self):
+        nina = AgentNina()
+        nina.tracer = Tracer(path=None)
+        nina.local_llm = _ChattyLLM()
+        nina.sql_db = _SQL()
+        nina.conversation_history = []
+        self.assertEqual(nina.think_and_respond("Salut Nina"), "Bonjour !")
+        nina.sql_db.fail = True
+        with self.assertRaises(RuntimeError):
+            nina.think_and_respond("Salut encore")
+
+        stats = nina.get_stats()
+        self.assertEqual(stats["total_tasks"], 2)
+        self.assertEqual(stats["successful_tasks"], 1)
+        self.assertEqual(stats["success_rate"], "50.0%")
+        self.assertEqual(stats["task_types"], {"conversation_simple": 2})
+        self.assertEqual(stats["agent_usage"], {"local_llm": 2})
+        self.assertEqual(stats["stages"]["request"]["count"], 2)
+        self.assertEqual(stats["stages"]["llm.generate"]["count"], 4)
+        self.assertEqual(nina.tracer.metrics.counter("nina_span_errors_total", span="request"), 1)
+
+    def test_task_stats_from_concurrent_threads(self):
+        nina = AgentNina()
+        nina.task_stats = _SlowDict(nina.task_stats)
+        plan = TaskPlan(TaskType.CONVERSATION_SIMPLE, TaskComplexity.SIMPLE, ["local_llm"], 0.1, 1, "")
+        threads = [threading.Thread(target=lambda: [nina._record_task(plan, 0.1, True) for _ in range(25)])
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = nina.get_stats()
+        self.assertEqual(stats["total_tasks"], 100)
+        self.assertEqual(stats["successful_tasks"], 100)
+
+if __name__ == "__main__":
+    unittest.main()
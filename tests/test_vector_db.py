@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from nina_project.tools.vector_db import VectorDB
 
 
@@ -16,6 +18,74 @@ class TestVectorDB(unittest.TestCase):
             self.assertIn('text', item)
             self.assertIn('meta', item)
 
+    def test_filtered_search(self):
+        db = VectorDB(collection="test_vectors_filtered")
+        # Les faits appris dominent largement la collection
+        facts = [f"Fait numéro {i}" for i in range(50)]
+        db.add_documents(facts, [{"type": "learned_fact", "topic": "ia", "timestamp": "2024-01-01T00:00:00"}] * 50)
+        db.add_documents(
+            ["User: bonjour\nNina: salut", "User: météo ?\nNina: soleil"],
+            [
+                {"type": "conversation", "topics": ["personnel"], "timestamp": "2024-06-01T12:00:00"},
+                {"type": "conversation", "topics": ["santé"], "timestamp": "2025-03-01T12:00:00"},
+            ],
+        )
+
+        res = db.similarity_search("bonjour", top_k=5, filters={"type": "conversation"})
+        self.assertEqual(len(res), 2)
+        self.assertTrue(all(r['meta']['type'] == 'conversation' for r in res))
+
+        res = db.similarity_search("bonjour", top_k=5, filters={"type": "conversation", "since": "2025-01-01T00:00:00"})
+        self.assertEqual([r['meta']['topics'] for r in res], [["santé"]])
+
+        res = db.similarity_search("ia", top_k=3, filters={"topic": "ia"})
+        self.assertEqual(len(res), 3)
+
+        with self.assertRaises(ValueError):
+            db.similarity_search("x", filters={"inconnu": 1})
+
+    def test_filter_indexes_follow_writes(self):
+        db = VectorDB(collection="test_vectors_filter_indexes")
+        collection = db.client.collections[db.collection]
+        db.add_documents([f"Note {i}" for i in range(10)],
+                         [{"type": "note" if i % 2 else "web_result", "ts": 100 + i} for i in range(10)])
+        self.assertEqual(len(db.similarity_search("Note", top_k=10, filters={"type": "note", "since": 105})), 3)
+        self.assertIn(("type", "note"), collection._postings)
+
+        # Un ajout invalide les lignes de sa valeur et étend la colonne de dates
+        db.add_documents(["Note tardive"], [{"type": "note", "ts": 200}])
+        self.assertNotIn(("type", "note"), collection._postings)
+        res = db.similarity_search("Note", top_k=10, filters={"type": "note", "since": 150})
+        self.assertEqual([r["text"] for r in res], ["Note tardive"])
+        self.assertIsInstance(collection._float_indexes["ts"], np.ndarray)
+
+    def test_dedup_on_ingest(self):
+        db = VectorDB(collection="test_vectors_dedup")
+        snippet = "OpenAI publie un nouveau modèle de langage capable de raisonner sur des documents longs"
+        self.assertEqual(db.add_documents([snippet, "Autre résultat"]), 2)
+        # Doublon exact (casse/espaces différents) puis quasi-doublon (suffixe ajouté)
+        self.assertEqual(db.add_documents(["  " + snippet.upper() + " "]), 0)
+        self.assertEqual(db.add_documents([snippet + " ..."]), 0)
+        self.assertEqual(db.client.count(collection_name=db.collection).count, 2)
+        self.assertEqual(db.dedup_stats["exact_duplicates"], 1)
+        self.assertEqual(db.dedup_stats["near_duplicates"], 1)
+
+    def test_search_many_matches_single_searches(self):
+        db = VectorDB(collection="test_vectors_many")
+        db.add_documents([f"Document {i} sur le sujet {i % 5}" for i in range(40)],
+                         [{"type": "web_page" if i % 2 else "web_result"} for i in range(40)])
+        queries = ["sujet 1", "Document 7", "sujet 1", "inconnu"]
+        for filters in (None, {"type": "web_page"}):
+            single = [db.similarity_search(q, top_k=4, filters=filters) for q in queries]
+            db.cache_results = False
+            batch = db.similarity_search_many(queries, top_k=4, filters=filters)
+            db.cache_results = True
+            self.assertEqual([[r["text"] for r in res] for res in batch], [[r["text"] for r in res] for res in single])
+            for res, expected in zip(batch, single):
+                for r, e in zip(res, expected):
+                    self.assertAlmostEqual(r["score"], e["score"], places=5)
+        self.assertEqual(db.similarity_search_many([], top_k=4), [])
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
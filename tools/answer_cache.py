@@ -0,0 +1,144 @@
+"""answer_cache.py – Cache des réponses d'`AgentNina` et fusion des questions identiques.
+
+Une réponse est réutilisée pour la même question normalisée (`normalize_text`)
+tant que ce dont elle dépend n'a pas changé :
+- le contexte de session (`context`, empreinte du résumé et du profil) pour
+  les réponses de recherche ; les routes `raisonnement_pur` et
+  `conversation_simple` ne dépendent que de la question (`context=""`) ;
+- la version de la mémoire commune (`VectorDB.version`) pour les réponses de
+  recherche (-1 : indépendante) ; tout ajout à la mémoire invalide donc les
+  réponses construites avant lui ;
+- une durée de vie par type de tâche (`ttls`, 0 : jamais mise en cache).
+
+`coalesce` fusionne les calculs identiques simultanés : le premier appelant
+exécute le pipeline, les suivants attendent son résultat (single-flight).
+Le cache vit en mémoire : les versions de la mémoire ne survivent pas au processus.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from tools.dedup import normalize_text
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    route: str
+    context: str            # empreinte du contexte de session ("" : la réponse n'en dépend pas)
+    memory_version: int     # version de la mémoire commune (-1 : la réponse n'en dépend pas)
+    expires: float
+    plan: Any = None        # TaskPlan d'origine (statistiques)
+
+
+class AnswerCache:
+    # Durées de vie par type de tâche (secondes)
+    DEFAULT_TTLS: Dict[str, float] = {
+        "recherche_information": 900,      # l'actualité change
+        "raisonnement_pur": 86400,
+        "conversation_simple": 300,
+    }
+    DEFAULT_TTL = 0
+    MAX_VARIANTS = 4        # réponses gardées par question (contextes différents)
+
+    def __init__(self, max_entries: int = 1024, ttls: Optional[Dict[str, float]] = None, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "invalidated": 0}
+        self._entries: "OrderedDict[str, list[CachedAnswer]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AnswerCache":
+        return cls(
+            max_entries=int(os.getenv("NINA_ANSWER_CACHE_SIZE", "1024")),
+            enabled=os.getenv("NINA_ANSWER_CACHE", "on").lower() not in ("off", "0", "false", "no"),
+        )
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return normalize_text(query).rstrip(" ?!.")
+
+    def __len__(self) -> int:
+        return sum(len(variants) for variants in self._entries.values())
+
+    # ------------------------------------------------------------------
+    def get(self, query: str, context: str, memory_version: int) -> Optional[CachedAnswer]:
+        """Réponse encore valide pour ce contexte et cette version de la mémoire."""
+        key = self.normalize(query)
+        now = time.time()
+        with self._lock:
+            for entry in self._entries.get(key, ()):
+                if entry.expires > now and entry.context in ("", context) \
+                        and entry.memory_version in (-1, memory_version):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, query: str, answer: str, route: str, context: str = "", memory_version: int = -1,
+            plan: Any = None) -> bool:
+        ttl = self.ttls.get(route, self.DEFAULT_TTL)
+        if ttl <= 0 or not answer:
+            return False
+        key = self.normalize(query)
+        now = time.time()
+        entry = CachedAnswer(answer, route, context, memory_version, now + ttl, plan)
+        with self._lock:
+            variants = self._entries.pop(key, [])
+            kept = [e for e in variants if e.expires > now and (e.route, e.context) != (route, context)
+                    and (e.memory_version == -1 or memory_version == -1 or e.memory_version >= memory_version)]
+            self.stats["invalidated"] += len(variants) - len(kept)
+            self._entries[key] = ([entry] + kept)[:self.MAX_VARIANTS]
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, query: Optional[str] = None) -> int:
+        """Oublie les réponses d'une question (toutes si `query` est None)."""
+        with self._lock:
+            if query is None:
+                removed = len(self)
+                self._entries.clear()
+            else:
+                removed = len(self._entries.pop(self.normalize(query), []))
+            self.stats["invalidated"] += removed
+        return removed
+
+    # ------------------------------------------------------------------
+    def coalesce(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """`(résultat, partagé)` : `compute()` n'est exécuté qu'une fois pour les appels simultanés de même clé."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            value = compute()
+            future.set_result(value)
+            return value, False
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def summary(self) -> Dict[str, int]:
+        return {"entries": len(self), **self.stats}
@@ -0,0 +1,154 @@
+"""context_renderer.py – Mise en forme compacte du contexte de recherche pour les prompts.
+
+`AgentRedacteur` injectait `json.dumps(search_results, indent=2)` : métadonnées
+de mémoire (simhash, horodatages…), compteurs d'insights, guillemets et
+indentation consommaient une bonne part des tokens du prompt. Ici :
+1. les passages (web, pages, mémoire) sont extraits de leur structure ;
+2. les doublons exacts, quasi-doublons (SimHash) et passages inclus dans un
+   autre sont éliminés ;
+3. les passages sont classés (recouvrement lexical avec la requête, score de
+   la source) puis tronqués pour tenir dans un budget de tokens ;
+4. le résultat est une liste numérotée `[n] texte (source)` que le modèle
+   peut citer.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from tools.dedup import SimHashIndex, normalize_text, simhash
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]|\n[ \t]*", re.UNICODE)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de tokens BPE (mots longs découpés, ponctuation et indentation comptées)."""
+    return sum(1 + len(tok) // 7 for tok in _TOKEN_RE.findall(text))
+
+
+@dataclass
+class Passage:
+    text: str
+    source: str            # "web", "page" ou "mémoire"
+    score: float = 0.0     # score fourni par la source (rang ou similarité), dans [0, 1]
+    origin: Optional[str] = None   # domaine ou URL d'origine, si connu
+
+
+@dataclass
+class RenderedContext:
+    text: str
+    tokens: int
+    passages: List[Passage] = field(default_factory=list)
+    dropped_duplicates: int = 0
+    dropped_budget: int = 0
+
+
+def collect_passages(search_results: Dict[str, Any]) -> List[Passage]:
+    """Extrait les passages des résultats de `AgentNina._execute_search_task`."""
+    passages: List[Passage] = []
+    web = search_results.get("web_results") or []
+    for rank, text in enumerate(web):
+        if isinstance(text, str) and text.strip():
+            passages.append(Passage(text.strip(), "web", 1.0 / (1 + rank)))
+    for key, source in (("page_passages", "page"), ("memory_results", "mémoire")):
+        for item in search_results.get(key) or []:
+            text = (item.get("text") or "").strip() if isinstance(item, dict) else ""
+            if not text:
+                continue
+            meta = item.get("meta") or {}
+            origin = meta.get("source") if isinstance(meta.get("source"), str) else None
+            if origin and "//" in origin:
+                origin = urlparse(origin).hostname or origin
+            passages.append(Passage(text, source, float(item.get("score", 0.0)), origin))
+    return passages
+
+
+def deduplicate(passages: List[Passage]) -> List[Passage]:
+    """Supprime doublons exacts, quasi-doublons et passages contenus dans un autre.
+
+    Les passages sont parcourus par score décroissant : la meilleure version est gardée.
+    """
+    kept: List[Passage] = []
+    kept_norm: List[str] = []
+    index = SimHashIndex()
+    for passage in sorted(passages, key=lambda p: p.score, reverse=True):
+        norm = normalize_text(passage.text)
+        if any(norm in other for other in kept_norm):
+            continue
+        fingerprint = simhash(norm)
+        if fingerprint is not None:
+            if index.find(fingerprint) is not None:
+                continue
+            index.add(str(id(passage)), fingerprint)
+        # Un passage plus long qui englobe un passage déjà gardé le remplace
+        contained = [i for i, other in enumerate(kept_norm) if other in norm]
+        for i in reversed(contained):
+            del kept[i], kept_norm[i]
+        kept.append(passage)
+        kept_norm.append(norm)
+    return kept
+
+
+def rank(passages: List[Passage], query: str) -> List[Passage]:
+    """Classe par recouvrement lexical avec la requête, puis par score de la source."""
+    terms = {t for t in re.findall(r"\w+", normalize_text(query)) if len(t) > 2}
+
+    def relevance(p: Passage) -> float:
+        if not terms:
+            return p.score
+        words = set(re.findall(r"\w+", normalize_text(p.text)))
+        return 0.6 * len(terms & words) / len(terms) + 0.4 * p.score
+
+    return sorted(passages, key=relevance, reverse=True)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Tronque à `max_tokens`, de préférence en fin de phrase."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END_RE.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    words, out = text.split(), []
+    for word in words:
+        used += estimate_tokens(word)
+        if used > max_tokens:
+            break
+        out.append(word)
+    return " ".join(out) + " …"
+
+
+def render_context(search_results: Dict[str, Any], query: str = "", budget_tokens: int = 1200,
+                   max_passage_tokens: int = 200) -> RenderedContext:
+    """Rend les résultats de recherche en liste numérotée tenant dans `budget_tokens`."""
+    passages = collect_passages(search_results)
+    unique = deduplicate(passages)
+    lines, selected, used = [], [], 0
+    ranked = rank(unique, query)
+    for passage in ranked:
+        text = truncate(" ".join(passage.text.split()), max_passage_tokens)
+        label = passage.origin or passage.source
+        line = f"[{len(selected) + 1}] {text} ({label})"
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget_tokens:
+            continue
+        lines.append(line)
+        selected.append(passage)
+        used += cost
+    text = "\n".join(lines) if lines else "Aucun résultat."
+    return RenderedContext(
+        text=text,
+        tokens=estimate_tokens(text),
+        passages=selected,
+        dropped_duplicates=len(passages) - len(unique),
+        dropped_budget=len(unique) - len(selected),
+    )
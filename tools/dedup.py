@@ -0,0 +1,100 @@
+"""dedup.py – Déduplication des documents à l'ingestion dans la base vectorielle.
+
+Deux niveaux :
+1. Doublons exacts : l'identifiant d'un point est dérivé du texte normalisé
+   (`content_id`), un même snippet réinséré retombe donc sur le même point.
+2. Quasi-doublons : empreinte SimHash 64 bits sur des shingles de mots, indexée
+   par LSH (4 bandes de 16 bits). Deux textes à distance de Hamming <= 3
+   partagent forcément une bande (principe des tiroirs), la recherche ne
+   compare donc que quelques candidats.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+import uuid
+from typing import Dict, List, Optional
+
+# Espace de noms fixe : un même texte donne le même identifiant sur toutes les machines
+NINA_NAMESPACE = uuid.UUID("6f1c2b9e-5a4d-4c1e-9a57-3d2f8b0e7c11")
+
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Normalisation Unicode (NFKC), minuscules et espaces compactés."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+def content_id(text: str) -> str:
+    """Identifiant de point adressé par le contenu (UUID v5 du texte normalisé)."""
+    return str(uuid.uuid5(NINA_NAMESPACE, normalize_text(text)))
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """Empreinte SimHash 64 bits ; None si le texte est trop court pour être fiable."""
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    if len(tokens) < shingle_size * 2:
+        return None
+    weights = [0] * 64
+    for i in range(len(tokens) - shingle_size + 1):
+        shingle = " ".join(tokens[i:i + shingle_size]).encode("utf-8")
+        h = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimHashIndex:
+    """Index LSH d'empreintes SimHash pour détecter les quasi-doublons."""
+
+    def __init__(self, max_distance: int = 3, bands: int = 4):
+        if max_distance >= bands:
+            raise ValueError("max_distance doit être strictement inférieur au nombre de bandes")
+        self.max_distance = max_distance
+        self.bands = bands
+        self._band_bits = 64 // bands
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(bands)]
+        self._fingerprints: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self._band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self._band_bits)) & mask
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Retourne l'identifiant d'un quasi-doublon déjà indexé, sinon None."""
+        seen = set()
+        for band, key in self._band_keys(fingerprint):
+            for doc_id in self._buckets[band].get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if bin(self._fingerprints[doc_id] ^ fingerprint).count("1") <= self.max_distance:
+                    return doc_id
+        return None
+
+    def add(self, doc_id: str, fingerprint: int):
+        if doc_id in self._fingerprints:
+            return
+        self._fingerprints[doc_id] = fingerprint
+        for band, key in self._band_keys(fingerprint):
+            self._buckets[band].setdefault(key, []).append(doc_id)
+
+    def remove(self, doc_id: str):
+        fingerprint = self._fingerprints.pop(doc_id, None)
+        if fingerprint is None:
+            return
+        for band, key in self._band_keys(fingerprint):
+            bucket = self._buckets[band].get(key, [])
+            if doc_id in bucket:
+                bucket.remove(doc_id)
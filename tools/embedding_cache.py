@@ -0,0 +1,188 @@
+"""embedding_cache.py – Réutilisation des embeddings de requête et des résultats de recherche.
+
+Une même requête est vectorisée plusieurs fois par requête utilisateur
+(mémoire commune, souvenirs de session, passages de pages, `AgentMemory`…) et
+de nouveau à chaque question répétée. Deux niveaux de réutilisation :
+
+1. Portée requête (`embedding_scope`) : les vecteurs calculés pendant un
+   traitement sont gardés dans une ContextVar ; les tâches lancées via
+   `contextvars.copy_context` (spéculation) partagent la même table.
+2. Processus : un LRU des vecteurs de requête (clé : embedder, texte) et un
+   LRU des résultats top-k. La clé d'un résultat contient la version
+   d'écriture de la collection (`VectorDB.version`) : tout `add_documents`
+   rend les résultats précédents inatteignables, ils sortent du LRU d'eux-mêmes.
+
+Le gain croît avec le coût de l'embedder : avec `SimpleEmbedder` (un SHA-256)
+seul le cache de résultats compte, avec un vrai modèle chaque vecteur évité
+économise un appel au modèle.
+
+Taux de succès : `cache_summary()` et la métrique `nina_cache_requests_total`
+(`cache="embedding"` / `cache="vector_results"`). Tailles : NINA_EMBEDDING_CACHE_SIZE,
+NINA_VECTOR_RESULT_CACHE_SIZE (0 désactive).
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Hashable, List, Optional
+
+from tools.tracing import get_tracer
+
+_request_vectors: ContextVar[Optional[Dict[Hashable, tuple]]] = ContextVar("nina_request_vectors", default=None)
+_namespaces = itertools.count(1)
+
+
+class LRUCache:
+    """LRU borné et thread-safe, avec compteurs de succès."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache et remet ses compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self.stats = {"hits": 0, "misses": 0}
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {"entries": len(self), **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+query_vectors = LRUCache(int(os.getenv("NINA_EMBEDDING_CACHE_SIZE", "4096")))
+search_results = LRUCache(int(os.getenv("NINA_VECTOR_RESULT_CACHE_SIZE", "2048")))
+_scope_hits = {"hits": 0}
+
+
+def new_namespace() -> int:
+    """Identifiant de cache d'une instance de base (jamais réutilisé, contrairement à `id()`)."""
+    return next(_namespaces)
+
+
+def embedder_key(embedder: Any) -> str:
+    """Nom stable d'un embedder : `name` s'il en a un, sinon sa classe."""
+    name = getattr(embedder, "name", None) or getattr(embedder, "__qualname__", None) or type(embedder).__qualname__
+    return f"{name}/{getattr(embedder, 'dim', '')}"
+
+
+@contextmanager
+def embedding_scope():
+    """Vecteurs de requête partagés pendant un traitement (imbrication : la portée englobante)."""
+    if _request_vectors.get() is not None:
+        yield
+        return
+    token = _request_vectors.set({})
+    try:
+        yield
+    finally:
+        _request_vectors.reset(token)
+
+
+def embed_query(embedder: Any, text: str) -> List[float]:
+    """Vecteur de `text` : portée de la requête, puis LRU du processus, sinon `embedder.embed`."""
+    key = (embedder_key(embedder), text)
+    scope = _request_vectors.get()
+    if scope is not None and key in scope:
+        _scope_hits["hits"] += 1
+        get_tracer().record_cache("embedding", True, level="request")
+        return list(scope[key])
+    vector = query_vectors.get(key)
+    get_tracer().record_cache("embedding", vector is not None, level="process")
+    if vector is None:
+        vector = tuple(embedder.embed(text))
+        query_vectors.put(key, vector)
+    if scope is not None:
+        scope[key] = vector
+    return list(vector)
+
+
+def embed_queries(embedder: Any, texts: List[str]) -> List[List[float]]:
+    """Vecteurs de `texts` (comme `embed_query`) ; les manquants sont calculés en un lot.
+
+    Un embedder exposant `embed_batch(texts)` reçoit tous les textes manquants
+    en un appel, sinon `embed` est appelé texte par texte.
+    """
+    name = embedder_key(embedder)
+    scope = _request_vectors.get()
+    vectors: Dict[str, tuple] = {}
+    missing: List[str] = []
+    for text in dict.fromkeys(texts):
+        key = (name, text)
+        if scope is not None and key in scope:
+            _scope_hits["hits"] += 1
+            get_tracer().record_cache("embedding", True, level="request")
+            vectors[text] = scope[key]
+            continue
+        vector = query_vectors.get(key)
+        get_tracer().record_cache("embedding", vector is not None, level="process")
+        if vector is None:
+            missing.append(text)
+        else:
+            vectors[text] = vector
+    if missing:
+        batch = getattr(embedder, "embed_batch", None)
+        computed = batch(missing) if batch is not None else [embedder.embed(text) for text in missing]
+        for text, vector in zip(missing, computed):
+            vectors[text] = tuple(vector)
+            query_vectors.put((name, text), vectors[text])
+    if scope is not None:
+        for text, vector in vectors.items():
+            scope[(name, text)] = vector
+    return [list(vectors[text]) for text in texts]
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> tuple:
+    """Forme hachable et canonique d'un dict de filtres."""
+    if not filters:
+        return ()
+    items = []
+    for name, value in filters.items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            value = tuple(sorted(str(v) for v in value))
+        else:
+            value = str(value)
+        items.append((name, value))
+    return tuple(sorted(items))
+
+
+def cache_summary() -> Dict[str, Any]:
+    return {
+        "embeddings": {**query_vectors.summary(), "request_hits": _scope_hits["hits"]},
+        "results": search_results.summary(),
+    }
+
+
+def clear_caches():
+    query_vectors.clear()
+    search_results.clear()
+    _scope_hits["hits"] = 0
@@ -0,0 +1,110 @@
+"""lazy.py – Construction paresseuse des agents et outils (démarrage à froid rapide).
+
+`component` est un descripteur : l'attribut n'est importé et construit qu'au
+premier accès, puis mis en cache sur l'instance (comme `functools.cached_property`).
+Assigner l'attribut (ex. un double de test) court-circuite la construction.
+
+    class AgentNina:
+        chercheur = component("agents.agent_chercheur_v3:AgentChercheurV3")
+        sql_db = component(lambda self: SQLDatabase(...))
+
+`preload` construit des composants en tâche de fond (ex. pendant que
+l'utilisateur tape sa première question) et `summarize_importtime` résume la
+sortie de `python -X importtime`.
+"""
+from __future__ import annotations
+
+import importlib
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+Factory = Union[str, Callable[[Any], Any]]
+
+
+def import_attr(path: str) -> Any:
+    """Importe `module:attribut` (ou un module seul)."""
+    module_name, _, attr = path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr) if attr else module
+
+
+class component:
+    """Attribut construit au premier accès ; la durée de construction est journalisée."""
+
+    # "Classe.attribut" -> durée de construction (s), import compris
+    build_times: Dict[str, float] = {}
+
+    def __init__(self, factory: Factory, *args, **kwargs):
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        self.name = ""
+        self.qualname = ""
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.qualname = f"{owner.__name__}.{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self._lock:
+            if self.name in instance.__dict__:   # construit entre-temps par un autre thread
+                return instance.__dict__[self.name]
+            start = time.perf_counter()
+            if isinstance(self.factory, str):
+                value = import_attr(self.factory)(*self.args, **self.kwargs)
+            else:
+                value = self.factory(instance)
+            component.build_times[self.qualname] = time.perf_counter() - start
+            instance.__dict__[self.name] = value
+            return value
+
+    @staticmethod
+    def is_built(instance, name: str) -> bool:
+        return name in instance.__dict__
+
+
+def preload(instance, names: Iterable[str]) -> threading.Thread:
+    """Construit les composants `names` dans un thread démon ; les erreurs sont journalisées."""
+    names = list(names)
+
+    def _warm():
+        for name in names:
+            try:
+                getattr(instance, name)
+            except Exception as e:
+                print(f"[preload] Échec de la construction de '{name}': {e}")
+
+    thread = threading.Thread(target=_warm, name="nina-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def summarize_importtime(stderr: str, top: int = 15) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Résume une sortie `-X importtime`.
+
+    Retourne (temps total d'import en ms, [(module, cumulé ms, propre ms)]) pour
+    les `top` imports de premier niveau les plus coûteux.
+    """
+    roots: List[Tuple[str, float, float]] = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # Une indentation d'un seul espace : import direct (non imbriqué)
+        if len(indent) == 1:
+            roots.append((name, int(cumulative_us) / 1000, int(self_us) / 1000))
+    total = sum(cumulative for _, cumulative, _ in roots)
+    return total, sorted(roots, key=lambda r: r[1], reverse=True)[:top]
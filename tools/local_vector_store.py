@@ -0,0 +1,656 @@
+"""local_vector_store.py – Moteur vectoriel local utilisé quand Qdrant est absent.
+
+Remplace l'ancien mock de `vector_db.py` : il expose le sous-ensemble de l'API
+`QdrantClient` dont `VectorDB` a besoin (collections, upsert, recherche,
+index de payload) avec une recherche cosinus exacte en NumPy.
+
+Les filtres sont appliqués *avant* le calcul de similarité : un masque
+booléen est construit à partir des index de payload (dictionnaires inversés
+pour les champs mot-clé, colonnes NumPy pour les champs numériques) et seules
+les lignes retenues sont scorées. Une requête filtrée ne coûte donc jamais
+plus cher qu'une requête non filtrée.
+
+Avec `quantization_config` (int8 ou produit, tools/quantization.py), une
+collection garde en RAM des codes de quelques octets par vecteur une fois
+`TRAIN_SIZE` vecteurs reçus ; les vecteurs pleine précision passent sur disque
+et servent à re-scorer les meilleurs candidats (`SearchParams`).
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.quantization import DiskVectors, make_quantizer
+
+
+# -----------------------------------------------------------------------------
+# Modèles compatibles avec `qdrant_client.models`
+# -----------------------------------------------------------------------------
+class Distance:
+    COSINE = "Cosine"
+
+
+class PayloadSchemaType:
+    KEYWORD = "keyword"
+    FLOAT = "float"
+
+
+@dataclass
+class VectorParams:
+    size: int
+    distance: str = Distance.COSINE
+    on_disk: Optional[bool] = None
+
+
+class ScalarType:
+    INT8 = "int8"
+
+
+class CompressionRatio:
+    X4 = "x4"
+    X8 = "x8"
+    X16 = "x16"
+    X32 = "x32"
+    X64 = "x64"
+
+
+@dataclass
+class ScalarQuantizationConfig:
+    type: str = ScalarType.INT8
+    quantile: Optional[float] = None
+    always_ram: Optional[bool] = None
+
+
+@dataclass
+class ScalarQuantization:
+    scalar: ScalarQuantizationConfig
+
+
+@dataclass
+class ProductQuantizationConfig:
+    compression: str = CompressionRatio.X16
+    always_ram: Optional[bool] = None
+
+
+@dataclass
+class ProductQuantization:
+    product: ProductQuantizationConfig
+
+
+@dataclass
+class QuantizationSearchParams:
+    ignore: Optional[bool] = False
+    rescore: Optional[bool] = None
+    oversampling: Optional[float] = None
+
+
+@dataclass
+class SearchParams:
+    quantization: Optional[QuantizationSearchParams] = None
+    exact: Optional[bool] = False
+
+
+@dataclass
+class PointStruct:
+    id: Any
+    vector: Sequence[float]
+    payload: Optional[dict] = None
+
+
+@dataclass
+class ScoredPoint:
+    id: Any
+    score: float
+    payload: Optional[dict] = None
+    vector: Optional[List[float]] = None
+
+
+@dataclass
+class Record:
+    id: Any
+    payload: Optional[dict] = None
+    vector: Optional[List[float]] = None
+
+
+@dataclass
+class MatchValue:
+    value: Any
+
+
+@dataclass
+class MatchAny:
+    any: List[Any]
+
+
+@dataclass
+class Range:
+    gte: Optional[float] = None
+    lte: Optional[float] = None
+    gt: Optional[float] = None
+    lt: Optional[float] = None
+
+
+@dataclass
+class FieldCondition:
+    key: str
+    match: Optional[Any] = None
+    range: Optional[Range] = None
+
+
+@dataclass
+class Filter:
+    must: Optional[List[Any]] = None
+    should: Optional[List[Any]] = None
+    must_not: Optional[List[Any]] = None
+
+
+@dataclass
+class SearchRequest:
+    vector: Sequence[float]
+    limit: int = 10
+    filter: Optional[Filter] = None
+    params: Optional[SearchParams] = None
+    with_payload: Optional[bool] = True
+
+
+@dataclass
+class PointIdsList:
+    points: List[Any]
+
+
+@dataclass
+class CountResult:
+    count: int
+
+
+models = SimpleNamespace(
+    Distance=Distance,
+    PayloadSchemaType=PayloadSchemaType,
+    VectorParams=VectorParams,
+    ScalarType=ScalarType,
+    CompressionRatio=CompressionRatio,
+    ScalarQuantizationConfig=ScalarQuantizationConfig,
+    ScalarQuantization=ScalarQuantization,
+    ProductQuantizationConfig=ProductQuantizationConfig,
+    ProductQuantization=ProductQuantization,
+    QuantizationSearchParams=QuantizationSearchParams,
+    SearchParams=SearchParams,
+    SearchRequest=SearchRequest,
+    PointIdsList=PointIdsList,
+    PointStruct=PointStruct,
+    ScoredPoint=ScoredPoint,
+    Record=Record,
+    MatchValue=MatchValue,
+    MatchAny=MatchAny,
+    Range=Range,
+    FieldCondition=FieldCondition,
+    Filter=Filter,
+)
+
+
+def _get_field(payload: Optional[dict], key: str) -> Any:
+    """Lit une clé de payload, éventuellement imbriquée (`meta.type`)."""
+    value: Any = payload or {}
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _as_values(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+# -----------------------------------------------------------------------------
+# Collection locale
+# -----------------------------------------------------------------------------
+class _LocalCollection:
+    """Stockage d'une collection : matrice de vecteurs normalisés (ou leurs codes) + payloads."""
+
+    TRAIN_SIZE = 1024        # vecteurs reçus avant d'entraîner le quantificateur
+    TRAIN_SAMPLE = 8192      # vecteurs tirés pour l'entraînement
+    COMPACT_RATIO = 0.25     # part de lignes supprimées au-delà de laquelle la collection est compactée
+    COMPACT_MIN = 64         # lignes supprimées avant d'envisager un compactage
+
+    def __init__(self, dim: int, quantization: Any = None):
+        self.dim = dim
+        # Quantification : None tant que TRAIN_SIZE vecteurs n'ont pas été reçus
+        self.quantization = quantization
+        self.quantizer = None
+        self._codes: Optional[np.ndarray] = None
+        self._originals: Optional[DiskVectors] = None
+        self.ids: List[Any] = []
+        self.payloads: List[dict] = []
+        self._rows: Dict[Any, int] = {}
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        # Index de payload : champ -> {valeur -> lignes} ou colonne float (NaN sans valeur,
+        # capacité doublée à la demande : seules les len(ids) premières cases comptent)
+        self._keyword_indexes: Dict[str, Dict[Any, set]] = {}
+        self._float_indexes: Dict[str, np.ndarray] = {}
+        # Lignes de chaque (champ, valeur) en tableau NumPy, invalidées par les écritures
+        self._postings: Dict[Tuple[str, Any], np.ndarray] = {}
+        # Lignes supprimées : désindexées et masquées, récupérées par `_compact`
+        self._deleted: set = set()
+        self._live: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        """Nombre de points vivants."""
+        return len(self._rows)
+
+    # -- Index ------------------------------------------------------------
+    def create_index(self, field_name: str, field_schema: str):
+        if field_schema == PayloadSchemaType.FLOAT:
+            self._float_indexes[field_name] = np.array([self._float_value(p, field_name) for p in self.payloads],
+                                                       dtype=np.float64)
+        else:
+            self._postings = {key: rows for key, rows in self._postings.items() if key[0] != field_name}
+            index: Dict[Any, set] = {}
+            for row, payload in enumerate(self.payloads):
+                for value in _as_values(_get_field(payload, field_name)):
+                    index.setdefault(value, set()).add(row)
+            self._keyword_indexes[field_name] = index
+
+    @staticmethod
+    def _float_value(payload: dict, key: str) -> float:
+        value = _get_field(payload, key)
+        return float(value) if isinstance(value, (int, float)) else np.nan
+
+    @staticmethod
+    def _rows_set(index: Dict[Any, Any], value: Any) -> set:
+        """Lignes d'une valeur, modifiables (un index partagé en lecture seule est recopié)."""
+        rows = index.get(value)
+        if rows is None:
+            rows = index[value] = set()
+        elif not isinstance(rows, set):
+            rows = index[value] = set(rows.tolist())
+        return rows
+
+    def _index_row(self, row: int, payload: dict):
+        for name, index in self._keyword_indexes.items():
+            for value in _as_values(_get_field(payload, name)):
+                self._rows_set(index, value).add(row)
+                self._postings.pop((name, value), None)
+        for name, column in self._float_indexes.items():
+            if row >= len(column) or not column.flags.writeable:
+                # Colonne pleine, ou partagée en lecture seule (mode pré-fork) : copie agrandie
+                grown = np.full(max(row + 1, 2 * len(column), 64), np.nan)
+                grown[:len(column)] = column
+                column = self._float_indexes[name] = grown
+            column[row] = self._float_value(payload, name)
+
+    def _unindex_row(self, row: int, payload: dict):
+        for name, index in self._keyword_indexes.items():
+            for value in _as_values(_get_field(payload, name)):
+                if value in index:
+                    self._rows_set(index, value).discard(row)
+                    self._postings.pop((name, value), None)
+
+    def _posting(self, name: str, value: Any) -> Optional[np.ndarray]:
+        """Lignes de `value` dans l'index `name`, en tableau (construit une fois par écriture)."""
+        rows = self._keyword_indexes[name].get(value)
+        if rows is None or isinstance(rows, np.ndarray):
+            return rows
+        posting = self._postings.get((name, value))
+        if posting is None:
+            posting = self._postings[(name, value)] = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        return posting
+
+    # -- Écriture ---------------------------------------------------------
+    def upsert(self, points: Sequence[PointStruct]):
+        for point in points:
+            vector = np.asarray(point.vector, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            if norm > 0:
+                vector = vector / norm
+            payload = point.payload or {}
+            row = self._rows.get(point.id)
+            if row is None:
+                row = len(self.ids)
+                self._rows[point.id] = row
+                self._live = None
+                self.ids.append(point.id)
+                self.payloads.append(payload)
+                self._pending.append(vector)
+            else:
+                self._unindex_row(row, self.payloads[row])
+                self.payloads[row] = payload
+                self._set_vector(row, vector)
+            self._index_row(row, payload)
+
+    def delete(self, ids: Sequence[Any]) -> int:
+        deleted = 0
+        for point_id in ids:
+            row = self._rows.pop(point_id, None)
+            if row is None:
+                continue
+            self._unindex_row(row, self.payloads[row])
+            self._deleted.add(row)
+            deleted += 1
+        if deleted:
+            self._live = None
+            if len(self._deleted) >= max(self.COMPACT_MIN, self.COMPACT_RATIO * len(self.ids)):
+                self._compact()
+        return deleted
+
+    def _compact(self):
+        """Réécrit la collection sans ses lignes supprimées (vecteurs ou codes, payloads, index).
+
+        Les lignes vivantes sont renumérotées : un parcours `scroll` en cours
+        (offset = indice de ligne) ne doit pas être entrelacé de suppressions.
+        """
+        self._consolidate()
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[list(self._deleted)] = False
+        keep = np.flatnonzero(keep)
+        new_rows = np.full(len(self.ids), -1, dtype=np.int64)
+        new_rows[keep] = np.arange(len(keep))
+
+        if self.quantizer is None:
+            self._matrix = self._matrix[keep]
+        else:
+            self._codes = np.asarray(self._codes[keep], order=self.quantizer.order)
+            originals = DiskVectors(self.dim, self._originals.directory)
+            for start in range(0, len(keep), 65536):
+                originals.append(self._originals.take(keep[start:start + 65536]))
+            self._originals = originals
+        self.ids = [self.ids[row] for row in keep.tolist()]
+        self.payloads = [self.payloads[row] for row in keep.tolist()]
+        self._rows = {point_id: row for row, point_id in enumerate(self.ids)}
+
+        for index in self._keyword_indexes.values():
+            for value, rows in list(index.items()):
+                rows = rows if isinstance(rows, np.ndarray) else np.fromiter(rows, dtype=np.int64, count=len(rows))
+                if len(rows):
+                    index[value] = set(new_rows[rows].tolist())
+                else:
+                    del index[value]
+        self._postings = {}
+        for name, column in self._float_indexes.items():
+            self._float_indexes[name] = column[keep]
+        self._deleted = set()
+        self._live = None
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """Vecteurs (normalisés, pleine précision) des lignes `rows`."""
+        self._consolidate()
+        if self.quantizer is None:
+            return self._matrix[np.asarray(rows, dtype=np.int64)]
+        return self._originals.take(rows)
+
+    def _set_vector(self, row: int, vector: np.ndarray):
+        self._consolidate()
+        if self.quantizer is None:
+            matrix = self._matrix
+            if not matrix.flags.writeable:
+                # Matrice partagée en lecture seule (mode pré-fork) : copie locale
+                matrix = self._matrix = matrix.copy()
+            matrix[row] = vector
+        else:
+            codes = self._codes
+            if not codes.flags.writeable:
+                codes = self._codes = codes.copy(order="K")
+            codes[row] = self.quantizer.encode(vector[None, :])[0]
+            self._originals.set(row, vector)
+
+    def matrix(self) -> np.ndarray:
+        """Matrice (n, dim) des vecteurs en RAM (vide une fois la collection quantifiée)."""
+        self._consolidate()
+        return self._matrix
+
+    def codes(self) -> Optional[np.ndarray]:
+        """Codes (n, octets par vecteur) des vecteurs ; None sans quantification entraînée."""
+        self._consolidate()
+        return self._codes
+
+    def _consolidate(self):
+        """Consolide paresseusement les ajouts, et entraîne le quantificateur le moment venu."""
+        if self._pending:
+            batch = np.stack(self._pending)
+            self._pending = []
+            if self.quantizer is None:
+                self._matrix = np.vstack([self._matrix, batch])
+            else:
+                codes = np.vstack([self._codes, self.quantizer.encode(batch)])
+                self._codes = np.asarray(codes, order=self.quantizer.order)
+                self._originals.append(batch)
+        if self.quantization is not None and self.quantizer is None and len(self._matrix) >= self.TRAIN_SIZE:
+            self._train()
+
+    def _train(self):
+        matrix = self._matrix
+        quantizer = make_quantizer(self.quantization, self.dim)
+        rng = np.random.default_rng(0)
+        sample = matrix[rng.choice(len(matrix), size=min(len(matrix), self.TRAIN_SAMPLE), replace=False)]
+        quantizer.train(sample)
+        self._codes = np.asarray(quantizer.encode(matrix), order=quantizer.order)
+        self._originals = DiskVectors(self.dim)
+        self._originals.append(matrix)
+        self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        self.quantizer = quantizer
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Octets occupés par les vecteurs : en RAM (matrice ou codes) et sur disque."""
+        self._consolidate()
+        ram = self._matrix.nbytes + (self._codes.nbytes if self._codes is not None else 0)
+        return {"ram": ram, "disk": self._originals.nbytes if self._originals is not None else 0,
+                "bytes_per_vector": ram // max(1, len(self.ids))}
+
+    # -- Filtrage ---------------------------------------------------------
+    def mask(self, query_filter: Optional[Filter]) -> Optional[np.ndarray]:
+        """Construit le masque booléen des lignes acceptées (None = tout)."""
+        mask = self._filter_mask(query_filter)
+        if not self._deleted:
+            return mask
+        if self._live is None or len(self._live) != len(self.ids):
+            self._live = np.ones(len(self.ids), dtype=bool)
+            self._live[list(self._deleted)] = False
+        return self._live if mask is None else mask & self._live
+
+    def _filter_mask(self, query_filter: Optional[Filter]) -> Optional[np.ndarray]:
+        if query_filter is None:
+            return None
+        n = len(self.ids)
+        mask = np.ones(n, dtype=bool)
+        for cond in query_filter.must or []:
+            mask &= self._condition_mask(cond, n)
+        if query_filter.should:
+            any_mask = np.zeros(n, dtype=bool)
+            for cond in query_filter.should:
+                any_mask |= self._condition_mask(cond, n)
+            mask &= any_mask
+        for cond in query_filter.must_not or []:
+            mask &= ~self._condition_mask(cond, n)
+        return mask
+
+    def _condition_mask(self, cond: Any, n: int) -> np.ndarray:
+        if isinstance(cond, Filter):
+            sub = self.mask(cond)
+            return np.ones(n, dtype=bool) if sub is None else sub
+        if cond.range is not None:
+            return self._range_mask(cond.key, cond.range, n)
+        wanted = cond.match.any if isinstance(cond.match, MatchAny) else [cond.match.value]
+        mask = np.zeros(n, dtype=bool)
+        if cond.key in self._keyword_indexes:
+            for value in wanted:
+                rows = self._posting(cond.key, value)
+                if rows is not None and len(rows):
+                    mask[rows] = True
+            return mask
+        wanted_set = set(wanted)
+        for row, payload in enumerate(self.payloads):
+            if wanted_set.intersection(_as_values(_get_field(payload, cond.key))):
+                mask[row] = True
+        return mask
+
+    def _range_mask(self, key: str, rng: Range, n: int) -> np.ndarray:
+        column = self._float_indexes.get(key)
+        if column is not None:
+            values = column[:n]
+        else:
+            values = np.array([self._float_value(p, key) for p in self.payloads], dtype=np.float64)
+        mask = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            if rng.gte is not None:
+                mask &= values >= rng.gte
+            if rng.gt is not None:
+                mask &= values > rng.gt
+            if rng.lte is not None:
+                mask &= values <= rng.lte
+            if rng.lt is not None:
+                mask &= values < rng.lt
+        return mask
+
+    # -- Lecture ----------------------------------------------------------
+    def search(self, query_vector: Sequence[float], limit: int,
+               query_filter: Optional[Filter] = None, params: Optional[SearchParams] = None) -> List[ScoredPoint]:
+        return self.search_many([query_vector], limit, query_filter, params)[0]
+
+    def search_many(self, query_vectors: Sequence[Sequence[float]], limit: int,
+                    query_filter: Optional[Filter] = None,
+                    params: Optional[SearchParams] = None) -> List[List[ScoredPoint]]:
+        """Recherche groupée : filtre évalué une fois, un produit matrice × matrice pour toutes les requêtes."""
+        if not self.ids or limit <= 0 or not len(query_vectors):
+            return [[] for _ in range(len(query_vectors))]
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+
+        self._consolidate()
+        mask = self.mask(query_filter)
+        rows = None if mask is None else np.flatnonzero(mask)
+        if rows is not None and rows.size == 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.quantizer is None:
+            matrix = self._matrix
+            scores = queries @ (matrix if rows is None else matrix[rows]).T
+            top = self._top(scores, limit)
+            scores = np.take_along_axis(scores, top, axis=1)
+        else:
+            top, scores = self._quantized_search(queries, rows, limit, params)
+
+        results = []
+        for query_top, query_scores in zip(top.tolist(), scores.tolist()):
+            hits = []
+            for i, score in zip(query_top, query_scores):
+                row = int(rows[i]) if rows is not None else i
+                hits.append(ScoredPoint(id=self.ids[row], score=score, payload=self.payloads[row]))
+            results.append(hits)
+        return results
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices (q, k) des `k` meilleurs scores de chaque ligne de `scores`, par score décroissant."""
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1)
+
+    def _quantized_search(self, queries: np.ndarray, rows: Optional[np.ndarray], limit: int,
+                          params: Optional[SearchParams]):
+        """Scores approchés sur les codes, puis re-scoring exact des meilleurs candidats."""
+        options = (params.quantization if params is not None else None) or QuantizationSearchParams()
+        row_ids = np.arange(len(self.ids)) if rows is None else rows
+        if options.ignore or (params is not None and params.exact):
+            exact = queries @ self._originals.take(row_ids).T
+            top = self._top(exact, limit)
+            return top, np.take_along_axis(exact, top, axis=1)
+
+        codes = self._codes if rows is None else self._codes[rows]
+        approx = self.quantizer.scores(queries, codes)
+        if options.rescore is False:
+            top = self._top(approx, limit)
+            return top, np.take_along_axis(approx, top, axis=1)
+        candidates = self._top(approx, max(limit, math.ceil(limit * (options.oversampling or 1.0))))
+        vectors = self._originals.take(row_ids[candidates.ravel()]).reshape(*candidates.shape, self.dim)
+        exact = np.einsum("qkd,qd->qk", vectors, queries)
+        order = np.argsort(-exact, axis=1, kind="stable")[:, :limit]
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(exact, order, axis=1)
+
+
+# -----------------------------------------------------------------------------
+# Client
+# -----------------------------------------------------------------------------
+class LocalQdrantClient:
+    """Client local reproduisant la partie de l'API Qdrant utilisée par Nina."""
+
+    def __init__(self, *args, **kwargs):
+        self.collections: Dict[str, _LocalCollection] = {}
+
+    def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name=n) for n in self.collections])
+
+    def recreate_collection(self, collection_name: str, vectors_config: VectorParams,
+                            quantization_config: Any = None, **kwargs):
+        self.collections[collection_name] = _LocalCollection(vectors_config.size, quantization_config)
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: str, **kwargs):
+        self.collections[collection_name].create_index(field_name, field_schema)
+
+    def upsert(self, collection_name: str, points: Sequence[PointStruct], **kwargs):
+        self.collections[collection_name].upsert(points)
+
+    def search(self, collection_name: str, query_vector: Sequence[float], limit: int = 10,
+               query_filter: Optional[Filter] = None, search_params: Optional[SearchParams] = None,
+               **kwargs) -> List[ScoredPoint]:
+        return self.collections[collection_name].search(query_vector, limit, query_filter, search_params)
+
+    def search_batch(self, collection_name: str, requests: Sequence[SearchRequest],
+                     **kwargs) -> List[List[ScoredPoint]]:
+        """Plusieurs recherches d'un coup ; celles qui partagent filtre, limite et paramètres sont groupées."""
+        collection = self.collections[collection_name]
+        groups: Dict[tuple, List[int]] = {}
+        for i, request in enumerate(requests):
+            groups.setdefault((id(request.filter), request.limit, id(request.params)), []).append(i)
+        results: List[List[ScoredPoint]] = [[] for _ in requests]
+        for indexes in groups.values():
+            first = requests[indexes[0]]
+            found = collection.search_many([requests[i].vector for i in indexes], first.limit,
+                                           first.filter, first.params)
+            for i, hits in zip(indexes, found):
+                results[i] = hits
+        return results
+
+    def retrieve(self, collection_name: str, ids: Sequence[Any], with_payload: bool = True,
+                 with_vectors: bool = False, **kwargs) -> List[Record]:
+        collection = self.collections[collection_name]
+        rows = [(point_id, collection._rows.get(point_id)) for point_id in ids]
+        return self._records(collection, [(i, r) for i, r in rows if r is not None], with_payload, with_vectors)
+
+    def scroll(self, collection_name: str, limit: int = 10, offset: Optional[int] = None,
+               with_payload: bool = True, with_vectors: bool = False, **kwargs):
+        """Parcours paginé ; l'offset est l'indice de ligne du prochain point."""
+        collection = self.collections[collection_name]
+        start = offset or 0
+        end = min(start + limit, len(collection.ids))
+        rows = [(collection.ids[row], row) for row in range(start, end) if row not in collection._deleted]
+        records = self._records(collection, rows, with_payload, with_vectors)
+        return records, (end if end < len(collection.ids) else None)
+
+    @staticmethod
+    def _records(collection: _LocalCollection, rows: List[tuple], with_payload: Any, with_vectors: bool) -> List[Record]:
+        vectors = collection.vectors([row for _, row in rows]).tolist() if with_vectors and rows else None
+        return [
+            Record(id=point_id, payload=collection.payloads[row] if with_payload else None,
+                   vector=vectors[i] if vectors is not None else None)
+            for i, (point_id, row) in enumerate(rows)
+        ]
+
+    def delete(self, collection_name: str, points_selector: PointIdsList, **kwargs):
+        self.collections[collection_name].delete(points_selector.points)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        return self.collections.pop(collection_name, None) is not None
+
+    def count(self, collection_name: str, count_filter: Optional[Filter] = None, exact: bool = True):
+        collection = self.collections[collection_name]
+        mask = collection.mask(count_filter)
+        return CountResult(count=len(collection) if mask is None else int(mask.sum()))
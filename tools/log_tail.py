@@ -0,0 +1,284 @@
+"""log_tail.py – Lecture incrémentale des journaux JSONL et agrégation sous-échantillonnée.
+
+Le tableau de bord relisait tout le journal à chaque rafraîchissement. Ici :
+- `JsonlTail` mémorise l'offset (en octets) déjà lu et ne parse que les lignes
+  ajoutées depuis ; rien n'est relu si la taille et la date de modification
+  n'ont pas changé ; une troncature ou une rotation repart du début ; une
+  ligne en cours d'écriture (sans fin de ligne) est laissée pour la lecture
+  suivante ; `max_backfill_bytes` borne la première lecture à la fin du
+  fichier ;
+- `TraceAggregator` résume les spans de `tools/tracing.py` par intervalle de
+  temps : compte, somme et histogramme logarithmique des durées (percentiles
+  à ~5 % près), succès de cache, tokens LLM. Quand le nombre d'intervalles
+  dépasse `max_buckets`, les intervalles voisins sont fusionnés (largeur
+  doublée) : la mémoire reste bornée quelle que soit la taille du journal.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Histogramme logarithmique : seaux de 10 % de largeur à partir de 0,01 ms
+_LOG_BASE = math.log(1.1)
+_MIN_MS = 0.01
+
+
+def _bin(ms: float) -> int:
+    return 0 if ms <= _MIN_MS else int(math.log(ms / _MIN_MS) / _LOG_BASE) + 1
+
+
+def _bin_value(index: int) -> float:
+    """Milieu (géométrique) du seau `index`, en ms."""
+    return _MIN_MS if index == 0 else _MIN_MS * math.exp((index - 0.5) * _LOG_BASE)
+
+
+class JsonlTail:
+    """Lecteur incrémental d'un fichier JSONL qui grossit par ajout."""
+
+    def __init__(self, path: str, block_size: int = 4 * 1024 * 1024, max_backfill_bytes: Optional[int] = None):
+        self.path = path
+        self.block_size = block_size
+        # Première lecture limitée aux `max_backfill_bytes` derniers octets (None : tout le fichier)
+        self.max_backfill_bytes = max_backfill_bytes
+        self.offset = 0
+        self.bad_lines = 0
+        self._signature: Optional[Tuple[int, int, int]] = None   # (inode, taille, mtime_ns)
+
+    def changed(self) -> bool:
+        """Vrai si le fichier a changé depuis la dernière lecture (sans l'ouvrir)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (st.st_ino, st.st_size, st.st_mtime_ns) != self._signature
+
+    def read_new(self) -> Iterator[Dict[str, Any]]:
+        """Enregistrements ajoutés depuis le dernier appel."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if signature == self._signature:
+            return
+        if self._signature and (st.st_ino != self._signature[0] or st.st_size < self.offset):
+            self.offset = 0    # rotation ou troncature
+        skip_partial = False
+        if self._signature is None and self.max_backfill_bytes is not None \
+                and st.st_size - self.offset > self.max_backfill_bytes:
+            self.offset = st.st_size - self.max_backfill_bytes
+            skip_partial = True    # on tombe au milieu d'une ligne
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            pending = b""       # début de ligne lu, commence à `self.offset`
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                data = pending + block
+                if skip_partial:
+                    newline = data.find(b"\n")
+                    if newline < 0:
+                        self.offset += len(data)
+                        pending = b""
+                        continue
+                    self.offset += newline + 1
+                    data = data[newline + 1:]
+                    skip_partial = False
+                end = data.rfind(b"\n")
+                if end < 0:
+                    pending = data
+                    continue
+                pending = data[end + 1:]
+                self.offset += end + 1
+                for line in data[:end].split(b"\n"):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        self.bad_lines += 1
+        # Une ligne incomplète (sans fin de ligne) sera relue quand le fichier aura grossi
+        self._signature = signature
+
+
+@dataclass
+class LatencyStats:
+    """Distribution de durées mergeable : compte, somme et histogramme logarithmique."""
+    count: int = 0
+    total_ms: float = 0.0
+    bins: Dict[int, int] = field(default_factory=dict)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        index = _bin(ms)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def merge(self, other: "LatencyStats"):
+        self.count += other.count
+        self.total_ms += other.total_ms
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+
+    @property
+    def mean(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= rank:
+                return _bin_value(index)
+        return _bin_value(max(self.bins))
+
+
+@dataclass
+class _Bucket:
+    spans: Dict[str, LatencyStats] = field(default_factory=dict)
+    cache: Dict[str, List[int]] = field(default_factory=dict)      # cache -> [succès, échecs]
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_seconds: float = 0.0
+    errors: int = 0
+
+    def merge(self, other: "_Bucket"):
+        for name, stats in other.spans.items():
+            self.spans.setdefault(name, LatencyStats()).merge(stats)
+        for name, (hits, misses) in other.cache.items():
+            entry = self.cache.setdefault(name, [0, 0])
+            entry[0] += hits
+            entry[1] += misses
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.llm_seconds += other.llm_seconds
+        self.errors += other.errors
+
+
+class TraceAggregator:
+    """Séries temporelles sous-échantillonnées des spans de `logs/traces.jsonl`."""
+
+    def __init__(self, bucket_seconds: float = 60.0, max_buckets: int = 720):
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, _Bucket] = {}       # indice d'intervalle -> agrégats
+        self.totals: Dict[str, LatencyStats] = {}   # sur toute la période
+        self.records = 0
+
+    # ------------------------------------------------------------------
+    def add(self, record: Dict[str, Any]):
+        try:
+            end = int(record["endTimeUnixNano"]) / 1e9
+            ms = float(record.get("durationMs", (int(record["endTimeUnixNano"]) -
+                                                 int(record["startTimeUnixNano"])) / 1e6))
+            name = record["name"]
+        except (KeyError, TypeError, ValueError):
+            return
+        attributes = record.get("attributes") or {}
+        bucket = self.buckets.get(int(end // self.bucket_seconds))
+        if bucket is None:
+            bucket = self.buckets[int(end // self.bucket_seconds)] = _Bucket()
+        keys = [name]
+        if name == "search.source" and attributes.get("source"):
+            keys.append(f"{name}:{attributes['source']}")
+        for key in keys:
+            bucket.spans.setdefault(key, LatencyStats()).add(ms)
+            self.totals.setdefault(key, LatencyStats()).add(ms)
+        for key, count in attributes.items():
+            if key.startswith(("cache_hits.", "cache_misses.")):
+                kind, _, cache = key.partition(".")
+                entry = bucket.cache.setdefault(cache, [0, 0])
+                entry[0 if kind == "cache_hits" else 1] += int(count or 0)
+        if "cache_hit" in attributes:
+            # Journaux antérieurs : un seul indicateur par span, compté sous le nom du span
+            entry = bucket.cache.setdefault(name, [0, 0])
+            entry[0 if attributes["cache_hit"] else 1] += 1
+        if "completion_tokens" in attributes:
+            bucket.prompt_tokens += int(attributes.get("prompt_tokens") or 0)
+            bucket.completion_tokens += int(attributes["completion_tokens"] or 0)
+            bucket.llm_seconds += ms / 1000
+        if (record.get("status") or {}).get("code") == "ERROR":
+            bucket.errors += 1
+        self.records += 1
+        if len(self.buckets) > self.max_buckets:
+            self._downsample()
+
+    def add_many(self, records) -> int:
+        before = self.records
+        for record in records:
+            self.add(record)
+        return self.records - before
+
+    def _downsample(self):
+        """Double la largeur des intervalles en fusionnant les voisins."""
+        while len(self.buckets) > self.max_buckets:
+            self.bucket_seconds *= 2
+            merged: Dict[int, _Bucket] = {}
+            for index, bucket in self.buckets.items():
+                target = merged.get(index // 2)
+                if target is None:
+                    merged[index // 2] = bucket
+                else:
+                    target.merge(bucket)
+            self.buckets = merged
+
+    # ------------------------------------------------------------------
+    def span_names(self) -> List[str]:
+        return sorted(self.totals)
+
+    def latency_series(self, name: str, quantiles=(50, 95, 99)) -> List[Dict[str, float]]:
+        """[{time, p50, p95, p99, count}] pour un span, un point par intervalle."""
+        rows = []
+        for index in sorted(self.buckets):
+            stats = self.buckets[index].spans.get(name)
+            if stats is None:
+                continue
+            row = {"time": index * self.bucket_seconds, "count": stats.count}
+            row.update({f"p{q}": round(stats.percentile(q), 3) for q in quantiles})
+            rows.append(row)
+        return rows
+
+    def cache_series(self) -> List[Dict[str, float]]:
+        """[{time, <cache>: taux de succès}] pour chaque cache consulté (`cache_hits.<cache>`…)."""
+        rows = []
+        for index in sorted(self.buckets):
+            cache = self.buckets[index].cache
+            if cache:
+                row: Dict[str, float] = {"time": index * self.bucket_seconds}
+                row.update({name: round(hits / (hits + misses), 3) for name, (hits, misses) in cache.items()})
+                rows.append(row)
+        return rows
+
+    def token_series(self) -> List[Dict[str, float]]:
+        """[{time, prompt_tokens, completion_tokens, decode_tps}] ; `decode_tps` par seconde de LLM."""
+        rows = []
+        for index in sorted(self.buckets):
+            b = self.buckets[index]
+            if b.prompt_tokens or b.completion_tokens:
+                rows.append({
+                    "time": index * self.bucket_seconds,
+                    "prompt_tokens": b.prompt_tokens,
+                    "completion_tokens": b.completion_tokens,
+                    "decode_tps": round(b.completion_tokens / b.llm_seconds, 1) if b.llm_seconds else 0.0,
+                })
+        return rows
+
+    def source_latency(self) -> Dict[str, Dict[str, float]]:
+        """{source: {count, mean, p50, p95}} des sources de recherche sur toute la période."""
+        prefix = "search.source:"
+        return {
+            key[len(prefix):]: {
+                "count": stats.count,
+                "mean": round(stats.mean, 2),
+                "p50": round(stats.percentile(50), 2),
+                "p95": round(stats.percentile(95), 2),
+            }
+            for key, stats in sorted(self.totals.items()) if key.startswith(prefix)
+        }
@@ -0,0 +1,211 @@
+"""news_feed.py – Sondage incrémental des sources d'actualités et stockage local.
+
+`AgentNews` ne contacte plus les sources amont à chaque appel : un
+`NewsPoller` interroge périodiquement chaque source (en parallèle, au plus une
+fois par `min_interval`), avec requêtes conditionnelles (ETag /
+Last-Modified) et curseur incrémental, puis alimente un `ArticleStore` qui
+déduplique les articles par hash d'URL. La lecture (`ArticleStore.latest`)
+se contente de découper un instantané déjà trié.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+def url_hash(url: str) -> str:
+    """Clé de déduplication d'un article (URL sans fragment ni slash final)."""
+    normalized = url.strip().split("#", 1)[0].rstrip("/").lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _parse_ts(value: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class FeedSource:
+    """État de sondage d'une source amont."""
+    name: str
+    min_interval: float                  # délai minimal entre deux appels (limite de débit)
+    cursor: Optional[str] = None         # ex. `publishedAt` le plus récent déjà vu
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_poll: float = 0.0
+    errors: int = 0                      # échecs consécutifs
+
+    MAX_BACKOFF = 32                     # facteur maximal appliqué à `min_interval`
+
+    def is_due(self, now: float) -> bool:
+        """Intervalle écoulé ; doublé à chaque échec consécutif (jusqu'à `MAX_BACKOFF` fois)."""
+        backoff = min(2 ** self.errors, self.MAX_BACKOFF)
+        return now - self.last_poll >= self.min_interval * backoff
+
+
+@dataclass
+class FetchResult:
+    """Résultat d'un appel amont ; `articles` vaut None si la source répond 304."""
+    articles: Optional[List[Dict]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    cursor: Optional[str] = None
+
+
+Fetcher = Callable[[FeedSource], FetchResult]
+
+
+class ArticleStore:
+    """Stock local d'articles dédupliqués, servi depuis un instantané trié."""
+
+    def __init__(self, path: Optional[str] = None, max_articles: int = 1000):
+        self.path = path
+        self.max_articles = max_articles
+        self._articles: Dict[str, Dict] = {}
+        self._snapshot: List[Dict] = []
+        self._lock = threading.Lock()
+        self.sources_state: Dict[str, Dict] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def latest(self, max_items: int = 5) -> List[Dict]:
+        # Lecture sans verrou : l'instantané est remplacé atomiquement
+        return self._snapshot[:max_items]
+
+    def add(self, articles: List[Dict]) -> int:
+        """Ajoute les articles inconnus ; retourne le nombre de nouveaux articles."""
+        added = 0
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for article in articles:
+                url = article.get("url")
+                if not url:
+                    continue
+                key = url_hash(url)
+                if key in self._articles:
+                    continue
+                # Date stable : celle de la source, sinon la première fois où l'article a été vu
+                stored = dict(article)
+                stored["published"] = stored.get("published") or now
+                self._articles[key] = stored
+                added += 1
+            if added:
+                ordered = sorted(self._articles.values(), key=lambda a: _parse_ts(a["published"]), reverse=True)
+                ordered = ordered[: self.max_articles]
+                self._articles = {url_hash(a["url"]): a for a in ordered}
+                self._snapshot = ordered
+        return added
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.sources_state = data.get("sources", {})
+            self.add(data.get("articles", []))
+        except Exception as e:
+            print(f"[ArticleStore] Erreur chargement {self.path}: {e}")
+
+    def save(self, sources: Dict[str, FeedSource]):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            data = {"articles": self._snapshot, "sources": {n: asdict(s) for n, s in sources.items()}}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[ArticleStore] Erreur sauvegarde {self.path}: {e}")
+
+
+class NewsPoller:
+    """Planifie le sondage des sources et alimente l'`ArticleStore`."""
+
+    def __init__(self, store: ArticleStore, max_workers: int = 4):
+        self.store = store
+        self.sources: Dict[str, FeedSource] = {}
+        self._fetchers: Dict[str, Fetcher] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-poll")
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def register(self, name: str, fetcher: Fetcher, min_interval: float):
+        source = FeedSource(name=name, min_interval=min_interval)
+        # Reprise du curseur / ETag persistés lors d'une exécution précédente
+        for key, value in self.store.sources_state.get(name, {}).items():
+            if key in ("cursor", "etag", "last_modified", "last_poll"):
+                setattr(source, key, value)
+        self.sources[name] = source
+        self._fetchers[name] = fetcher
+
+    def poll_due(self, force: bool = False) -> int:
+        """Interroge en parallèle les sources dont l'intervalle est écoulé."""
+        if not self._poll_lock.acquire(blocking=False):
+            return 0  # un sondage est déjà en cours : on sert le stock actuel
+        try:
+            now = time.time()
+            due = [s for s in self.sources.values() if force or s.is_due(now)]
+            if not due:
+                return 0
+            futures = {s.name: self._executor.submit(self._poll_source, s) for s in due}
+            added = sum(f.result() for f in futures.values())
+            self.store.save(self.sources)
+            return added
+        finally:
+            self._poll_lock.release()
+
+    def _poll_source(self, source: FeedSource) -> int:
+        source.last_poll = time.time()
+        try:
+            result = self._fetchers[source.name](source)
+        except Exception as e:
+            source.errors += 1
+            print(f"[NewsPoller] Erreur source {source.name}: {e}")
+            return 0
+        source.errors = 0
+        if isinstance(result.etag, str):
+            source.etag = result.etag
+        if isinstance(result.last_modified, str):
+            source.last_modified = result.last_modified
+        if result.cursor:
+            source.cursor = result.cursor
+        return self.store.add(result.articles) if result.articles else 0
+
+    def start(self, tick: float = 5.0):
+        """Lance le sondage en tâche de fond (thread démon)."""
+        if self.running:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.is_set():
+                self.poll_due()
+                self._stop.wait(tick)
+
+        self._thread = threading.Thread(target=_loop, name="news-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
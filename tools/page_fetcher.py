@@ -0,0 +1,254 @@
+"""page_fetcher.py – Téléchargement parallèle des pages de résultats et extraction du texte.
+
+Les moteurs de recherche ne renvoient qu'un titre et un extrait (~200
+caractères). `PageFetcher` télécharge les N premières URLs en parallèle
+(pool de connexions borné, taille de corps maximale, décodage en flux), puis
+extrait le texte principal dans un pool de processus : l'analyse HTML est
+coûteuse en CPU et resterait sinon sérialisée par le GIL. Le texte est enfin
+découpé en passages prêts à être indexés par `VectorDB`.
+"""
+from __future__ import annotations
+
+import codecs
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.rate_limiter import HostRateLimiter, RateLimitExceeded, get_rate_limiter
+
+
+# ----------------------------------------------------------------------
+# Extraction (fonctions de module : exécutées dans les processus du pool)
+# ----------------------------------------------------------------------
+
+_SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "template", "iframe"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "blockquote", "pre", "td",
+               "h1", "h2", "h3", "h4", "h5", "h6", "br", "tr", "ul", "ol", "table", "figcaption"}
+_HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_WS = re.compile(r"\s+")
+
+
+class _MainTextParser(HTMLParser):
+    """Parcours unique du HTML : ignore le « chrome » de page, regroupe le texte par bloc."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[tuple] = []   # (texte, est_un_titre)
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._heading = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._heading = tag in _HEADINGS
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._heading = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush(self):
+        if self._buffer:
+            text = _WS.sub(" ", "".join(self._buffer)).strip()
+            if text:
+                self.blocks.append((text, self._heading))
+            self._buffer = []
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_main_text(html: str, min_block_chars: int = 40) -> Dict[str, str]:
+    """Texte principal d'une page : blocs suffisamment longs et titres de section.
+
+    Les blocs courts (menus, boutons, mentions) sont écartés, sauf les titres.
+    """
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass  # HTML invalide : on garde ce qui a pu être lu
+    kept = [text for text, heading in parser.blocks if heading or len(text) >= min_block_chars]
+    return {"title": _WS.sub(" ", parser.title).strip(), "text": "\n".join(kept)}
+
+
+def chunk_text(text: str, max_chars: int = 1000, overlap: int = 150) -> List[str]:
+    """Découpe en passages d'au plus `max_chars`, sur les frontières de paragraphes.
+
+    Un paragraphe trop long est coupé en fenêtres chevauchantes de `overlap` caractères.
+    """
+    chunks: List[str] = []
+    current = ""
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            step = max_chars - overlap
+            chunks.extend(paragraph[i:i + max_chars] for i in range(0, len(paragraph) - overlap, step))
+            continue
+        if current and len(current) + 1 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _extract_and_chunk(html: str, max_chars: int) -> Dict:
+    extracted = extract_main_text(html)
+    extracted["chunks"] = chunk_text(extracted["text"], max_chars=max_chars)
+    return extracted
+
+
+# ----------------------------------------------------------------------
+# Téléchargement
+# ----------------------------------------------------------------------
+
+@dataclass
+class Page:
+    """Page téléchargée et extraite ; `error` est renseigné en cas d'échec."""
+    url: str
+    status: int = 0
+    title: str = ""
+    text: str = ""
+    chunks: List[str] = field(default_factory=list)
+    bytes: int = 0
+    truncated: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class PageFetcher:
+    """Télécharge des pages en parallèle et en extrait le texte principal."""
+
+    HTML_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+    def __init__(self, max_workers: int = 8, max_bytes: int = 2 * 1024 * 1024, timeout: float = 10.0,
+                 extract_workers: Optional[int] = None, use_processes: bool = True,
+                 inline_below: int = 16 * 1024, chunk_chars: int = 1000,
+                 rate_limiter: Optional[HostRateLimiter] = None):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.chunk_chars = chunk_chars
+        # Les petites pages sont extraites sur place : l'aller-retour inter-processus coûterait plus cher
+        self.inline_below = inline_below
+        self.use_processes = use_processes
+        self.extract_workers = extract_workers
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+        # Pool de connexions borné au nombre de téléchargements simultanés
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (compatible; NinaBot/0.1)"
+        self._downloads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-fetch")
+        self._extractors: Optional[ProcessPoolExecutor] = None
+
+    # ------------------------------------------------------------------
+    def fetch_many(self, urls: List[str]) -> List[Page]:
+        """Télécharge et extrait `urls` ; les pages sont retournées dans l'ordre des URLs."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        downloads = [self._downloads.submit(self._download, url) for url in urls]
+        extractions: List[Optional[Future]] = []
+        pages: List[Page] = []
+        for future in downloads:
+            page, html = future.result()
+            pages.append(page)
+            extractions.append(self._submit_extraction(html) if html else None)
+        for page, extraction in zip(pages, extractions):
+            if extraction is None:
+                continue
+            try:
+                extracted = extraction.result()
+                page.title, page.text, page.chunks = extracted["title"], extracted["text"], extracted["chunks"]
+            except Exception as e:
+                page.error = f"extraction: {e}"
+        return pages
+
+    def _download(self, url: str):
+        page = Page(url=url)
+        start = time.perf_counter()
+        try:
+            self.rate_limiter.acquire(url)
+            with self.session.get(url, timeout=self.timeout, stream=True) as resp:
+                page.status = resp.status_code
+                resp.raise_for_status()
+                content_type = resp.headers.get("Content-Type", "text/html").lower()
+                if not content_type.startswith(self.HTML_TYPES):
+                    page.error = f"type non pris en charge: {content_type}"
+                    return page, None
+                # requests suppose ISO-8859-1 sans charset explicite : on préfère UTF-8
+                encoding = resp.encoding if "charset=" in content_type else "utf-8"
+                try:
+                    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                parts: List[str] = []
+                for block in resp.iter_content(chunk_size=16 * 1024):
+                    remaining = self.max_bytes - page.bytes
+                    if len(block) >= remaining:
+                        parts.append(decoder.decode(block[:remaining]))
+                        page.bytes = self.max_bytes
+                        page.truncated = True
+                        break
+                    page.bytes += len(block)
+                    parts.append(decoder.decode(block))
+                parts.append(decoder.decode(b"", final=True))
+            return page, "".join(parts)
+        except (requests.RequestException, RateLimitExceeded) as e:
+            page.error = str(e)
+            return page, None
+        finally:
+            page.elapsed = time.perf_counter() - start
+
+    def _submit_extraction(self, html: str) -> Future:
+        if self.use_processes and len(html) >= self.inline_below:
+            try:
+                if self._extractors is None:
+                    self._extractors = ProcessPoolExecutor(max_workers=self.extract_workers)
+                return self._extractors.submit(_extract_and_chunk, html, self.chunk_chars)
+            except (OSError, RuntimeError, NotImplementedError) as e:
+                # Environnement sans multiprocessing : extraction dans le thread courant
+                print(f"[PageFetcher] Pool de processus indisponible ({e}), extraction locale")
+                self.use_processes = False
+        future: Future = Future()
+        future.set_result(_extract_and_chunk(html, self.chunk_chars))
+        return future
+
+    def close(self):
+        self._downloads.shutdown(wait=False)
+        if self._extractors is not None:
+            self._extractors.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,229 @@
+"""quantization.py – Quantification des vecteurs du moteur local (int8, produit).
+
+Avec un vrai embedder (quelques centaines de dimensions), les matrices float32
+de `LocalQdrantClient` dominent la RAM des workers. Deux codages, entraînés sur
+les vecteurs de la collection :
+
+- `ScalarQuantizer` (int8) : un octet par dimension (÷4), bornes par dimension
+  prises aux quantiles pour ne pas gaspiller la plage sur quelques valeurs extrêmes ;
+- `ProductQuantizer` : le vecteur est coupé en `m` sous-vecteurs, chacun
+  remplacé par l'indice (un octet) du plus proche de 256 centroïdes appris par
+  k-means ; `m` octets par vecteur, soit quelques dizaines d'octets.
+
+Le score est calculé de façon asymétrique : la requête reste en float32, seuls
+les vecteurs stockés sont codés (produit scalaire direct pour l'int8, table de
+correspondance requête × centroïdes pour le PQ). `DiskVectors` garde les
+vecteurs pleine précision sur disque pour re-scorer les meilleurs candidats.
+
+Les noms de configuration suivent `qdrant_client.models` (`ScalarQuantization`,
+`ProductQuantization`, `CompressionRatio`) : la même configuration vaut pour un
+serveur Qdrant.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, List, Optional
+
+import numpy as np
+
+_CHUNK = 1024        # lignes int8 converties à la fois (restent dans le cache du processeur)
+_QUERY_CHUNK = 32    # requêtes PQ cumulées à la fois (borne le tableau (q, n) temporaire)
+
+
+class ScalarQuantizer:
+    """Codage int8 par dimension : v ≈ offset + scale * code."""
+
+    order = "C"          # disposition des codes attendue par `scores` (une ligne par vecteur)
+
+    def __init__(self, dim: int, quantile: Optional[float] = 0.99):
+        self.dim = dim
+        self.quantile = quantile
+        self.code_size = dim
+        self.offset = np.zeros(dim, dtype=np.float32)
+        self.scale = np.ones(dim, dtype=np.float32)
+
+    def train(self, vectors: np.ndarray):
+        if self.quantile and len(vectors) > 1:
+            low = np.quantile(vectors, 1.0 - self.quantile, axis=0)
+            high = np.quantile(vectors, self.quantile, axis=0)
+        else:
+            low, high = vectors.min(axis=0), vectors.max(axis=0)
+        self.offset = low.astype(np.float32)
+        self.scale = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + codes.astype(np.float32) * self.scale
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Produits scalaires approchés (q, n) requêtes · vecteurs codés."""
+        weights = (queries * self.scale).astype(np.float32)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), _CHUNK):
+            out[:, start:start + _CHUNK] = weights @ codes[start:start + _CHUNK].astype(np.float32).T
+        return out + (queries @ self.offset)[:, None]
+
+
+class ProductQuantizer:
+    """Quantification produit : `m` sous-espaces de 256 centroïdes (un octet chacun)."""
+
+    order = "F"          # codes par colonne : chaque sous-espace est lu d'un bloc par `scores`
+
+    def __init__(self, dim: int, m: int, centroids: int = 256, iterations: int = 20, seed: int = 0):
+        if dim % m:
+            raise ValueError(f"La dimension {dim} n'est pas divisible par m={m}")
+        self.dim, self.m = dim, m
+        self.sub_dim = dim // m
+        self.centroids = centroids
+        self.iterations = iterations
+        self.seed = seed
+        self.code_size = m
+        self.codebooks = np.zeros((m, centroids, self.sub_dim), dtype=np.float32)
+
+    @classmethod
+    def for_compression(cls, dim: int, ratio: int, **kwargs) -> "ProductQuantizer":
+        """PQ dont les codes tiennent en `dim * 4 / ratio` octets (diviseur de `dim` le plus proche)."""
+        target = max(1, (dim * 4) // ratio)
+        m = max(d for d in range(1, dim + 1) if dim % d == 0 and d <= target)
+        return cls(dim, m, **kwargs)
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.m, self.sub_dim)
+
+    def train(self, vectors: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        parts = self._split(np.asarray(vectors, dtype=np.float32))
+        k = min(self.centroids, len(vectors))
+        self.codebooks = np.zeros((self.m, k, self.sub_dim), dtype=np.float32)
+        for j in range(self.m):
+            data = parts[:, j, :]
+            centers = data[rng.choice(len(data), size=k, replace=False)].copy()
+            for _ in range(self.iterations):
+                assign = self._nearest(data, centers)
+                sums = np.stack([np.bincount(assign, weights=data[:, d], minlength=k)
+                                 for d in range(self.sub_dim)], axis=1)
+                counts = np.bincount(assign, minlength=k)[:, None]
+                empty = counts[:, 0] == 0
+                centers = np.where(empty[:, None], centers, sums / np.maximum(counts, 1)).astype(np.float32)
+            self.codebooks[j] = centers
+
+    @staticmethod
+    def _nearest(data: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        distances = (centers * centers).sum(axis=1)[None, :] - 2.0 * data @ centers.T
+        return np.argmin(distances, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        parts = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = self._nearest(parts[:, j, :], self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = self.codebooks[np.arange(self.m), codes]          # (n, m, sub_dim)
+        return parts.reshape(len(codes), self.dim)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Produits scalaires approchés (q, n) via les tables (q, m, 256) requêtes × centroïdes."""
+        tables = np.einsum("jkd,qjd->qjk", self.codebooks,
+                           queries.reshape(len(queries), self.m, self.sub_dim)).astype(np.float32)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(queries), _QUERY_CHUNK):
+            block = tables[start:start + _QUERY_CHUNK]
+            acc = block[:, 0, :].take(codes[:, 0], axis=1)
+            for j in range(1, self.m):
+                acc += block[:, j, :].take(codes[:, j], axis=1)
+            out[start:start + _QUERY_CHUNK] = acc
+        return out
+
+
+def make_quantizer(config: Any, dim: int):
+    """Quantificateur correspondant à une configuration de type `qdrant_client.models`."""
+    scalar = getattr(config, "scalar", None)
+    if scalar is not None:
+        return ScalarQuantizer(dim, quantile=getattr(scalar, "quantile", None) or 0.99)
+    product = getattr(config, "product", None)
+    if product is not None:
+        ratio = str(getattr(product.compression, "value", product.compression)).lower().lstrip("x")
+        return ProductQuantizer.for_compression(dim, int(ratio))
+    raise ValueError(f"Quantification non supportée : {config!r}")
+
+
+class DiskVectors:
+    """Vecteurs float32 pleine précision sur disque, en ajout seul, lus par `take`.
+
+    Fichiers temporaires (anonymes) par segment. Après un `fork`, les segments
+    existants restent partagés en lecture et les ajouts partent dans un segment
+    propre au processus ; une ligne d'un segment hérité modifiée est gardée en RAM.
+    """
+
+    def __init__(self, dim: int, directory: Optional[str] = None):
+        self.dim = dim
+        self.directory = directory or os.getenv("NINA_VECTOR_DIR") or None
+        self._row_bytes = dim * 4
+        self._segments: List[dict] = []     # {"first", "rows", "file", "pid", "map"}
+        self._overrides = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return self._count * self._row_bytes
+
+    def _writable_segment(self) -> dict:
+        pid = os.getpid()
+        if not self._segments or self._segments[-1]["pid"] != pid:
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+            handle = tempfile.TemporaryFile(dir=self.directory)
+            self._segments.append({"first": self._count, "rows": 0, "file": handle, "pid": pid, "map": None})
+        return self._segments[-1]
+
+    def append(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        segment = self._writable_segment()
+        os.pwrite(segment["file"].fileno(), vectors.tobytes(), segment["rows"] * self._row_bytes)
+        segment["rows"] += len(vectors)
+        segment["map"] = None
+        self._count += len(vectors)
+
+    def set(self, row: int, vector: np.ndarray):
+        segment = self._segment_of(row)
+        if segment["pid"] == os.getpid():
+            offset = (row - segment["first"]) * self._row_bytes
+            os.pwrite(segment["file"].fileno(), np.asarray(vector, dtype=np.float32).tobytes(), offset)
+        else:
+            self._overrides[row] = np.asarray(vector, dtype=np.float32)
+
+    def _segment_of(self, row: int) -> dict:
+        for segment in reversed(self._segments):
+            if segment["first"] <= row:
+                return segment
+        raise IndexError(row)
+
+    def _map(self, segment: dict) -> np.ndarray:
+        if segment["map"] is None:
+            segment["map"] = np.memmap(segment["file"], dtype=np.float32, mode="r",
+                                       shape=(segment["rows"], self.dim))
+        return segment["map"]
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Vecteurs des lignes `rows` (lectures aléatoires, servies par le cache de pages)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        for segment in self._segments:
+            inside = (rows >= segment["first"]) & (rows < segment["first"] + segment["rows"])
+            if inside.any():
+                out[inside] = self._map(segment)[rows[inside] - segment["first"]]
+        for i, row in enumerate(rows.tolist()):
+            if row in self._overrides:
+                out[i] = self._overrides[row]
+        return out
@@ -0,0 +1,151 @@
+"""rate_limiter.py – Limiteur de débit par hôte (token bucket) partagé par les agents.
+
+Remplace les pauses aléatoires (`time.sleep`) avant chaque requête : tant qu'un
+hôte est sous sa limite, l'acquisition est immédiate. Au-delà, chaque appel
+réserve le prochain jeton disponible (file d'attente FIFO implicite) et
+n'attend que le temps nécessaire ; si cette attente dépasse `max_wait`, la
+requête est rejetée (`RateLimitExceeded`) plutôt que de ralentir l'appelant.
+
+`acquire_async` attend via `asyncio.sleep` et ne bloque donc jamais la boucle
+d'événements.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class RateLimitExceeded(Exception):
+    """Levée quand l'attente nécessaire dépasse le budget accordé (délestage)."""
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons/seconde, rafale maximale `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Prend un jeton s'il est disponible immédiatement, sans jamais attendre."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def reserve(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """Réserve un jeton et retourne le délai avant de pouvoir l'utiliser.
+
+        Le solde peut devenir négatif : les appels suivants héritent de la
+        dette et sont servis dans l'ordre. Lève `RateLimitExceeded` si le délai
+        dépasse `max_wait` (rien n'est alors réservé).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitExceeded(f"attente de {wait:.2f}s > {max_wait:.2f}s")
+            self._tokens -= tokens
+            return wait
+
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        import asyncio  # import différé : coûteux et inutile aux appelants synchrones
+
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """Registre de seaux par hôte, résolu par suffixe de domaine."""
+
+    # hôte -> (jetons/seconde, rafale)
+    DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+        "duckduckgo.com": (1.0, 3),
+        "wikipedia.org": (5.0, 10),
+        "reddit.com": (0.5, 2),
+        "api.github.com": (0.15, 3),   # recherche non authentifiée : 10 req/min
+        "hn.algolia.com": (2.0, 5),
+        "newsapi.org": (0.5, 2),
+        "serpapi.com": (1.0, 2),
+        "openlibrary.org": (1.0, 3),
+    }
+    DEFAULT_LIMIT = (2.0, 5)
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None, max_wait: float = 2.0):
+        self.limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.max_wait = max_wait
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.shed_count: Dict[str, int] = {}
+
+    @staticmethod
+    def _host(url_or_host: str) -> str:
+        host = urlparse(url_or_host).hostname if "//" in url_or_host else url_or_host
+        return (host or url_or_host).lower()
+
+    def _key(self, url_or_host: str) -> str:
+        host = self._host(url_or_host)
+        return next((d for d in self.limits if host == d or host.endswith("." + d)), host)
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        key = self._key(url_or_host)
+        with self._lock:
+            if key not in self._buckets:
+                rate, capacity = self.limits.get(key, self.DEFAULT_LIMIT)
+                self._buckets[key] = TokenBucket(rate, capacity)
+                self.shed_count.setdefault(key, 0)
+            return self._buckets[key]
+
+    def _shed(self, url_or_host: str):
+        key = self._key(url_or_host)
+        with self._lock:
+            self.shed_count[key] = self.shed_count.get(key, 0) + 1
+
+    def acquire(self, url_or_host: str, max_wait: Optional[float] = None) -> float:
+        """Attend (au plus `max_wait`) un jeton pour l'hôte ; lève `RateLimitExceeded` sinon."""
+        try:
+            return self.bucket(url_or_host).acquire(max_wait=self.max_wait if max_wait is None else max_wait)
+        except RateLimitExceeded:
+            self._shed(url_or_host)
+            raise
+
+    async def acquire_async(self, url_or_host: str, max_wait: Optional[float] = None) -> float:
+        try:
+            return await self.bucket(url_or_host).acquire_async(
+                max_wait=self.max_wait if max_wait is None else max_wait
+            )
+        except RateLimitExceeded:
+            self._shed(url_or_host)
+            raise
+
+
+_shared_limiter: Optional[HostRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Limiteur partagé par tous les agents de recherche du processus."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = HostRateLimiter()
+        return _shared_limiter
@@ -0,0 +1,125 @@
+"""react_history.py – Historique compacté de la boucle ReAct de l'Orchestrator.
+
+Le prompt était reconstruit à chaque itération en concaténant toutes les
+pensées et le texte intégral de toutes les observations (y compris des
+fichiers entiers lus par `read_file`) : sa taille croissait sans borne. Ici :
+- les `keep_recent` dernières étapes sont gardées telles quelles ;
+- les étapes plus anciennes sont réduites (pensée tronquée, observation
+  résumée à son début) ;
+- toute observation volumineuse est stockée hors du prompt, derrière une
+  référence (`obs-3`) que le modèle peut relire par morceaux avec l'outil
+  `read_observation` ;
+- si le rendu dépasse encore `max_tokens`, les étapes les plus anciennes sont
+  réduites à une ligne.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from tools.context_renderer import estimate_tokens
+
+
+@dataclass
+class ReActStep:
+    thought: str
+    action: Optional[Dict[str, Any]] = None
+    observation: str = ""
+    ref: Optional[str] = None       # référence de l'observation complète stockée hors prompt
+
+
+class ReActHistory:
+    def __init__(self, keep_recent: int = 2, max_inline_chars: int = 2000, excerpt_chars: int = 300,
+                 old_thought_chars: int = 200, max_tokens: int = 1500):
+        self.keep_recent = keep_recent
+        self.max_inline_chars = max_inline_chars
+        self.excerpt_chars = excerpt_chars
+        self.old_thought_chars = old_thought_chars
+        self.max_tokens = max_tokens
+        self.steps: List[ReActStep] = []
+        self._observations: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    # ------------------------------------------------------------------
+    def add_thought(self, thought: str, action: Optional[Dict[str, Any]] = None):
+        self.steps.append(ReActStep(thought=thought, action=action if isinstance(action, dict) else None))
+
+    def add_observation(self, observation: str):
+        """Rattache l'observation à la dernière étape (en crée une si besoin)."""
+        observation = str(observation)
+        if not self.steps or self.steps[-1].observation:
+            self.steps.append(ReActStep(thought=""))
+        step = self.steps[-1]
+        step.observation = observation
+        if len(observation) > self.max_inline_chars:
+            step.ref = f"obs-{len(self._observations) + 1}"
+            self._observations[step.ref] = observation
+
+    def read_observation(self, ref: str, offset: int = 0, length: int = 2000) -> str:
+        """Outil `read_observation` : relit un morceau d'une observation stockée."""
+        text = self._observations.get(ref)
+        if text is None:
+            return f"Erreur: référence '{ref}' inconnue."
+        offset, length = max(0, int(offset)), max(1, min(int(length), self.max_inline_chars))
+        chunk = text[offset:offset + length]
+        end = offset + len(chunk)
+        suffix = f"\n[{ref} : caractères {offset}-{end} sur {len(text)}]"
+        return chunk + suffix
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _format_action(action: Optional[Dict[str, Any]]) -> str:
+        if not action:
+            return ""
+        args = {k: v for k, v in action.items() if k != "tool_name"}
+        # Le contenu écrit par write_file n'a pas besoin d'être renvoyé au modèle
+        if isinstance(args.get("content"), str) and len(args["content"]) > 80:
+            args["content"] = f"<{len(args['content'])} caractères>"
+        return f"Action: {action.get('tool_name')} {json.dumps(args, ensure_ascii=False)}"
+
+    def _excerpt(self, step: ReActStep, chars: int) -> str:
+        obs = step.observation
+        if len(obs) <= chars:
+            return obs
+        hint = f"{step.ref}, " if step.ref else ""
+        return f"{obs[:chars]}… [{hint}{len(obs)} caractères au total]"
+
+    def _render_step(self, index: int, step: ReActStep, level: int) -> str:
+        """level 0 : récent, 1 : ancien (résumé), 2 : une ligne."""
+        thought = step.thought
+        if level >= 1 and len(thought) > self.old_thought_chars:
+            thought = thought[: self.old_thought_chars] + "…"
+        lines = [f"Étape {index}"]
+        if level < 2 and thought:
+            lines.append(f"Pensée: {thought}")
+        action = self._format_action(step.action)
+        if action:
+            lines.append(action)
+        if step.observation:
+            if level == 0:
+                obs = self._excerpt(step, self.max_inline_chars) if step.ref else step.observation
+            elif level == 1:
+                obs = self._excerpt(step, self.excerpt_chars)
+            else:
+                obs = f"({step.ref})" if step.ref else self._excerpt(step, 80)
+            lines.append(f"Observation: {obs}")
+        return "\n".join(lines) if level < 2 else " | ".join(lines)
+
+    def render(self) -> str:
+        """Historique à injecter dans le prompt, borné à `max_tokens` dans la mesure du possible."""
+        if not self.steps:
+            return "(aucune étape pour l'instant)"
+        n = len(self.steps)
+        levels = [0 if i >= n - self.keep_recent else 1 for i in range(n)]
+        rendered = [self._render_step(i + 1, s, lvl) for i, (s, lvl) in enumerate(zip(self.steps, levels))]
+        # Réduction progressive des étapes les plus anciennes jusqu'à tenir dans le budget
+        for i in range(n):
+            if estimate_tokens("\n\n".join(rendered)) <= self.max_tokens:
+                break
+            if levels[i] < 2:
+                levels[i] = 2
+                rendered[i] = self._render_step(i + 1, self.steps[i], 2)
+        return "\n\n".join(rendered)
@@ -0,0 +1,248 @@
+"""search_cache.py – Cache persistant des résultats de recherche, partagé par les agents.
+
+Clé : (source, requête normalisée, paramètres). Pour chaque source :
+- pendant `ttl` secondes, le résultat est servi depuis le cache ;
+- pendant la fenêtre suivante (`ttl * stale_ratio`), il est servi *périmé*
+  pendant qu'un rafraîchissement part en arrière-plan (stale-while-revalidate) ;
+- au-delà, l'appel amont est refait.
+
+Les requêtes identiques concurrentes sont fusionnées (un seul appel amont,
+les autres attendent son résultat). Le stockage est un fichier SQLite borné
+en taille (éviction LRU), qui survit aux redémarrages.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from tools.dedup import normalize_text
+from tools.tracing import get_tracer
+
+
+class SearchCache:
+    # Durées de fraîcheur par source (secondes)
+    DEFAULT_TTLS: Dict[str, float] = {
+        "duckduckgo": 3600,
+        "wikipedia": 86400,
+        "serpapi": 3600,
+        "newsapi": 900,
+        "hackernews": 600,
+        "reddit": 600,
+        "github": 3600,
+        "openlibrary": 86400,
+    }
+    DEFAULT_TTL = 1800
+    # Dates d'accès gardées en mémoire avant d'être écrites d'un coup (voir `_read`)
+    ACCESS_FLUSH = 256
+
+    def __init__(self, path: Optional[str] = "data/search_cache.db", max_bytes: int = 50 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None, stale_ratio: float = 1.0, enabled: bool = True):
+        self.path = path or ":memory:"
+        self.max_bytes = max_bytes
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ratio = stale_ratio
+        self.enabled = enabled
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._accessed: Dict[str, float] = {}
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-cache")
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        _instances.add(self)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, source TEXT, value TEXT, created REAL,"
+            " expires REAL, last_access REAL, size INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(source: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+        raw = json.dumps([source, normalize_text(query), params or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_or_fetch(self, source: str, query: str, fetch: Callable[[], Any],
+                     params: Optional[Dict[str, Any]] = None) -> Any:
+        """Retourne le résultat en cache, ou appelle `fetch()` une seule fois pour tous."""
+        if not self.enabled:
+            return fetch()
+        key = self.make_key(source, query, params)
+        now = time.time()
+        entry = self._read(key, now)
+        if entry is not None:
+            value, expires, stale_until = entry
+            if now < expires:
+                self._count("hits")
+                get_tracer().record_cache("search", True, source=source)
+                return value
+            if now < stale_until:
+                self._count("stale_hits")
+                get_tracer().record_cache("search", True, source=source)
+                self._refresh_in_background(key, source, fetch)
+                return value
+
+        self._count("misses")
+        get_tracer().record_cache("search", False, source=source)
+        return self._fetch_once(key, source, fetch)
+
+    # ------------------------------------------------------------------
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _fetch_once(self, key: str, source: str, fetch: Callable[[], Any]) -> Any:
+        """Fusion des requêtes : le premier appelant interroge l'amont, les autres attendent."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            self._count("upstream_calls")
+            value = fetch()
+            # Les résultats vides (erreurs amont absorbées par les agents) ne sont pas mis en cache
+            if value:
+                self._write(key, source, value)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, source: str, fetch: Callable[[], Any]):
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def _refresh():
+            try:
+                self._fetch_once(key, source, fetch)
+            except Exception as e:
+                print(f"[SearchCache] Rafraîchissement échoué ({source}): {e}")
+
+        self._refresher.submit(_refresh)
+
+    def _read(self, key: str, now: float):
+        """Lecture seule : la date d'accès (LRU) est notée en mémoire.
+
+        Les dates sont écrites par lot avec la prochaine écriture (ou tous les
+        `ACCESS_FLUSH` accès) : un succès de cache n'ouvre pas de transaction,
+        qui garderait le verrou d'écriture du fichier partagé entre processus.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires, source FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= self.ACCESS_FLUSH:
+                self._flush_accesses()
+                self._db.commit()
+        value, expires, source = row
+        ttl = self.ttls.get(source, self.DEFAULT_TTL)
+        return json.loads(value), expires, expires + ttl * self.stale_ratio
+
+    def _write(self, key: str, source: str, value: Any):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        expires = now + self.ttls.get(source, self.DEFAULT_TTL)
+        with self._lock:
+            self._flush_accesses()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, source, payload, now, expires, now, len(payload)),
+            )
+            # Taille relue dans la transaction : les autres processus écrivent aussi dans le fichier
+            self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if self._size > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _flush_accesses(self):
+        """Écrit les dates d'accès en attente (verrou déjà pris, sans valider)."""
+        if self._accessed:
+            self._db.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                 [(ts, key) for key, ts in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        """Éviction LRU jusqu'à 90 % de la taille maximale (verrou déjà pris)."""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._size -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._accessed.clear()
+            self._size = 0
+
+
+def _reopen_after_fork():
+    """Dans un processus enfant : nouvelle connexion SQLite, verrous et pool neufs.
+
+    Une connexion SQLite ne doit pas être utilisée de part et d'autre d'un `fork`.
+    L'ancienne est gardée (non fermée) : la fermer libérerait les verrous du parent.
+    """
+    for cache in list(_instances):
+        cache._lock = threading.Lock()
+        cache._inflight = {}
+        cache._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-cache")
+        if cache.path != ":memory:":   # une base en mémoire est une simple copie privée
+            cache._inherited_db = cache._db
+            cache._db = sqlite3.connect(cache.path, check_same_thread=False)
+
+
+_instances: "weakref.WeakSet[SearchCache]" = weakref.WeakSet()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+_shared_cache: Optional[SearchCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Cache partagé par les agents de recherche.
+
+    `NINA_SEARCH_CACHE` choisit le fichier SQLite (défaut `data/search_cache.db`) ;
+    la valeur `off` désactive le cache.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            setting = os.getenv("NINA_SEARCH_CACHE", "data/search_cache.db")
+            if setting.lower() == "off":
+                _shared_cache = SearchCache(path=None, enabled=False)
+            else:
+                _shared_cache = SearchCache(path=setting)
+        return _shared_cache
@@ -0,0 +1,241 @@
+"""sessions.py – État de conversation par utilisateur, cache LRU des sessions actives.
+
+Chaque session (clé : identifiant d'utilisateur ou de session) porte son
+historique récent, un résumé glissant des échanges plus anciens et une
+surcharge du profil ; ses souvenirs vectoriels vivent dans une partition
+(`session`) de la collection `nina_sessions` (voir `AgentNina.session_memory`).
+
+`SessionStore` garde en mémoire au plus `max_active` sessions (LRU). Une
+session évincée, ou inactive depuis `idle_ttl` secondes, est écrite en JSON
+dans `directory` puis oubliée ; elle est relue au prochain accès. Une session
+utilisée par une requête en cours n'est jamais évincée. La mémoire d'un
+utilisateur inactif se limite ainsi à son fichier.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_SESSION = "default"
+MAX_SESSION_ID_LENGTH = 128
+
+
+@dataclass
+class Session:
+    session_id: str
+    history: List[Dict[str, Any]] = field(default_factory=list)   # échanges récents {query, response}
+    summary: str = ""                # résumé glissant de la conversation
+    summarized: int = 0              # nombre d'échanges (depuis le début) couverts par `summary`
+    profile: Dict[str, Any] = field(default_factory=dict)         # surcharge du profil global
+    turns: int = 0                   # nombre total d'échanges (`history` n'en garde que la fin)
+    created: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+    # Non persistés
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    users: int = field(default=0, repr=False, compare=False)
+    dirty: bool = field(default=False, repr=False, compare=False)
+
+    _PERSISTED = ("session_id", "history", "summary", "summarized", "profile", "turns", "created", "last_access")
+
+    @property
+    def first_turn(self) -> int:
+        """Numéro du plus ancien échange encore présent dans `history`."""
+        return self.turns - len(self.history)
+
+    def add_turn(self, query: str, response: str, max_history: int):
+        """Ajoute un échange ; au-delà de `max_history`, les échanges déjà résumés sont oubliés."""
+        self.history.append({"query": query, "response": response})
+        self.turns += 1
+        self.dirty = True
+        self.trim(max_history)
+
+    def pending_turns(self) -> List[Dict[str, Any]]:
+        """Échanges pas encore intégrés au résumé glissant."""
+        return self.history[max(0, self.summarized - self.first_turn):]
+
+    def set_summary(self, summary: str, upto: int, max_history: int):
+        """Enregistre un résumé couvrant les `upto` premiers échanges (ignoré s'il est dépassé)."""
+        if upto <= self.summarized:
+            return
+        self.summary, self.summarized = summary, upto
+        self.dirty = True
+        self.trim(max_history)
+
+    def trim(self, max_history: int):
+        # Un échange non résumé n'est oublié qu'au-delà de 4 × max_history (routes sans résumé)
+        excess = len(self.history) - max_history
+        if excess <= 0:
+            return
+        covered = max(0, self.summarized - self.first_turn)
+        drop = max(min(excess, covered), len(self.history) - 4 * max_history)
+        if drop > 0:
+            del self.history[:drop]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._PERSISTED}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        return cls(**{name: data[name] for name in cls._PERSISTED if name in data})
+
+
+def validate_session_id(session_id: Any) -> str:
+    if not isinstance(session_id, str) or not session_id.strip():
+        raise ValueError("L'identifiant de session doit être une chaîne non vide")
+    session_id = session_id.strip()
+    if len(session_id) > MAX_SESSION_ID_LENGTH:
+        raise ValueError(f"Identifiant de session trop long (> {MAX_SESSION_ID_LENGTH} caractères)")
+    return session_id
+
+
+class SessionStore:
+    """Sessions actives en mémoire (LRU), sessions inactives sur disque."""
+
+    def __init__(self, directory: Optional[str] = "data/sessions", max_active: int = 256,
+                 max_history: int = 20, idle_ttl: Optional[float] = 1800.0):
+        # directory=None : pas de persistance (une session évincée est perdue)
+        self.directory = directory
+        self.max_active = max_active
+        self.max_history = max_history
+        self.idle_ttl = idle_ttl
+        self.stats = {"created": 0, "loaded": 0, "evicted": 0, "hits": 0}
+        self._active: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._active
+
+    def _path(self, session_id: str) -> str:
+        # Nom de fichier dérivé de l'identifiant : aucun caractère de l'utilisateur dans le chemin
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def use(self, session_id: str) -> Iterator[Session]:
+        """Session de `session_id` (créée ou relue du disque), protégée de l'éviction pendant l'usage."""
+        session_id = validate_session_id(session_id)
+        with self._lock:
+            session = self._get(session_id)
+            session.users += 1
+            session.last_access = time.time()
+            self._evict_overflow()
+        try:
+            yield session
+        finally:
+            with self._lock:
+                session.users -= 1
+                self._evict_overflow()
+            self._maybe_sweep()
+
+    def get(self, session_id: str) -> Session:
+        """Session de `session_id` sans la réserver (lecture, inspection)."""
+        with self.use(session_id) as session:
+            return session
+
+    def _get(self, session_id: str) -> Session:
+        session = self._active.get(session_id)
+        if session is not None:
+            self._active.move_to_end(session_id)
+            self.stats["hits"] += 1
+            return session
+        session = self._load(session_id)
+        if session is None:
+            session = Session(session_id)
+            self.stats["created"] += 1
+        else:
+            self.stats["loaded"] += 1
+        self._active[session_id] = session
+        return session
+
+    def _load(self, session_id: str) -> Optional[Session]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(session_id), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[SessionStore] Session '{session_id}' illisible, recréée : {e}")
+            return None
+        return Session.from_dict(data) if data.get("session_id") == session_id else None
+
+    def _save(self, session: Session):
+        if not self.directory or not session.dirty:
+            return
+        with session.lock:
+            data = json.dumps(session.to_dict(), ensure_ascii=False)
+            session.dirty = False
+        path = self._path(session.session_id)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    def _evict_overflow(self):
+        """Évince les sessions les moins récemment utilisées au-delà de `max_active` (verrou tenu)."""
+        overflow = len(self._active) - self.max_active
+        if overflow <= 0:
+            return
+        for session_id in [sid for sid, s in self._active.items() if s.users == 0][:overflow]:
+            self._evict(session_id)
+
+    def _evict(self, session_id: str):
+        session = self._active.pop(session_id)
+        try:
+            self._save(session)
+        except OSError as e:
+            print(f"[SessionStore] Sauvegarde de la session '{session_id}' impossible : {e}")
+            self._active[session_id] = session   # gardée en mémoire plutôt que perdue
+            return
+        self.stats["evicted"] += 1
+
+    def _maybe_sweep(self):
+        if self.idle_ttl and time.monotonic() - self._last_sweep > self.idle_ttl / 4:
+            self.evict_idle(self.idle_ttl)
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Évince les sessions inutilisées depuis `max_idle_seconds` ; retourne leur nombre."""
+        limit = time.time() - max_idle_seconds
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            idle = [sid for sid, s in self._active.items() if s.users == 0 and s.last_access <= limit]
+            for session_id in idle:
+                self._evict(session_id)
+        return len(idle)
+
+    def flush(self):
+        """Écrit sur disque les sessions actives modifiées (sans les évincer)."""
+        with self._lock:
+            sessions = list(self._active.values())
+        for session in sessions:
+            self._save(session)
+
+    def delete(self, session_id: str):
+        """Oublie une session, en mémoire et sur disque."""
+        session_id = validate_session_id(session_id)
+        with self._lock:
+            self._active.pop(session_id, None)
+            if self.directory:
+                try:
+                    os.remove(self._path(session_id))
+                except FileNotFoundError:
+                    pass
+
+    def summary(self) -> Dict[str, int]:
+        return {"active": len(self._active), "max_active": self.max_active, **self.stats}
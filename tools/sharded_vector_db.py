@@ -0,0 +1,580 @@
+"""sharded_vector_db.py – Mémoire vectorielle partitionnée, recherche scatter-gather.
+
+Une seule collection `nina_vectors` mélange conversations, faits et résultats
+web, servie par un seul client : la latence d'une recherche croît avec le
+volume total. `ShardedVectorDB` répartit les documents sur plusieurs
+`VectorDB` (partitions) selon une stratégie :
+
+- `HashSharding` : hachage cohérent de l'identifiant de contenu (anneau à
+  nœuds virtuels). Ajouter ou retirer une partition ne déplace qu'environ
+  1/n des points (`add_shard`, `remove_shard`, `rebalance`), sans arrêter
+  les recherches : un point est copié avant d'être supprimé de son ancienne
+  partition, la fusion écarte le doublon transitoire ;
+- `TypeSharding` : une partition par type de document (`conversation`,
+  `web_page`…) ; un filtre `type` n'interroge que les partitions concernées ;
+- `TimeSharding` : une partition par tranche de temps (`ts` ou `timestamp`
+  des méta-données). Les filtres `since` / `until` écartent les tranches hors
+  période et `drop_before` supprime les anciennes tranches d'un coup
+  (rétention sans suppression point par point).
+
+Chaque partition vit dans le processus (`LocalShard`) ou dans un processus
+dédié (`ShardProcess`, appels par `Pipe`). La requête est vectorisée une fois
+par le routeur, envoyée en parallèle aux partitions concernées (scatter) et
+leurs top-k sont fusionnés par un tas (gather). Les doublons exacts et
+quasi-doublons sont écartés par le routeur avant le routage, quelle que soit la
+partition qui détient le document déjà connu.
+
+Configuration par l'environnement (`open_vector_db`) : NINA_VECTOR_SHARDING
+("hash:4", "type", "time:604800") et NINA_VECTOR_SHARD_PROCESSES=on.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from tools.dedup import SimHashIndex, content_id, simhash
+from tools.embedding_cache import embed_queries, filters_key, new_namespace, search_results
+from tools.tracing import get_tracer
+from tools.vector_db import QdrantClient, SimpleEmbedder, VectorDB, to_epoch
+
+if TYPE_CHECKING:
+    from tools.sql_db import Fact
+
+
+# -----------------------------------------------------------------------------
+# Stratégies de partitionnement
+# -----------------------------------------------------------------------------
+class ShardingStrategy:
+    """Choix de la partition d'un document, et des partitions à interroger."""
+
+    # Le placement ne dépend que de l'identifiant du point : `rebalance` peut le recalculer
+    routes_by_id = False
+
+    def initial_shards(self) -> List[str]:
+        return []
+
+    def shard_for(self, point_id: str, meta: Optional[dict]) -> str:
+        raise NotImplementedError
+
+    def shards_for(self, filters: Optional[Dict[str, Any]], shards: List[str]) -> List[str]:
+        return list(shards)
+
+    def shard_filters(self, name: str, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Filtres à appliquer dans la partition `name` (sans les conditions qu'elle satisfait d'office)."""
+        return filters
+
+
+class HashSharding(ShardingStrategy):
+    """Hachage cohérent : `replicas` nœuds virtuels par partition sur un anneau 64 bits."""
+
+    routes_by_id = True
+
+    def __init__(self, shards: Any = 4, replicas: int = 64):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._owners: List[str] = []
+        for name in ([f"h{i}" for i in range(shards)] if isinstance(shards, int) else shards):
+            self.add(name)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(set(self._owners))
+
+    def initial_shards(self) -> List[str]:
+        return self.names
+
+    def add(self, name: str):
+        for replica in range(self.replicas):
+            key = self._hash(f"{name}#{replica}")
+            i = bisect.bisect(self._keys, key)
+            self._keys.insert(i, key)
+            self._owners.insert(i, name)
+
+    def remove(self, name: str):
+        kept = [(k, o) for k, o in zip(self._keys, self._owners) if o != name]
+        self._keys = [k for k, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def shard_for(self, point_id: str, meta: Optional[dict]) -> str:
+        if not self._keys:
+            raise ValueError("Aucune partition sur l'anneau")
+        return self._owners[bisect.bisect(self._keys, self._hash(point_id)) % len(self._keys)]
+
+
+class TypeSharding(ShardingStrategy):
+    """Une partition par type de document (`groups` regroupe des types, `default` sans type)."""
+
+    def __init__(self, groups: Optional[Dict[str, str]] = None, default: str = "autres"):
+        self.groups = groups or {}
+        self.default = default
+
+    def _name(self, doc_type: Any) -> str:
+        return self.groups.get(str(doc_type), str(doc_type)) if doc_type else self.default
+
+    def shard_for(self, point_id: str, meta: Optional[dict]) -> str:
+        return self._name((meta or {}).get("type"))
+
+    def shards_for(self, filters: Optional[Dict[str, Any]], shards: List[str]) -> List[str]:
+        wanted = (filters or {}).get("type")
+        if wanted is None:
+            return list(shards)
+        values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        names = {self._name(v) for v in values}
+        return [s for s in shards if s in names]
+
+
+class TimeSharding(ShardingStrategy):
+    """Une partition par tranche de `bucket_seconds` (documents sans date : tranche courante)."""
+
+    def __init__(self, bucket_seconds: int = 7 * 86400):
+        self.bucket_seconds = int(bucket_seconds)
+
+    def shard_for(self, point_id: str, meta: Optional[dict]) -> str:
+        meta = meta or {}
+        ts = to_epoch(meta.get("ts", meta.get("timestamp")))
+        ts = time.time() if ts is None else ts
+        return f"t{int(ts // self.bucket_seconds) * self.bucket_seconds}"
+
+    def bounds(self, name: str) -> Tuple[float, float]:
+        start = float(name[1:])
+        return start, start + self.bucket_seconds
+
+    def shards_for(self, filters: Optional[Dict[str, Any]], shards: List[str]) -> List[str]:
+        since = to_epoch((filters or {}).get("since"))
+        until = to_epoch((filters or {}).get("until"))
+        kept = []
+        for name in shards:
+            start, end = self.bounds(name)
+            if (since is None or end > since) and (until is None or start <= until):
+                kept.append(name)
+        return kept
+
+    def shard_filters(self, name: str, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not filters:
+            return filters
+        start, end = self.bounds(name)
+        filters = dict(filters)
+        if "since" in filters and to_epoch(filters["since"]) <= start:
+            del filters["since"]
+        if "until" in filters and to_epoch(filters["until"]) >= end:
+            del filters["until"]
+        return filters or None
+
+
+def strategy_from_spec(spec: str) -> ShardingStrategy:
+    """Stratégie décrite par "hash:4", "type" ou "time:<secondes>"."""
+    kind, _, arg = spec.lower().partition(":")
+    if kind == "hash":
+        return HashSharding(int(arg or 4))
+    if kind == "type":
+        return TypeSharding()
+    if kind == "time":
+        return TimeSharding(int(arg or 7 * 86400))
+    raise ValueError(f"Partitionnement inconnu : {spec}")
+
+
+# -----------------------------------------------------------------------------
+# Partitions
+# -----------------------------------------------------------------------------
+def _open_db(options: Dict[str, Any]) -> VectorDB:
+    db = VectorDB(**options)
+    # Les résultats sont mis en cache par le routeur, après fusion
+    db.cache_results = False
+    return db
+
+
+class LocalShard:
+    """Partition servie dans le processus courant."""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.db = _open_db(options)
+
+    def call(self, method: str, *args) -> Any:
+        return getattr(self.db, method)(*args)
+
+    def close(self, drop: bool = False):
+        if drop:
+            self.db.drop()
+
+
+class ShardProcess:
+    """Partition servie par un processus dédié : une `VectorDB` par processus, appels par `Pipe`.
+
+    Démarrage par `spawn` par défaut (NINA_SHARD_START_METHOD) : le routeur a
+    des threads, un `fork` pourrait hériter d'un verrou pris. Le canal n'est
+    utilisable que par le processus qui a ouvert la partition (pas de partage
+    avec des workers pré-forkés).
+    """
+
+    def __init__(self, options: Dict[str, Any]):
+        context = multiprocessing.get_context(os.getenv("NINA_SHARD_START_METHOD", "spawn"))
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child, options), daemon=True,
+                                        name=f"nina-shard-{options['collection']}")
+        self._process.start()
+        child.close()
+        self._lock = threading.Lock()
+        self._owner = os.getpid()
+        self.call("__len__")             # attend que la partition soit prête
+
+    def call(self, method: str, *args) -> Any:
+        if os.getpid() != self._owner:
+            raise RuntimeError("Partition ouverte par un autre processus (ouvrir les partitions après le fork)")
+        with self._lock:
+            self._conn.send((method, args))
+            ok, value = self._conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def close(self, drop: bool = False):
+        try:
+            if drop:
+                self.call("drop")
+            with self._lock:
+                self._conn.send(None)
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+
+
+def _serve(conn, options: Dict[str, Any]):
+    """Boucle d'un processus de partition : (méthode, arguments) -> (succès, résultat)."""
+    try:
+        db, error = _open_db(options), None
+    except Exception as e:
+        db, error = None, e
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        method, args = message
+        if error is not None:
+            conn.send((False, error))
+            continue
+        try:
+            conn.send((True, getattr(db, method)(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+# -----------------------------------------------------------------------------
+# Routeur
+# -----------------------------------------------------------------------------
+class ShardedVectorDB:
+    """`VectorDB` partitionnée : même API de lecture/écriture, plus la gestion des partitions."""
+
+    def __init__(self, collection: str = "nina_vectors", strategy: Optional[ShardingStrategy] = None,
+                 processes: bool = False, embedder: Any = None, **db_options):
+        self.collection = collection
+        self.strategy = strategy or HashSharding()
+        self.processes = processes
+        self.embedder = embedder or SimpleEmbedder
+        # Options de chaque `VectorDB` partition (dedup, quantization…)
+        self.db_options = db_options
+        # Déduplication avant routage : deux quasi-doublons (ou deux copies d'un texte avec
+        # d'autres méta-données) peuvent être envoyés à des partitions différentes
+        self.dedup = db_options.get("dedup", True)
+        self._ids: set = set()
+        self._near_dups = SimHashIndex(max_distance=db_options.get("near_dup_distance", 3))
+        self.dedup_stats = {"inserted": 0, "exact_duplicates": 0, "near_duplicates": 0}
+        self.version = 0
+        self._cache_namespace = new_namespace()
+        self.cache_results = not os.getenv("QDRANT_URL") and os.getenv("NINA_VECTOR_RESULT_CACHE", "on").lower() not in ("off", "0", "false", "no")
+        self.shards: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=int(os.getenv("NINA_SHARD_THREADS", "8")),
+                                        thread_name_prefix="nina-shard")
+        for name in self.strategy.initial_shards() + self._stored_shards():
+            self._shard(name)
+
+    @classmethod
+    def from_env(cls, collection: str = "nina_vectors", **db_options) -> "ShardedVectorDB":
+        processes = os.getenv("NINA_VECTOR_SHARD_PROCESSES", "off").lower() in ("on", "1", "true", "yes")
+        return cls(collection, strategy_from_spec(os.getenv("NINA_VECTOR_SHARDING", "hash:4")),
+                   processes=processes, **db_options)
+
+    # -- Partitions -------------------------------------------------------
+    def _stored_shards(self) -> List[str]:
+        """Partitions par type ou par date déjà présentes sur le serveur Qdrant (QDRANT_URL).
+
+        Elles sont ouvertes dès le démarrage : la déduplication du routeur connaît
+        leurs points avant la première écriture.
+        """
+        url = os.getenv("QDRANT_URL")
+        if not url or self.strategy.routes_by_id:
+            return []
+        prefix = f"{self.collection}__"
+        try:
+            collections = getattr(QdrantClient(url=url).get_collections(), "collections", [])
+        except Exception as e:
+            print(f"[ShardedVectorDB] Partitions existantes non listées : {e}")
+            return []
+        return sorted(c.name[len(prefix):] for c in collections if c.name.startswith(prefix))
+
+    def _shard(self, name: str) -> Any:
+        """Partition `name`, ouverte à la première utilisation."""
+        with self._lock:
+            shard = self.shards.get(name)
+            if shard is None:
+                options = {"collection": f"{self.collection}__{name}", "embedder": self.embedder, **self.db_options}
+                shard = ShardProcess(options) if self.processes else LocalShard(options)
+                self.shards[name] = shard
+                if self.dedup:
+                    self._index_points(shard.call("fingerprints"))
+                print(f"[ShardedVectorDB] Partition {name} ouverte ({'processus' if self.processes else 'locale'})")
+            return shard
+
+    def _index_points(self, pairs: List[Tuple[str, Optional[int]]]):
+        """Ajoute des points (identifiant, empreinte) à l'index de déduplication du routeur."""
+        for point_id, fingerprint in pairs:
+            self._ids.add(point_id)
+            if fingerprint is not None:
+                self._near_dups.add(point_id, fingerprint)
+
+    def _unindex_points(self, ids: List[str]):
+        for point_id in ids:
+            self._ids.discard(point_id)
+            self._near_dups.remove(point_id)
+
+    def _scatter(self, calls: Dict[str, Tuple[str, tuple]]) -> Dict[str, Any]:
+        """Appelle chaque partition en parallèle : {partition: (méthode, arguments)} -> résultats."""
+        shards = {name: self._shard(name) for name in calls}
+        if len(calls) == 1:
+            (name, (method, args)), = calls.items()
+            return {name: shards[name].call(method, *args)}
+        futures = {name: self._pool.submit(shards[name].call, method, *args)
+                   for name, (method, args) in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def add_shard(self, name: Optional[str] = None, rebalance: bool = True) -> str:
+        """Ajoute une partition à l'anneau (hachage) puis y déplace les points qui lui reviennent."""
+        if not self.strategy.routes_by_id:
+            raise ValueError("Partitions créées d'après les méta-données : rien à ajouter à la main")
+        with self._lock:
+            name = name or f"h{next(n for n in itertools.count() if f'h{n}' not in self.shards)}"
+            self._shard(name)
+            self.strategy.add(name)
+        if rebalance:
+            self.rebalance()
+        return name
+
+    def remove_shard(self, name: str):
+        """Retire une partition de l'anneau, redistribue ses points puis la ferme."""
+        if not self.strategy.routes_by_id:
+            raise ValueError("Utiliser drop_before pour abandonner des partitions temporelles")
+        with self._lock:
+            self.strategy.remove(name)
+        self.rebalance()
+        with self._lock:
+            shard = self.shards.pop(name)
+        shard.close(drop=True)
+        self.version += 1
+
+    def rebalance(self, batch_size: int = 512) -> int:
+        """Déplace chaque point vers la partition que lui attribue la stratégie ; retourne le nombre déplacé.
+
+        Copie puis suppression : pendant le déplacement un point peut être
+        présent dans deux partitions, jamais dans aucune.
+        """
+        if not self.strategy.routes_by_id:
+            return 0
+        moved = 0
+        with get_tracer().span("vector.rebalance", collection=self.collection) as span:
+            for name in list(self.shards):
+                source = self.shards[name]
+                moves: Dict[str, List[str]] = {}
+                for point_id in source.call("point_ids"):
+                    owner = self.strategy.shard_for(point_id, None)
+                    if owner != name:
+                        moves.setdefault(owner, []).append(point_id)
+                for owner, ids in moves.items():
+                    for start in range(0, len(ids), batch_size):
+                        batch = ids[start:start + batch_size]
+                        self._shard(owner).call("import_points", source.call("export_points", batch))
+                        source.call("delete_points", batch)
+                        moved += len(batch)
+                        self.version += 1
+            span.set(moved=moved)
+        if moved:
+            print(f"[ShardedVectorDB] {moved} points déplacés")
+        return moved
+
+    def drop_before(self, when: Any) -> List[str]:
+        """Supprime les partitions temporelles entièrement antérieures à `when` (rétention)."""
+        if not isinstance(self.strategy, TimeSharding):
+            raise ValueError("drop_before suppose un partitionnement temporel")
+        limit = to_epoch(when)
+        if limit is None:
+            raise ValueError(f"Date invalide : {when!r}")
+        with self._lock:
+            dropped = [n for n in self.shards if self.strategy.bounds(n)[1] <= limit]
+            shards = [self.shards.pop(n) for n in dropped]
+        for shard in shards:
+            if self.dedup:
+                ids = shard.call("point_ids")
+                with self._lock:
+                    self._unindex_points(ids)
+            shard.close(drop=True)
+        if dropped:
+            self.version += 1
+            print(f"[ShardedVectorDB] Partitions abandonnées : {', '.join(sorted(dropped))}")
+        return dropped
+
+    def shard_sizes(self) -> Dict[str, int]:
+        with self._lock:
+            names = list(self.shards)
+        return self._scatter({name: ("__len__", ()) for name in names}) if names else {}
+
+    def __len__(self) -> int:
+        return sum(self.shard_sizes().values())
+
+    def close(self):
+        with self._lock:
+            shards, self.shards = list(self.shards.values()), {}
+        for shard in shards:
+            shard.close()
+        self._pool.shutdown(wait=False)
+
+    # -- Écriture ---------------------------------------------------------
+    def add_documents(self, docs: List[str], metadata_list: Optional[List[Optional[dict]]] = None) -> int:
+        """Indexe `docs`, chaque partition recevant ses documents en un lot.
+
+        Les doublons exacts et quasi-doublons sont écartés par le routeur, sur
+        l'ensemble des partitions (chaque partition ne voit que ses propres points).
+        """
+        if not docs:
+            return 0
+        entries = list(zip(docs, metadata_list or [None] * len(docs)))
+        if self.dedup:
+            entries = self._drop_duplicates(entries)
+        groups: Dict[str, Tuple[List[str], List[Optional[dict]]]] = {}
+        for point_id, text, meta in entries:
+            texts, metas = groups.setdefault(self.strategy.shard_for(point_id, meta), ([], []))
+            texts.append(text)
+            metas.append(meta)
+        with get_tracer().span("vector.upsert", collection=self.collection, docs=len(docs),
+                               shards=len(groups)) as span:
+            try:
+                inserted = sum(self._scatter({name: ("add_documents", group) for name, group in groups.items()}).values()) \
+                    if groups else 0
+            except Exception:
+                if self.dedup:
+                    with self._lock:
+                        self._unindex_points([point_id for point_id, _, _ in entries])
+                raise
+            span.set(inserted=inserted)
+        self.dedup_stats["inserted"] += inserted
+        if inserted:
+            self.version += 1
+        return inserted
+
+    def _drop_duplicates(self, entries: List[Tuple[str, Optional[dict]]]) -> List[Tuple[str, str, Optional[dict]]]:
+        """(identifiant, texte, méta) des documents ni déjà connus, ni proches d'un document connu.
+
+        Les documents retenus sont inscrits à l'index aussitôt : un lot concurrent
+        ne peut pas les insérer une seconde fois dans une autre partition.
+        """
+        kept = []
+        with self._lock:
+            for text, meta in entries:
+                point_id = content_id(text)
+                if point_id in self._ids:
+                    self.dedup_stats["exact_duplicates"] += 1
+                    continue
+                fingerprint = simhash(text)
+                if fingerprint is not None and self._near_dups.find(fingerprint):
+                    self.dedup_stats["near_duplicates"] += 1
+                    continue
+                self._index_points([(point_id, fingerprint)])
+                kept.append((point_id, text, meta))
+        return kept
+
+    def add_fact(self, fact: Fact):
+        if not fact or not isinstance(fact.content, str):
+            return
+        meta = {"type": "fact", "timestamp": fact.timestamp.isoformat() if fact.timestamp else None}
+        self._scatter({self.strategy.shard_for(VectorDB.fact_point_id(fact), meta): ("add_fact", (fact,))})
+        self.version += 1
+
+    # -- Lecture ----------------------------------------------------------
+    def similarity_search(self, query: str, top_k: int = 3,
+                          filters: Optional[Dict[str, Any]] = None) -> List[dict]:
+        return self.similarity_search_many([query], top_k, filters)[0]
+
+    def similarity_search_many(self, queries: List[str], top_k: int = 3,
+                               filters: Optional[Dict[str, Any]] = None) -> List[List[dict]]:
+        """Vectorise les requêtes une fois, interroge les partitions concernées en parallèle, fusionne les top-k."""
+        if not queries:
+            return []
+        with self._lock:
+            names = self.strategy.shards_for(filters, list(self.shards))
+        with get_tracer().span("vector.search", collection=self.collection, top_k=top_k,
+                               filtered=bool(filters), shards=len(names)) as span:
+            fkey = filters_key(filters)
+            results: List[Optional[List[dict]]] = [None] * len(queries)
+            pending: Dict[str, List[int]] = {}
+            for i, query in enumerate(queries):
+                cached = search_results.get((self._cache_namespace, self.version, query, top_k, fkey)) \
+                    if self.cache_results else None
+                if self.cache_results:
+                    get_tracer().record_cache("vector_results", cached is not None)
+                if cached is not None:
+                    results[i] = [dict(r) for r in cached]
+                else:
+                    pending.setdefault(query, []).append(i)
+
+            if pending:
+                texts = list(pending)
+                version = self.version
+                vectors = embed_queries(self.embedder, texts)
+                partial = self._scatter({
+                    name: ("search_vectors", (vectors, top_k, self.strategy.shard_filters(name, filters)))
+                    for name in names
+                }) if names else {}
+                for q, text in enumerate(texts):
+                    found = tuple(self._merge([partial[name][q] for name in names], top_k))
+                    if self.cache_results:
+                        search_results.put((self._cache_namespace, version, text, top_k, fkey), found)
+                    for i in pending[text]:
+                        results[i] = [dict(r) for r in found]
+            span.set(results=sum(len(r) for r in results))
+        return results
+
+    @staticmethod
+    def _merge(ranked: List[List[dict]], top_k: int) -> List[dict]:
+        """Fusion par tas des listes triées des partitions ; un point en cours de déplacement n'apparaît qu'une fois."""
+        merged, seen = [], set()
+        for result in heapq.merge(*ranked, key=lambda r: -r["score"]):
+            if result["id"] in seen:
+                continue
+            seen.add(result["id"])
+            merged.append(result)
+            if len(merged) == top_k:
+                break
+        return merged
+
+
+def open_vector_db(collection: str = "nina_vectors", **options) -> Any:
+    """`ShardedVectorDB` si NINA_VECTOR_SHARDING est défini, sinon une `VectorDB` simple."""
+    if os.getenv("NINA_VECTOR_SHARDING"):
+        return ShardedVectorDB.from_env(collection, **options)
+    return VectorDB(collection=collection, **options)
@@ -0,0 +1,210 @@
+"""shared_state.py – État en lecture seule partagé entre processus (mode pré-fork).
+
+Après `fork`, les pages du maître sont partagées en copie sur écriture, mais
+les objets Python ne le restent pas : le simple fait de lire un `dict` ou une
+`str` modifie son compteur de références, donc sa page, qui est alors copiée
+dans chaque worker. Pour que les workers n'ajoutent presque rien à la mémoire :
+- les tableaux NumPy (matrice des vecteurs, index de payload) sont placés dans
+  `multiprocessing.shared_memory` (`SharedArray`) et exposés en lecture seule ;
+- les payloads et textes sont sérialisés dans un seul bloc d'octets partagé
+  avec une table d'offsets (`SharedJsonList`) et décodés à la lecture ;
+- `freeze_for_fork` exclut du ramasse-miettes les objets restants (`gc.freeze`).
+
+Les écritures d'un worker après le fork restent locales à ce worker (éléments
+ajoutés ou remplacés conservés à part, matrice recopiée à la première
+modification) ; la base SQL reste la source partagée des écritures.
+"""
+from __future__ import annotations
+
+import gc
+import json
+from collections.abc import MutableSequence
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+
+class SharedArray:
+    """Tableau NumPy stocké dans un segment `shared_memory`."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape, dtype, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.array.flags.writeable = False
+
+    @classmethod
+    def create(cls, source: np.ndarray) -> "SharedArray":
+        source = np.ascontiguousarray(source)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, source.nbytes))
+        target = np.ndarray(source.shape, dtype=source.dtype, buffer=shm.buf)
+        target[...] = source
+        return cls(shm, source.shape, source.dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, shape, dtype) -> "SharedArray":
+        """Rattache un segment créé par un autre processus (démarrage par `spawn`)."""
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    def close(self):
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # des vues sont encore utilisées : le segment sera libéré à la sortie
+
+    def unlink(self):
+        """Supprime le segment (maître uniquement, une fois les workers arrêtés)."""
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedJsonList(MutableSequence):
+    """Liste d'objets JSON figés dans un bloc partagé, avec ajouts et remplacements locaux."""
+
+    def __init__(self, blob: SharedArray, offsets: SharedArray):
+        self.blob = blob
+        self.offsets = offsets
+        self._frozen = len(offsets.array) - 1
+        self._overrides: Dict[int, Any] = {}
+        self._tail: List[Any] = []
+
+    @classmethod
+    def from_items(cls, items: Iterable[Any]) -> "SharedJsonList":
+        encoded = [json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for item in items]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            offsets[1:] = np.cumsum([len(e) for e in encoded])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+        return cls(SharedArray.create(blob), SharedArray.create(offsets))
+
+    @property
+    def segments(self) -> List[SharedArray]:
+        return [self.blob, self.offsets]
+
+    def __len__(self) -> int:
+        return self._frozen + len(self._tail)
+
+    def _index(self, index: int) -> int:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("index hors limites")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._index(index)
+        if index >= self._frozen:
+            return self._tail[index - self._frozen]
+        if index in self._overrides:
+            return self._overrides[index]
+        start, end = self.offsets.array[index], self.offsets.array[index + 1]
+        return json.loads(self.blob.array[start:end].tobytes())
+
+    def __setitem__(self, index, value):
+        index = self._index(index)
+        if index >= self._frozen:
+            self._tail[index - self._frozen] = value
+        else:
+            self._overrides[index] = value
+
+    def __delitem__(self, index):
+        raise TypeError("SharedJsonList ne supporte pas la suppression")
+
+    def insert(self, index, value):
+        if index < len(self):
+            raise TypeError("SharedJsonList ne supporte que l'ajout en fin de liste")
+        self._tail.append(value)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _share_collection(collection, segments: List[SharedArray]) -> int:
+    """Place la matrice (ou les codes), les payloads et les index d'une collection locale en mémoire partagée."""
+    matrix = SharedArray.create(collection.matrix())
+    collection._matrix = matrix.array
+    payloads = SharedJsonList.from_items(collection.payloads)
+    collection.payloads = payloads
+    segments += [matrix, *payloads.segments]
+    shared = matrix.nbytes + payloads.blob.nbytes + payloads.offsets.nbytes
+    if collection.codes() is not None:
+        # Collection quantifiée : les vecteurs pleine précision restent dans les fichiers hérités
+        # (codes PQ rangés par colonne : partagés transposés pour garder leur disposition)
+        by_column = not collection.codes().flags.c_contiguous
+        codes = SharedArray.create(collection.codes().T if by_column else collection.codes())
+        collection._codes = codes.array.T if by_column else codes.array
+        segments.append(codes)
+        shared += codes.nbytes
+    for name, index in collection._keyword_indexes.items():
+        for value, rows in list(index.items()):
+            if isinstance(rows, set):
+                index[value] = np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+    collection._postings = {}
+    for name, column in list(collection._float_indexes.items()):
+        array = SharedArray.create(np.asarray(column[:len(collection.ids)], dtype=np.float64))
+        collection._float_indexes[name] = array.array
+        segments.append(array)
+        shared += array.nbytes
+    return shared
+
+
+def share_vector_db(vectordb) -> List[SharedArray]:
+    """Déplace l'état volumineux d'un `VectorDB` local en mémoire partagée.
+
+    Retourne les segments créés (à libérer avec `release`). Sans effet avec un
+    serveur Qdrant (l'index vit alors hors du processus) ni avec qdrant-client en
+    mémoire, dont l'état n'est pas accessible : le mode pré-fork impose donc le
+    moteur local (NINA_VECTOR_BACKEND=local, voir `app/prefork.py`).
+    """
+    from tools.local_vector_store import LocalQdrantClient
+
+    segments: List[SharedArray] = []
+    if hasattr(vectordb, "shards"):
+        # Base partitionnée : seules les partitions servies dans le processus sont partagées
+        for shard in list(vectordb.shards.values()):
+            if hasattr(shard, "db"):
+                segments += share_vector_db(shard.db)
+        return segments
+    if not isinstance(vectordb.client, LocalQdrantClient):
+        print("[shared_state] Client qdrant-client (serveur ou en mémoire) : rien à partager "
+              "(NINA_VECTOR_BACKEND=local pour le moteur local)")
+        return segments
+    shared = sum(_share_collection(c, segments) for c in vectordb.client.collections.values())
+    # Copies locales des textes et méta-données, sérialisées elles aussi
+    docs = SharedJsonList.from_items(vectordb._docs)
+    metadatas = SharedJsonList.from_items(vectordb._metadatas)
+    vectordb._docs, vectordb._metadatas = docs, metadatas
+    segments += docs.segments + metadatas.segments
+    shared += sum(s.nbytes for s in docs.segments + metadatas.segments)
+    print(f"[shared_state] {shared / 1024 / 1024:.1f} Mo placés en mémoire partagée ({len(segments)} segments)")
+    return segments
+
+
+def freeze_for_fork():
+    """À appeler juste avant `fork` : collecte puis gèle les objets du maître."""
+    gc.collect()
+    gc.freeze()
+
+
+def release(segments: Iterable[SharedArray], unlink: bool = True):
+    for segment in segments:
+        segment.close()
+        if unlink:
+            segment.unlink()
@@ -0,0 +1,217 @@
+"""source_registry.py – Registre de sources de recherche et sélection adaptative.
+
+Chaque source se déclare comme un `SourcePlugin` (capacités, coût relatif,
+latence attendue, a priori de rendement). Le `SourceSelector` apprend, à
+partir des résultats journalisés (`record`), la probabilité qu'une source
+rapporte quelque chose pour une requête donnée – globalement et par terme de
+requête – puis n'interroge que les sources dont l'utilité espérée dépasse
+leur coût. L'échantillonnage de Thompson garde un peu d'exploration pour que
+les estimations ne se figent pas.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from tools.dedup import normalize_text
+from tools.tracing import get_tracer
+
+
+@dataclass
+class SourcePlugin:
+    """Déclaration d'une source : `fetch(query) -> List[str]`."""
+    name: str
+    fetch: Callable[[str], List[str]]
+    capabilities: FrozenSet[str]             # ex. {"web"}, {"news"}, {"api"}
+    cost: float = 0.0                        # coût relatif par appel (0 = gratuit, 1 = API payante)
+    expected_latency: float = 1.0            # secondes, avant toute mesure
+    prior: float = 0.5                       # probabilité a priori de rendre au moins un résultat
+    keywords: Tuple[str, ...] = ()           # termes qui rendent la source très probable
+    available: Callable[[], bool] = lambda: True
+
+
+@dataclass
+class SourceStats:
+    """Statistiques en ligne d'une source."""
+    calls: int = 0
+    useful: int = 0                          # appels ayant rendu au moins un résultat
+    results: int = 0
+    errors: int = 0
+    latency: Optional[float] = None          # moyenne mobile exponentielle (s)
+    terms: Dict[str, List[int]] = field(default_factory=dict)   # terme -> [utiles, appels]
+
+    @property
+    def yield_rate(self) -> float:
+        return self.useful / self.calls if self.calls else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "yield_rate": round(self.yield_rate, 3),
+            "avg_results": round(self.results / self.calls, 2) if self.calls else 0.0,
+            "error_rate": round(self.error_rate, 3),
+            "latency_s": round(self.latency, 3) if self.latency is not None else None,
+        }
+
+
+def query_terms(query: str) -> List[str]:
+    return sorted({t for t in normalize_text(query).split() if len(t) >= 3})
+
+
+class SourceRegistry:
+    """Sources déclarées, dans l'ordre de priorité d'affichage des résultats."""
+
+    def __init__(self):
+        self._plugins: Dict[str, SourcePlugin] = {}
+
+    def register(self, plugin: SourcePlugin):
+        self._plugins[plugin.name] = plugin
+
+    def get(self, name: str) -> SourcePlugin:
+        return self._plugins[name]
+
+    def __iter__(self):
+        return iter(self._plugins.values())
+
+    def for_capability(self, capability: str) -> List[SourcePlugin]:
+        return [p for p in self._plugins.values() if capability in p.capabilities and p.available()]
+
+
+class SourceSelector:
+    """Choisit les sources à interroger et apprend de leurs résultats."""
+
+    def __init__(self, cost_weight: float = 0.3, latency_weight: float = 0.05, error_weight: float = 0.5,
+                 threshold: float = 0.25,
+                 prior_weight: float = 4.0, term_smoothing: float = 2.0, max_evidence: float = 50.0,
+                 max_terms: int = 5000, path: Optional[str] = None, rng: Optional[random.Random] = None):
+        self.cost_weight = cost_weight
+        self.latency_weight = latency_weight
+        self.error_weight = error_weight
+        self.threshold = threshold
+        self.prior_weight = prior_weight          # poids (en pseudo-appels) de l'a priori
+        self.term_smoothing = term_smoothing      # lissage des taux par terme vers le taux global
+        self.max_evidence = max_evidence          # plafond : garde l'estimation réactive
+        self.max_terms = max_terms
+        self.path = path
+        self.rng = rng or random.Random()
+        self.stats: Dict[str, SourceStats] = {}
+        self.selections = 0
+        self.calls_saved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    # ------------------------------------------------------------------
+    def estimate(self, plugin: SourcePlugin, terms: List[str]) -> Tuple[float, float]:
+        """(probabilité de rendement, poids de l'évidence) pour une requête."""
+        stats = self.stats.get(plugin.name, SourceStats())
+        prior = plugin.prior
+        if plugin.keywords and any(k in t for t in terms for k in plugin.keywords):
+            prior = max(prior, 0.9)
+        base = (stats.useful + prior * self.prior_weight) / (stats.calls + self.prior_weight)
+
+        known = [stats.terms[t] for t in terms if t in stats.terms]
+        if not known:
+            return base, stats.calls + self.prior_weight
+        k = self.term_smoothing
+        p = sum((u + k * base) / (n + k) for u, n in known) / len(known)
+        return p, sum(n for _, n in known) + self.prior_weight
+
+    def score(self, plugin: SourcePlugin, terms: List[str]) -> float:
+        """Utilité échantillonnée : rendement tiré d'une loi Beta, moins coût, latence et taux d'erreur."""
+        p, evidence = self.estimate(plugin, terms)
+        evidence = min(evidence, self.max_evidence)
+        theta = self.rng.betavariate(p * evidence + 1, (1 - p) * evidence + 1)
+        stats = self.stats.get(plugin.name)
+        latency = stats.latency if stats and stats.latency is not None else plugin.expected_latency
+        error_rate = stats.error_rate if stats else 0.0
+        return (theta - self.cost_weight * plugin.cost - self.latency_weight * latency
+                - self.error_weight * error_rate)
+
+    def select(self, query: str, plugins: List[SourcePlugin], min_sources: int = 1) -> List[SourcePlugin]:
+        """Sources dont l'utilité dépasse le seuil (au moins `min_sources`), dans l'ordre du registre."""
+        if not plugins:
+            return []
+        terms = query_terms(query)
+        scores = {p.name: self.score(p, terms) for p in plugins}
+        chosen = {name for name, s in scores.items() if s >= self.threshold}
+        for name in sorted(scores, key=scores.get, reverse=True)[:min_sources]:
+            chosen.add(name)
+        with self._lock:
+            self.selections += 1
+            self.calls_saved += len(plugins) - len(chosen)
+        return [p for p in plugins if p.name in chosen]
+
+    # ------------------------------------------------------------------
+    def record(self, name: str, query: str, n_results: int, latency: float, error: bool = False):
+        """Journalise le résultat d'un appel à une source."""
+        useful = int(n_results > 0)
+        with self._lock:
+            stats = self.stats.setdefault(name, SourceStats())
+            stats.calls += 1
+            stats.useful += useful
+            stats.results += n_results
+            stats.errors += int(error)
+            stats.latency = latency if stats.latency is None else 0.8 * stats.latency + 0.2 * latency
+            for term in query_terms(query):
+                entry = stats.terms.setdefault(term, [0, 0])
+                entry[0] += useful
+                entry[1] += 1
+            if len(stats.terms) > self.max_terms:
+                # Oubli des termes vus une seule fois
+                stats.terms = {t: e for t, e in stats.terms.items() if e[1] > 1}
+
+    def run(self, plugin: SourcePlugin, query: str) -> List[str]:
+        """Appelle la source, mesure et journalise le résultat."""
+        start = time.perf_counter()
+        with get_tracer().span("search.source", source=plugin.name) as span:
+            try:
+                results = plugin.fetch(query) or []
+                error = False
+            except Exception as e:
+                print(f"[SourceSelector] Erreur source {plugin.name}: {e}")
+                results, error = [], True
+            span.set(results=len(results), error=error)
+        self.record(plugin.name, query, len(results), time.perf_counter() - start, error)
+        return results
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "selections": self.selections,
+                "calls_saved": self.calls_saved,
+                "sources": {name: s.summary() for name, s in self.stats.items()},
+            }
+
+    # ------------------------------------------------------------------
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.stats = {name: SourceStats(**s) for name, s in data.items()}
+        except Exception as e:
+            print(f"[SourceSelector] Erreur chargement {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                data = {name: asdict(s) for name, s in self.stats.items()}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[SourceSelector] Erreur sauvegarde {self.path}: {e}")
@@ -0,0 +1,129 @@
+"""speculation.py – Recherche spéculative lancée pendant le routage LLM.
+
+Le routage d'`AgentNina` coûte un aller-retour LLM avant toute recherche.
+`quick_route` estime la route en quelques microsecondes (indices lexicaux) ;
+si la probabilité d'une recherche dépasse le seuil de `SpeculationPolicy`, la
+recherche en mémoire, la collecte web et (au-delà d'un second seuil) la
+récupération de pages partent en parallèle du routage (`Speculation`).
+
+Si la route retenue est bien la recherche, les résultats sont repris tels
+quels ; sinon les tâches non commencées sont annulées et les autres ignorées.
+La collecte web passe par `SearchCache` : un résultat ignoré reste en cache
+et une collecte encore en vol est rejointe, jamais relancée. Une fois la
+recherche décidée, les étapes qui n'avaient pas été spéculées partent elles
+aussi en arrière-plan, pendant le résumé de l'historique.
+
+Configuration : NINA_SPECULATION (`auto`, `always`, `off`),
+NINA_SPECULATION_THRESHOLD et NINA_SPECULATION_PAGES_THRESHOLD.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import re
+import unicodedata
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+SEARCH, REASONING, CONVERSATION = "recherche_information", "raisonnement_pur", "conversation_simple"
+
+_GREETINGS = ("bonjour", "bonsoir", "salut", "coucou", "hello", "hey", "merci", "au revoir", "ca va",
+              "comment vas tu", "comment ca va", "thanks", "thank you", "bonne nuit", "a plus")
+_REASONING = re.compile(
+    r"\d+\s*[-+*/x×÷^=]\s*\d+|suite logique|combien de temps|resous|calcule|equation|"
+    r"\bsi\b.+\b(combien|alors|ou sera)\b|\bcombien\b.*\d"
+)
+_SEARCH_CUES = ("qui ", "quel", "quoi", "ou se", "ou est", "quand", "pourquoi", "comment fonctionne",
+                "parle moi", "parler de", "explique", "qu est ce", "c est quoi", "actualit", "dernier",
+                "derniere", "news", "histoire", "definition", "recherche", "trouve", "prix", "meteo",
+                "what", "who ", "when", "where", "why", "how does", "latest")
+
+
+def _fold(text: str) -> str:
+    """Minuscules sans accents."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def quick_route(query: str) -> Tuple[str, float]:
+    """Route probable de `query` et confiance (0-1), sans appel LLM."""
+    folded = _fold(query)
+    text = " ".join(re.findall(r"\w+", folded))
+    words = text.split()
+    if words and len(words) <= 5 and any(text == g or text.startswith(g + " ") for g in _GREETINGS):
+        return CONVERSATION, 0.9
+    if _REASONING.search(folded):
+        return REASONING, 0.8
+    cues = sum(1 for cue in _SEARCH_CUES if cue in text + " ")
+    if cues:
+        return SEARCH, min(0.95, 0.6 + 0.15 * cues)
+    if len(words) > 6:
+        return SEARCH, 0.55
+    return CONVERSATION, 0.6
+
+
+def search_probability(query: str) -> float:
+    route, confidence = quick_route(query)
+    return confidence if route == SEARCH else 1.0 - confidence
+
+
+@dataclass
+class SpeculationPolicy:
+    mode: str = "auto"               # auto : selon la confiance ; always ; off
+    threshold: float = 0.5           # mémoire et collecte web à partir de cette probabilité de recherche
+    pages_threshold: float = 0.7     # récupération de pages (plus coûteuse) à partir de celle-ci
+
+    @classmethod
+    def from_env(cls) -> "SpeculationPolicy":
+        return cls(
+            mode=os.getenv("NINA_SPECULATION", "auto").lower(),
+            threshold=float(os.getenv("NINA_SPECULATION_THRESHOLD", "0.5")),
+            pages_threshold=float(os.getenv("NINA_SPECULATION_PAGES_THRESHOLD", "0.7")),
+        )
+
+    def tasks(self, probability: float) -> Tuple[str, ...]:
+        """Tâches à lancer en spéculation pour une probabilité de recherche donnée."""
+        if self.mode in ("off", "0", "false", "no"):
+            return ()
+        if self.mode == "always":
+            return ("memory", "web", "pages")
+        if probability < self.threshold:
+            return ()
+        return ("memory", "web", "pages") if probability >= self.pages_threshold else ("memory", "web")
+
+
+class Speculation:
+    """Tâches lancées avant la décision de routage ; reprises (`take`) ou abandonnées (`discard`)."""
+
+    def __init__(self, executor: Optional[Executor] = None, metrics=None):
+        self.executor = executor
+        self.metrics = metrics
+        self.futures: Dict[str, Future] = {}
+        self.speculative: Set[str] = set()   # lancées avant la décision de routage
+
+    def start(self, key: str, fn: Callable[..., Any], *args, speculative: bool = True):
+        # Le contexte (span courant, observateur) suit la tâche : ses spans restent rattachés à la requête
+        context = contextvars.copy_context()
+        self.futures[key] = self.executor.submit(context.run, fn, *args)
+        if speculative:
+            self.speculative.add(key)
+
+    def take(self, key: str, fn: Callable[..., Any], *args) -> Any:
+        """Résultat spéculé de `key` s'il existe, sinon `fn(*args)` exécuté maintenant."""
+        future = self.futures.pop(key, None)
+        if future is None:
+            return fn(*args)
+        self._count(key, "used")
+        return future.result()
+
+    def discard(self):
+        """Abandonne les tâches restantes (annulées si elles n'ont pas commencé)."""
+        for key, future in self.futures.items():
+            self._count(key, "cancelled" if future.cancel() else "discarded")
+        self.futures.clear()
+
+    def _count(self, task: str, outcome: str):
+        if self.metrics is not None and task in self.speculative:
+            self.metrics.inc("nina_speculation_total", help="Tâches spéculatives par issue",
+                             task=task, outcome=outcome)
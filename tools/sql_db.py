@@ -6,6 +6,8 @@ import json
 from datetime import datetime
 from typing import Optional
 
+from tools.tracing import get_tracer
+
 Base = declarative_base()
 
 class Fact(Base):
@@ -38,6 +40,10 @@ class SQLDatabase:
 
     def save_fact(self, content: str, source: str):
         """Sauvegarde un nouveau fait dans la base de données, en évitant les doublons."""
+        with get_tracer().span("db.write", table="facts"):
+            return self._save_fact(content, source)
+
+    def _save_fact(self, content: str, source: str):
         session = self.Session()
         try:
             # Vérifier si le fait existe déjà
@@ -59,7 +65,8 @@ class SQLDatabase:
         finally:
             session.close()
 
-    def load_conversations(self):
+    def load_conversations(self, session_id: Optional[str] = None):
+        """Conversations de la session `session_id` (None : celles sans session, l'historique global)."""
         session = self.Session()
         try:
             convs = session.query(Conversation).order_by(Conversation.timestamp).all()
@@ -73,6 +80,8 @@ class SQLDatabase:
                         meta_data = json.loads(meta_raw)
                     except Exception:
                         meta_data = {}
+                if meta_data.get('session') != session_id:
+                    continue
                 results.append({
                     'timestamp': c.timestamp.isoformat(),
                     'user': c.user_input,
@@ -91,18 +100,24 @@ class SQLDatabase:
         finally:
             session.close()
 
-    def save_interaction(self, user_query: str, nina_response: str, summary: Optional[str] = None):
+    def save_interaction(self, user_query: str, nina_response: str, summary: Optional[str] = None,
+                         meta: Optional[dict] = None):
         """Sauvegarde une interaction et son résumé dans la base de données."""
-        with self.Session() as session:
+        with get_tracer().span("db.write", table="conversations"), self.Session() as session:
             interaction = Conversation(
                 user_input=user_query,
                 nina_response=nina_response,
+                meta=json.dumps(meta, ensure_ascii=False) if meta else None,
                 summary=summary
             )
             session.add(interaction)
             session.commit()
 
     def save_user_profile(self, key, value):
+        with get_tracer().span("db.write", table="user_profile"):
+            self._save_user_profile(key, value)
+
+    def _save_user_profile(self, key, value):
         session = self.Session()
         try:
             p = session.get(UserProfile, key)
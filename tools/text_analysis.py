@@ -0,0 +1,199 @@
+"""text_analysis.py – Analyse d'un échange en une passe : importance, entités, sujets.
+
+Toutes les listes de mots-clés (importance, questions personnelles, réponses
+factuelles, sujets) sont compilées dans un seul automate d'Aho-Corasick. Le
+texte est mis en minuscules une fois et parcouru une fois : le coût dépend de
+sa longueur, pas du nombre de mots-clés (des milliers restent gratuits).
+
+La recherche garde la sémantique historique de `keyword in text` (sous-chaîne,
+pas de limite de mot). Chaque occurrence est rattachée à la question, à la
+réponse ou à l'échange complet selon sa position ; les entités (mots
+capitalisés) sont relevées pendant l'unique découpage en mots.
+
+Les résultats sont gardés par empreinte du texte (LRU) : la requête analysée à
+l'ajout d'une conversation puis dans `get_context_for_response` ne l'est qu'une fois.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+IMPORTANCE_KEYWORDS = (
+    "préférence", "n'aime pas", "déteste", "adore", "important",
+    "nom", "âge", "travail", "famille", "objectif", "problème",
+    "erreur", "bug", "solution", "urgent", "critique",
+)
+PERSONAL_WORDS = ("je", "mon", "ma", "mes")                          # cherchés dans la question
+FACTUAL_WORDS = ("définition", "explication", "signifie")            # cherchés dans la réponse
+TOPIC_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "programmation": ("python", "code", "programmation", "développement", "bug", "fonction"),
+    "alimentation": ("manger", "nourriture", "cuisine", "restaurant", "recette", "plat"),
+    "travail": ("travail", "bureau", "collègue", "projet", "réunion", "entreprise"),
+    "personnel": ("famille", "ami", "maison", "vacances", "loisir", "hobby"),
+    "technologie": ("ordinateur", "internet", "ia", "intelligence", "artificielle", "tech"),
+    "santé": ("santé", "médecin", "maladie", "sport", "exercice", "bien-être"),
+}
+ENTITY_STOPWORDS = ("Nina", "User", "Je", "Tu", "Il", "Elle")
+
+# Portée d'un mot-clé dans l'échange
+_ANY, _QUERY, _RESPONSE = 0, 1, 2
+
+
+class KeywordAutomaton:
+    """Automate d'Aho-Corasick : toutes les occurrences de tous les mots-clés en une passe."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for keyword in dict.fromkeys(k for k in keywords if k):
+            self._insert(keyword, len(self.keywords))
+            self.keywords.append(keyword)
+        self._link()
+
+    def _insert(self, keyword: str, index: int):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (index,)
+
+    def _link(self):
+        """Liens d'échec en largeur ; chaque état hérite des sorties de son lien."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Couples (indice du mot-clé, position de fin) pour chaque occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for position, char in enumerate(text):
+            node = goto[state]
+            if char in node:
+                state = node[char]
+            else:
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield index, position
+
+    def spans(self, text: str) -> Dict[int, Tuple[int, int]]:
+        """Mot-clé trouvé -> (première, dernière) position de fin de ses occurrences."""
+        found: Dict[int, Tuple[int, int]] = {}
+        for index, end in self.iter_matches(text):
+            first = found.get(index)
+            found[index] = (end, end) if first is None else (first[0], end)
+        return found
+
+
+@dataclass(frozen=True)
+class TextAnalysis:
+    importance: float
+    entities: Tuple[str, ...]
+    topics: Tuple[str, ...]
+
+
+class TextAnalyzer:
+    """Importance, entités et sujets d'un échange (question, réponse), listes configurables."""
+
+    BASE_IMPORTANCE = 0.5
+    KEYWORD_BOOST = 0.1          # par mot-clé d'importance distinct
+    PERSONAL_BOOST = 0.2
+    FACTUAL_BOOST = 0.15
+    LONG_BOOST = 0.1             # échanges de plus de LONG_WORDS mots
+    LONG_WORDS = 50
+
+    def __init__(self, importance_keywords: Iterable[str] = IMPORTANCE_KEYWORDS,
+                 personal_words: Iterable[str] = PERSONAL_WORDS,
+                 factual_words: Iterable[str] = FACTUAL_WORDS,
+                 topics: Optional[Mapping[str, Iterable[str]]] = None,
+                 entity_stopwords: Iterable[str] = ENTITY_STOPWORDS,
+                 cache_size: int = 4096):
+        topics = TOPIC_KEYWORDS if topics is None else topics
+        self.topic_names = list(topics)
+        # Mot-clé -> étiquettes (portée, catégorie, valeur) ; un même mot peut servir plusieurs listes
+        tags: Dict[str, List[Tuple[int, str, str]]] = {}
+        for keyword in importance_keywords:
+            tags.setdefault(keyword.lower(), []).append((_ANY, "importance", keyword.lower()))
+        for word in personal_words:
+            tags.setdefault(word.lower(), []).append((_QUERY, "personal", ""))
+        for word in factual_words:
+            tags.setdefault(word.lower(), []).append((_RESPONSE, "factual", ""))
+        for topic, keywords in topics.items():
+            for keyword in keywords:
+                tags.setdefault(keyword.lower(), []).append((_ANY, "topic", topic))
+        self.automaton = KeywordAutomaton(tags)
+        self._tags = [tuple(tags[k]) for k in self.automaton.keywords]
+        self.entity_stopwords = frozenset(entity_stopwords)
+        self.cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0}
+        self._cache: "OrderedDict[bytes, TextAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, query: str, response: str = "") -> TextAnalysis:
+        key = hashlib.blake2b(f"{query}\x00{response}".encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
+        result = self._analyze(query, response)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _analyze(self, query: str, response: str) -> TextAnalysis:
+        query_lower = query.lower()
+        text = query_lower + " " + response.lower()
+        query_end, response_start = len(query_lower), len(query_lower) + 1
+
+        # Première occurrence pour la question, dernière pour la réponse : une par mot-clé suffit
+        keywords, found = self.automaton.keywords, set()
+        for index, (first_end, last_end) in self.automaton.spans(text).items():
+            for scope, category, value in self._tags[index]:
+                if scope == _ANY or (scope == _QUERY and first_end < query_end) \
+                        or (scope == _RESPONSE and last_end - len(keywords[index]) + 1 >= response_start):
+                    found.add((category, value))
+
+        importance = self.BASE_IMPORTANCE
+        importance += self.KEYWORD_BOOST * sum(1 for category, _ in found if category == "importance")
+        if ("personal", "") in found:
+            importance += self.PERSONAL_BOOST
+        if ("factual", "") in found:
+            importance += self.FACTUAL_BOOST
+
+        # Un seul découpage en mots : longueur de l'échange et entités (mots capitalisés)
+        words = (query + " " + response).split()
+        if len(words) > self.LONG_WORDS:
+            importance += self.LONG_BOOST
+        entities = []
+        for word in words:
+            clean = word.strip(".,!?;:")
+            if len(clean) > 2 and clean[0].isupper() and clean not in self.entity_stopwords:
+                entities.append(clean)
+
+        topics = tuple(t for t in self.topic_names if ("topic", t) in found)
+        return TextAnalysis(min(importance, 1.0), tuple(dict.fromkeys(entities)), topics)
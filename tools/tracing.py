@@ -0,0 +1,354 @@
+"""tracing.py – Spans et métriques légers du pipeline (où passent les secondes).
+
+    from tools.tracing import get_tracer
+    with get_tracer().span("vector.search", top_k=3) as span:
+        hits = ...
+        span.set(results=len(hits))
+
+Chaque span terminé :
+- est ajouté au journal JSONL (`logs/traces.jsonl`, variable `NINA_TRACE_FILE`,
+  `off` pour désactiver le fichier), une ligne par span, avec les noms de
+  champs OTLP (`traceId`, `spanId`, `parentSpanId`, `startTimeUnixNano`…) ;
+  `to_otlp` convertit ces lignes en requête d'export OTLP/JSON ;
+- alimente les métriques exposées au format texte Prometheus
+  (`render_prometheus`, `serve_metrics`) : histogramme des durées par span,
+  erreurs, tokens LLM et succès/échecs de cache.
+
+Les spans imbriqués héritent de la trace et du parent via `contextvars` (le
+contexte n'est pas propagé automatiquement aux threads d'un pool).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TRACE_FILE = "logs/traces.jsonl"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("nina_current_span", default=None)
+# Observateur des spans terminés dans le contexte courant (ex. flux SSE d'une requête)
+_span_listener: ContextVar[Optional[Callable[["Span"], None]]] = ContextVar("nina_span_listener", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Durée en secondes (0 tant que le span n'est pas terminé)."""
+        return max(0, self.end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_record(self, service: str) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "service": service,
+        }
+
+
+# ----------------------------------------------------------------------
+# Métriques
+# ----------------------------------------------------------------------
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class Metrics:
+    """Compteurs et histogrammes en mémoire, rendus au format texte Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}   # [compte par seau…, somme, compte]
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+            if help:
+                self._help.setdefault(name, help)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram_summary(self, name: str, label: str) -> Dict[str, Dict[str, float]]:
+        """{valeur du label: {count, avg_ms}} pour un histogramme de durées."""
+        summary: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for labels, state in self._histograms.get(name, {}).items():
+                value = dict(labels).get(label, "")
+                entry = summary.setdefault(value, {"count": 0, "total_s": 0.0})
+                entry["count"] += int(state[-1])
+                entry["total_s"] += state[-2]
+        return {
+            k: {"count": v["count"], "avg_ms": round(1000 * v["total_s"] / v["count"], 2) if v["count"] else 0.0}
+            for k, v in sorted(summary.items())
+        }
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, state in sorted(series.items()):
+                    for bound, count in zip(self.buckets, state):
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count:g}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {state[-1]:g}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Traceur
+# ----------------------------------------------------------------------
+
+class Tracer:
+    """Crée les spans, les exporte en JSONL et met à jour les métriques."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_TRACE_FILE, service: str = "nina",
+                 metrics: Optional[Metrics] = None, flush_every: int = 64):
+        self.path = path
+        self.service = service
+        self.metrics = metrics or Metrics()
+        self.flush_every = flush_every
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self._finish(span, root=parent is None)
+
+    @contextmanager
+    def listen(self, callback: Callable[[Span], None]):
+        """Appelle `callback(span)` à la fin de chaque span ouvert dans ce contexte."""
+        token = _span_listener.set(callback)
+        try:
+            yield
+        finally:
+            _span_listener.reset(token)
+
+    def set_attributes(self, **attributes):
+        """Complète le span courant (sans effet hors span)."""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def record_llm(self, span: Span, prompt_tokens: int, completion_tokens: int, model: str = ""):
+        span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        help_text = "Tokens LLM consommés"
+        self.metrics.inc("nina_llm_tokens_total", prompt_tokens, help_text, type="prompt", model=model)
+        self.metrics.inc("nina_llm_tokens_total", completion_tokens, help_text, type="completion", model=model)
+
+    def record_cache(self, cache: str, hit: bool, **labels):
+        """Succès ou échec de cache, sur le span courant et dans les métriques.
+
+        Le span compte les consultations par cache (`cache_hits.<cache>`,
+        `cache_misses.<cache>`) : plusieurs caches consultés dans un même span
+        (résultats puis embeddings d'une recherche) ne s'écrasent pas.
+        """
+        span = _current_span.get()
+        if span is not None:
+            key = f"cache_{'hits' if hit else 'misses'}.{cache}"
+            span.set(**{key: span.attributes.get(key, 0) + 1})
+        self.metrics.inc("nina_cache_requests_total", help="Consultations de cache",
+                         cache=cache, result="hit" if hit else "miss", **labels)
+
+    # ------------------------------------------------------------------
+    def _finish(self, span: Span, root: bool):
+        listener = _span_listener.get()
+        if listener is not None:
+            try:
+                listener(span)
+            except Exception as e:
+                print(f"[Tracer] Erreur de l'observateur de spans: {e}")
+        self.metrics.observe("nina_span_duration_seconds", span.duration,
+                             "Durée des étapes du pipeline (s)", span=span.name)
+        if span.error:
+            self.metrics.inc("nina_span_errors_total", help="Étapes terminées en erreur", span=span.name)
+        if not self.path:
+            return
+        line = json.dumps(span.to_record(self.service), ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if root or len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer or not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._buffer) + "\n")
+        except OSError as e:
+            print(f"[Tracer] Écriture impossible dans {self.path}: {e}")
+        self._buffer = []
+
+
+def to_otlp(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convertit des lignes du journal en requête OTLP/JSON (`ExportTraceServiceRequest`)."""
+    def value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for r in records:
+        span = {
+            "traceId": r["traceId"],
+            "spanId": r["spanId"],
+            "name": r["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(r["startTimeUnixNano"]),
+            "endTimeUnixNano": str(r["endTimeUnixNano"]),
+            "attributes": [{"key": k, "value": value(v)} for k, v in r.get("attributes", {}).items()],
+            "status": {"code": 2 if r.get("status", {}).get("code") == "ERROR" else 1,
+                       "message": r.get("status", {}).get("message", "")},
+        }
+        if r.get("parentSpanId"):
+            span["parentSpanId"] = r["parentSpanId"]
+        by_service.setdefault(r.get("service", "nina"), []).append(span)
+    return {"resourceSpans": [
+        {"resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+         "scopeSpans": [{"scope": {"name": "nina.tracing"}, "spans": spans}]}
+        for service, spans in by_service.items()
+    ]}
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1", tracer: Optional[Tracer] = None):
+    """Expose `/metrics` (format texte Prometheus) dans un thread démon ; retourne le serveur."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    tracer = tracer or get_tracer()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="nina-metrics", daemon=True).start()
+    print(f"[Tracer] Métriques Prometheus sur http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Traceur partagé ; `NINA_TRACE_FILE` choisit le journal (`off` : métriques seules)."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                path = os.getenv("NINA_TRACE_FILE", DEFAULT_TRACE_FILE)
+                _tracer = Tracer(path=None if path.lower() == "off" else path)
+                atexit.register(_tracer.flush)
+    return _tracer
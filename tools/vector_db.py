@@ -12,35 +12,28 @@ from __future__ import annotations
 
 import hashlib
 import uuid
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 import os
 
 from tools.sql_db import Fact
+from tools.dedup import SimHashIndex, content_id, simhash
+from tools.embedding_cache import embed_queries, embed_query, filters_key, new_namespace, search_results
+from tools.tracing import get_tracer
 
 # -----------------------------------------------------------------------------
 # Import sécurisé de Qdrant ; si la lib n'est pas dispo (ex. CI minimal),
-# on fournit un mock simplifié pour permettre aux tests de tourner sans erreur.
+# on bascule sur le moteur local NumPy qui expose la même API.
+# NINA_VECTOR_BACKEND=local impose le moteur local (lu à l'import) : seul son état
+# peut être placé en mémoire partagée (serveur pré-fork, tools/shared_state.py).
 # -----------------------------------------------------------------------------
-try:
-    from qdrant_client import QdrantClient, models as rest
-except ImportError:
-    class _MockPoint:
-        def __init__(self, id, payload): self.id, self.payload = id, payload
-    class _MockCollection:
-        def __init__(self): self.storage = {}
-        def upsert(self, points):
-            for p in points: self.storage[p.id] = p
-        def search(self, query_vector, limit): return list(self.storage.values())[:limit]
-    class QdrantClient:
-        def __init__(self, *args, **kwargs): self.collections = {}
-        def get_collections(self): return type("o", (), {"collections": [type("c", (), {"name": n}) for n in self.collections]})()
-        def recreate_collection(self, collection_name, vectors_config): self.collections[collection_name] = _MockCollection()
-        def upsert(self, collection_name, points): self.collections[collection_name].upsert(points)
-        def search(self, collection_name, query_vector, limit): return self.collections[collection_name].search(query_vector, limit)
-    class rest:
-        VectorParams = type("VectorParams", (), {"__init__": lambda s, size, distance: None})
-        Distance = type("Distance", (), {"COSINE": "Cosine"})
-        PointStruct = type("PointStruct", (), {"__init__": lambda s, id, vector, payload: setattr(s, "id", id) or setattr(s, "vector", vector) or setattr(s, "payload", payload)})
+if os.getenv("NINA_VECTOR_BACKEND", "auto").lower() == "local":
+    from tools.local_vector_store import LocalQdrantClient as QdrantClient, models as rest
+else:
+    try:
+        from qdrant_client import QdrantClient, models as rest
+    except ImportError:
+        from tools.local_vector_store import LocalQdrantClient as QdrantClient, models as rest
 
 
 class SimpleEmbedder:
@@ -60,16 +53,64 @@ class SimpleEmbedder:
         return [val / 2**32 for val in ints]
 
 
+def to_epoch(value: Any) -> Optional[float]:
+    """Convertit un timestamp (epoch, datetime ou ISO 8601) en secondes epoch."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
 class VectorDB:
-    def __init__(self, collection: str = "nina_vectors", dim: int = SimpleEmbedder.dim):
+    # Champs de payload indexés, recopiés au premier niveau à l'ingestion pour
+    # que les filtres soient évalués par l'index (Qdrant ou moteur local).
+    INDEXED_FIELDS = {
+        "type": rest.PayloadSchemaType.KEYWORD,
+        "topics": rest.PayloadSchemaType.KEYWORD,
+        "source": rest.PayloadSchemaType.KEYWORD,
+        "ts": rest.PayloadSchemaType.FLOAT,
+        "session": rest.PayloadSchemaType.KEYWORD,
+    }
+    # Clé de filtre publique -> champ de payload indexé
+    FILTER_FIELDS = {"type": "type", "topic": "topics", "source": "source", "session": "session"}
+
+    def __init__(self, collection: str = "nina_vectors", dim: Optional[int] = None,
+                 dedup: bool = True, near_dup_distance: int = 3, embedder: Any = None,
+                 quantization: Optional[str] = None):
         self.collection = collection
-        self.dim = dim
-        # Stockage local des documents pour fallback substring search
+        # Tout objet exposant `embed(text) -> List[float]` et `dim` (SimpleEmbedder par défaut)
+        self.embedder = embedder or SimpleEmbedder
+        self.dim = dim = dim or self.embedder.dim
+        # Déduplication à l'ingestion (doublons exacts + quasi-doublons SimHash)
+        self.dedup = dedup
+        self._near_dups = SimHashIndex(max_distance=near_dup_distance)
+        self.dedup_stats = {"inserted": 0, "exact_duplicates": 0, "near_duplicates": 0}
+        # Stockage local des documents pour fallback substring search : documents ingérés par
+        # `add_documents` ; les points déplacés (import_points/delete_points) n'y figurent pas
         self._docs: List[str] = []
         self._metadatas: List[Optional[dict]] = []
+        # Incrémentée à chaque écriture : invalide les résultats et réponses construits avant
+        # (tools/embedding_cache.py, tools/answer_cache.py)
+        self.version = 0
         # Connexion à Qdrant persistant si configuré
         qdrant_url = os.getenv("QDRANT_URL")
+        # Un serveur Qdrant partagé reçoit aussi les écritures d'autres processus, que
+        # `version` ne voit pas : les résultats n'y sont pas mis en cache
+        self._cache_namespace = new_namespace()
+        self.cache_results = not qdrant_url and os.getenv("NINA_VECTOR_RESULT_CACHE", "on").lower() not in ("off", "0", "false", "no")
         self.client = QdrantClient(url=qdrant_url) if qdrant_url else QdrantClient(":memory:")
+        # Quantification optionnelle des vecteurs ("int8", "pq", "pq-x32"…), voir tools/quantization.py
+        self.quantization = quantization or os.getenv("NINA_VECTOR_QUANTIZATION") or None
+        quantization_config = self.quantization_config(self.quantization)
+        self.search_params = self._search_params() if quantization_config is not None else None
         # Crée la collection si elle n'existe pas
         # Récupère la liste des collections Qdrant de façon sécurisée
         collections = getattr(self.client.get_collections(), "collections", [])
@@ -77,8 +118,128 @@ class VectorDB:
         if self.collection not in existing_names:
             self.client.recreate_collection(
                 collection_name=self.collection,
-                vectors_config=rest.VectorParams(size=dim, distance=rest.Distance.COSINE),
+                vectors_config=rest.VectorParams(size=dim, distance=rest.Distance.COSINE,
+                                                 on_disk=True if quantization_config is not None else None),
+                quantization_config=quantization_config,
+            )
+        elif self.dedup:
+            self._warm_dedup_index()
+        self._ensure_payload_indexes()
+
+    @staticmethod
+    def quantization_config(spec: Optional[str]) -> Any:
+        """Configuration Qdrant d'une quantification : "int8", "pq" (x16) ou "pq-x4" … "pq-x64"."""
+        if not spec or spec.lower() in ("off", "none", "0", "false", "no"):
+            return None
+        spec = spec.lower()
+        if spec in ("int8", "scalar"):
+            return rest.ScalarQuantization(scalar=rest.ScalarQuantizationConfig(
+                type=rest.ScalarType.INT8, quantile=0.99, always_ram=True))
+        if spec == "pq" or spec.startswith("pq-"):
+            ratio = spec.partition("-")[2] or "x16"
+            compression = getattr(rest.CompressionRatio, ratio.upper(), None)
+            if compression is None:
+                raise ValueError(f"Taux de compression PQ inconnu : {ratio}")
+            return rest.ProductQuantization(product=rest.ProductQuantizationConfig(
+                compression=compression, always_ram=True))
+        raise ValueError(f"Quantification inconnue : {spec}")
+
+    @staticmethod
+    def _search_params() -> Any:
+        """Re-scoring des candidats sur les vecteurs pleine précision (NINA_VECTOR_RESCORE, NINA_VECTOR_OVERSAMPLING)."""
+        rescore = os.getenv("NINA_VECTOR_RESCORE", "on").lower() not in ("off", "0", "false", "no")
+        return rest.SearchParams(quantization=rest.QuantizationSearchParams(
+            rescore=rescore, oversampling=float(os.getenv("NINA_VECTOR_OVERSAMPLING", "2.0"))))
+
+    def __len__(self) -> int:
+        """Points de la collection."""
+        return self.client.count(collection_name=self.collection).count
+
+    def _warm_dedup_index(self, batch_size: int = 256):
+        """Recharge les empreintes SimHash d'une collection persistante existante."""
+        try:
+            for point_id, fingerprint in self.fingerprints(batch_size):
+                if fingerprint is not None:
+                    self._near_dups.add(point_id, fingerprint)
+        except Exception as e:
+            print(f"[VectorDB] Index de quasi-doublons non rechargé : {e}")
+
+    def fingerprints(self, batch_size: int = 256) -> List[Tuple[str, Optional[int]]]:
+        """(identifiant, empreinte SimHash ou None) de chaque point de la collection."""
+        pairs, offset = [], None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection, limit=batch_size, offset=offset,
+                with_payload=["simhash"], with_vectors=False,
             )
+            for record in records:
+                fingerprint = (record.payload or {}).get("simhash")
+                pairs.append((str(record.id), int(fingerprint, 16) if fingerprint else None))
+            if offset is None:
+                return pairs
+
+    def _ensure_payload_indexes(self):
+        """Crée les index de payload sur les champs filtrés (idempotent)."""
+        for field_name, schema in self.INDEXED_FIELDS.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection, field_name=field_name, field_schema=schema
+                )
+            except Exception as e:
+                print(f"[VectorDB] Index de payload '{field_name}' non créé : {e}")
+
+    @staticmethod
+    def _filter_fields(meta: Optional[dict]) -> Dict[str, Any]:
+        """Extrait des méta-données les champs indexés (type, topics, source, ts, session)."""
+        if not meta:
+            return {}
+        fields: Dict[str, Any] = {}
+        if meta.get("type"):
+            fields["type"] = str(meta["type"])
+        topics = meta.get("topics") or ([meta["topic"]] if meta.get("topic") else [])
+        if topics:
+            fields["topics"] = [str(t) for t in topics]
+        if meta.get("source"):
+            fields["source"] = str(meta["source"])
+        if meta.get("session"):
+            fields["session"] = str(meta["session"])
+        ts = to_epoch(meta.get("ts", meta.get("timestamp")))
+        if ts is not None:
+            fields["ts"] = ts
+        return fields
+
+    def _build_filter(self, filters: Optional[Dict[str, Any]]):
+        """Traduit un dict de filtres en filtre Qdrant.
+
+        Clés supportées : `type`, `topic`, `source`, `session` (valeur ou liste de valeurs)
+        et `since` / `until` (epoch, datetime ou ISO 8601) sur l'horodatage.
+        """
+        if not filters:
+            return None
+        conditions = []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key in self.FILTER_FIELDS:
+                field_name = self.FILTER_FIELDS[key]
+                if isinstance(value, (list, tuple, set)):
+                    match = rest.MatchAny(any=list(value))
+                else:
+                    match = rest.MatchValue(value=value)
+                conditions.append(rest.FieldCondition(key=field_name, match=match))
+            elif key in ("since", "until"):
+                bound = to_epoch(value)
+                if bound is None:
+                    raise ValueError(f"Borne temporelle invalide pour '{key}': {value!r}")
+                rng = rest.Range(gte=bound) if key == "since" else rest.Range(lte=bound)
+                conditions.append(rest.FieldCondition(key="ts", range=rng))
+            else:
+                raise ValueError(f"Filtre non supporté : {key}")
+        return rest.Filter(must=conditions) if conditions else None
+
+    @staticmethod
+    def fact_point_id(fact: Fact) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"fact_{fact.id}"))
 
     def add_fact(self, fact: Fact):
         """Vectorise et ajoute un fait à Qdrant."""
@@ -86,21 +247,24 @@ class VectorDB:
             return
 
         metadata = {
+            "type": "fact",
             "fact_id": fact.id,
             "source": fact.source,
             "timestamp": fact.timestamp.isoformat() if fact.timestamp else None,
         }
-        vector = SimpleEmbedder.embed(fact.content)
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"fact_{fact.id}"))
+        vector = self.embedder.embed(fact.content)
+        point_id = self.fact_point_id(fact)
         point = rest.PointStruct(
-            id=point_id, vector=vector, payload={"text": fact.content, "meta": metadata}
+            id=point_id, vector=vector,
+            payload={"text": fact.content, "meta": metadata, **self._filter_fields(metadata)},
         )
         self.client.upsert(collection_name=self.collection, points=[point])
+        self.version += 1
 
     # ------------------------------------------------------------------
     # API documents
     # ------------------------------------------------------------------
-    def add_documents(self, docs: List[str], metadata_list: Optional[List[Optional[dict]]] = None):
+    def add_documents(self, docs: List[str], metadata_list: Optional[List[Optional[dict]]] = None) -> int:
         """Indexe une liste de documents.
 
         Args:
@@ -108,25 +272,202 @@ class VectorDB:
             metadata_list: liste de dicts de même longueur que docs (ou None) contenant
                 des méta‐données (ex. timestamp, url, source). Elles seront stockées
                 dans le payload sous la clé "meta".
+
+        Returns:
+            Le nombre de documents réellement insérés (hors doublons écartés).
         """
         if not docs:
-            return
-        
+            return 0
+        with get_tracer().span("vector.upsert", collection=self.collection, docs=len(docs)) as span:
+            inserted = self._add_documents(docs, metadata_list)
+            span.set(inserted=inserted)
+            return inserted
+
+    def _add_documents(self, docs: List[str], metadata_list: Optional[List[Optional[dict]]]) -> int:
         metadata_list = metadata_list or ([None] * len(docs))
-        self._docs.extend(docs)
-        self._metadatas.extend(metadata_list)
+        if not self.dedup:
+            entries = [(uuid.uuid4().hex, text, meta, None) for text, meta in zip(docs, metadata_list)]
+        else:
+            entries = self._drop_duplicates(docs, metadata_list)
         
         points = []
-        for text, meta in zip(docs, metadata_list):
-            vector = SimpleEmbedder.embed(text)
+        for point_id, text, meta, fingerprint in entries:
+            vector = self.embedder.embed(text)
             payload = {"text": text, "meta": meta} if meta else {"text": text}
-            points.append(rest.PointStruct(id=uuid.uuid4().hex, vector=vector, payload=payload))
+            payload.update(self._filter_fields(meta))
+            if fingerprint is not None:
+                payload["simhash"] = format(fingerprint, "016x")
+            points.append(rest.PointStruct(id=point_id, vector=vector, payload=payload))
+            self._docs.append(text)
+            self._metadatas.append(meta)
         
         if points:
             self.client.upsert(collection_name=self.collection, points=points)
+            for point_id, _, _, fingerprint in entries:
+                if fingerprint is not None:
+                    self._near_dups.add(point_id, fingerprint)
+        self.dedup_stats["inserted"] += len(points)
+        if points:
+            self.version += 1
+        return len(points)
+
+    def _drop_duplicates(self, docs: List[str], metadata_list: List[Optional[dict]]):
+        """Écarte les doublons exacts (id adressé par le contenu) et les quasi-doublons."""
+        ids = [content_id(text) for text in docs]
+        try:
+            existing = {str(r.id) for r in self.client.retrieve(
+                collection_name=self.collection, ids=list(set(ids)), with_payload=False
+            )}
+        except Exception:
+            existing = set()
+
+        entries = []
+        batch_index = SimHashIndex(max_distance=self._near_dups.max_distance)
+        for point_id, text, meta in zip(ids, docs, metadata_list):
+            if point_id in existing:
+                self.dedup_stats["exact_duplicates"] += 1
+                continue
+            fingerprint = simhash(text)
+            if fingerprint is not None and (
+                self._near_dups.find(fingerprint) or batch_index.find(fingerprint)
+            ):
+                self.dedup_stats["near_duplicates"] += 1
+                continue
+            existing.add(point_id)
+            if fingerprint is not None:
+                batch_index.add(point_id, fingerprint)
+            entries.append((point_id, text, meta, fingerprint))
+        return entries
+
+    def similarity_search(self, query: str, top_k: int = 3,
+                          filters: Optional[Dict[str, Any]] = None) -> List[dict]:
+        """Retourne `top_k` documents (texte + meta + score cosinus) les plus proches.
+
+        `filters` restreint la recherche côté index (voir `_build_filter`) : les
+        `top_k` résultats respectent tous le filtre, quelle que soit la part
+        des autres documents dans la collection.
+        """
+        with get_tracer().span("vector.search", collection=self.collection, top_k=top_k,
+                               filtered=bool(filters)) as span:
+            key = (self._cache_namespace, self.version, query, top_k, filters_key(filters))
+            cached = search_results.get(key) if self.cache_results else None
+            if self.cache_results:
+                get_tracer().record_cache("vector_results", cached is not None)
+            if cached is not None:
+                span.set(results=len(cached))
+                return [dict(r) for r in cached]
+            hits = self.client.search(
+                collection_name=self.collection,
+                query_vector=embed_query(self.embedder, query),
+                query_filter=self._build_filter(filters),
+                limit=top_k,
+                search_params=self.search_params,
+            )
+            span.set(results=len(hits))
+        results = [self._to_result(h) for h in hits]
+        if self.cache_results:
+            # Le cache garde ses propres dicts : l'appelant peut modifier ceux qu'il reçoit
+            search_results.put(key, tuple(results))
+            results = [dict(r) for r in results]
+        return results
+
+    def similarity_search_many(self, queries: List[str], top_k: int = 3,
+                               filters: Optional[Dict[str, Any]] = None) -> List[List[dict]]:
+        """`similarity_search` pour une liste de requêtes, en un seul passage.
+
+        Les vecteurs manquants sont calculés en un lot (`embed_batch` si
+        l'embedder le propose) et toutes les requêtes partent ensemble via
+        `search_batch` : un produit matrice × matrice avec le moteur local, un
+        seul appel avec un serveur Qdrant. Retourne, dans l'ordre de `queries`,
+        les résultats qu'aurait donnés `similarity_search` (cache compris).
+        """
+        if not queries:
+            return []
+        with get_tracer().span("vector.search_many", collection=self.collection, queries=len(queries),
+                               top_k=top_k, filtered=bool(filters)) as span:
+            fkey = filters_key(filters)
+            results: List[Optional[List[dict]]] = [None] * len(queries)
+            pending: Dict[str, List[int]] = {}
+            for i, query in enumerate(queries):
+                cached = search_results.get((self._cache_namespace, self.version, query, top_k, fkey)) \
+                    if self.cache_results else None
+                if self.cache_results:
+                    get_tracer().record_cache("vector_results", cached is not None)
+                if cached is not None:
+                    results[i] = [dict(r) for r in cached]
+                else:
+                    pending.setdefault(query, []).append(i)
+
+            if pending:
+                texts = list(pending)
+                batches = self.search_vectors(embed_queries(self.embedder, texts), top_k, filters)
+                for text, found in zip(texts, batches):
+                    found = tuple(found)
+                    if self.cache_results:
+                        search_results.put((self._cache_namespace, self.version, text, top_k, fkey), found)
+                    for i in pending[text]:
+                        results[i] = [dict(r) for r in found]
+            span.set(searched=len(pending), results=sum(len(r) for r in results))
+        return results
+
+    def search_vectors(self, vectors: List[List[float]], top_k: int = 3,
+                       filters: Optional[Dict[str, Any]] = None) -> List[List[dict]]:
+        """Recherche groupée de vecteurs déjà calculés (sans cache), via `search_batch`."""
+        query_filter = self._build_filter(filters)
+        requests = [
+            rest.SearchRequest(vector=vector, filter=query_filter, limit=top_k,
+                               params=self.search_params, with_payload=True)
+            for vector in vectors
+        ]
+        batches = self.client.search_batch(collection_name=self.collection, requests=requests)
+        return [[self._to_result(h) for h in hits] for hits in batches]
+
+    # ------------------------------------------------------------------
+    # Déplacement de points (tools/sharded_vector_db.py)
+    # ------------------------------------------------------------------
+    def drop(self):
+        """Supprime la collection (partition abandonnée)."""
+        self.client.delete_collection(collection_name=self.collection)
+        self.version += 1
+
+    def point_ids(self, batch_size: int = 1024) -> List[str]:
+        ids, offset = [], None
+        while True:
+            records, offset = self.client.scroll(collection_name=self.collection, limit=batch_size,
+                                                 offset=offset, with_payload=False, with_vectors=False)
+            ids.extend(str(r.id) for r in records)
+            if offset is None:
+                return ids
+
+    def export_points(self, ids: List[str]) -> List[dict]:
+        """Points `ids` (id, vecteur, payload) sous forme sérialisable."""
+        records = self.client.retrieve(collection_name=self.collection, ids=ids,
+                                       with_payload=True, with_vectors=True)
+        return [{"id": str(r.id), "vector": list(r.vector), "payload": r.payload} for r in records]
+
+    def import_points(self, points: List[dict]) -> int:
+        """Insère des points exportés par `export_points` (vecteurs non recalculés)."""
+        if not points:
+            return 0
+        self.client.upsert(collection_name=self.collection, points=[
+            rest.PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"]) for p in points
+        ])
+        for point in points:
+            if point["payload"].get("simhash"):
+                self._near_dups.add(point["id"], int(point["payload"]["simhash"], 16))
+        self.version += 1
+        return len(points)
+
+    def delete_points(self, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        self.client.delete(collection_name=self.collection, points_selector=rest.PointIdsList(points=ids))
+        for point_id in ids:
+            self._near_dups.remove(point_id)
+        self.version += 1
+        return len(ids)
 
-    def similarity_search(self, query: str, top_k: int = 3) -> List[dict]:
-        """Retourne `top_k` documents (texte + meta) les plus proches."""
-        query_vector = SimpleEmbedder.embed(query)
-        hits = self.client.search(collection_name=self.collection, query_vector=query_vector, limit=top_k)
-        return [{"text": h.payload.get("text", ""), "meta": h.payload.get("meta", {})} for h in hits]
\ No newline at end of file
+    @staticmethod
+    def _to_result(hit: Any) -> dict:
+        return {"id": str(hit.id), "text": hit.payload.get("text", ""), "meta": hit.payload.get("meta", {}),
+                "score": float(hit.score)}